@@ -4,7 +4,7 @@
    Compatible with the 'profile' module.
 """
 
-__all__ = ["run", "runctx", "help", "Profile"]
+__all__ = ["run", "runctx", "help", "Profile", "Sampler"]
 
 import _lsprof
 
@@ -152,6 +152,29 @@ class Profile(_lsprof.Profiler):
 
 # ____________________________________________________________
 
+class Sampler(_lsprof.Sampler):
+    """Sampler(interval=0.001, max_depth=128)
+
+    Builds a statistical profiler, which looks at the Python stack of
+    the running thread about every 'interval' seconds instead of timing
+    every call.  The overhead is low enough to leave it enabled.  Up
+    to 'max_depth' frames are recorded from the top of the stack.  The
+    columns of pstats give the number of samples in which a function
+    was on the stack instead of the number of calls, and times are
+    estimated from the samples.
+    """
+
+    # Unlike Profile.create_stats(), this does not stop the sampler,
+    # so that pstats.Stats(sampler) can be used while it runs.
+    def create_stats(self):
+        self.snapshot_stats()
+
+    print_stats = Profile.__dict__['print_stats']
+    dump_stats = Profile.__dict__['dump_stats']
+    snapshot_stats = Profile.__dict__['snapshot_stats']
+
+# ____________________________________________________________
+
 def label(code):
     if isinstance(code, str):
         return ('~', 0, code)    # built-in functions ('~' sorts at the end)
@@ -162,6 +162,11 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                "Honor the __builtins__ key of a module dictionary",
                default=False),
 
+    IntOption("compile_cache_size",
+              "number of code objects built by compile(), eval() and exec "
+              "of strings to keep in an LRU cache (0 disables it)",
+              default=0, cmdline="--compile-cache-size"),
+
     BoolOption("disable_call_speedhacks",
                "make sure that all calls go through space.call_args",
                default=False),
@@ -199,6 +204,14 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                    "use specialised tuples",
                    default=False),
 
+        BoolOption("withstrbuf", "use strings optimized for addition",
+                   default=False),
+
+        BoolOption("withsharedkeysdict",
+                   "let dicts built from literals or keyword arguments "
+                   "share their keys",
+                   default=False),
+
         BoolOption("withliststrategies",
                    "enable optimized ways to store lists of primitives ",
                    default=True),
@@ -244,6 +257,8 @@ def set_pypy_opt_level(config, level):
         config.objspace.std.suggest(optimized_list_getitem=True)
         #config.objspace.std.suggest(newshortcut=True)
         config.objspace.std.suggest(withspecialisedtuple=True)
+        config.objspace.std.suggest(withstrbuf=True)
+        config.objspace.std.suggest(withsharedkeysdict=True)
         #if not IS_64_BITS:
         #    config.objspace.std.suggest(withsmalllong=True)
 
@@ -903,6 +903,13 @@ class PythonCodeGenerator(assemble.PythonCodeMaker):
 
     def visit_IfExp(self, ifexp):
         self.update_position(ifexp.lineno)
+        test_constant = ifexp.test.as_constant_truth(self.space)
+        if test_constant == optimize.CONST_TRUE:
+            ifexp.body.walkabout(self)
+            return
+        elif test_constant == optimize.CONST_FALSE:
+            ifexp.orelse.walkabout(self)
+            return
         end = self.new_block()
         otherwise = self.new_block()
         ifexp.test.accept_jump_if(self, False, otherwise)
@@ -954,7 +961,10 @@ class PythonCodeGenerator(assemble.PythonCodeMaker):
 
     def visit_Dict(self, d):
         self.update_position(d.lineno)
-        self.emit_op_arg(ops.BUILD_MAP, 0)
+        # like CPython, the argument is the number of items as a size hint,
+        # used by BUILD_MAP to tell dict literals from empty dicts
+        item_count = len(d.values) if d.values else 0
+        self.emit_op_arg(ops.BUILD_MAP, min(item_count, 0xFFFF))
         if d.values:
             for i in range(len(d.values)):
                 d.values[i].walkabout(self)
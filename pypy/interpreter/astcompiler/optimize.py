@@ -7,10 +7,13 @@ from pypy.interpreter.error import OperationError
 from rpython.rlib.unroll import unrolling_iterable
 from rpython.rlib.rutf8 import MAXUNICODE
 from rpython.rlib.objectmodel import specialize
+from rpython.rlib.rarithmetic import ovfcheck
 
 
 def optimize_ast(space, tree, compile_info):
-    return tree.mutate_over(OptimizingVisitor(space, compile_info))
+    tree = tree.mutate_over(OptimizingVisitor(space, compile_info))
+    tree.walkabout(_UnreachableCodeRemover())
+    return tree
 
 
 CONST_NOT_CONST = -1
@@ -72,6 +75,16 @@ class __extend__(ast.Slice):
         # constants, but we don't have a space here.
         return None
 
+class __extend__(ast.Name):
+
+    def accept_jump_if(self, gen, condition, target):
+        if self.id == "__debug__" and self.ctx == ast.Load and not condition:
+            # "if __debug__:" follows the -O flag, like assert statements
+            gen.emit_jump(ops.JUMP_IF_NOT_DEBUG, target)
+        else:
+            ast.expr.accept_jump_if(self, gen, condition, target)
+
+
 class __extend__(ast.UnaryOp):
 
     def accept_jump_if(self, gen, condition, target):
@@ -151,6 +164,203 @@ for folder in binary_folders.values() + unary_folders.values():
     folder._always_inline_ = 'try'
 del folder
 
+def _compare_fold(name):
+    def do_fold(space, left, right):
+        return space.is_true(getattr(space, name)(left, right))
+    return do_fold
+
+compare_folders = {
+    ast.Eq : _compare_fold("eq"),
+    ast.NotEq : _compare_fold("ne"),
+    ast.Lt : _compare_fold("lt"),
+    ast.LtE : _compare_fold("le"),
+    ast.Gt : _compare_fold("gt"),
+    ast.GtE : _compare_fold("ge"),
+}
+unrolling_compare_folders = unrolling_iterable(compare_folders.items())
+
+for folder in compare_folders.values():
+    folder._always_inline_ = 'try'
+del folder
+
+# methods of str and unicode which are folded when called on a constant
+# with constant arguments: they don't depend on the locale or on codecs
+# and return immutable objects
+foldable_str_methods = dict.fromkeys([
+    "capitalize", "center", "count", "endswith", "expandtabs", "find",
+    "index", "isalnum", "isalpha", "isdigit", "islower", "isspace",
+    "istitle", "isupper", "join", "ljust", "lower", "lstrip", "partition",
+    "replace", "rfind", "rindex", "rjust", "rpartition", "rstrip",
+    "startswith", "strip", "swapcase", "title", "upper", "zfill"])
+
+# To avoid blowing up the size of pyc files, we only fold reasonably sized
+# sequences.
+MAX_FOLDED_LENGTH = 20
+
+def _is_small_enough(space, w_const):
+    try:
+        w_len = space.len(w_const)
+    except OperationError:
+        return True
+    return space.int_w(w_len) <= MAX_FOLDED_LENGTH
+
+def _folded_str_length(space, w_obj, attr, args_w):
+    """Returns the length of the result of the method 'attr' of the
+    string 'w_obj' called with 'args_w', without calling it, or -1 for
+    the methods that can't make the string longer.  Raises OperationError
+    if the arguments are wrong, and OverflowError if the length is huge.
+    """
+    length = space.len_w(w_obj)
+    if attr == "center" or attr == "ljust" or attr == "rjust" or \
+            attr == "zfill":
+        if not args_w:
+            return -1       # the call fails
+        return max(length, space.int_w(args_w[0]))
+    if attr == "expandtabs":
+        tabsize = 8
+        if args_w:
+            tabsize = space.int_w(args_w[0])
+        ntabs = space.int_w(space.call_method(w_obj, "count",
+                                              space.newtext("\t")))
+        extra = ovfcheck(ntabs * max(tabsize - 1, 0))
+        return ovfcheck(length + extra)
+    if attr == "replace":
+        if len(args_w) < 2:
+            return -1       # the call fails
+        len_old = space.len_w(args_w[0])
+        len_new = space.len_w(args_w[1])
+        if len_new <= len_old:
+            return length
+        if len_old == 0:
+            count = length + 1      # between all the characters
+        else:
+            count = space.int_w(space.call_method(w_obj, "count",
+                                                  args_w[0]))
+        if len(args_w) > 2:
+            maxcount = space.int_w(args_w[2])
+            if 0 <= maxcount < count:
+                count = maxcount
+        extra = ovfcheck(count * (len_new - len_old))
+        return ovfcheck(length + extra)
+    return -1
+
+def _is_comparable_constant(space, w_const, w_type):
+    return (space.isinstance_w(w_const, w_type) and
+            not space.isinstance_w(w_const, space.w_complex))
+
+class _DeadCodeChecker(ast.GenericASTVisitor):
+    """Checks if unreachable code can be removed without changing
+    the scopes, the kind of function (generator or not) or the syntax
+    errors reported by the compiler."""
+
+    def __init__(self, nested):
+        # in a scope nested in a function, the names loaded by the
+        # statements can be free variables, which would disappear from
+        # co_freevars and from the co_cellvars of the enclosing function
+        self.nested = nested
+        self.removable = True
+
+    def _not_removable(self, node):
+        self.removable = False
+
+    visit_FunctionDef = _not_removable
+    visit_ClassDef = _not_removable
+    visit_Import = _not_removable
+    visit_ImportFrom = _not_removable
+    visit_Global = _not_removable
+    visit_Exec = _not_removable
+    visit_Yield = _not_removable
+    visit_Lambda = _not_removable
+    visit_GeneratorExp = _not_removable
+    visit_SetComp = _not_removable
+    visit_DictComp = _not_removable
+    visit_Break = _not_removable
+    visit_Continue = _not_removable
+    visit_Return = _not_removable
+
+    def visit_Name(self, name):
+        if name.ctx != ast.Load or self.nested:
+            self.removable = False
+
+
+class _UnreachableCodeRemover(ast.GenericASTVisitor):
+    """Removes the statements after a return, raise, break or continue
+    when it is safe to do so."""
+
+    def __init__(self):
+        self.in_function = False
+        self.nested = False
+
+    def _remove_unreachable(self, stmts):
+        if not stmts:
+            return
+        for i in range(len(stmts) - 1):
+            stmt = stmts[i]
+            if (isinstance(stmt, ast.Return) or isinstance(stmt, ast.Raise) or
+                    isinstance(stmt, ast.Break) or
+                    isinstance(stmt, ast.Continue)):
+                checker = _DeadCodeChecker(self.nested)
+                for j in range(i + 1, len(stmts)):
+                    stmts[j].walkabout(checker)
+                if checker.removable:
+                    del stmts[i + 1:]
+                return
+
+    def _visit_scope(self, body, is_function):
+        saved_in_function = self.in_function
+        saved_nested = self.nested
+        self.nested = self.in_function
+        if is_function:
+            self.in_function = True
+        self._remove_unreachable(body)
+        self.visit_sequence(body)
+        self.in_function = saved_in_function
+        self.nested = saved_nested
+
+    def visit_Module(self, mod):
+        self._remove_unreachable(mod.body)
+        self.visit_sequence(mod.body)
+
+    def visit_FunctionDef(self, func):
+        self._visit_scope(func.body, True)
+
+    def visit_ClassDef(self, cls):
+        self._visit_scope(cls.body, False)
+
+    def visit_If(self, if_):
+        self._remove_unreachable(if_.body)
+        self._remove_unreachable(if_.orelse)
+        ast.GenericASTVisitor.visit_If(self, if_)
+
+    def visit_For(self, fr):
+        self._remove_unreachable(fr.body)
+        self._remove_unreachable(fr.orelse)
+        ast.GenericASTVisitor.visit_For(self, fr)
+
+    def visit_While(self, wh):
+        self._remove_unreachable(wh.body)
+        self._remove_unreachable(wh.orelse)
+        ast.GenericASTVisitor.visit_While(self, wh)
+
+    def visit_With(self, wih):
+        self._remove_unreachable(wih.body)
+        ast.GenericASTVisitor.visit_With(self, wih)
+
+    def visit_TryExcept(self, tr):
+        self._remove_unreachable(tr.body)
+        self._remove_unreachable(tr.orelse)
+        ast.GenericASTVisitor.visit_TryExcept(self, tr)
+
+    def visit_ExceptHandler(self, handler):
+        self._remove_unreachable(handler.body)
+        ast.GenericASTVisitor.visit_ExceptHandler(self, handler)
+
+    def visit_TryFinally(self, tr):
+        self._remove_unreachable(tr.body)
+        self._remove_unreachable(tr.finalbody)
+        ast.GenericASTVisitor.visit_TryFinally(self, tr)
+
+
 opposite_compare_operations = misc.dict_to_switch({
     ast.Is : ast.IsNot,
     ast.IsNot : ast.Is,
@@ -193,18 +403,133 @@ class OptimizingVisitor(ast.ASTVisitor):
                 except OperationError:
                     pass
                 else:
-                    # To avoid blowing up the size of pyc files, we only fold
-                    # reasonably sized sequences.
-                    try:
-                        w_len = self.space.len(w_const)
-                    except OperationError:
-                        pass
-                    else:
-                        if self.space.int_w(w_len) > 20:
-                            return binop
+                    if not _is_small_enough(self.space, w_const):
+                        return binop
                     return ast.Const(w_const, binop.lineno, binop.col_offset)
         return binop
 
+    def visit_Compare(self, comp):
+        # fold comparisons between numbers or between strings of the same
+        # type, which can't have side-effects like warnings
+        space = self.space
+        w_left = comp.left.as_constant()
+        if w_left is None:
+            return comp
+        if _is_comparable_constant(space, w_left, space.w_bytes):
+            w_type = space.w_bytes
+        elif _is_comparable_constant(space, w_left, space.w_unicode):
+            w_type = space.w_unicode
+        elif (_is_comparable_constant(space, w_left, space.w_int) or
+              _is_comparable_constant(space, w_left, space.w_long) or
+              _is_comparable_constant(space, w_left, space.w_float)):
+            w_type = None
+        else:
+            return comp
+        consts_w = [None] * len(comp.comparators)
+        for i in range(len(comp.comparators)):
+            w_right = comp.comparators[i].as_constant()
+            if w_right is None:
+                return comp
+            if w_type is not None:
+                if not space.is_w(space.type(w_right), space.type(w_left)):
+                    return comp
+            elif not (_is_comparable_constant(space, w_right, space.w_int) or
+                      _is_comparable_constant(space, w_right, space.w_long) or
+                      _is_comparable_constant(space, w_right, space.w_float)):
+                return comp
+            consts_w[i] = w_right
+        result = True
+        try:
+            for i in range(len(comp.ops)):
+                op = comp.ops[i]
+                for op_kind, folder in unrolling_compare_folders:
+                    if op_kind == op:
+                        result = folder(space, w_left, consts_w[i])
+                        break
+                else:
+                    # 'is', 'in'...
+                    return comp
+                if not result:
+                    break
+                w_left = consts_w[i]
+        except OperationError:
+            return comp
+        return ast.Const(space.newbool(result), comp.lineno, comp.col_offset)
+
+    def visit_IfExp(self, ifexp):
+        # the symbol table is not built yet and this pass doesn't know if
+        # we are in a nested scope: the dead branch is only dropped if it
+        # can't change the scopes or the kind of function.  Otherwise the
+        # codegen still only emits the live branch.
+        truth = ifexp.test.as_constant_truth(self.space)
+        if truth == CONST_TRUE:
+            dead, live = ifexp.orelse, ifexp.body
+        elif truth == CONST_FALSE:
+            dead, live = ifexp.body, ifexp.orelse
+        else:
+            return ifexp
+        checker = _DeadCodeChecker(True)
+        dead.walkabout(checker)
+        if checker.removable:
+            return live
+        return ifexp
+
+    def visit_Call(self, call):
+        func = call.func
+        if (not isinstance(func, ast.Attribute) or call.keywords or
+                call.starargs is not None or call.kwargs is not None or
+                func.attr not in foldable_str_methods):
+            return call
+        space = self.space
+        w_obj = func.value.as_constant()
+        if w_obj is None or not space.isinstance_w(w_obj, space.w_basestring):
+            return call
+        count = len(call.args) if call.args is not None else 0
+        args_w = [None] * count
+        for i in range(count):
+            w_arg = call.args[i].as_constant()
+            if w_arg is None:
+                return call
+            args_w[i] = w_arg
+        # don't build big strings only to throw them away
+        try:
+            length = _folded_str_length(space, w_obj, func.attr, args_w)
+        except (OperationError, OverflowError):
+            return call
+        if length > MAX_FOLDED_LENGTH:
+            return call
+        try:
+            w_meth = space.getattr(w_obj, space.newtext(func.attr))
+            w_const = space.call(w_meth, space.newtuple(args_w))
+        except OperationError:
+            # Let all errors be found at runtime.
+            return call
+        if not _is_small_enough(space, w_const):
+            return call
+        return ast.Const(w_const, call.lineno, call.col_offset)
+
+    def _constant_iter(self, node):
+        # iterating over a list of constants is the same as iterating over
+        # a tuple of them, which is built only once
+        if isinstance(node, ast.List) and node.elts:
+            consts_w = [None] * len(node.elts)
+            for i in range(len(node.elts)):
+                w_const = node.elts[i].as_constant()
+                if w_const is None:
+                    return node
+                consts_w[i] = w_const
+            return ast.Const(self.space.newtuple(consts_w), node.lineno,
+                             node.col_offset)
+        return node
+
+    def visit_For(self, fr):
+        fr.iter = self._constant_iter(fr.iter)
+        return fr
+
+    def visit_comprehension(self, comp):
+        comp.iter = self._constant_iter(comp.iter)
+        return comp
+
     def visit_UnaryOp(self, unary):
         w_operand = unary.operand.as_constant()
         op = unary.op
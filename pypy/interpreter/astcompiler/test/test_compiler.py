@@ -1239,6 +1239,184 @@ class TestOptimizations:
         counts = self.count_instructions(source)
         assert ops.BUILD_TUPLE not in counts
 
+    def test_fold_compare(self):
+        for source in ("1 < 2 <= 2.5", "'a' != 'b'", "3L > 2 > 5",
+                       "u'a' == u'a'", "not 1 == 2"):
+            source = 'def f(): return %s' % source
+            counts = self.count_instructions(source)
+            assert counts == {ops.LOAD_CONST: 1, ops.RETURN_VALUE: 1}
+        for source in ("'a' == u'a'", "1 is 1", "1 in (1, 2)", "1j < 2",
+                       "x < 2", "1 < 2 < x"):
+            source = 'def f(): return %s' % source
+            counts = self.count_instructions(source)
+            assert ops.COMPARE_OP in counts
+
+    def test_fold_ifexp(self):
+        source = """def f():
+            return a if 1 else b
+        """
+        counts = self.count_instructions(source)
+        assert counts == {ops.LOAD_GLOBAL: 1, ops.RETURN_VALUE: 1}
+        source = """def f():
+            return a if 'x' < '' else b
+        """
+        counts = self.count_instructions(source)
+        assert counts == {ops.LOAD_GLOBAL: 1, ops.RETURN_VALUE: 1}
+
+    def test_if_debug(self):
+        source = """def f():
+            if __debug__:
+                check()
+        """
+        counts = self.count_instructions(source)
+        assert counts[ops.JUMP_IF_NOT_DEBUG] == 1
+        assert counts[ops.LOAD_GLOBAL] == 1
+        assert ops.POP_JUMP_IF_FALSE not in counts
+
+    def test_fold_str_methods(self):
+        for source in ("'a,b'.upper()", "u'abc'.replace(u'b', u'x')",
+                       "', '.join(('a', 'b'))", "'abc'.startswith('a')",
+                       "'a=b'.partition('=')", "'x'.center(20)",
+                       "'a\\tb'.expandtabs(4)", "'aaa'.replace('a', 'xyz', 2)",
+                       "'ab'.replace('', '-')", "'-5'.zfill(3)"):
+            source = 'def f(): return %s' % source
+            counts = self.count_instructions(source)
+            assert counts == {ops.LOAD_CONST: 1, ops.RETURN_VALUE: 1}
+        for source in ("'a b'.split()", "'abc'.encode('utf-8')",
+                       "'{}'.format(1)", "'x'.center(21)", "'abc'.index('d')",
+                       "'abc'.upper(x)", "'abc'.strip(chars='a')",
+                       "'aaaa'.replace('a', 'xxxxxx')", "'ab'.ljust(-1, 'xy')",
+                       "('x' * 20).replace('', '-', 10 ** 12)",
+                       # too big to be built at all
+                       "'x'.zfill(10 ** 12)", "'x\\ty'.expandtabs(10 ** 12)"):
+            source = 'def f(): return %s' % source
+            counts = self.count_instructions(source)
+            assert ops.LOAD_CONST in counts
+            assert ops.RETURN_VALUE in counts
+            assert len(counts) > 2
+
+    def test_dont_fold_big_sequences(self):
+        source = """def f():
+            return 'ab' * 10
+        """
+        counts = self.count_instructions(source)
+        assert counts == {ops.LOAD_CONST: 1, ops.RETURN_VALUE: 1}
+        for source in ("'ab' * 11", "(1,) * 100"):
+            source = 'def f(): return %s' % source
+            counts = self.count_instructions(source)
+            assert ops.BINARY_MULTIPLY in counts
+
+    def test_constant_list_iteration(self):
+        source = """def f():
+            for x in [1, 2, "a"]:
+                pass
+            return [y for y in [3, 4]]
+        """
+        counts = self.count_instructions(source)
+        assert ops.BUILD_LIST_FROM_ARG in counts
+        assert ops.BUILD_LIST not in counts
+
+    def test_remove_unreachable_statements(self):
+        w_res = self.space.appexec([], """():
+            d = {}
+            exec '''def f(x):
+                if x:
+                    return x
+                    print "dead1"
+                else:
+                    raise ValueError
+                    g("dead2")
+                return 1
+                y = "kept"
+            ''' in d
+            return d['f'].__code__.co_consts
+        """)
+        consts_w = self.space.fixedview(w_res)
+        consts = [self.space.str_w(self.space.repr(w_c)) for w_c in consts_w]
+        assert "'dead1'" not in consts
+        assert "'dead2'" not in consts
+        assert "'kept'" in consts
+
+    def test_keep_unreachable_bindings(self):
+        w_res = self.space.appexec([], """():
+            d = {}
+            exec '''if 1:
+                def f():
+                    return x
+                    x = 1
+                def g():
+                    return
+                    yield 1
+                def h():
+                    for i in range(3):
+                        continue
+                        break
+                    else:
+                        return 5
+            ''' in d
+            try:
+                d['f']()
+            except UnboundLocalError:
+                pass
+            else:
+                raise AssertionError
+            return str(type(d['g']())), d['h']()
+        """)
+        w_type, w_h = self.space.fixedview(w_res)
+        assert 'generator' in self.space.str_w(w_type)
+        assert self.space.int_w(w_h) == 5
+
+    def test_keep_unreachable_free_variables(self):
+        w_res = self.space.appexec([], """():
+            d = {}
+            exec '''def f():
+                y = 1
+                def g():
+                    return
+                    print y
+                class C:
+                    while 1:
+                        break
+                        print y
+                return g
+            ''' in d
+            g = d['f']()
+            return (d['f'].__code__.co_cellvars, g.__code__.co_freevars,
+                    len(g.__closure__))
+        """)
+        w_cellvars, w_freevars, w_len = self.space.fixedview(w_res)
+        assert self.space.unwrap(w_cellvars) == ('y',)
+        assert self.space.unwrap(w_freevars) == ('y',)
+        assert self.space.int_w(w_len) == 1
+
+    def test_keep_dead_ifexp_branch_scopes(self):
+        w_res = self.space.appexec([], """():
+            d = {}
+            exec '''if 1:
+                def f():
+                    x = (yield 1) if 0 else 2
+                def outer():
+                    y = 5
+                    def g():
+                        return y if 0 else 2
+                    return g
+            ''' in d
+            g = d['outer']()
+            return (str(type(d['f']())), d['outer'].__code__.co_cellvars,
+                    g.__code__.co_freevars, g())
+        """)
+        w_type, w_cellvars, w_freevars, w_g = self.space.fixedview(w_res)
+        assert 'generator' in self.space.str_w(w_type)
+        assert self.space.unwrap(w_cellvars) == ('y',)
+        assert self.space.unwrap(w_freevars) == ('y',)
+        assert self.space.int_w(w_g) == 2
+        # the dead branch is still not compiled
+        source = """def f():
+            x = (yield 1) if 0 else 2
+        """
+        counts = self.count_instructions(source)
+        assert ops.YIELD_VALUE not in counts
+
 
 class TestHugeStackDepths:
     def run_and_check_stacksize(self, source):
@@ -471,8 +471,13 @@ class AbstractActionFlag(object):
         assert isinstance(action, PeriodicAsyncAction)
         # hack to put the release-the-GIL one at the end of the list,
         # and the report-the-signals one at the start of the list.
+        # The others must run before the GIL is released, whatever the
+        # order in which they are registered.
         if use_bytecode_counter:
-            self._periodic_actions.append(action)
+            i = len(self._periodic_actions)
+            while i > 0 and self._periodic_actions[i - 1].releases_gil:
+                i -= 1
+            self._periodic_actions.insert(i, action)
             self.has_bytecode_counter = True
         else:
             self._periodic_actions.insert(0, action)
@@ -582,6 +587,7 @@ class PeriodicAsyncAction(AsyncAction):
     """Abstract base class for actions that occur automatically
     every sys.checkinterval bytecodes.
     """
+    releases_gil = False    # if True, it runs after the other ones
 
 
 class UserDelAction(AsyncAction):
@@ -251,6 +251,24 @@ class PyCode(eval.Code):
             if isinstance(w_co, PyCode):
                 w_co.remove_docstrings(space)
 
+    def copy(self):
+        """Return a new code object with the same content, but not bound
+        to any globals and with empty caches.  The code objects in the
+        constants are copied too."""
+        space = self.space
+        consts_w = self.co_consts_w[:]
+        for i in range(len(consts_w)):
+            w_const = consts_w[i]
+            if isinstance(w_const, PyCode):
+                consts_w[i] = w_const.copy()
+        names = [space.text_w(w_name) for w_name in self.co_names_w]
+        return PyCode(space, self.co_argcount, self.co_nlocals,
+                      self.co_stacksize, self.co_flags, self.co_code,
+                      consts_w, names, self.co_varnames, self.co_filename,
+                      self.co_name, self.co_firstlineno, self.co_lnotab,
+                      self.co_freevars, self.co_cellvars,
+                      self.hidden_applevel, self.magic)
+
     def _to_code(self):
         """For debugging only."""
         consts = [None] * len(self.co_consts_w)
@@ -3,6 +3,10 @@ General classes for bytecode compilers.
 Compiler instances are stored into 'space.getexecutioncontext().compiler'.
 """
 
+from collections import OrderedDict
+
+from rpython.rlib.objectmodel import move_to_end
+
 from pypy.interpreter import pycode
 from pypy.interpreter.pyparser import future, pyparse, error as parseerror
 from pypy.interpreter.astcompiler import (astbuilder, codegen, consts, misc,
@@ -154,3 +158,53 @@ class PythonAstCompiler(PyCodeCompiler):
                                    hidden_applevel=hidden_applevel)
         mod = self._compile_to_ast(source, info)
         return self._compile_ast(mod, info, source)
+
+
+class CompileCache(object):
+    """LRU cache of the code objects built by the compile() builtin, and so
+    by eval() and exec of strings, keyed on the source, filename, mode and
+    flags.  Disabled if the size is 0.
+
+    A code object is bound to the first globals it runs in (see
+    PyCode.frame_stores_global()), which it then keeps alive, and it
+    holds caches for them.  So the cached code objects are never run:
+    each call returns a copy of one, which is much cheaper than compiling
+    but still costs an allocation per nested code object.  The copies are
+    distinct code objects, so the JIT compiles each of them separately,
+    like without the cache."""
+
+    def __init__(self, space):
+        self.size = space.config.objspace.compile_cache_size
+        self.hits = 0
+        self.misses = 0
+        self.cache = OrderedDict()
+
+    def compile(self, compiler, source, filename, mode, flags):
+        if self.size <= 0:
+            return compiler.compile(source, filename, mode, flags)
+        key = (source, filename, mode, flags)
+        code = self.cache.get(key, None)
+        if code is not None:
+            self.hits += 1
+            move_to_end(self.cache, key)
+            return code.copy()
+        self.misses += 1
+        code = compiler.compile(source, filename, mode, flags)
+        self.cache[key] = code
+        self._trim()
+        return code.copy()
+
+    def set_size(self, size):
+        self.size = size
+        self._trim()
+
+    def clear(self):
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _trim(self):
+        while len(self.cache) > self.size:
+            for key in self.cache:     # the least recently used one
+                del self.cache[key]
+                break
@@ -1318,7 +1318,9 @@ class __extend__(pyframe.PyFrame):
     STOP_CODE = MISSING_OPCODE
 
     def BUILD_MAP(self, itemcount, next_instr):
-        w_dict = self.space.newdict()
+        # a dict literal with keys: dicts built here probably all get the
+        # same keys, which they can share
+        w_dict = self.space.newdict(sharedkeys=itemcount > 0)
         self.pushvalue(w_dict)
 
     @jit.unroll_safe
@@ -137,6 +137,25 @@ class TestExecutionContext:
             space.actionflag = ActionFlag()   # reset to default
         assert 10 < i < 110
 
+    def test_periodic_action_before_gil_release(self):
+        from pypy.interpreter.executioncontext import ActionFlag
+
+        class ReleaseAction(executioncontext.PeriodicAsyncAction):
+            releases_gil = True
+
+        class DemoAction(executioncontext.PeriodicAsyncAction):
+            pass
+
+        space = self.space
+        flag = ActionFlag()
+        a1 = ReleaseAction(space)
+        a2 = DemoAction(space)
+        a3 = DemoAction(space)
+        flag.register_periodic_action(a1, True)
+        flag.register_periodic_action(a2, True)
+        flag.register_periodic_action(a3, False)
+        assert flag._periodic_actions == [a3, a2, a1]
+
     def test_llprofile(self):
         l = []
 
@@ -3,6 +3,7 @@ Implementation of the interpreter-level compile/eval builtins.
 """
 
 from pypy.interpreter.pycode import PyCode
+from pypy.interpreter.pycompiler import CompileCache
 from pypy.interpreter.error import OperationError, oefmt
 from pypy.interpreter.astcompiler import consts, ast
 from pypy.interpreter.gateway import unwrap_spec
@@ -61,7 +62,8 @@ in addition to any features explicitly specified.
         node = ec.compiler.compile_to_ast(source, filename, mode, flags)
         return node.to_object(space)
     else:
-        return ec.compiler.compile(source, filename, mode, flags)
+        cache = space.fromcache(CompileCache)
+        return cache.compile(ec.compiler, source, filename, mode, flags)
 
 
 def eval(space, w_code, w_globals=None, w_locals=None):
@@ -1,6 +1,7 @@
 from pypy.interpreter.error import oefmt, wrap_oserror
 from pypy.interpreter.gateway import unwrap_spec
 from pypy.interpreter.pycode import CodeHookCache
+from pypy.interpreter.pycompiler import CompileCache
 from pypy.interpreter.pyframe import PyFrame
 from pypy.interpreter.mixedmodule import MixedModule
 from rpython.rlib.objectmodel import we_are_translated
@@ -191,6 +192,27 @@ def set_code_callback(space, w_callable):
     else:
         cache._code_hook = w_callable
 
+@unwrap_spec(size=int)
+def set_compile_cache_size(space, size):
+    """Set the number of code objects built by compile(), eval() and exec
+    of strings that are kept in an LRU cache.  0 disables the cache."""
+    if size < 0:
+        raise oefmt(space.w_ValueError, "size must be >= 0")
+    space.fromcache(CompileCache).set_size(size)
+
+def clear_compile_cache(space):
+    """Empty the compile cache and reset its counters."""
+    space.fromcache(CompileCache).clear()
+
+def compile_cache_info(space):
+    """Return a tuple (hits, misses, maxsize, currsize) about the compile
+    cache."""
+    cache = space.fromcache(CompileCache)
+    return space.newtuple([space.newint(cache.hits),
+                           space.newint(cache.misses),
+                           space.newint(cache.size),
+                           space.newint(len(cache.cache))])
+
 @unwrap_spec(string='bytes', byteorder='text', signed=int)
 def decode_long(space, string, byteorder='little', signed=1):
     from rpython.rlib.rbigint import rbigint, InvalidEndiannessError
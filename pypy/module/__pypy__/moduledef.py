@@ -112,6 +112,9 @@ class Module(MixedModule):
         'set_debug'                 : 'interp_magic.set_debug',
         'locals_to_fast'            : 'interp_magic.locals_to_fast',
         'set_code_callback'         : 'interp_magic.set_code_callback',
+        'set_compile_cache_size'    : 'interp_magic.set_compile_cache_size',
+        'clear_compile_cache'       : 'interp_magic.clear_compile_cache',
+        'compile_cache_info'        : 'interp_magic.compile_cache_info',
         'save_module_content_for_future_reload':
                           'interp_magic.save_module_content_for_future_reload',
         'decode_long'               : 'interp_magic.decode_long',
@@ -84,3 +84,92 @@ def f():
         l = [1, 2]
         l.append(3)
         assert list_get_physical_size(l) >= 3 # should be 6, but untranslated 3
+
+
+class AppTestCompileCache:
+    spaceconfig = {"usemodules": ['__pypy__'],
+                   "objspace.compile_cache_size": 2}
+
+    def setup_method(self, meth):
+        from pypy.interpreter.pycompiler import CompileCache
+        cache = self.space.fromcache(CompileCache)
+        cache.set_size(2)
+        cache.clear()
+
+    def test_compile(self):
+        from __pypy__ import compile_cache_info
+        assert compile_cache_info() == (0, 0, 2, 0)
+        co = compile("x + 1", "<a>", "eval")
+        co2 = compile("x + 1", "<a>", "eval")
+        # a copy of the cached code object is returned
+        assert co2 is not co
+        assert co2 == co
+        assert compile_cache_info() == (1, 1, 2, 1)
+        compile(u"x + 1", "<a>", "eval")
+        compile("x + 1", "<b>", "eval")
+        compile("x + 1", "<a>", "exec")
+        assert compile_cache_info() == (1, 4, 2, 2)
+        compile("x + 1", "<a>", "exec", 0x2000)
+        assert compile_cache_info() == (1, 5, 2, 2)
+
+    def test_lru(self):
+        from __pypy__ import compile_cache_info
+        compile("a", "", "eval")
+        compile("b", "", "eval")
+        compile("a", "", "eval")
+        assert compile_cache_info() == (1, 2, 2, 2)
+        compile("c", "", "eval")
+        compile("a", "", "eval")
+        assert compile_cache_info() == (2, 3, 2, 2)
+        compile("b", "", "eval")
+        assert compile_cache_info() == (2, 4, 2, 2)
+
+    def test_eval_exec(self):
+        from __pypy__ import compile_cache_info
+        for i in range(3):
+            assert eval("i * 2") == i * 2
+            d = {'i': i}
+            exec "j = i + 1" in d
+            assert d['j'] == i + 1
+        assert compile_cache_info()[:2] == (4, 2)
+
+    def test_globals_not_kept_alive(self):
+        import gc, weakref
+        from __pypy__ import compile_cache_info
+        class A(object):
+            pass
+        d = {'a': A()}
+        wr = weakref.ref(d['a'])
+        exec "def f(): return a\nb = f()" in d
+        del d
+        for i in range(3):
+            gc.collect()
+        assert wr() is None
+        for i in range(2):
+            d = {'a': i}
+            exec "def f(): return a\nb = f()" in d
+            assert d['b'] == i
+            assert d['f']() == i
+        assert compile_cache_info()[:2] == (2, 1)
+
+    def test_syntax_error(self):
+        from __pypy__ import compile_cache_info
+        for i in range(2):
+            raises(SyntaxError, compile, "a +", "", "eval")
+        assert compile_cache_info() == (0, 2, 2, 0)
+
+    def test_size(self):
+        from __pypy__ import (compile_cache_info, set_compile_cache_size,
+                              clear_compile_cache)
+        compile("a", "", "eval")
+        compile("b", "", "eval")
+        set_compile_cache_size(1)
+        assert compile_cache_info() == (0, 2, 1, 1)
+        assert compile("a", "", "eval") == compile("a", "", "eval")
+        assert compile_cache_info() == (1, 3, 1, 1)
+        clear_compile_cache()
+        assert compile_cache_info() == (0, 0, 1, 0)
+        set_compile_cache_size(0)
+        assert compile("a", "", "eval") == compile("a", "", "eval")
+        assert compile_cache_info() == (0, 0, 0, 0)
+        raises(ValueError, set_compile_cache_size, -1)
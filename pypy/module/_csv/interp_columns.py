@@ -0,0 +1,414 @@
+"""
+read_columns(): parse a whole CSV file into one list per column, instead
+of one list of strings per row.
+
+The input is read in big chunks, either from a file-like object or from
+an object with the buffer interface.  Unquoted fields, which are the
+common case, are found with a table-driven scan for the few special
+characters and sliced directly out of the chunk; fields in int columns
+are even converted without making a string first.  Quoted and escaped
+fields go through the same state machine as the normal reader.
+"""
+
+from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.rstring import ParseStringError, ParseStringOverflowError
+from rpython.rlib.rarithmetic import string_to_int, OVF_DIGITS
+from rpython.rlib.rfloat import string_to_float
+from rpython.rlib import objectmodel
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.module._csv.interp_csv import _build_dialect
+from pypy.module._csv.interp_csv import QUOTE_NONNUMERIC, QUOTE_NONE
+from pypy.module._csv.interp_reader import field_limit
+from pypy.module._csv.interp_reader import (IN_FIELD, ESCAPED_CHAR,
+    IN_QUOTED_FIELD, ESCAPE_IN_QUOTED_FIELD, QUOTE_IN_QUOTED_FIELD)
+from pypy.objspace.std.util import wrap_parsestringerror
+
+DEFAULT_CHUNKSIZE = 1024 * 1024
+
+
+class Column(object):
+    """The values of one column, as an RPython list of the right type."""
+
+    def append_slice(self, reader, buf, start, stop):
+        assert start >= 0
+        assert stop >= start
+        self.append_str(reader, buf[start:stop])
+
+    def append_str(self, reader, s):
+        raise NotImplementedError
+
+    def wrap(self, space):
+        raise NotImplementedError
+
+
+class StrColumn(Column):
+    def __init__(self):
+        self.items = []
+
+    def append_str(self, reader, s):
+        self.items.append(s)
+
+    def wrap(self, space):
+        return space.newlist_bytes(self.items)
+
+
+class IntColumn(Column):
+    def __init__(self):
+        self.items = []
+
+    def append_slice(self, reader, buf, start, stop):
+        # fast path for (+/-)[0-9]* with not too many digits, like in
+        # string_to_int(), but without making a string first
+        if 0 < stop - start < OVF_DIGITS:
+            i = start
+            sign = 1
+            if buf[i] == '-':
+                sign = -1
+                i += 1
+            elif buf[i] == '+':
+                i += 1
+            result = 0
+            ok = i < stop
+            while i < stop:
+                value = ord(buf[i]) - ord('0')
+                if not 0 <= value <= 9:
+                    ok = False
+                    break
+                result = result * 10 + value
+                i += 1
+            if ok:
+                self.items.append(result * sign)
+                return
+        Column.append_slice(self, reader, buf, start, stop)
+
+    def append_str(self, reader, s):
+        try:
+            value = string_to_int(s)
+        except ParseStringError as e:
+            raise reader.conversion_error(e, s)
+        except ParseStringOverflowError:
+            raise reader.error("integer too large for an int column: '%s'"
+                               % (s,))
+        self.items.append(value)
+
+    def wrap(self, space):
+        return space.newlist_int(self.items)
+
+
+class FloatColumn(Column):
+    def __init__(self):
+        self.items = []
+
+    def append_str(self, reader, s):
+        try:
+            value = string_to_float(s)
+        except ParseStringError as e:
+            raise reader.conversion_error(e, s)
+        self.items.append(value)
+
+    def wrap(self, space):
+        return space.newlist_float(self.items)
+
+
+class ColumnReader(object):
+
+    def __init__(self, space, dialect, w_source, kinds_w, skiprows,
+                 chunksize):
+        self.space = space
+        self.dialect = dialect
+        self.kinds_w = kinds_w
+        self.skiprows = skiprows
+        self.chunksize = chunksize
+        self.line_num = 0        # number of records seen so far
+        self.columns = None      # created from the first stored record
+        # the source is either something with a read() method, or
+        # something with the buffer interface
+        self.w_source = w_source
+        self.buffer = None
+        self.offset = 0
+        if space.findattr(w_source, space.newtext('read')) is None:
+            self.buffer = space.readbuf_w(w_source)
+        self.eof = False
+        # the fields of the record being parsed: either a slice of the
+        # current chunk, or a string in 'field_strs' if it had to be
+        # built (quotes or escapes)
+        self.field_starts = []
+        self.field_stops = []
+        self.field_strs = []
+        # the characters that end an unquoted field, or that it needs
+        # to be looked at more carefully
+        self.special = [False] * 256
+        for c in ['\n', '\r', '\0', dialect.delimiter, dialect.escapechar]:
+            self.special[ord(c)] = True
+
+    @objectmodel.dont_inline
+    def error(self, msg):
+        space = self.space
+        w_module = space.getbuiltinmodule('_csv')
+        w_error = space.getattr(w_module, space.newtext('Error'))
+        raise oefmt(w_error, "record %d: %s", self.line_num + 1, msg)
+
+    @objectmodel.dont_inline
+    def conversion_error(self, e, s):
+        raise wrap_parsestringerror(self.space, e, self.space.newtext(s))
+
+    def read_chunk(self):
+        space = self.space
+        if self.buffer is not None:
+            size = min(self.chunksize,
+                       self.buffer.getlength() - self.offset)
+            if size <= 0:
+                self.eof = True
+                return ''
+            chunk = self.buffer.getslice(self.offset, 1, size)
+            self.offset += size
+            return chunk
+        w_chunk = space.call_method(self.w_source, 'read',
+                                    space.newint(self.chunksize))
+        chunk = space.text_w(w_chunk)
+        if not chunk:
+            self.eof = True
+        return chunk
+
+    def read_all(self):
+        buf = ''
+        pos = 0
+        while True:
+            # skip the line ends between records; empty lines are ignored
+            end = len(buf)
+            while pos < end and (buf[pos] == '\n' or buf[pos] == '\r'):
+                pos += 1
+            if pos == end:
+                if self.eof:
+                    break
+                buf = self.read_chunk()
+                pos = 0
+                continue
+            newpos = self.parse_record(buf, pos, self.eof)
+            if newpos < 0:
+                # the record continues in the next chunk: start over
+                # with it
+                assert pos >= 0
+                buf = buf[pos:] + self.read_chunk()
+                pos = 0
+                continue
+            self.store_record(buf)
+            pos = newpos
+        if self.columns is None:
+            return []
+        return [column.wrap(self.space) for column in self.columns]
+
+    def store_record(self, buf):
+        nfields = len(self.field_starts)
+        if self.line_num < self.skiprows:
+            self.line_num += 1
+            return
+        if self.columns is None:
+            self.columns = self.make_columns(nfields)
+        elif nfields != len(self.columns):
+            raise self.error("expected %d fields, saw %d" % (
+                len(self.columns), nfields))
+        for i in range(nfields):
+            s = self.field_strs[i]
+            if s is not None:
+                self.columns[i].append_str(self, s)
+            else:
+                self.columns[i].append_slice(self, buf, self.field_starts[i],
+                                             self.field_stops[i])
+        self.line_num += 1
+
+    def make_columns(self, nfields):
+        space = self.space
+        if self.kinds_w is not None and len(self.kinds_w) != nfields:
+            raise self.error("%d types given for %d fields" % (
+                len(self.kinds_w), nfields))
+        columns = []
+        for i in range(nfields):
+            if self.kinds_w is None:
+                columns.append(StrColumn())
+                continue
+            w_kind = self.kinds_w[i]
+            if space.is_w(w_kind, space.w_int):
+                columns.append(IntColumn())
+            elif space.is_w(w_kind, space.w_float):
+                columns.append(FloatColumn())
+            elif (space.is_w(w_kind, space.w_bytes) or
+                      space.is_w(w_kind, space.w_None)):
+                columns.append(StrColumn())
+            else:
+                raise oefmt(space.w_TypeError,
+                            "column types must be int, float, str or None, "
+                            "not %R", w_kind)
+        return columns
+
+    def save_field(self, start, stop, s):
+        self.field_starts.append(start)
+        self.field_stops.append(stop)
+        self.field_strs.append(s)
+
+    def parse_record(self, buf, pos, final):
+        """Parse the record starting at 'pos' into the field_* lists.
+        Returns the position after its line end, or -1 if 'buf' ends
+        before the record is complete and 'final' is false."""
+        dialect = self.dialect
+        special = self.special
+        limit = field_limit.limit
+        end = len(buf)
+        del self.field_starts[:]
+        del self.field_stops[:]
+        del self.field_strs[:]
+        while True:
+            # at the start of a field
+            if dialect.skipinitialspace:
+                while pos < end and buf[pos] == ' ':
+                    pos += 1
+            if pos == end and not final:
+                return -1
+            start = pos
+            if (pos < end and buf[pos] == dialect.quotechar and
+                    dialect.quoting != QUOTE_NONE):
+                pos = self.parse_slow_field(buf, pos + 1, start,
+                                            IN_QUOTED_FIELD, final)
+                if pos < 0:
+                    return -1
+            else:
+                while pos < end and not special[ord(buf[pos])]:
+                    pos += 1
+                if pos - start > limit:
+                    raise self.error("field larger than field limit")
+                if (pos < end and buf[pos] != '\n' and buf[pos] != '\r' and
+                        buf[pos] != dialect.delimiter):
+                    # escape character or NULL byte
+                    pos = self.parse_slow_field(buf, pos, start, IN_FIELD,
+                                                final)
+                    if pos < 0:
+                        return -1
+                elif pos == end and not final:
+                    return -1
+                else:
+                    self.save_field(start, pos, None)
+            # at the end of a field
+            if pos == end:
+                return end
+            c = buf[pos]
+            pos += 1
+            if c != dialect.delimiter:
+                assert c == '\n' or c == '\r'
+                return pos
+
+    def parse_slow_field(self, buf, pos, start, state, final):
+        """Parse the rest of a field that needs more than slicing,
+        starting at 'pos' in the given state, and save it.  Returns the
+        position of the character after the field, or -1 like
+        parse_record()."""
+        dialect = self.dialect
+        limit = field_limit.limit
+        end = len(buf)
+        builder = StringBuilder()
+        if state == IN_FIELD:
+            assert start >= 0
+            assert pos >= start
+            builder.append_slice(buf, start, pos)
+        while pos < end:
+            c = buf[pos]
+            if c == '\0':
+                raise self.error("line contains NULL byte")
+            if state == IN_FIELD:
+                if c == '\n' or c == '\r' or c == dialect.delimiter:
+                    break
+                elif c == dialect.escapechar:
+                    state = ESCAPED_CHAR
+                else:
+                    builder.append(c)
+            elif state == ESCAPED_CHAR:
+                builder.append(c)
+                state = IN_FIELD
+            elif state == IN_QUOTED_FIELD:
+                if c == dialect.escapechar:
+                    state = ESCAPE_IN_QUOTED_FIELD
+                elif c == dialect.quotechar:
+                    if dialect.doublequote:
+                        state = QUOTE_IN_QUOTED_FIELD
+                    else:
+                        state = IN_FIELD
+                else:
+                    builder.append(c)
+            elif state == ESCAPE_IN_QUOTED_FIELD:
+                builder.append(c)
+                state = IN_QUOTED_FIELD
+            elif state == QUOTE_IN_QUOTED_FIELD:
+                if c == dialect.quotechar:
+                    # save "" as "
+                    builder.append(c)
+                    state = IN_QUOTED_FIELD
+                elif c == '\n' or c == '\r' or c == dialect.delimiter:
+                    break
+                elif not dialect.strict:
+                    builder.append(c)
+                    state = IN_FIELD
+                else:
+                    raise self.error("'%s' expected after '%s'" % (
+                        dialect.delimiter, dialect.quotechar))
+            if builder.getlength() > limit:
+                raise self.error("field larger than field limit")
+            pos += 1
+        else:
+            # reached the end of the data
+            if not final:
+                return -1
+            if state == ESCAPED_CHAR or state == ESCAPE_IN_QUOTED_FIELD:
+                if dialect.strict:
+                    raise self.error("unexpected end of data")
+                builder.append('\n')
+            elif state == IN_QUOTED_FIELD and dialect.strict:
+                raise self.error("newline inside string")
+        self.save_field(-1, -1, builder.build())
+        return pos
+
+
+@unwrap_spec(skiprows=int, chunksize=int)
+def csv_read_columns(space, w_source, w_types=None, skiprows=0,
+                     chunksize=DEFAULT_CHUNKSIZE, w_dialect=None,
+                     w_delimiter        = None,
+                     w_doublequote      = None,
+                     w_escapechar       = None,
+                     w_lineterminator   = None,
+                     w_quotechar        = None,
+                     w_quoting          = None,
+                     w_skipinitialspace = None,
+                     w_strict           = None,
+                     ):
+    """
+    columns = read_columns(source [, types] [, skiprows=0]
+                           [, chunksize] [, dialect='excel']
+                           [optional keyword args])
+
+    Read a whole CSV file and return a list with one list per column.
+    This is a PyPy extension.
+
+    The "source" argument is either a file-like object, from which the
+    data is read "chunksize" bytes at a time, or an object with the
+    buffer interface (e.g. a string or an mmap).  All records must have
+    the same number of fields; empty lines are ignored, and the first
+    "skiprows" records (e.g. a header) are skipped.  If given, "types"
+    is a sequence with one entry per column: int, float, or str/None to
+    keep the field as a string.  The columns of ints and floats are
+    converted while parsing and stored compactly.  The dialect settings
+    are the same as for reader(), except that QUOTE_NONNUMERIC is not
+    supported: use "types" instead."""
+    dialect = _build_dialect(space, w_dialect, w_delimiter, w_doublequote,
+                             w_escapechar, w_lineterminator, w_quotechar,
+                             w_quoting, w_skipinitialspace, w_strict)
+    if dialect.quoting == QUOTE_NONNUMERIC:
+        raise oefmt(space.w_ValueError,
+                    "read_columns() does not support QUOTE_NONNUMERIC, "
+                    "use 'types' instead")
+    if chunksize <= 0:
+        raise oefmt(space.w_ValueError, "chunksize must be positive")
+    kinds_w = None
+    if not space.is_none(w_types):
+        kinds_w = space.listview(w_types)
+    reader = ColumnReader(space, dialect, w_source, kinds_w, skiprows,
+                          chunksize)
+    return space.newlist(reader.read_all())
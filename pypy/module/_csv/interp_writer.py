@@ -7,6 +7,11 @@ from pypy.interpreter.typedef import interp_attrproperty_w
 from pypy.module._csv.interp_csv import _build_dialect
 from pypy.module._csv.interp_csv import (QUOTE_MINIMAL, QUOTE_ALL,
                                          QUOTE_NONNUMERIC, QUOTE_NONE)
+from pypy.objspace.std.floatobject import W_FloatObject, float_repr
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.listobject import W_ListObject
+
+BATCH_SIZE = 64 * 1024     # characters written at once by writerows()
 
 
 class W_Writer(W_Root):
@@ -33,103 +38,172 @@ class W_Writer(W_Root):
         """Construct and write a CSV record from a sequence of fields.
         Non-string elements will be converted to string."""
         space = self.space
-        fields_w = space.listview(w_fields)
-        dialect = self.dialect
         rec = StringBuilder(80)
-        #
-        for field_index in range(len(fields_w)):
-            w_field = fields_w[field_index]
-            if space.is_w(w_field, space.w_None):
-                field = ""
-            elif space.isinstance_w(w_field, space.w_float):
-                field = space.text_w(space.repr(w_field))
-            else:
-                field = space.text_w(space.str(w_field))
-            #
-            if dialect.quoting == QUOTE_NONNUMERIC:
-                try:
-                    space.float_w(w_field)    # is it an int/long/float?
-                    quoted = False
-                except OperationError as e:
-                    if e.async(space):
-                        raise
-                    quoted = True
-            elif dialect.quoting == QUOTE_ALL:
-                quoted = True
-            elif dialect.quoting == QUOTE_MINIMAL:
-                # Find out if we really quoting
-                special_characters = self.special_characters
-                for c in field:
-                    if c in special_characters:
-                        if c != dialect.quotechar or dialect.doublequote:
-                            quoted = True
-                            break
-                else:
-                    quoted = False
-            else:
-                quoted = False
-
-            # If field is empty check if it needs to be quoted
-            if len(field) == 0 and len(fields_w) == 1:
-                if dialect.quoting == QUOTE_NONE:
-                    raise self.error("single empty field record "
-                                     "must be quoted")
-                quoted = True
-
-            # If this is not the first field we need a field separator
-            if field_index > 0:
-                rec.append(dialect.delimiter)
-
-            # Handle preceding quote
-            if quoted:
-                rec.append(dialect.quotechar)
-
-            # Copy field data
-            special_characters = self.special_characters
-            for c in field:
-                if c in special_characters:
-                    if dialect.quoting == QUOTE_NONE:
-                        want_escape = True
-                    else:
-                        want_escape = False
-                        if c == dialect.quotechar:
-                            if dialect.doublequote:
-                                rec.append(dialect.quotechar)
-                            else:
-                                want_escape = True
-                    if want_escape:
-                        if dialect.escapechar == '\0':
-                            raise self.error("need to escape, "
-                                             "but no escapechar set")
-                        rec.append(dialect.escapechar)
-                    else:
-                        assert quoted
-                # Copy field character into record buffer
-                rec.append(c)
-
-            # Handle final quote
-            if quoted:
-                rec.append(dialect.quotechar)
-
-        # Add line terminator
-        rec.append(dialect.lineterminator)
-
+        self.append_record(rec, w_fields)
         line = rec.build()
         return space.call_function(self.w_filewrite, space.newtext(line))
 
     def writerows(self, w_seqseq):
         """Construct and write a series of sequences to a csv file.
         Non-string elements will be converted to string."""
+        # the records are collected and written in batches of about
+        # BATCH_SIZE characters, instead of calling write() once per row
         space = self.space
-        w_iter = space.iter(w_seqseq)
-        while True:
+        rec = StringBuilder(BATCH_SIZE)
+        complete = 0    # length of the rows fully appended to 'rec'
+        try:
+            if type(w_seqseq) is W_ListObject:
+                # a list of rows: no need for the iterator protocol
+                rows_w = space.listview(w_seqseq)
+                for w_seq in rows_w:
+                    self.append_record(rec, w_seq)
+                    complete = rec.getlength()
+                    if complete >= BATCH_SIZE:
+                        full = rec
+                        rec = StringBuilder(BATCH_SIZE)
+                        complete = 0
+                        self.flush(full, full.getlength())
+            else:
+                w_iter = space.iter(w_seqseq)
+                while True:
+                    try:
+                        w_seq = space.next(w_iter)
+                    except OperationError as e:
+                        if e.match(space, space.w_StopIteration):
+                            break
+                        raise
+                    self.append_record(rec, w_seq)
+                    complete = rec.getlength()
+                    if complete >= BATCH_SIZE:
+                        full = rec
+                        rec = StringBuilder(BATCH_SIZE)
+                        complete = 0
+                        self.flush(full, full.getlength())
+        except OperationError:
+            # write the rows before the failing one, like if they had
+            # been written one by one, but not the part of the failing
+            # row already appended.  A batch whose write() failed is
+            # not in 'rec' any more and is not written again.
+            self.flush(rec, complete)
+            raise
+        self.flush(rec, complete)
+
+    def flush(self, rec, length):
+        if length > 0:
+            space = self.space
+            data = rec.build()
+            if length < len(data):
+                assert length >= 0
+                data = data[:length]
+            space.call_function(self.w_filewrite, space.newtext(data))
+
+    def append_record(self, rec, w_fields):
+        space = self.space
+        dialect = self.dialect
+        # lists of ints or floats are formatted without wrapping the items
+        intlist = space.listview_int(w_fields)
+        if intlist is not None:
+            for i in range(len(intlist)):
+                self.append_field(rec, str(intlist[i]), True, i, len(intlist))
+        else:
+            floatlist = space.listview_float(w_fields)
+            if floatlist is not None:
+                for i in range(len(floatlist)):
+                    self.append_field(rec, float_repr(floatlist[i]), True,
+                                      i, len(floatlist))
+            else:
+                fields_w = space.listview(w_fields)
+                for i in range(len(fields_w)):
+                    self.append_wrapped_field(rec, fields_w[i], i,
+                                              len(fields_w))
+        # Add line terminator
+        rec.append(dialect.lineterminator)
+
+    def append_wrapped_field(self, rec, w_field, field_index, num_fields):
+        space = self.space
+        numeric = False
+        if type(w_field) is W_IntObject:
+            field = str(space.int_w(w_field))
+            numeric = True
+        elif type(w_field) is W_FloatObject:
+            field = float_repr(space.float_w(w_field))
+            numeric = True
+        elif space.is_w(w_field, space.w_None):
+            field = ""
+        elif space.isinstance_w(w_field, space.w_float):
+            field = space.text_w(space.repr(w_field))
+        else:
+            field = space.text_w(space.str(w_field))
+        #
+        if not numeric and self.dialect.quoting == QUOTE_NONNUMERIC:
             try:
-                w_seq = space.next(w_iter)
+                space.float_w(w_field)    # is it an int/long/float?
+                numeric = True
             except OperationError as e:
-                if e.match(space, space.w_StopIteration):
-                    break
-                raise
-            self.writerow(w_seq)
+                if e.async(space):
+                    raise
+        self.append_field(rec, field, numeric, field_index, num_fields)
+
+    def append_field(self, rec, field, numeric, field_index, num_fields):
+        dialect = self.dialect
+        if dialect.quoting == QUOTE_NONNUMERIC:
+            quoted = not numeric
+        elif dialect.quoting == QUOTE_ALL:
+            quoted = True
+        elif dialect.quoting == QUOTE_MINIMAL:
+            # Find out if we really quoting
+            special_characters = self.special_characters
+            for c in field:
+                if c in special_characters:
+                    if c != dialect.quotechar or dialect.doublequote:
+                        quoted = True
+                        break
+            else:
+                quoted = False
+        else:
+            quoted = False
+
+        # If field is empty check if it needs to be quoted
+        if len(field) == 0 and num_fields == 1:
+            if dialect.quoting == QUOTE_NONE:
+                raise self.error("single empty field record "
+                                 "must be quoted")
+            quoted = True
+
+        # If this is not the first field we need a field separator
+        if field_index > 0:
+            rec.append(dialect.delimiter)
+
+        # Handle preceding quote
+        if quoted:
+            rec.append(dialect.quotechar)
+
+        # Copy field data
+        special_characters = self.special_characters
+        for c in field:
+            if c in special_characters:
+                if dialect.quoting == QUOTE_NONE:
+                    want_escape = True
+                else:
+                    want_escape = False
+                    if c == dialect.quotechar:
+                        if dialect.doublequote:
+                            rec.append(dialect.quotechar)
+                        else:
+                            want_escape = True
+                if want_escape:
+                    if dialect.escapechar == '\0':
+                        raise self.error("need to escape, "
+                                         "but no escapechar set")
+                    rec.append(dialect.escapechar)
+                else:
+                    assert quoted
+            # Copy field character into record buffer
+            rec.append(c)
+
+        # Handle final quote
+        if quoted:
+            rec.append(dialect.quotechar)
 
 
 def csv_writer(space, w_fileobj, w_dialect=None,
@@ -82,6 +82,7 @@ SETTINGS:
 
         'reader': 'interp_reader.csv_reader',
         'field_size_limit': 'interp_reader.csv_field_size_limit',
+        'read_columns': 'interp_columns.csv_read_columns',
 
         'writer': 'interp_writer.csv_writer',
         }
@@ -104,3 +104,114 @@ class AppTestReader(object):
         self._read_test(['a,"'], 'Error', strict=True)
         self._read_test(['"a'], 'Error', strict=True)
         self._read_test(['^'], 'Error', escapechar='^', strict=True)
+
+
+class AppTestReadColumns(object):
+    spaceconfig = dict(usemodules=['_csv'])
+
+    def setup_class(cls):
+        w__check = cls.space.appexec([], r"""():
+            import _csv
+            def _check(data, **kwargs):
+                # read_columns() gives the same as reader(), transposed,
+                # whatever the chunk size
+                expected = [row for row in
+                            _csv.reader(data.splitlines(True), **kwargs)
+                            if row]
+                expected = [list(col) for col in zip(*expected)]
+                for chunksize in [1, 2, 3, 7, 1000]:
+                    result = _csv.read_columns(data, chunksize=chunksize,
+                                               **kwargs)
+                    assert result == expected, 'result: %r\nexpect: %r' % (
+                        result, expected)
+            return _check
+        """)
+        if type(w__check) is type(lambda:0):
+            w__check = staticmethod(w__check)
+        cls.w__check = w__check
+
+    def test_simple(self):
+        self._check('a,b,c\n1,22,333\n')
+        self._check('a,b\r\nc,d\r\n\r\ne,f')
+        self._check('a,b\rc,d\r')
+        self._check('x:y\n:z\n', delimiter=':')
+        self._check('a,\n,b\n')
+        self._check('a\n\nb\n\n\n')
+
+    def test_quotes(self):
+        self._check('"a,b",c\n"x""y",z\n')
+        self._check('"multi\nline",c\nd,"e\r\nf"\n')
+        self._check('\'a,b\',c\n', quotechar="'")
+        self._check('"ab"c,d\n', doublequote=False)
+        self._check('a,"b"\n', quoting=3)
+        self._check('12,1",\n')
+
+    def test_escapes_and_spaces(self):
+        self._check('a^,b,c\n"x^"y",z\n', escapechar='^')
+        self._check('a,^', escapechar='^')
+        self._check('a,  b,   "c"\n', skipinitialspace=True)
+
+    def test_empty(self):
+        import _csv
+        assert _csv.read_columns('') == []
+        assert _csv.read_columns('\n\r\n') == []
+
+    def test_types(self):
+        import _csv
+        data = 'name,n,x\nfoo,12,1.5\nbar,-3,"2e3"\nbaz,+7, 4\n'
+        cols = _csv.read_columns(data, [str, int, float], skiprows=1)
+        assert cols == [['foo', 'bar', 'baz'], [12, -3, 7], [1.5, 2000.0, 4.0]]
+        assert type(cols[1][0]) is int
+        cols = _csv.read_columns('"1",2\n', [int, None])
+        assert cols == [[1], ['2']]
+        big = str(2 ** 40)
+        assert _csv.read_columns(big + '\n', [int]) == [[2 ** 40]]
+        raises(ValueError, _csv.read_columns, 'a\n', [int])
+        raises(ValueError, _csv.read_columns, '\n1.5\n', [int])
+        raises(ValueError, _csv.read_columns, 'x,\n', [str, float])
+        raises(_csv.Error, _csv.read_columns, str(2 ** 80) + '\n', [int])
+        raises(_csv.Error, _csv.read_columns, '1,2\n', [int])
+        raises(TypeError, _csv.read_columns, '1\n', [list])
+
+    def test_file_source(self):
+        import _csv
+        class File(object):
+            def __init__(self, data):
+                self.data = data
+                self.sizes = []
+            def read(self, size):
+                self.sizes.append(size)
+                result = self.data[:size]
+                self.data = self.data[size:]
+                return result
+        f = File('1,a\n2,"b\nc"\n3,d\n' * 5)
+        cols = _csv.read_columns(f, [int, str], chunksize=4)
+        assert cols == [[1, 2, 3] * 5, ['a', 'b\nc', 'd'] * 5]
+        assert set(f.sizes) == set([4])
+
+    def test_buffer_source(self):
+        import _csv
+        data = bytearray('1,2\n3,4\n')
+        assert _csv.read_columns(data, [int, int]) == [[1, 3], [2, 4]]
+        assert _csv.read_columns(buffer('x,5\n'), chunksize=2) == [['x'], ['5']]
+
+    def test_errors(self):
+        import _csv
+        raises(_csv.Error, _csv.read_columns, 'a,b\nc\n')
+        raises(_csv.Error, _csv.read_columns, 'a,b\nc,d,e\n')
+        raises(_csv.Error, _csv.read_columns, 'a\0b\n')
+        raises(_csv.Error, _csv.read_columns, '"ab"c\n', strict=True)
+        raises(_csv.Error, _csv.read_columns, '"ab', strict=True)
+        raises(ValueError, _csv.read_columns, 'a\n', quoting=2)
+        raises(ValueError, _csv.read_columns, 'a\n', chunksize=0)
+
+    def test_field_limit(self):
+        import _csv
+        limit = _csv.field_size_limit()
+        try:
+            _csv.field_size_limit(5)
+            assert _csv.read_columns('12345\n') == [['12345']]
+            raises(_csv.Error, _csv.read_columns, '123456\n')
+            raises(_csv.Error, _csv.read_columns, '"123456"\n')
+        finally:
+            _csv.field_size_limit(limit)
@@ -85,3 +85,79 @@ class AppTestWriter(object):
 
     def test_writerows(self):
         self._write_test([['a'],['b','c']], 'a\r\nb,c')
+
+    def test_write_numbers(self):
+        import _csv as csv
+        class MyInt(int):
+            def __str__(self):
+                return 'myint'
+        self._write_test([1, -2, 2.5, 1e100, 3L, MyInt(4), True],
+                         '1,-2,2.5,1e+100,3,myint,True')
+        self._write_test([1, 2, 3], '1,2,3')
+        self._write_test([0.1, -2.0, float('inf')], '0.1,-2.0,inf')
+        self._write_test([1, 2], '"1","2"', quoting=csv.QUOTE_ALL)
+        self._write_test([1.5, 2.5], '1.5,2.5', quoting=csv.QUOTE_NONNUMERIC)
+        self._write_test([1.5, 2.5], '"1.5"."2.5"', delimiter='.')
+        self._write_test([-1, 2], '\\-1-2', delimiter='-', escapechar='\\',
+                         quoting=csv.QUOTE_NONE)
+        self._write_test([[1, 2], [3.5], (4, 'x')], '1,2\r\n3.5\r\n4,x')
+
+    def test_writerows_batches(self):
+        import _csv
+        class File(object):
+            def __init__(self):
+                self.parts = []
+            def write(self, s):
+                self.parts.append(s)
+        f = File()
+        w = _csv.writer(f)
+        w.writerows([[i, i * 0.5, 'x'] for i in range(10000)])
+        assert len(f.parts) < 10
+        lines = ''.join(f.parts).split('\r\n')
+        assert len(lines) == 10001
+        assert lines[1234] == '1234,617.0,x'
+        f = File()
+        w = _csv.writer(f)
+        w.writerows(iter([[1], [2]]))
+        assert f.parts == ['1\r\n2\r\n']
+
+    def test_writerows_error(self):
+        import _csv
+        class File(object):
+            def __init__(self):
+                self.parts = []
+            def write(self, s):
+                self.parts.append(s)
+        class Bad(object):
+            def __str__(self):
+                raise ValueError
+        f = File()
+        w = _csv.writer(f)
+        raises(ValueError, w.writerows, [[1], [2], [Bad()], [3]])
+        assert f.parts == ['1\r\n2\r\n']
+        f = File()
+        w = _csv.writer(f)
+        raises(ValueError, w.writerows, iter([[1], [Bad()]]))
+        assert f.parts == ['1\r\n']
+        f = File()
+        w = _csv.writer(f)
+        raises(ValueError, w.writerows, [[1, 2], ["a", Bad()]])
+        assert f.parts == ['1,2\r\n']
+
+    def test_writerows_write_error(self):
+        import _csv
+        class File(object):
+            def __init__(self):
+                self.parts = []
+            def write(self, s):
+                self.parts.append(s)
+                raise IOError
+        f = File()
+        w = _csv.writer(f)
+        rows = [['x' * 100] for i in range(1000)]
+        raises(IOError, w.writerows, rows)
+        assert len(f.parts) == 1
+        f = File()
+        w = _csv.writer(f)
+        raises(IOError, w.writerows, iter(rows))
+        assert len(f.parts) == 1
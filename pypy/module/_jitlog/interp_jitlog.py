@@ -14,14 +14,29 @@ def JitlogError(space, e):
     w_JitlogError = space.fromcache(Cache).w_JitlogError
     return OperationError(w_JitlogError, space.newtext(e.msg))
 
-@unwrap_spec(fileno=int)
-def enable(space, fileno):
-    """ Enable PyPy's logging facility. """
+@unwrap_spec(fileno=int, buffer_size=int, events=int)
+def enable(space, fileno, buffer_size=0, events=rjitlog.EVENT_ALL):
+    """ Enable PyPy's logging facility.  The log is written to the file
+    descriptor 'fileno' (a file, a pipe or a socket), which is closed by
+    disable().  With a positive 'buffer_size', the log is kept in a ring
+    buffer of that many bytes and written out by a background thread;
+    records that do not fit into the buffer are dropped, see
+    dropped_records().  'events' selects what is logged, a combination
+    of LOOPS, BRIDGES, ABORTS and COUNTERS. """
     try:
-        rjitlog.enable_jitlog(fileno)
+        rjitlog.enable_jitlog(fileno, buffer_size, events)
     except rjitlog.JitlogError, e:
         raise JitlogError(space, e)
 
+@unwrap_spec(events=int)
+def set_events(space, events):
+    """ Change which events are logged, see enable(). """
+    rjitlog.set_events(events)
+
+def dropped_records(space):
+    """ The number of records dropped because the buffer was full. """
+    return space.newint(rjitlog.dropped_records())
+
 @jit.dont_look_inside
 def disable(space):
     """ Disable PyPy's logging facility. """
@@ -1,5 +1,6 @@
 from pypy.interpreter.mixedmodule import MixedModule
 from rpython.rlib.rvmprof import VMProfPlatformUnsupported
+from rpython.rlib.rjitlog import rjitlog
 
 class Module(MixedModule):
     """ JitLog the new logging facility """
@@ -9,5 +10,12 @@ class Module(MixedModule):
     interpleveldefs = {
         'enable': 'interp_jitlog.enable',
         'disable': 'interp_jitlog.disable',
+        'set_events': 'interp_jitlog.set_events',
+        'dropped_records': 'interp_jitlog.dropped_records',
+        'LOOPS': 'space.newint(%d)' % rjitlog.EVENT_LOOPS,
+        'BRIDGES': 'space.newint(%d)' % rjitlog.EVENT_BRIDGES,
+        'ABORTS': 'space.newint(%d)' % rjitlog.EVENT_ABORTS,
+        'COUNTERS': 'space.newint(%d)' % rjitlog.EVENT_COUNTERS,
+        'ALL': 'space.newint(%d)' % rjitlog.EVENT_ALL,
         'JitlogError': 'space.fromcache(interp_jitlog.Cache).w_JitlogError',
     }
@@ -52,3 +52,22 @@ class AppTestJitLog(object):
                 assert opnum in self.resops
                 # the name must equal
                 assert self.resops[opnum] == opname
+
+    @pytest.mark.skipif("sys.platform == 'win32'")
+    def test_enable_buffered(self):
+        import _jitlog
+        tmpfile = open(self.tmpfilename, 'wb')
+        _jitlog.enable(tmpfile.fileno(), buffer_size=1024 * 1024,
+                       events=_jitlog.LOOPS | _jitlog.ABORTS)
+        assert _jitlog.dropped_records() == 0
+        _jitlog.disable()
+        with open(self.tmpfilename, 'rb') as fd:
+            assert fd.read(1) == self.mark_header
+            assert fd.read(2) == self.version
+
+    def test_events(self):
+        import _jitlog
+        assert _jitlog.ALL == (_jitlog.LOOPS | _jitlog.BRIDGES |
+                               _jitlog.ABORTS | _jitlog.COUNTERS)
+        _jitlog.set_events(_jitlog.BRIDGES)
+        _jitlog.set_events(_jitlog.ALL)
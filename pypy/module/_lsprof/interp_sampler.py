@@ -0,0 +1,187 @@
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.executioncontext import PeriodicAsyncAction
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef, interp_attrproperty
+from pypy.module._lsprof.interp_lsprof import W_StatsEntry, W_StatsSubEntry
+from rpython.rlib import jit
+
+import time
+
+#
+# A statistical profiler.  Instead of hooking every call and return
+# like W_Profiler, it looks at the chain of frames of the running thread
+# from time to time and records which code objects are on it.  This is
+# done from a periodic action, i.e. at the same points where the GIL can
+# be released, so the frames are always in a consistent state.  The
+# action runs before the one that releases the GIL, so that the time
+# spent by other threads is not charged to this one.  Each sample is
+# weighted by the wall-clock time elapsed since the previous one: the
+# code object at the top of the stack gets it as inline time, and every
+# code object on the stack gets it as total time.
+#
+# Walking the frames forces them, in the sense of the JIT, like
+# ExecutionContext.force_all_frames(): the machine code that is running
+# leaves at its next GUARD_NOT_FORCED and the current iteration is
+# finished by the interpreter.  This cost is paid once per sample, not
+# once per periodic action, because _maybe_sample() only reads the
+# clock until 'interval' has passed.  With the default interval of 1ms,
+# this is at most about a thousand exits from machine code per second.
+#
+
+class SamplerSubEntry(object):
+    def __init__(self, w_code):
+        self.w_code = w_code
+        self.samples = 0
+        self.tt = 0.0
+        self.it = 0.0
+        self.last_sample = -1
+
+    def _record(self, sample, dt, top):
+        if self.last_sample != sample:    # count recursive code once
+            self.last_sample = sample
+            self.samples += 1
+            self.tt += dt
+        if top:
+            self.it += dt
+
+    def stats(self, space):
+        return W_StatsSubEntry(space, self.w_code, self.samples, 0,
+                               self.tt, self.it)
+
+class SamplerEntry(SamplerSubEntry):
+    def __init__(self, w_code):
+        SamplerSubEntry.__init__(self, w_code)
+        self.calls = {}
+
+    def _get_or_make_subentry(self, entry):
+        try:
+            return self.calls[entry]
+        except KeyError:
+            subentry = SamplerSubEntry(entry.w_code)
+            self.calls[entry] = subentry
+            return subentry
+
+    def stats(self, space):
+        if self.calls:
+            w_sublist = space.newlist([sub_entry.stats(space)
+                                       for sub_entry in self.calls.values()])
+        else:
+            w_sublist = space.w_None
+        return W_StatsEntry(space, self.w_code, self.samples, 0,
+                            self.tt, self.it, w_sublist)
+
+
+class SamplerAction(PeriodicAsyncAction):
+    """Takes a sample for the enabled Sampler, if any, every time the
+    tick counter runs out and at least 'interval' seconds have passed."""
+
+    def __init__(self, space):
+        PeriodicAsyncAction.__init__(self, space)
+        self.w_sampler = None
+
+    def perform(self, executioncontext, frame):
+        w_sampler = self.w_sampler
+        if w_sampler is not None:
+            w_sampler._maybe_sample(executioncontext)
+
+class SamplerState(object):
+    def __init__(self, space):
+        self.action = None
+
+    @staticmethod
+    def setup(space):
+        "NOT_RPYTHON"
+        state = space.fromcache(SamplerState)
+        state.action = SamplerAction(space)
+        space.actionflag.register_periodic_action(state.action,
+                                                  use_bytecode_counter=True)
+
+
+class W_Sampler(W_Root):
+    def __init__(self, space, interval, max_depth):
+        self.space = space
+        self.interval = interval
+        self.max_depth = max_depth
+        self.is_enabled = False
+        self.last_time = 0.0
+        self.clear(space)
+
+    def clear(self, space):
+        self.data = {}
+        self.samples = 0
+
+    def enable(self, space):
+        if self.is_enabled:
+            return      # ignored
+        action = space.fromcache(SamplerState).action
+        if action.w_sampler is not None:
+            raise oefmt(space.w_RuntimeError,
+                        "another Sampler instance is already enabled")
+        self.is_enabled = True
+        self.last_time = time.time()
+        action.w_sampler = self
+
+    def disable(self, space):
+        if not self.is_enabled:
+            return      # ignored
+        self.is_enabled = False
+        space.fromcache(SamplerState).action.w_sampler = None
+
+    def _get_or_make_entry(self, w_code):
+        try:
+            return self.data[w_code]
+        except KeyError:
+            entry = SamplerEntry(w_code)
+            self.data[w_code] = entry
+            return entry
+
+    @jit.dont_look_inside
+    def _maybe_sample(self, ec):
+        now = time.time()
+        dt = now - self.last_time
+        if dt < self.interval:
+            return
+        self.last_time = now
+        self._sample(ec, dt)
+
+    def _sample(self, ec, dt):
+        sample = self.samples
+        self.samples = sample + 1
+        frame = ec.gettopframe_nohidden()
+        callee = None
+        depth = 0
+        while frame is not None and depth < self.max_depth:
+            entry = self._get_or_make_entry(frame.getcode())
+            entry._record(sample, dt, callee is None)
+            if callee is not None:
+                subentry = entry._get_or_make_subentry(callee)
+                subentry._record(sample, dt, depth == 1)
+            callee = entry
+            depth += 1
+            frame = ec.getnextframe_nohidden(frame)
+
+    def getstats(self, space):
+        return space.newlist([entry.stats(space)
+                              for entry in self.data.values()])
+
+@unwrap_spec(interval=float, max_depth=int)
+def descr_new_sampler(space, w_type, interval=0.001, max_depth=128):
+    if interval < 0.0:
+        raise oefmt(space.w_ValueError, "interval must not be negative")
+    if max_depth <= 0:
+        raise oefmt(space.w_ValueError, "max_depth must be positive")
+    s = space.allocate_instance(W_Sampler, w_type)
+    s.__init__(space, interval, max_depth)
+    return s
+
+W_Sampler.typedef = TypeDef(
+    '_lsprof.Sampler',
+    __new__ = interp2app(descr_new_sampler),
+    enable = interp2app(W_Sampler.enable),
+    disable = interp2app(W_Sampler.disable),
+    clear = interp2app(W_Sampler.clear),
+    getstats = interp2app(W_Sampler.getstats),
+    interval = interp_attrproperty('interval', W_Sampler, wrapfn="newfloat"),
+    samples = interp_attrproperty('samples', W_Sampler, wrapfn="newint"),
+)
@@ -1,10 +1,16 @@
-
 """ _lsprof module
 """
 
 from pypy.interpreter.mixedmodule import MixedModule
 
 class Module(MixedModule):
-    interpleveldefs = {'Profiler':'interp_lsprof.W_Profiler'}
+    interpleveldefs = {'Profiler':'interp_lsprof.W_Profiler',
+                       'Sampler':'interp_sampler.W_Sampler'}
 
     appleveldefs = {}
+
+    def __init__(self, space, *args):
+        "NOT_RPYTHON"
+        from pypy.module._lsprof.interp_sampler import SamplerState
+        MixedModule.__init__(self, space, *args)
+        SamplerState.setup(space)
@@ -0,0 +1,140 @@
+class AppTestSampler(object):
+    spaceconfig = {
+        "usemodules": ['_lsprof', 'time'],
+    }
+
+    def setup_method(self, meth):
+        self.w_old_interval = self.space.appexec([], """():
+            import sys
+            old = sys.getcheckinterval()
+            sys.setcheckinterval(10)
+            return old
+        """)
+
+    def teardown_method(self, meth):
+        self.space.appexec([self.w_old_interval], """(old):
+            import sys
+            sys.setcheckinterval(old)
+        """)
+
+    def test_repr(self):
+        import _lsprof
+        assert repr(_lsprof.Sampler) == "<type '_lsprof.Sampler'>"
+
+    def test_bad_arguments(self):
+        import _lsprof
+        raises(ValueError, _lsprof.Sampler, -1.0)
+        raises(ValueError, _lsprof.Sampler, max_depth=0)
+        assert _lsprof.Sampler(0.5).interval == 0.5
+
+    def test_samples(self):
+        import _lsprof
+        def leaf(n):
+            x = 0
+            for i in range(n):
+                x += i
+            return x
+        def middle(n):
+            return leaf(n) + leaf(n)
+        def top():
+            for i in range(20):
+                middle(50)
+        sampler = _lsprof.Sampler(0.0)
+        sampler.enable()
+        top()
+        sampler.disable()
+        assert sampler.samples > 0
+        entries = {}
+        for entry in sampler.getstats():
+            assert entry.reccallcount == 0
+            assert entry.inlinetime <= entry.totaltime
+            entries[entry.code.co_name] = entry
+        etop = entries['top']
+        eleaf = entries['leaf']
+        emiddle = entries['middle']
+        assert eleaf.callcount > 0
+        assert eleaf.inlinetime > 0.0
+        # every sample taken in 'leaf' also has 'middle' and 'top' below
+        assert emiddle.callcount >= eleaf.callcount
+        assert etop.callcount >= emiddle.callcount
+        assert etop.totaltime >= emiddle.totaltime >= eleaf.totaltime
+        assert eleaf.calls is None
+        middle2leaf, = emiddle.calls
+        assert middle2leaf.code is leaf.__code__
+        assert middle2leaf.callcount == eleaf.callcount
+        assert middle2leaf.inlinetime == eleaf.inlinetime
+        # no sample is taken while disabled
+        n = sampler.samples
+        top()
+        assert sampler.samples == n
+        sampler.clear()
+        assert sampler.samples == 0
+        assert sampler.getstats() == []
+
+    def test_recursion_counted_once(self):
+        import _lsprof
+        def rec(n):
+            if n == 0:
+                for i in range(200):
+                    pass
+            else:
+                rec(n - 1)
+        sampler = _lsprof.Sampler(0.0)
+        sampler.enable()
+        for i in range(10):
+            rec(5)
+        sampler.disable()
+        entry, = [entry for entry in sampler.getstats()
+                        if entry.code is rec.__code__]
+        assert 0 < entry.callcount <= sampler.samples
+        rec2rec, = entry.calls
+        assert rec2rec.callcount <= entry.callcount
+
+    def test_max_depth(self):
+        import _lsprof
+        def f():
+            for i in range(500):
+                pass
+        def g():
+            f()
+        sampler = _lsprof.Sampler(0.0, max_depth=1)
+        sampler.enable()
+        g()
+        sampler.disable()
+        stats = sampler.getstats()
+        assert 'f' in [entry.code.co_name for entry in stats]
+        # only the top frame of each sample was looked at
+        for entry in stats:
+            assert entry.calls is None
+            assert entry.inlinetime == entry.totaltime
+
+    def test_only_one_enabled(self):
+        import _lsprof
+        s1 = _lsprof.Sampler()
+        s2 = _lsprof.Sampler()
+        s1.enable()
+        try:
+            s1.enable()     # ignored
+            raises(RuntimeError, s2.enable)
+        finally:
+            s1.disable()
+        s2.enable()
+        s2.disable()
+
+    def test_pstats(self):
+        import cProfile, pstats
+        def work():
+            x = 0
+            for i in range(2000):
+                x += i
+        sampler = cProfile.Sampler(0.0)
+        sampler.enable()
+        work()
+        # pstats can be used while the sampler runs
+        stats = pstats.Stats(sampler)
+        work()
+        sampler.disable()
+        keys = [key for key in stats.stats if key[2] == 'work']
+        assert len(keys) == 1
+        cc, nc, tt, ct, callers = stats.stats[keys[0]]
+        assert nc > 0
@@ -13,7 +13,7 @@ from rpython.rlib.rstring import StringBuilder
 #
 # Constants and exposed functions
 
-from rpython.rlib.rsre import rsre_core, rsre_utf8
+from rpython.rlib.rsre import rsre_core, rsre_utf8, rsre_dfa
 from rpython.rlib.rsre.rsre_char import CODESIZE, MAXREPEAT, getlower, set_unicode_db
 
 
@@ -97,6 +97,11 @@ def matchcontext(space, ctx, pattern):
 
 def searchcontext(space, ctx, pattern):
     try:
+        # patterns without backreferences or lookaround that would need
+        # backtracking are searched with a DFA, which is linear-time
+        dfa = rsre_dfa.get_dfa(pattern)
+        if dfa is not None:
+            return rsre_dfa.search_context(ctx, pattern, dfa)
         return rsre_core.search_context(ctx, pattern)
     except rsre_core.Error as e:
         raise OperationError(space.w_RuntimeError, space.newtext(e.msg))
@@ -785,3 +790,90 @@ W_SRE_Scanner.typedef = TypeDef(
     pattern  = interp_attrproperty_w('srepat', W_SRE_Scanner),
 )
 W_SRE_Scanner.typedef.acceptable_as_base_class = False
+
+# ____________________________________________________________
+#
+# SRE_RegexSet class
+# This is a PyPy extension: many patterns that are searched for in the
+# same string.  Most patterns are combined into a single automaton (see
+# rsre_dfa.PatternSet), so that we only do one pass over the string to
+# know which ones match.
+
+class W_SRE_RegexSet(W_Root):
+    def __init__(self, space, patterns_w):
+        self.space = space
+        self.patterns_w = patterns_w
+        self.patternset = rsre_dfa.PatternSet([srepat.code
+                                               for srepat in patterns_w])
+        # the patterns that the automaton doesn't handle
+        self.searched_alone = [False] * len(patterns_w)
+        for i in self.patternset.others:
+            self.searched_alone[i] = True
+
+    def find(self, w_string, pos, endpos):
+        # which patterns match somewhere, ignoring the 'searched_alone' ones
+        space = self.space
+        found = [False] * len(self.patterns_w)
+        if self.patternset.dfa is not None:
+            ctx = self.patterns_w[0].make_ctx(w_string, pos, endpos)
+            try:
+                rsre_dfa.find_matching_patterns(ctx, self.patternset, found)
+            except rsre_core.Error as e:
+                raise OperationError(space.w_RuntimeError, space.newtext(e.msg))
+        return found
+
+    @unwrap_spec(pos=int, endpos=int)
+    def matches_w(self, w_string, pos=0, endpos=sys.maxint):
+        """Return the sorted list of the indices of the patterns that
+        match somewhere in the string."""
+        space = self.space
+        found = self.find(w_string, pos, endpos)
+        result_w = []
+        for i in range(len(found)):
+            if self.searched_alone[i]:
+                srepat = self.patterns_w[i]
+                ctx = srepat.make_ctx(w_string, pos, endpos)
+                found[i] = searchcontext(space, ctx, srepat.code)
+            if found[i]:
+                result_w.append(space.newint(i))
+        return space.newlist(result_w)
+
+    @unwrap_spec(pos=int, endpos=int)
+    def search_w(self, w_string, pos=0, endpos=sys.maxint):
+        """Return a list with, for each pattern, the match object that
+        pattern.search() would return, or None."""
+        space = self.space
+        found = self.find(w_string, pos, endpos)
+        result_w = []
+        for i in range(len(found)):
+            if found[i] or self.searched_alone[i]:
+                w_match = self.patterns_w[i].search_w(w_string, pos, endpos)
+            else:
+                w_match = space.w_None
+            result_w.append(w_match)
+        return space.newlist(result_w)
+
+    def len_w(self):
+        return self.space.newint(len(self.patterns_w))
+
+    def fget_patterns(self, space):
+        return space.newtuple(self.patterns_w[:])
+
+
+def SRE_RegexSet__new__(space, w_subtype, w_patterns):
+    patterns_w = [space.interp_w(W_SRE_Pattern, w_srepat)
+                  for w_srepat in space.listview(w_patterns)]
+    w_regexset = space.allocate_instance(W_SRE_RegexSet, w_subtype)
+    regexset = space.interp_w(W_SRE_RegexSet, w_regexset)
+    regexset.__init__(space, patterns_w)
+    return w_regexset
+
+W_SRE_RegexSet.typedef = TypeDef(
+    'SRE_RegexSet',
+    __new__  = interp2app(SRE_RegexSet__new__),
+    __len__  = interp2app(W_SRE_RegexSet.len_w),
+    matches  = interp2app(W_SRE_RegexSet.matches_w),
+    search   = interp2app(W_SRE_RegexSet.search_w),
+    patterns = GetSetProperty(W_SRE_RegexSet.fget_patterns),
+)
+W_SRE_RegexSet.typedef.acceptable_as_base_class = False
@@ -10,6 +10,7 @@ class Module(MixedModule):
         'MAGIC':          'space.newint(20031017)',
         'MAXREPEAT':      'space.newint(interp_sre.MAXREPEAT)',
         'compile':        'interp_sre.W_SRE_Pattern',
+        'RegexSet':       'interp_sre.W_SRE_RegexSet',
         'getlower':       'interp_sre.w_getlower',
         'getcodesize':    'interp_sre.w_getcodesize',
     }
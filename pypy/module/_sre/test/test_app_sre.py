@@ -1088,6 +1088,76 @@ class AppTestOptimizations:
         assert re.search(".+ab", "wowowowawoabwowo")
         assert None == re.search(".+ab", "wowowaowowo")
 
+    def test_dfa_search(self):
+        import re
+        # exponential with backtracking only
+        assert None == re.search("(a|aa)*[bc][bc]", "a" * 200 + "b")
+        m = re.search("x(ab|c)+y", "xabcxcabcy xy")
+        assert m.span() == (4, 10)
+        assert m.group(1) == "c"
+        assert ["xcy", "xaby"] == [m.group() for m in
+                                   re.finditer("x(?:ab|c)+y", "xcy xy xaby")]
+
+
+class AppTestRegexSet:
+
+    def test_matches(self):
+        import re, _sre
+        routes = [r"/users/\d+", r"/users/new", r"/posts/(\w+)/edit",
+                  r"/static/.*\.css", r"/(?:a|b)+/x"]
+        s = _sre.RegexSet([re.compile(r) for r in routes])
+        assert len(s) == 5
+        assert s.matches("GET /users/42 HTTP/1.1") == [0]
+        assert s.matches("/users/new /posts/x/edit") == [1, 2]
+        assert s.matches("/static/a.css /abba/x") == [3, 4]
+        assert s.matches("nothing") == []
+        assert s.matches("/users/42", 1) == []
+        assert s.matches("/users/42", 0, 6) == []
+
+    def test_search(self):
+        import re, _sre
+        patterns = [re.compile(r"b(\w)"), re.compile("zz"),
+                    re.compile(r"(?:a|ab)+c")]
+        s = _sre.RegexSet(patterns)
+        result = s.search("xabcbd")
+        assert len(result) == 3
+        assert result[0].span() == (2, 4)
+        assert result[0].group(1) == "c"
+        assert result[0].re is patterns[0]
+        assert result[1] is None
+        assert result[2].span() == (1, 4)
+
+    def test_patterns(self):
+        import re, _sre
+        patterns = [re.compile("a"), re.compile("b")]
+        s = _sre.RegexSet(patterns)
+        assert s.patterns == tuple(patterns)
+        raises(TypeError, _sre.RegexSet, ["a"])
+
+    def test_empty(self):
+        import _sre
+        s = _sre.RegexSet([])
+        assert len(s) == 0
+        assert s.matches("abc") == []
+        assert s.search("abc") == []
+
+    def test_unsupported_patterns(self):
+        import re, _sre
+        s = _sre.RegexSet([re.compile("^foo"), re.compile(r"(a)\1"),
+                           re.compile("bar"), re.compile("(?=b)")])
+        assert s.matches("foo aa") == [0, 1]
+        assert s.matches("xbar") == [2, 3]
+        result = s.search("aa foo")
+        assert result[0] is None
+        assert result[1].span() == (0, 2)
+
+    def test_unicode(self):
+        import re, _sre
+        s = _sre.RegexSet([re.compile(u"\u1234+"), re.compile(u"(?:a|\xe9)+b")])
+        assert s.matches(u"x\u1234") == [0]
+        assert s.matches(u"\xe9ab") == [1]
+        assert s.search(u"\xe9ab")[1].span() == (0, 3)
+
 
 class AppTestUnicodeExtra:
     def test_string_attribute(self):
@@ -51,17 +51,26 @@ def VMProfError(space, e):
     return OperationError(w_VMProfError, space.newtext(e.msg))
 
 
-@unwrap_spec(fileno=int, period=float, memory=int, lines=int, native=int, real_time=int)
-def enable(space, fileno, period, memory, lines, native, real_time):
+@unwrap_spec(fileno=int, period=float, memory=int, lines=int, native=int,
+             real_time=int, alloc_sampling=int, alloc_fileno=int)
+def enable(space, fileno, period, memory, lines, native, real_time,
+           alloc_sampling=0, alloc_fileno=-1):
     """Enable vmprof.  Writes go to the given 'fileno', a file descriptor
     opened for writing.  *The file descriptor must remain open at least
     until disable() is called.*
 
     'interval' is a float representing the sampling interval, in seconds.
     Must be smaller than 1.0
+
+    If 'alloc_sampling' is positive, the Python stack and the RPython
+    type (an index in gc.get_typeids_list()) of one allocation every
+    'alloc_sampling' bytes are recorded too, as allocation samples.  They
+    are written to 'alloc_fileno', a second file descriptor, in the format
+    read by rpython/rlib/rvmprof/allocprofile.py.
     """
     try:
-        rvmprof.enable(fileno, period, memory, native, real_time)
+        rvmprof.enable(fileno, period, memory, native, real_time,
+                       alloc_sampling, alloc_fileno)
     except rvmprof.VMProfError as e:
         raise VMProfError(space, e)
 
@@ -107,6 +107,23 @@ class AppTestVMProf(object):
         _vmprof.disable()
         assert _vmprof.is_enabled() is False
 
+    def test_enable_alloc_sampling(self):
+        import _vmprof
+        tmpfile = open(self.tmpfilename, 'wb')
+        allocfile = open(self.tmpfilename2, 'wb')
+        raises(_vmprof.VMProfError, _vmprof.enable, tmpfile.fileno(), 0.01,
+               0, 0, 0, 0, alloc_sampling=64 * 1024)
+        _vmprof.enable(tmpfile.fileno(), 0.01, 0, 0, 0, 0,
+                       alloc_sampling=64 * 1024,
+                       alloc_fileno=allocfile.fileno())
+        assert _vmprof.is_enabled() is True
+        lst = [[i] for i in range(10000)]
+        _vmprof.disable()
+        tmpfile.close()
+        allocfile.close()
+        with open(self.tmpfilename2, 'rb') as f:
+            assert f.read().startswith('VMPROFALLOC\x01')
+
     @py.test.mark.xfail(sys.platform.startswith('freebsd'), reason = "not implemented")
     def test_get_profile_path(self):
         import _vmprof
@@ -5,7 +5,8 @@ from pypy.module.cpyext.api import (cpython_api, CANNOT_FAIL, Py_ssize_t,
                                     build_type_checkers_flags)
 from pypy.module.cpyext.pyerrors import PyErr_BadInternalCall
 from pypy.module.cpyext.pyobject import decref, incref, PyObject, make_ref
-from pypy.objspace.std.listobject import W_ListObject
+from pypy.objspace.std.listobject import (
+    W_ListObject, ObjectListStrategy, EmptyListStrategy)
 from pypy.interpreter.error import oefmt
 
 
@@ -30,6 +31,23 @@ def get_list_storage(space, w_list):
     w_list.convert_to_cpy_strategy(space)
     return CPyListStrategy.unerase(w_list.lstorage)
 
+def is_unboxed_list(w_list):
+    from pypy.module.cpyext.sequence import CPyListStrategy
+    strategy = w_list.strategy
+    return not (isinstance(strategy, CPyListStrategy) or
+                isinstance(strategy, ObjectListStrategy) or
+                isinstance(strategy, EmptyListStrategy))
+
+def get_list_item(space, w_list, index):
+    """Borrowed reference to the item 'index' of the list.  A list of
+    unboxed items, like ints or floats, is not switched to the
+    CPyListStrategy: the PyObject is made from a read-only view instead."""
+    from pypy.module.cpyext.sequence import get_list_view
+    if is_unboxed_list(w_list):
+        return get_list_view(space, w_list).getitem(space, w_list, index)
+    storage = get_list_storage(space, w_list)
+    return storage._elems[index]
+
 @cpython_api([rffi.VOIDP, Py_ssize_t, PyObject], lltype.Void, error=CANNOT_FAIL)
 def PyList_SET_ITEM(space, w_list, index, py_item):
     """Form of PyList_SetItem() without error checking. This is normally
@@ -67,9 +85,8 @@ def PyList_SetItem(space, w_list, index, py_item):
 @cpython_api([rffi.VOIDP, Py_ssize_t], PyObject, result_is_ll=True)
 def PyList_GET_ITEM(space, w_list, index):
     assert isinstance(w_list, W_ListObject)
-    storage = get_list_storage(space, w_list)
     assert 0 <= index < w_list.length()
-    return storage._elems[index]     # borrowed ref
+    return get_list_item(space, w_list, index)     # borrowed ref
 
 @cpython_api([PyObject, Py_ssize_t], PyObject, result_is_ll=True)
 def PyList_GetItem(space, w_list, index):
@@ -81,8 +98,7 @@ def PyList_GetItem(space, w_list, index):
         PyErr_BadInternalCall(space)
     if index < 0 or index >= w_list.length():
         raise oefmt(space.w_IndexError, "list index out of range")
-    storage = get_list_storage(space, w_list)
-    return storage._elems[index]     # borrowed ref
+    return get_list_item(space, w_list, index)     # borrowed ref
 
 
 @cpython_api([PyObject, PyObject], rffi.INT_real, error=-1)
@@ -12,6 +12,7 @@ from pypy.module.cpyext.state import State
 from pypy.objspace.std.typeobject import W_TypeObject
 from pypy.objspace.std.noneobject import W_NoneObject
 from pypy.objspace.std.boolobject import W_BoolObject
+from pypy.objspace.std.intobject import W_IntObject
 from pypy.objspace.std.objectobject import W_ObjectObject
 from rpython.rlib.objectmodel import specialize, we_are_translated
 from rpython.rlib.objectmodel import keepalive_until_here
@@ -69,6 +70,41 @@ add_direct_pyobj_storage(W_NoneObject)
 add_direct_pyobj_storage(W_BoolObject)
 
 
+# Small integers are passed to and from C code all the time.  Like
+# CPython's intobject.c does, we keep one PyIntObject for each of them,
+# which is never freed.  as_pyobj() and make_ref() return it for any
+# W_IntObject of exact type 'int' with the same value, without looking
+# up the rawrefcount dictionaries or allocating anything.
+NSMALLPOSINTS = 257
+NSMALLNEGINTS = 5
+
+class SmallIntCache(object):
+    def __init__(self, space):
+        self.space = space
+        size = NSMALLNEGINTS + NSMALLPOSINTS
+        self.ints_w = [None] * size        # keeps the W_IntObjects alive
+        self.pyobjs = [lltype.nullptr(PyObject.TO)] * size
+
+    @jit.dont_look_inside
+    def get_pyobj(self, intval):
+        index = intval + NSMALLNEGINTS
+        py_obj = self.pyobjs[index]
+        if not py_obj:
+            w_int = self.space.newint(intval)
+            py_obj = create_ref(self.space, w_int, immortal=True)
+            py_obj.c_ob_refcnt += 1     # 1 for kept immortal
+            self.ints_w[index] = w_int
+            self.pyobjs[index] = py_obj
+        return py_obj
+
+def _int_as_pyobj(self, space):
+    if (space.type(self) is space.w_int and
+            -NSMALLNEGINTS <= self.intval < NSMALLPOSINTS):
+        return space.fromcache(SmallIntCache).get_pyobj(self.intval)
+    return w_root_as_pyobj(self, space)
+W_IntObject._cpyext_as_pyobj = _int_as_pyobj
+
+
 class BaseCpyTypedescr(object):
     basestruct = PyObject.TO
     W_BaseObject = W_ObjectObject
@@ -359,8 +395,12 @@ def make_ref(space, w_obj, w_userdata=None, immortal=False):
     """
     assert not is_pyobj(w_obj)
     if w_obj is not None and space.type(w_obj) is space.w_int:
-        state = space.fromcache(State)
         intval = space.int_w(w_obj)
+        if -NSMALLNEGINTS <= intval < NSMALLPOSINTS:
+            py_obj = space.fromcache(SmallIntCache).get_pyobj(intval)
+            py_obj.c_ob_refcnt += 1
+            return py_obj
+        state = space.fromcache(State)
         return state.ccall("PyInt_FromLong", intval)
     return get_pyobj_and_incref(space, w_obj, w_userdata, immortal=False)
 
@@ -1,6 +1,8 @@
 
+import weakref
 from rpython.rlib import rerased, jit
 from rpython.rlib.objectmodel import keepalive_until_here
+from rpython.rlib.rweakref import RWeakKeyDictionary, dead_ref
 from pypy.interpreter.error import OperationError, oefmt
 from pypy.objspace.std.listobject import (
     ListStrategy, UNROLL_CUTOFF, W_ListObject, ObjectListStrategy)
@@ -116,6 +118,8 @@ def PySequence_Fast_ITEMS(space, py_obj):
         from pypy.module.cpyext.listobject import get_list_storage
         w_obj = from_ref(space, py_obj)
         assert isinstance(w_obj, W_ListObject)
+        # C code can write to the array, so even a list of unboxed items
+        # is switched to the CPyListStrategy: a CPyListView is read-only
         storage = get_list_storage(space, w_obj)
         return rffi.cast(PyObjectP, storage._elems)
 
@@ -432,3 +436,54 @@ class CPyListStorage(object):
         for i in range(self._length):
             decref(self.space, self._elems[i])
         lltype.free(self._elems, flavor='raw')
+
+
+class CPyListView(object):
+    """Read-only view of a list of unboxed items, e.g. ints or floats.
+    The items are wrapped, and turned into PyObjects, only when C code
+    reads them; the list keeps its strategy.  The view keeps the wrapped
+    items alive, so that the returned PyObjects stay valid like borrowed
+    references to the items of a CPython list: until the list is modified.
+    """
+    def __init__(self):
+        self.items_w = []
+
+    def _resize(self, length):
+        # only the items that are still in the list are kept alive
+        if len(self.items_w) < length:
+            self.items_w.extend([None] * (length - len(self.items_w)))
+        elif len(self.items_w) > length:
+            del self.items_w[length:]
+
+    def getitem(self, space, w_list, index):
+        self._resize(w_list.length())
+        w_item = w_list.getitem(index)
+        w_old = self.items_w[index]
+        if w_old is not None and space.is_w(w_old, w_item):
+            w_item = w_old       # unboxed items are compared by value
+        else:
+            self.items_w[index] = w_item
+        return as_pyobj(space, w_item)
+
+class CPyListViews(object):
+    def __init__(self, space):
+        self.views = RWeakKeyDictionary(W_ListObject, CPyListView)
+        # the list read last and its view, to avoid a lookup in 'views'
+        # when C code reads the items of a list one after the other.  Both
+        # are weak: the view must die with its list
+        self.last_list_wref = dead_ref
+        self.last_view_wref = dead_ref
+
+def get_list_view(space, w_list):
+    views = space.fromcache(CPyListViews)
+    if views.last_list_wref() is w_list:
+        view = views.last_view_wref()
+        if view is not None:
+            return view
+    view = views.views.get(w_list)
+    if view is None:
+        view = CPyListView()
+        views.views.set(w_list, view)
+    views.last_list_wref = weakref.ref(w_list)
+    views.last_view_wref = weakref.ref(view)
+    return view
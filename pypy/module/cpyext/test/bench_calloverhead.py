@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""Benchmarks for the overhead of calling C extension functions, i.e.
+mostly the cost of turning the arguments into PyObjects and the result
+back into an app-level object.
+
+Run it with a translated pypy-c from the root of the checkout:
+
+    pypy-c pypy/module/cpyext/test/bench_calloverhead.py [loops]
+
+Running it on top of CPython gives the numbers to compare against.
+"""
+from __future__ import print_function
+
+import os, sys, time, tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', '..', '..'))
+from pypy.tool.cpyext.extbuild import get_sys_info_app
+
+
+FUNCTIONS = [
+    ("noargs", "METH_NOARGS",
+     """
+         Py_INCREF(Py_None);
+         return Py_None;
+     """),
+    ("identity", "METH_O",
+     """
+         Py_INCREF(args);
+         return args;
+     """),
+    ("add", "METH_VARARGS",
+     """
+         long a, b;
+         if (!PyArg_ParseTuple(args, "ll", &a, &b))
+             return NULL;
+         return PyInt_FromLong(a + b);
+     """),
+    ("is_true", "METH_O",
+     """
+         PyObject *res = PyObject_IsTrue(args) ? Py_True : Py_False;
+         Py_INCREF(res);
+         return res;
+     """),
+]
+
+# (name, function, argument)
+BENCHMARKS = [
+    ('noargs()',              'noargs',   None),
+    ('identity(small int)',   'identity', 42),
+    ('identity(large int)',   'identity', 10 ** 12),
+    ('identity(None)',        'identity', None),
+    ('identity(type)',        'identity', int),
+    ('identity(str)',         'identity', 'interned'),
+    ('identity(tuple)',       'identity', (1, 2)),
+    ('add(small, small)',     'add',      (3, 4)),
+    ('add(large, large)',     'add',      (10 ** 12, 10 ** 12)),
+    ('is_true(small int)',    'is_true',  7),
+]
+
+def build_module():
+    builddir = tempfile.mkdtemp(prefix='bench_calloverhead-')
+    compiler = get_sys_info_app(builddir)
+    return compiler.import_extension('bench_calloverhead', FUNCTIONS)
+
+def run_one(name, func, arg, loops):
+    if arg is None and func.__name__ == 'noargs':
+        t0 = time.time()
+        for i in xrange(loops):
+            func()
+        t1 = time.time()
+    elif isinstance(arg, tuple) and func.__name__ == 'add':
+        t0 = time.time()
+        for i in xrange(loops):
+            func(*arg)
+        t1 = time.time()
+    else:
+        t0 = time.time()
+        for i in xrange(loops):
+            func(arg)
+        t1 = time.time()
+    print('%-24s %8.4fs  %8.1f ns/call' % (name, t1 - t0,
+                                           (t1 - t0) * 1e9 / loops))
+    return t1 - t0
+
+def main(argv):
+    loops = 1000000
+    if len(argv) > 1:
+        loops = int(argv[1])
+    mod = build_module()
+    for name, funcname, arg in BENCHMARKS:
+        run_one(name, getattr(mod, funcname), arg, loops)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
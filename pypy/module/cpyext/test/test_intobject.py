@@ -4,9 +4,10 @@ from pypy.module.cpyext.intobject import (
     PyInt_Check, PyInt_AsLong, PyInt_AS_LONG,
     PyInt_AsUnsignedLong, PyInt_AsUnsignedLongMask,
     PyInt_AsUnsignedLongLongMask)
-from pypy.module.cpyext.pyobject import (decref, make_ref,
-                                         get_w_obj_and_decref)
+from pypy.module.cpyext.pyobject import (decref, make_ref, as_pyobj,
+                                         from_ref, get_w_obj_and_decref)
 from pypy.module.cpyext.state import State
+from rpython.rlib import rawrefcount
 import sys
 
 class TestIntObject(BaseApiTest):
@@ -66,6 +67,27 @@ class TestIntObject(BaseApiTest):
         assert p_x == p_y
         decref(space, p_y)
 
+    def test_small_ints(self, space):
+        for i in [-5, 0, 1, 42, 256]:
+            p_x = make_ref(space, space.newint(i))
+            p_y = make_ref(space, space.newint(i))
+            # the same immortal PyObject every time, also from as_pyobj()
+            assert p_x == p_y == as_pyobj(space, space.newint(i))
+            assert p_x.c_ob_refcnt > rawrefcount.REFCNT_FROM_PYPY + 2
+            assert space.eq_w(from_ref(space, p_x), space.newint(i))
+            decref(space, p_x)
+            decref(space, p_y)
+        for i in [-6, 257]:
+            w_x = space.newint(i)
+            assert as_pyobj(space, w_x) != as_pyobj(space, space.newint(i))
+        w_MyInt = space.appexec([], """():
+            class MyInt(int):
+                pass
+            return MyInt""")
+        w_x = space.call_function(w_MyInt, space.newint(5))
+        assert as_pyobj(space, w_x) != as_pyobj(space, space.newint(5))
+        assert from_ref(space, as_pyobj(space, w_x)) is w_x
+
     def test_freelist_int_subclass(self, space):
         w_MyInt = space.appexec([], """():
             class MyInt(int):
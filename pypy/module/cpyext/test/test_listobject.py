@@ -66,6 +66,59 @@ class TestListObject(BaseApiTest):
         w_s = api.PyList_GetSlice(w_l, 1, 5)
         assert space.unwrap(w_s) == [2, 1]
 
+    def test_get_item_unboxed(self, space, api):
+        from pypy.module.cpyext.pyobject import from_ref, make_ref
+        from pypy.objspace.std.listobject import (
+            IntegerListStrategy, FloatListStrategy)
+        w_l = space.newlist([space.wrap(10 ** 6 + i) for i in range(5)])
+        assert isinstance(w_l.strategy, IntegerListStrategy)
+        py_item = api.PyList_GetItem(w_l, 2)
+        assert space.int_w(from_ref(space, py_item)) == 10 ** 6 + 2
+        # the list keeps its strategy, and the same item gives the same
+        # PyObject again
+        assert isinstance(w_l.strategy, IntegerListStrategy)
+        assert api.PyList_GET_ITEM(w_l, 2) == py_item
+        space.setitem(w_l, space.wrap(2), space.wrap(-7))
+        py_item = api.PyList_GetItem(w_l, 2)
+        assert space.int_w(from_ref(space, py_item)) == -7
+        space.call_method(w_l, 'append', space.wrap(42))
+        py_item = api.PyList_GetItem(w_l, 5)
+        assert space.int_w(from_ref(space, py_item)) == 42
+        assert isinstance(w_l.strategy, IntegerListStrategy)
+        #
+        w_l = space.newlist([space.wrap(1.5), space.wrap(2.5)])
+        py_item = api.PyList_GetItem(w_l, 1)
+        assert space.float_w(from_ref(space, py_item)) == 2.5
+        assert isinstance(w_l.strategy, FloatListStrategy)
+        # writing switches to the CPyListStrategy
+        assert api.PyList_SetItem(w_l, 0, make_ref(space, space.wrap(0.5))) == 0
+        assert not isinstance(w_l.strategy, FloatListStrategy)
+        assert space.unwrap(w_l) == [0.5, 2.5]
+
+    def test_list_view_lifetime(self, space, api):
+        from pypy.module.cpyext.sequence import get_list_view
+        w_l = space.newlist([space.wrap(10 ** 6 + i) for i in range(5)])
+        api.PyList_GetItem(w_l, 4)
+        view = get_list_view(space, w_l)
+        assert get_list_view(space, w_l) is view
+        assert len(view.items_w) == 5
+        # the items removed from the list are not kept alive any more
+        space.call_method(w_l, 'pop')
+        api.PyList_GetItem(w_l, 0)
+        assert len(view.items_w) == 4
+        # a different list gets a different view
+        w_l2 = space.newlist([space.wrap(1.5)])
+        api.PyList_GetItem(w_l2, 0)
+        assert get_list_view(space, w_l2) is not view
+        assert get_list_view(space, w_l) is view
+        # the view of the list read last dies with its list
+        import gc, weakref
+        w_l3 = space.newlist([space.wrap(2.5)])
+        view_wref = weakref.ref(get_list_view(space, w_l3))
+        del w_l3
+        gc.collect()
+        assert view_wref() is None
+
 class AppTestListObject(AppTestCpythonExtensionBase):
     def test_basic_listobject(self):
         import sys
@@ -85,7 +85,7 @@ class TestSequence(BaseApiTest):
 
     def test_get_slice_fast(self, space, api):
         w_t = space.wrap([1, 2, 3, 4, 5])
-        api.PyList_GetItem(w_t, 0)  # converts to cpy strategy
+        w_t.convert_to_cpy_strategy(space)
         assert space.unwrap(api.PySequence_GetSlice(w_t, 2, 4)) == [3, 4]
         assert space.unwrap(api.PySequence_GetSlice(w_t, 1, -1)) == [2, 3, 4]
 
@@ -217,7 +217,7 @@ class AppTestSetObject(AppTestCpythonExtensionBase):
 class TestCPyListStrategy(BaseApiTest):
     def test_getitem_setitem(self, space, api):
         w_l = space.wrap([1, 2, 3, 4])
-        api.PyList_GetItem(w_l, 0)   # converts to cpy strategy
+        w_l.convert_to_cpy_strategy(space)
         assert space.int_w(space.len(w_l)) == 4
         assert space.int_w(space.getitem(w_l, space.wrap(1))) == 2
         assert space.int_w(space.getitem(w_l, space.wrap(0))) == 1
@@ -231,17 +231,17 @@ class TestCPyListStrategy(BaseApiTest):
         w = space.wrap
         w_l = w([1, 2, 3, 4])
 
-        api.PyList_GetItem(w_l, 0)   # converts to cpy strategy
+        w_l.convert_to_cpy_strategy(space)
         space.call_method(w_l, 'insert', w(0), w(0))
         assert space.int_w(space.len(w_l)) == 5
         assert space.int_w(space.getitem(w_l, w(3))) == 3
 
-        api.PyList_GetItem(w_l, 0)   # converts to cpy strategy
+        w_l.convert_to_cpy_strategy(space)
         space.call_method(w_l, 'sort')
         assert space.int_w(space.len(w_l)) == 5
         assert space.int_w(space.getitem(w_l, w(0))) == 0
 
-        api.PyList_GetItem(w_l, 0)   # converts to cpy strategy
+        w_l.convert_to_cpy_strategy(space)
         w_t = space.wrap(space.fixedview(w_l))
         assert space.int_w(space.len(w_t)) == 5
         assert space.int_w(space.getitem(w_t, w(0))) == 0
@@ -249,22 +249,22 @@ class TestCPyListStrategy(BaseApiTest):
         assert space.int_w(space.len(w_l2)) == 5
         assert space.int_w(space.getitem(w_l2, w(0))) == 0
 
-        api.PyList_GetItem(w_l, 0)   # converts to cpy strategy
+        w_l.convert_to_cpy_strategy(space)
         w_sum = space.add(w_l, w_l)
         assert space.int_w(space.len(w_sum)) == 10
 
-        api.PyList_GetItem(w_l, 0)   # converts to cpy strategy
+        w_l.convert_to_cpy_strategy(space)
         w_prod = space.mul(w_l, space.wrap(2))
         assert space.int_w(space.len(w_prod)) == 10
 
-        api.PyList_GetItem(w_l, 0)   # converts to cpy strategy
+        w_l.convert_to_cpy_strategy(space)
         w_l.inplace_mul(2)
         assert space.int_w(space.len(w_l)) == 10
 
     def test_getstorage_copy(self, space, api):
         w = space.wrap
         w_l = w([1, 2, 3, 4])
-        api.PyList_GetItem(w_l, 0)   # converts to cpy strategy
+        w_l.convert_to_cpy_strategy(space)
 
         w_l1 = w([])
         space.setitem(w_l1, space.newslice(w(0), w(0), w(1)), w_l)
@@ -317,6 +317,55 @@ class AppTestSequenceObject(AppTestCpythonExtensionBase):
         assert module.test_fast_sequence(s[0:-1])
         assert module.test_fast_sequence(s[::-1])
 
+    def test_fast_unboxed_list(self):
+        module = self.import_extension('foo', [
+            ("sum_fast", "METH_O",
+             """
+                Py_ssize_t size, i;
+                double total = 0.0;
+                PyObject *seq = PySequence_Fast(args, "not a sequence");
+                if (seq == NULL)
+                    return NULL;
+                size = PySequence_Fast_GET_SIZE(seq);
+                for (i = 0; i < size; ++i)
+                    total += PyFloat_AsDouble(PySequence_Fast_GET_ITEM(seq, i));
+                Py_DECREF(seq);
+                return PyFloat_FromDouble(total);
+             """),
+            ("set_first", "METH_VARARGS",
+             """
+                PyObject *lst, *item, **objects;
+                if (!PyArg_ParseTuple(args, "OO", &lst, &item))
+                    return NULL;
+                /* the array of PySequence_Fast_ITEMS() is writable */
+                objects = PySequence_Fast_ITEMS(lst);
+                Py_INCREF(item);
+                Py_DECREF(objects[0]);
+                objects[0] = item;
+                if (objects[0] != PySequence_Fast_GET_ITEM(lst, 0)) {
+                    PyErr_SetString(PyExc_AssertionError, "mismatch");
+                    return NULL;
+                }
+                Py_RETURN_NONE;
+             """)])
+        import sys
+        lst = [i * 0.5 for i in range(1000)]
+        assert module.sum_fast(lst) == sum(lst)
+        lst.append(1000.0)
+        lst[0] = 0.25
+        assert module.sum_fast(lst) == sum(lst)
+        ints = [i * 3 for i in range(-100, 1000)]
+        assert module.sum_fast(ints) == sum(ints)
+        if '__pypy__' in sys.builtin_module_names:
+            from __pypy__ import strategy
+            assert strategy(lst) == 'FloatListStrategy'
+            assert strategy(ints) == 'IntegerListStrategy'
+        module.set_first(lst, 42.5)
+        module.set_first(ints, 'x')
+        assert lst[:2] == [42.5, 0.5]
+        assert ints[:2] == ['x', -297]
+        assert module.sum_fast(lst) == sum(lst)
+
     def test_fast_keyerror(self):
         module = self.import_extension('foo', [
             ("test_fast_sequence", "METH_VARARGS",
@@ -49,6 +49,146 @@ def dump_rpy_heap(file):
             fd = file.fileno()
         gc._dump_rpy_heap(fd)
 
+def write_heap_snapshot(file):
+    """Write the snapshot requested by start_heap_snapshot() to the given
+    file (which can be a file, a file name, or a file descriptor).  This
+    raises RuntimeError if it is not ready yet.  Format, with each item
+    being one machine word:
+
+        [version] [edge_interval]
+        [typeindex] [count] [bytes]      for every type seen
+        [-1] [-1] [-1]
+        [typeindex1] [typeindex2]        for every sampled reference
+        [-1] [-1]
+
+    where [typeindex] is as get_rpy_type_index() would return.  Use
+    load_heap_snapshot() to read it back.
+    """
+    if isinstance(file, str):
+        f = open(file, 'wb')
+        try:
+            gc._heap_snapshot_write(f.fileno())
+        finally:
+            f.close()
+    else:
+        if isinstance(file, int):
+            fd = file
+        else:
+            if hasattr(file, 'flush'):
+                file.flush()
+            fd = file.fileno()
+        gc._heap_snapshot_write(fd)
+
+def load_heap_snapshot(file):
+    """Read a file written by write_heap_snapshot() (a file or a file name)
+    and return it as a HeapSnapshot."""
+    if isinstance(file, str):
+        f = open(file, 'rb')
+        try:
+            data = f.read()
+        finally:
+            f.close()
+    else:
+        data = file.read()
+    return HeapSnapshot(data)
+
+def heap_snapshot(edge_interval=0):
+    """Take a heap snapshot now and return it as a HeapSnapshot.  This runs
+    major collection steps until the snapshot is complete.  In a program
+    that must not pause, call start_heap_snapshot() instead and let the
+    regular collections build it, until heap_snapshot_ready() is True.
+    """
+    import os
+    gc.start_heap_snapshot(edge_interval)
+    while not gc.heap_snapshot_ready():
+        gc.collect_step()
+    f = os.tmpfile()
+    try:
+        gc._heap_snapshot_write(f.fileno())
+        f.seek(0)
+        return load_heap_snapshot(f)
+    finally:
+        f.close()
+
+_typenames = None
+
+def _get_typenames():
+    global _typenames
+    if _typenames is None:
+        _typenames = {}
+        try:
+            import zlib
+            data = zlib.decompress(gc.get_typeids_z())
+        except (ImportError, NotImplementedError):
+            pass
+        else:
+            # same format as read by pypy/tool/gcdump.py
+            for num, line in enumerate(data.splitlines()):
+                words = line.split()
+                if num == 0 or not words:
+                    continue
+                if words[0].startswith('member'):
+                    del words[0]
+                if words and words[0] == 'GcStruct':
+                    del words[0]
+                _typenames[num] = ' '.join(words)
+    return _typenames
+
+class HeapSnapshot(object):
+    """The objects of a heap snapshot, grouped by type.
+
+    'types' maps each type index to a (count, bytes) pair.  'edges' maps
+    (typeindex1, typeindex2) pairs to the number of sampled references
+    from an object of the first type to an object of the second one.
+    """
+
+    def __init__(self, data):
+        import array
+        a = array.array('l')
+        a.fromstring(data)
+        if len(a) < 7 or a[0] != 1:
+            raise ValueError("not a heap snapshot")
+        self.edge_interval = a[1]
+        self.types = {}
+        i = 2
+        while a[i] != -1:
+            self.types[a[i]] = (a[i + 1], a[i + 2])
+            i += 3
+        i += 3
+        self.edges = {}
+        while a[i] != -1:
+            key = (a[i], a[i + 1])
+            self.edges[key] = self.edges.get(key, 0) + 1
+            i += 2
+
+    def type_name(self, typeindex):
+        return _get_typenames().get(typeindex, '<typenum %d>' % typeindex)
+
+    def total_bytes(self):
+        return sum([bytes for count, bytes in self.types.values()])
+
+    def diff(self, older):
+        """Compare with an older snapshot.  Returns a list of
+        (typeindex, count_delta, bytes_delta) for the types whose number
+        of objects changed, the ones that grew the most first.
+        """
+        result = []
+        for typeindex in set(self.types) | set(older.types):
+            count1, bytes1 = older.types.get(typeindex, (0, 0))
+            count2, bytes2 = self.types.get(typeindex, (0, 0))
+            if count1 != count2 or bytes1 != bytes2:
+                result.append((typeindex, count2 - count1, bytes2 - bytes1))
+        result.sort(key=lambda item: (-item[2], -item[1], item[0]))
+        return result
+
+    def format_diff(self, older, limit=20):
+        """Return the first 'limit' lines of diff() as a printable table."""
+        lines = []
+        for typeindex, dcount, dbytes in self.diff(older)[:limit]:
+            lines.append('%+10d %+12d  %s' % (dcount, dbytes,
+                                              self.type_name(typeindex)))
+        return '\n'.join(lines)
+
 class GcStats(object):
     def __init__(self, s):
         self._s = s
@@ -34,6 +34,13 @@ class LowLevelGcHooks(GcHooks):
     def is_gc_collect_enabled(self):
         return self.w_hooks.gc_collect_enabled
 
+    def is_alloc_sample_enabled(self):
+        # allocation samples go to vmprof, see _vmprof.enable()
+        if not self.space.config.objspace.usemodules._vmprof:
+            return False
+        from rpython.rlib import rvmprof
+        return rvmprof.is_alloc_sampling_enabled()
+
     def on_gc_minor(self, duration, total_memory_used, pinned_objects):
         action = self.w_hooks.gc_minor
         action.count += 1
@@ -69,6 +76,10 @@ class LowLevelGcHooks(GcHooks):
         action.pinned_objects = pinned_objects
         action.fire()
 
+    def on_alloc_sample(self, typeindex, size):
+        from rpython.rlib import rvmprof
+        rvmprof.sample_allocation(typeindex, size)
+
 
 class W_AppLevelHooks(W_Root):
 
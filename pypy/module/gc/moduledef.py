@@ -20,6 +20,10 @@ class Module(MixedModule):
             self.appleveldefs.update({
                 'dump_rpy_heap': 'app_referents.dump_rpy_heap',
                 'get_stats': 'app_referents.get_stats',
+                'write_heap_snapshot': 'app_referents.write_heap_snapshot',
+                'load_heap_snapshot': 'app_referents.load_heap_snapshot',
+                'heap_snapshot': 'app_referents.heap_snapshot',
+                'HeapSnapshot': 'app_referents.HeapSnapshot',
                 })
             self.interpleveldefs.update({
                 'collect_step': 'interp_gc.collect_step',
@@ -32,6 +36,9 @@ class Module(MixedModule):
                 'get_referrers': 'referents.get_referrers',
                 '_get_stats': 'referents.get_stats',
                 '_dump_rpy_heap': 'referents._dump_rpy_heap',
+                'start_heap_snapshot': 'referents.start_heap_snapshot',
+                'heap_snapshot_ready': 'referents.heap_snapshot_ready',
+                '_heap_snapshot_write': 'referents._heap_snapshot_write',
                 'get_typeids_z': 'referents.get_typeids_z',
                 'get_typeids_list': 'referents.get_typeids_list',
                 'GcRef': 'referents.W_GcRef',
@@ -163,6 +163,29 @@ def _dump_rpy_heap(space, fd):
     if not ok:
         raise missing_operation(space)
 
+@unwrap_spec(edge_interval=int)
+def start_heap_snapshot(space, edge_interval=0):
+    """Request a heap snapshot, made of the objects found alive by the
+    next complete major collection.  It is built while the collection
+    runs, a few steps at a time.  If 'edge_interval' is positive, the
+    references of one object every 'edge_interval' are also sampled."""
+    if not rgc.heap_snapshot_start(edge_interval):
+        raise missing_operation(space)
+
+def heap_snapshot_ready(space):
+    """Return True if the snapshot requested by start_heap_snapshot()
+    is complete and can be written with write_heap_snapshot()."""
+    return space.newbool(
+        rgc.heap_snapshot_state() == rgc.HEAP_SNAPSHOT_READY)
+
+@unwrap_spec(fd=int)
+def _heap_snapshot_write(space, fd):
+    res = rgc.heap_snapshot_write(fd)
+    if res < 0:
+        raise oefmt(space.w_RuntimeError, "no heap snapshot is ready")
+    if res > 0:
+        raise wrap_oserror(space, OSError(res, "write failed"))
+
 def get_typeids_z(space):
     a = rgc.get_typeids_z()
     s = ''.join([a[i] for i in range(len(a))])
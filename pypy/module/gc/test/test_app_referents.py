@@ -1,5 +1,6 @@
 import py, os
 from rpython.tool.udir import udir
+from pypy.tool.pytest.objspace import gettestobjspace
 
 
 def test_interface_to_dump_rpy_heap_str(space):
@@ -37,3 +38,60 @@ def test_interface_to_dump_rpy_heap_fd(space):
             gc.dump_rpy_heap(fd)""")
     except NotImplementedError:
         pass
+
+def write_fake_snapshot(filename, types, edges, edge_interval=0):
+    import array
+    a = array.array('l', [1, edge_interval])
+    for typeindex, (count, bytes) in types:
+        a.extend([typeindex, count, bytes])
+    a.extend([-1, -1, -1])
+    for typeindex1, typeindex2 in edges:
+        a.extend([typeindex1, typeindex2])
+    a.extend([-1, -1])
+    f = open(filename, 'wb')
+    a.tofile(f)
+    f.close()
+
+def test_load_heap_snapshot():
+    space = gettestobjspace(usemodules=['array'])
+    filename = str(udir.join('heap_snapshot.1'))
+    write_fake_snapshot(filename, [(5, (10, 320)), (7, (1, 16))],
+                        [(5, 7), (5, 5), (5, 7)], edge_interval=3)
+    w_res = space.appexec([space.wrap(filename)], """(filename):
+        import gc
+        s = gc.load_heap_snapshot(filename)
+        assert isinstance(s, gc.HeapSnapshot)
+        f = open(filename, 'rb')
+        assert gc.load_heap_snapshot(f).types == s.types
+        f.close()
+        return (s.edge_interval, sorted(s.types.items()),
+                sorted(s.edges.items()), s.total_bytes())""")
+    assert space.unwrap(w_res) == (3, [(5, (10, 320)), (7, (1, 16))],
+                                   [((5, 5), 1), ((5, 7), 2)], 336)
+
+def test_heap_snapshot_diff():
+    space = gettestobjspace(usemodules=['array'])
+    filename1 = str(udir.join('heap_snapshot.old'))
+    filename2 = str(udir.join('heap_snapshot.new'))
+    write_fake_snapshot(filename1, [(1, (10, 100)), (2, (5, 50)),
+                                    (3, (1, 8))], [])
+    write_fake_snapshot(filename2, [(1, (10, 100)), (2, (50, 500)),
+                                    (4, (2, 2000))], [])
+    w_res = space.appexec([space.wrap(filename1), space.wrap(filename2)],
+                          """(filename1, filename2):
+        import gc
+        old = gc.load_heap_snapshot(filename1)
+        new = gc.load_heap_snapshot(filename2)
+        text = new.format_diff(old, limit=2)
+        assert len(text.splitlines()) == 2
+        assert '<typenum 4>' in text or '+2000' in text
+        return new.diff(old)""")
+    assert space.unwrap(w_res) == [(4, 2, 2000), (2, 45, 450), (3, -1, -8)]
+
+def test_bad_heap_snapshot():
+    space = gettestobjspace(usemodules=['array'])
+    filename = str(udir.join('heap_snapshot.bad'))
+    open(filename, 'wb').write('foobar' * 20)
+    space.appexec([space.wrap(filename)], """(filename):
+        import gc
+        raises(ValueError, gc.load_heap_snapshot, filename)""")
@@ -0,0 +1,37 @@
+# Times dot() for a few shapes of float64 matrices:
+#     pypy-c dot_shapes.py [repeat]
+# and with PYPY_NUMPY_THREADS=4 to also split the work between threads.
+import sys
+import time
+
+try:
+    import numpypy as numpy
+except ImportError:
+    import numpy
+
+SHAPES = [
+    ('square 256',        (256, 256),    (256, 256)),
+    ('square 512',        (512, 512),    (512, 512)),
+    ('tall-skinny',       (20000, 64),   (64, 64)),
+    ('skinny-tall',       (64, 20000),   (20000, 64)),
+    ('batched 16x128',    (16, 128, 128), (128, 128)),
+    ('batched right',     (128, 128),    (16, 128, 128)),
+]
+
+def main(r):
+    for name, shape1, shape2 in SHAPES:
+        for dtype in [numpy.float64, numpy.float32, numpy.int64]:
+            x = numpy.ones(shape1, dtype=dtype)
+            y = numpy.ones(shape2, dtype=dtype)
+            a = time.time()
+            for _ in xrange(r):
+                numpy.dot(x, y)
+            b = time.time()
+            print '%-16s %-8s %d runs, %.3f seconds' % (
+                name, numpy.dtype(dtype).name, r, b - a)
+
+try:
+    r = int(sys.argv[1])
+except IndexError:
+    r = 3
+main(r)
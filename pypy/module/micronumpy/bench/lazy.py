@@ -0,0 +1,29 @@
+# Compares a*b + c*d - e computed normally, with four temporary arrays,
+# and with lazy(), in a single loop:
+#     pypy-c lazy.py
+import time
+
+try:
+    import numpypy as numpy
+except:
+    import numpy
+try:
+    from _numpypy.multiarray import lazy
+except ImportError:
+    lazy = None
+
+def bench(name, f, loops=20):
+    t0 = time.time()
+    for i in range(loops):
+        f()
+    t1 = time.time()
+    print '%-12s %8.2f ms' % (name, (t1 - t0) * 1000.0 / loops)
+
+def main():
+    n = 2000000
+    a, b, c, d, e = [numpy.arange(n, dtype=float) for i in range(5)]
+    bench('eager', lambda: a * b + c * d - e)
+    if lazy is not None:
+        bench('lazy', lambda: (lazy(a) * b + lazy(c) * d - e).evaluate())
+
+main()
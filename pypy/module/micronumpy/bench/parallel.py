@@ -0,0 +1,34 @@
+# Run with different values of PYPY_NUMPY_THREADS to compare, e.g.:
+#     PYPY_NUMPY_THREADS=1 pypy-c parallel.py
+#     PYPY_NUMPY_THREADS=4 pypy-c parallel.py
+import time
+
+try:
+    import numpypy as numpy
+except:
+    import numpy
+
+def bench(name, f, loops=20):
+    t0 = time.time()
+    for i in range(loops):
+        f()
+    t1 = time.time()
+    print '%-16s %8.2f ms' % (name, (t1 - t0) * 1000.0 / loops)
+
+def main():
+    a = numpy.arange(4000000, dtype=float)
+    b = numpy.arange(4000000, dtype=float)
+    i = numpy.arange(4000000)
+    out = numpy.zeros(4000000)
+    bench('a + b', lambda: numpy.add(a, b, out=out))
+    bench('a * 2.5', lambda: numpy.multiply(a, 2.5, out=out))
+    bench('a / b', lambda: numpy.true_divide(a, b, out=out))
+    bench('max(a, b)', lambda: numpy.maximum(a, b, out=out))
+    bench('-a', lambda: numpy.negative(a, out=out))
+    bench('a[::2] + b[::2]', lambda: a[::2] + b[::2])
+    bench('i + i', lambda: i + i)
+    bench('a.sum()', a.sum)
+    bench('a.max()', a.max)
+    bench('i.sum()', i.sum)
+
+main()
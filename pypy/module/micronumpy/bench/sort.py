@@ -0,0 +1,43 @@
+# Sorting random arrays of several dtypes and sizes, with each kind.
+# The sort of float64 and int64 arrays of more than 256k items is split
+# among threads if PYPY_NUMPY_THREADS is set, e.g.:
+#     PYPY_NUMPY_THREADS=1 pypy-c sort.py
+#     PYPY_NUMPY_THREADS=4 pypy-c sort.py
+import time
+from random import Random
+
+try:
+    import numpypy as numpy
+except:
+    import numpy
+
+def bench(name, f, loops):
+    t0 = time.time()
+    for i in range(loops):
+        f()
+    t1 = time.time()
+    print '%-36s %10.2f ms' % (name, (t1 - t0) * 1000.0 / loops)
+
+def sort_copy(a, kind):
+    def f():
+        c = a.copy()
+        c.sort(kind=kind)
+    return f
+
+def main():
+    rnd = Random(42)
+    for size in [1000, 100000, 2000000]:
+        values = [rnd.random() * 2e9 - 1e9 for i in range(size)]
+        loops = max(2, 2000000 // size)
+        for dtype in ['int32', 'int64', 'float32', 'float64']:
+            a = numpy.array(values, dtype=dtype)
+            for kind in ['quicksort', 'mergesort', 'heapsort']:
+                bench('sort %s[%d] %s' % (dtype, size, kind),
+                      sort_copy(a, kind), loops)
+            bench('argsort %s[%d] stable' % (dtype, size),
+                  lambda: a.argsort(kind='stable'), loops)
+        a = numpy.array(values, dtype=complex)
+        bench('sort complex[%d] quicksort' % size,
+              sort_copy(a, 'quicksort'), loops)
+
+main()
@@ -9,7 +9,7 @@ from pypy.interpreter.error import oefmt
 from rpython.rlib.objectmodel import specialize, instantiate
 from rpython.rlib.nonconst import NonConstant
 from rpython.rlib.rarithmetic import base_int
-from pypy.module.micronumpy import boxes, ufuncs
+from pypy.module.micronumpy import boxes, ufuncs, lazy
 from pypy.module.micronumpy.arrayops import where
 from pypy.module.micronumpy.ndarray import W_NDimArray
 from pypy.module.micronumpy.ctors import array
@@ -39,10 +39,10 @@ class BadToken(Exception):
 
 SINGLE_ARG_FUNCTIONS = ["sum", "prod", "max", "min", "all", "any",
                         "unegative", "flat", "tostring", "count_nonzero",
-                        "argsort", "cumsum", "logical_xor_reduce"]
+                        "argsort", "sort", "cumsum", "logical_xor_reduce"]
 TWO_ARG_FUNCTIONS = ["dot", 'take', 'searchsorted', 'multiply']
 TWO_ARG_FUNCTIONS_OR_NONE = ['view', 'astype', 'reshape']
-THREE_ARG_FUNCTIONS = ['where']
+THREE_ARG_FUNCTIONS = ['where', 'lazy_mul_add']
 
 class W_TypeObject(W_Root):
     def __init__(self, name):
@@ -829,6 +829,10 @@ class FunctionCall(Node):
                 w_res = arr.descr_get_flatiter(interp.space)
             elif self.name == "argsort":
                 w_res = arr.descr_argsort(interp.space)
+            elif self.name == "sort":
+                # in-place, returns the sorted array
+                arr.descr_sort(interp.space)
+                w_res = arr
             elif self.name == "tostring":
                 arr.descr_tostring(interp.space)
                 w_res = None
@@ -862,6 +866,15 @@ class FunctionCall(Node):
                 raise ArgumentNotAnArray
             if self.name == "where":
                 w_res = where(interp.space, arr, arg1, arg2)
+            elif self.name == "lazy_mul_add":
+                # lazy(arr) * arg1 + arg2, in a single loop
+                w_lazy = lazy.lazy(interp.space, arr)
+                assert isinstance(w_lazy, lazy.W_LazyArray)
+                w_lazy = w_lazy.descr_mul(interp.space, arg1)
+                assert isinstance(w_lazy, lazy.W_LazyArray)
+                w_lazy = w_lazy.descr_add(interp.space, arg2)
+                assert isinstance(w_lazy, lazy.W_LazyArray)
+                w_res = w_lazy.evaluate(interp.space)
             else:
                 assert False # unreachable code
         elif self.name in TWO_ARG_FUNCTIONS_OR_NONE:
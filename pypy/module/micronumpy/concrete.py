@@ -513,9 +513,9 @@ class ConcreteArrayNotOwning(BaseConcreteArray):
         from .selection import argsort_array
         return argsort_array(self, space, w_axis)
 
-    def sort(self, space, w_axis, w_order):
+    def sort(self, space, w_axis, w_order, kind=NPY.QUICKSORT):
         from .selection import sort_array
-        return sort_array(self, space, w_axis, w_order)
+        return sort_array(self, space, w_axis, w_order, kind)
 
     def base(self):
         return None
@@ -675,9 +675,9 @@ class SliceArray(BaseConcreteArray):
         return self.__class__(self.start, new_strides, new_backstrides, new_shape,
                           self, orig_array)
 
-    def sort(self, space, w_axis, w_order):
+    def sort(self, space, w_axis, w_order, kind=NPY.QUICKSORT):
         from .selection import sort_array
-        return sort_array(self, space, w_axis, w_order)
+        return sort_array(self, space, w_axis, w_order, kind)
 
 class NonWritableSliceArray(SliceArray):
     def __init__(self, start, strides, backstrides, shape, parent, orig_arr,
@@ -68,6 +68,11 @@ COMPLEXLTR = 'c'
 SEARCHLEFT = 0
 SEARCHRIGHT = 1
 
+QUICKSORT = 0
+HEAPSORT = 1
+MERGESORT = 2
+STABLESORT = 2
+
 ANYORDER = -1
 CORDER = 0
 FORTRANORDER = 1
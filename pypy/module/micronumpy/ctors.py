@@ -1,7 +1,10 @@
-from pypy.interpreter.error import OperationError, oefmt
+import os
+from pypy.interpreter.error import OperationError, oefmt, wrap_oserror
 from pypy.interpreter.baseobjspace import BufferInterfaceNotFound
 from pypy.interpreter.gateway import unwrap_spec, WrappedDefault
+from rpython.rlib import rmmap
 from rpython.rlib.buffer import SubBuffer
+from rpython.rlib.rarithmetic import intmask, ovfcheck
 from rpython.rlib.rstring import strip_spaces
 from rpython.rlib.rawstorage import RAW_STORAGE_PTR
 from rpython.rtyper.lltypesystem import lltype, rffi
@@ -588,3 +591,129 @@ def frombuffer(space, w_buffer, w_dtype=None, count=-1, offset=0):
         writable = not buf.readonly
     return W_NDimArray.from_shape_and_storage(space, [n], storage, storage_bytes=s,
                                 dtype=dtype, w_base=w_buffer, writable=writable)
+
+
+def _mmap_access(space, w_mmap_mode):
+    # the same modes as numpy.load() and numpy.memmap
+    if space.is_none(w_mmap_mode):
+        return -1
+    mode = space.text_w(w_mmap_mode)
+    if mode == 'r' or mode == 'readonly':
+        return rmmap.ACCESS_READ
+    elif mode == 'r+' or mode == 'readwrite':
+        return rmmap.ACCESS_WRITE
+    elif mode == 'c' or mode == 'copyonwrite':
+        return rmmap.ACCESS_COPY
+    raise oefmt(space.w_ValueError,
+                "mmap_mode must be one of 'r', 'r+' or 'c', not '%s'", mode)
+
+
+def _dtype_has_object(dtype):
+    if dtype.is_object():
+        return True
+    if dtype.subdtype and _dtype_has_object(dtype.subdtype):
+        return True
+    if dtype.fields:
+        for name in dtype.fields:
+            offset, subdtype = dtype.fields[name]
+            if _dtype_has_object(subdtype):
+                return True
+    return False
+
+def _fromfile_mmap(space, w_file, dtype, count, offset, access):
+    from pypy.module.mmap.interp_mmap import W_MMap, mmap_error, OFF_T
+    fd = space.c_filedescriptor_w(w_file)
+    try:
+        pos = ovfcheck(space.int_w(space.call_method(w_file, 'tell')) +
+                       offset)
+    except OverflowError:
+        raise oefmt(space.w_ValueError, "offset too large")
+    try:
+        size = os.fstat(fd).st_size
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    itemsize = dtype.elsize
+    n = max(0, intmask(size - pos)) // itemsize
+    if count >= 0 and count < n:
+        n = count
+    if n == 0:
+        return W_NDimArray.from_shape(space, [0], dtype=dtype)
+    # the mapping must start on a multiple of the allocation granularity
+    start = pos - pos % rmmap.ALLOCATIONGRANULARITY
+    try:
+        mm = rmmap.mmap(fd, pos - start + n * itemsize, access=access,
+                        offset=OFF_T(start))
+    except OSError as e:
+        raise mmap_error(space, e)
+    except rmmap.RMMapError as e:
+        raise mmap_error(space, e)
+    w_base = W_MMap(space, mm)
+    storage = rffi.ptradd(rffi.cast(RAW_STORAGE_PTR, mm.data), pos - start)
+    w_arr = W_NDimArray.from_shape_and_storage(space, [n], storage, dtype,
+                                storage_bytes=n * itemsize, w_base=w_base,
+                                writable=access != rmmap.ACCESS_READ)
+    space.call_method(w_file, 'seek', space.newint(pos + n * itemsize))
+    return w_arr
+
+
+def _fromfile(space, w_file, dtype, count, sep, offset, access):
+    if sep != '':
+        if offset:
+            raise oefmt(space.w_TypeError,
+                        "'offset' argument only permitted for binary files")
+        s = space.bytes_w(space.call_method(w_file, 'read'))
+        return _fromstring_text(space, s, count, sep, len(s), dtype)
+    if access >= 0:
+        return _fromfile_mmap(space, w_file, dtype, count, offset, access)
+    itemsize = dtype.elsize
+    assert itemsize > 0
+    if offset:
+        space.call_method(w_file, 'seek', space.newint(offset),
+                          space.newint(1))
+    if count < 0:
+        w_data = space.call_method(w_file, 'read')
+    else:
+        try:
+            nbytes = ovfcheck(count * itemsize)
+        except OverflowError:
+            raise oefmt(space.w_ValueError, "count too large")
+        w_data = space.call_method(w_file, 'read', space.newint(nbytes))
+    s = space.bytes_w(w_data)
+    # like numpy, a short read gives fewer items
+    n = len(s) // itemsize
+    a = W_NDimArray.from_shape(space, [n], dtype=dtype)
+    loop.fromstring_loop(space, a, dtype, itemsize, s)
+    return a
+
+
+@unwrap_spec(count=int, sep='text', offset=int, w_dtype=WrappedDefault(None))
+def fromfile(space, w_file, w_dtype=None, count=-1, sep='', offset=0,
+             w_mmap_mode=None):
+    """Reads an array from a file object or a file name, starting 'offset'
+    bytes after the current position.  With 'mmap_mode' ('r', 'r+' or 'c',
+    as in numpy.load()) a binary file is not read but mapped in memory:
+    the pages are loaded by the OS when they are used, and are shared with
+    the other processes that map the same file."""
+    dtype = space.interp_w(descriptor.W_Dtype,
+        space.call_function(space.gettypefor(descriptor.W_Dtype), w_dtype))
+    if dtype.elsize == 0:
+        raise oefmt(space.w_ValueError, "itemsize cannot be zero in type")
+    access = _mmap_access(space, w_mmap_mode)
+    if access >= 0 and _dtype_has_object(dtype):
+        # the GC would follow pointers read from the file
+        raise oefmt(space.w_ValueError,
+                    "Array can't be memory-mapped: Python objects in dtype.")
+    if offset < 0:
+        raise oefmt(space.w_ValueError, "offset must be non-negative")
+    if space.isinstance_w(w_file, space.w_text):
+        if access == rmmap.ACCESS_WRITE:
+            mode = 'r+b'
+        else:
+            mode = 'rb'
+        w_file = space.call_function(space.builtin.get('open'), w_file,
+                                     space.newtext(mode))
+        try:
+            return _fromfile(space, w_file, dtype, count, sep, offset, access)
+        finally:
+            space.call_method(w_file, 'close')
+    return _fromfile(space, w_file, dtype, count, sep, offset, access)
@@ -0,0 +1,504 @@
+""" Lazy arrays: numpy.lazy(a) returns a lazyarray, and the arithmetic
+operators and ufuncs called on lazyarrays don't compute anything but
+return another lazyarray, holding the tree of operations.  When the
+value is needed, the whole tree is computed in a single loop over the
+items, without any temporary array (see loop.lazy_eval()).
+
+The JIT compiles one loop per shape of tree: the trees are turned into
+Signatures, which are shared between all the trees of the same shape
+and are the green variable of the loop.
+
+The arrays in the tree are only read when the value is computed, so
+they should not be modified before that.  A tree that grows deeper than
+MAX_DEPTH or with more than MAX_LEAVES arrays is computed right away,
+so that e.g. 'acc = acc + chunk' in a loop doesn't build an endless tree
+and a new Signature, and a new JIT loop, for every step.
+"""
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from rpython.tool.sourcetools import func_with_new_name
+from pypy.module.micronumpy import loop, constants as NPY
+from pypy.module.micronumpy.base import W_NDimArray, convert_to_array
+from pypy.module.micronumpy.boxes import W_GenericBox
+from pypy.module.micronumpy.ctors import numpify
+
+# the trees are computed when they get deeper or have more leaves
+MAX_DEPTH = 32
+MAX_LEAVES = 64
+# the cache of the signatures is emptied when it reaches that size
+MAX_SIGNATURES = 500
+
+
+class Signature(object):
+    """ The shape of a tree of operations, with the dtypes but without the
+    arrays, which are in a LazyFrame.
+    """
+    _immutable_fields_ = ['dtype', 'key']
+
+    def eval(self, space, frame, i):
+        """ Returns the item 'i' of the result, as a box of self.dtype """
+        raise NotImplementedError
+
+
+class LeafSignature(Signature):
+    _immutable_fields_ = ['index']
+
+    def __init__(self, key, dtype, index):
+        self.key = key
+        self.dtype = dtype
+        self.index = index
+
+    def eval(self, space, frame, i):
+        index = self.index
+        return self.dtype.read(frame.arrays[index],
+                               frame.starts[index] + i * frame.strides[index],
+                               0)
+
+
+class Call1Signature(Signature):
+    _immutable_fields_ = ['ufunc', 'calc_dtype', 'child']
+
+    def __init__(self, key, dtype, ufunc, calc_dtype, child):
+        self.key = key
+        self.dtype = dtype
+        self.ufunc = ufunc
+        self.calc_dtype = calc_dtype
+        self.child = child
+
+    def eval(self, space, frame, i):
+        calc_dtype = self.calc_dtype
+        w_val = self.child.eval(space, frame, i).convert_to(space, calc_dtype)
+        return self.ufunc.func(calc_dtype, w_val).convert_to(space,
+                                                             self.dtype)
+
+
+class Call2Signature(Signature):
+    _immutable_fields_ = ['ufunc', 'calc_dtype', 'left', 'right']
+
+    def __init__(self, key, dtype, ufunc, calc_dtype, left, right):
+        self.key = key
+        self.dtype = dtype
+        self.ufunc = ufunc
+        self.calc_dtype = calc_dtype
+        self.left = left
+        self.right = right
+
+    def eval(self, space, frame, i):
+        calc_dtype = self.calc_dtype
+        w_left = self.left.eval(space, frame, i).convert_to(space, calc_dtype)
+        w_right = self.right.eval(space, frame, i).convert_to(space,
+                                                              calc_dtype)
+        return self.ufunc.func(calc_dtype, w_left, w_right).convert_to(
+            space, self.dtype)
+
+
+class LazyFrame(object):
+    """ The arrays read by the leaves of a Signature, with the offset of
+    their first item and the stride to go to the next one.
+    """
+    _immutable_fields_ = ['arrays[*]', 'starts[*]', 'strides[*]']
+
+    def __init__(self, count):
+        self.arrays = [None] * count
+        self.starts = [0] * count
+        self.strides = [0] * count
+        self.next = 0
+
+    def add(self, impl, start, stride):
+        index = self.next
+        self.arrays[index] = impl
+        self.starts[index] = start
+        self.strides[index] = stride
+        self.next = index + 1
+        return index
+
+
+class LazyCache(object):
+    def __init__(self, space):
+        self.signatures = {}
+
+    def get(self, sig):
+        # share the signatures, so that the JIT compiles a single loop for
+        # all the trees of the same shape
+        try:
+            return self.signatures[sig.key]
+        except KeyError:
+            if len(self.signatures) >= MAX_SIGNATURES:
+                self.signatures.clear()
+            self.signatures[sig.key] = sig
+            return sig
+
+
+def _dtype_key(dtype):
+    return '%d%s%d' % (dtype.num, dtype.byteorder, dtype.elsize)
+
+
+class Node(object):
+    """ A node in the tree of operations of a lazyarray, of the dtype
+    'self.dtype', with 'self.depth' levels and 'self.leaves' leaves. """
+
+    def compile(self, space, cache, frame):
+        """ Returns the Signature of the tree, and adds its arrays to
+        'frame' """
+        raise NotImplementedError
+
+    def casting_arg(self, space):
+        """ What to give to find_specialization() for this operand """
+        return W_NDimArray.from_shape(space, [0], self.dtype)
+
+
+class ArrayLeaf(Node):
+    """ An array of the shape of the result, walked with a single stride,
+    or a scalar (with a stride of 0). """
+    def __init__(self, w_arr, stride):
+        self.w_arr = w_arr
+        self.dtype = w_arr.get_dtype()
+        self.stride = stride
+        self.depth = 1
+        self.leaves = 1
+
+    def compile(self, space, cache, frame):
+        impl = self.w_arr.implementation
+        index = frame.add(impl, impl.start, self.stride)
+        key = 'L%d:%s' % (index, _dtype_key(self.dtype))
+        return cache.get(LeafSignature(key, self.dtype, index))
+
+    def casting_arg(self, space):
+        return self.w_arr
+
+
+class Call1Node(Node):
+    def __init__(self, ufunc, calc_dtype, dtype, child):
+        assert calc_dtype is not None and dtype is not None
+        self.ufunc = ufunc
+        self.calc_dtype = calc_dtype
+        self.dtype = dtype
+        self.child = child
+        self.depth = child.depth + 1
+        self.leaves = child.leaves
+
+    def compile(self, space, cache, frame):
+        child = self.child.compile(space, cache, frame)
+        key = '%s:%s:%s(%s)' % (self.ufunc.name, _dtype_key(self.calc_dtype),
+                                _dtype_key(self.dtype), child.key)
+        return cache.get(Call1Signature(key, self.dtype, self.ufunc,
+                                        self.calc_dtype, child))
+
+
+class Call2Node(Node):
+    def __init__(self, ufunc, calc_dtype, dtype, left, right):
+        assert calc_dtype is not None and dtype is not None
+        self.ufunc = ufunc
+        self.calc_dtype = calc_dtype
+        self.dtype = dtype
+        self.left = left
+        self.right = right
+        self.depth = max(left.depth, right.depth) + 1
+        self.leaves = left.leaves + right.leaves
+
+    def compile(self, space, cache, frame):
+        left = self.left.compile(space, cache, frame)
+        right = self.right.compile(space, cache, frame)
+        key = '%s:%s:%s(%s,%s)' % (self.ufunc.name,
+                                   _dtype_key(self.calc_dtype),
+                                   _dtype_key(self.dtype),
+                                   left.key, right.key)
+        return cache.get(Call2Signature(key, self.dtype, self.ufunc,
+                                        self.calc_dtype, left, right))
+
+
+def _flat_stride(w_arr):
+    """ The stride to walk all the items of 'w_arr' in C order, or 0 """
+    impl = w_arr.implementation
+    shape = impl.get_shape()
+    if len(shape) == 1:
+        return impl.get_strides()[0]
+    if impl.get_flags() & NPY.ARRAY_C_CONTIGUOUS:
+        return impl.dtype.elsize
+    return 0
+
+def _supported_dtype(dtype):
+    return not (dtype.is_object() or dtype.is_flexible())
+
+def leaf(space, w_arr):
+    """ A leaf for an array of at least one dimension """
+    stride = _flat_stride(w_arr)
+    if stride == 0:
+        # it cannot be walked with a single stride: work on a copy
+        w_arr = W_NDimArray(w_arr.implementation.copy(space, NPY.CORDER))
+        stride = _flat_stride(w_arr)
+    return ArrayLeaf(w_arr, stride)
+
+
+class W_LazyArray(W_Root):
+    def __init__(self, node, shape):
+        self.node = node
+        self.shape = shape
+        self.w_value = None
+
+    def get_node(self):
+        if self.w_value is not None:
+            return ArrayLeaf(self.w_value, _flat_stride(self.w_value))
+        return self.node
+
+    def evaluate(self, space):
+        if self.w_value is None:
+            node = self.node
+            frame = LazyFrame(node.leaves)
+            sig = node.compile(space, space.fromcache(LazyCache), frame)
+            w_res = W_NDimArray.from_shape(space, self.shape, node.dtype)
+            loop.lazy_eval(space, sig, frame, w_res)
+            self.w_value = w_res
+            self.node = None    # don't keep the arrays alive
+        return self.w_value
+
+    def descr_evaluate(self, space):
+        return self.evaluate(space)
+
+    def descr_get_shape(self, space):
+        return space.newtuple([space.newint(i) for i in self.shape])
+
+    def descr_get_ndim(self, space):
+        return space.newint(len(self.shape))
+
+    def descr_get_size(self, space):
+        size = 1
+        for i in self.shape:
+            size *= i
+        return space.newint(size)
+
+    def descr_get_dtype(self, space):
+        if self.w_value is not None:
+            return self.w_value.get_dtype()
+        return self.node.dtype
+
+    def descr_array(self, space, w_dtype=None):
+        w_res = self.evaluate(space)
+        if space.is_none(w_dtype):
+            return w_res
+        return space.call_method(w_res, 'astype', w_dtype)
+
+    def descr_repr(self, space):
+        return space.newtext('lazy(%s)' %
+                             space.text_w(space.repr(self.evaluate(space))))
+
+    def descr_str(self, space):
+        return space.str(self.evaluate(space))
+
+    def descr_len(self, space):
+        return space.newint(self.shape[0])
+
+    def descr_getitem(self, space, w_idx):
+        return space.getitem(self.evaluate(space), w_idx)
+
+    def descr_iter(self, space):
+        return space.iter(self.evaluate(space))
+
+    def descr_nonzero(self, space):
+        return space.newbool(space.is_true(self.evaluate(space)))
+
+    def descr_getattr(self, space, w_name):
+        # everything else works on the value
+        return space.getattr(self.evaluate(space), w_name)
+
+    def descr_pos(self, space):
+        return self
+
+    def _unaryop_impl(ufunc_name):
+        def impl(self, space):
+            from pypy.module.micronumpy import ufuncs
+            return call1(space, getattr(ufuncs.get(space), ufunc_name), self)
+        return func_with_new_name(impl, "unaryop_%s_impl" % ufunc_name)
+
+    descr_neg = _unaryop_impl("negative")
+    descr_abs = _unaryop_impl("absolute")
+    descr_invert = _unaryop_impl("invert")
+
+    def _binop_impl(ufunc_name):
+        def impl(self, space, w_other):
+            from pypy.module.micronumpy import ufuncs
+            return call2(space, getattr(ufuncs.get(space), ufunc_name),
+                         self, w_other)
+        return func_with_new_name(impl, "binop_%s_impl" % ufunc_name)
+
+    descr_add = _binop_impl("add")
+    descr_sub = _binop_impl("subtract")
+    descr_mul = _binop_impl("multiply")
+    descr_div = _binop_impl("divide")
+    descr_truediv = _binop_impl("true_divide")
+    descr_floordiv = _binop_impl("floor_divide")
+    descr_mod = _binop_impl("mod")
+    descr_pow = _binop_impl("power")
+    descr_and = _binop_impl("bitwise_and")
+    descr_or = _binop_impl("bitwise_or")
+    descr_xor = _binop_impl("bitwise_xor")
+    descr_eq = _binop_impl("equal")
+    descr_ne = _binop_impl("not_equal")
+    descr_lt = _binop_impl("less")
+    descr_le = _binop_impl("less_equal")
+    descr_gt = _binop_impl("greater")
+    descr_ge = _binop_impl("greater_equal")
+
+    def _binop_right_impl(ufunc_name):
+        def impl(self, space, w_other):
+            from pypy.module.micronumpy import ufuncs
+            return call2(space, getattr(ufuncs.get(space), ufunc_name),
+                         w_other, self)
+        return func_with_new_name(impl, "binop_right_%s_impl" % ufunc_name)
+
+    descr_radd = _binop_right_impl("add")
+    descr_rsub = _binop_right_impl("subtract")
+    descr_rmul = _binop_right_impl("multiply")
+    descr_rdiv = _binop_right_impl("divide")
+    descr_rtruediv = _binop_right_impl("true_divide")
+    descr_rfloordiv = _binop_right_impl("floor_divide")
+    descr_rmod = _binop_right_impl("mod")
+    descr_rpow = _binop_right_impl("power")
+    descr_rand = _binop_right_impl("bitwise_and")
+    descr_ror = _binop_right_impl("bitwise_or")
+    descr_rxor = _binop_right_impl("bitwise_xor")
+
+
+def _evaluated(space, w_obj):
+    if isinstance(w_obj, W_LazyArray):
+        return w_obj.evaluate(space)
+    return w_obj
+
+def _as_node(space, w_obj, shape):
+    """ The node for an operand of a lazy operation with the given result
+    shape, or None if it cannot be part of the tree """
+    if isinstance(w_obj, W_LazyArray):
+        if w_obj.shape != shape:
+            return None
+        node = w_obj.get_node()
+        if not _supported_dtype(node.dtype):
+            return None
+        return node
+    w_obj = numpify(space, w_obj)
+    if isinstance(w_obj, W_GenericBox):
+        w_obj = W_NDimArray.from_scalar(space, w_obj)
+    assert isinstance(w_obj, W_NDimArray)
+    if not _supported_dtype(w_obj.get_dtype()):
+        return None
+    if w_obj.is_scalar():
+        return ArrayLeaf(w_obj, 0)
+    if w_obj.get_shape() != shape:
+        return None
+    return leaf(space, w_obj)
+
+def _new_lazy(space, node, shape):
+    w_res = W_LazyArray(node, shape)
+    if node.depth > MAX_DEPTH or node.leaves > MAX_LEAVES:
+        w_res.evaluate(space)
+    return w_res
+
+def _wrap_result(space, w_res):
+    if isinstance(w_res, W_NDimArray) and not w_res.is_scalar():
+        return W_LazyArray(leaf(space, w_res), w_res.get_shape())
+    return w_res
+
+def call1(space, ufunc, w_obj, casting='unsafe'):
+    assert isinstance(w_obj, W_LazyArray)
+    shape = w_obj.shape
+    node = _as_node(space, w_obj, shape)
+    if node is not None:
+        calc_dtype, dt_out, func = ufunc.find_specialization(
+            space, node.dtype, None, casting)
+        if _supported_dtype(calc_dtype) and _supported_dtype(dt_out):
+            return _new_lazy(space, Call1Node(ufunc, calc_dtype, dt_out,
+                                              node), shape)
+    w_res = ufunc.call(space, [_evaluated(space, w_obj)], None, casting, None)
+    return _wrap_result(space, w_res)
+
+def call2(space, ufunc, w_lhs, w_rhs, casting='unsafe'):
+    if isinstance(w_lhs, W_LazyArray):
+        shape = w_lhs.shape
+    else:
+        assert isinstance(w_rhs, W_LazyArray)
+        shape = w_rhs.shape
+    left = _as_node(space, w_lhs, shape)
+    right = _as_node(space, w_rhs, shape)
+    if left is not None and right is not None:
+        calc_dtype, dt_out, func = ufunc.find_specialization(
+            space, left.dtype, right.dtype, None, casting,
+            left.casting_arg(space), right.casting_arg(space))
+        if _supported_dtype(calc_dtype) and _supported_dtype(dt_out):
+            return _new_lazy(space, Call2Node(ufunc, calc_dtype, dt_out,
+                                              left, right), shape)
+    # e.g. broadcasting: compute it now
+    w_res = ufunc.call(space, [_evaluated(space, w_lhs),
+                               _evaluated(space, w_rhs)], None, casting, None)
+    return _wrap_result(space, w_res)
+
+
+def lazy(space, w_obj):
+    """ Returns a lazyarray for 'w_obj': operations on it are only computed
+    when their result is needed, in a single loop """
+    if isinstance(w_obj, W_LazyArray):
+        return w_obj
+    w_arr = convert_to_array(space, w_obj)
+    if w_arr.is_scalar():
+        raise oefmt(space.w_ValueError,
+                    "lazy() needs an array of at least one dimension")
+    if not _supported_dtype(w_arr.get_dtype()):
+        raise oefmt(space.w_TypeError,
+                    "lazy() does not support arrays of dtype %s",
+                    w_arr.get_dtype().get_name())
+    return W_LazyArray(leaf(space, w_arr), w_arr.get_shape())
+
+
+W_LazyArray.typedef = TypeDef("numpy.lazyarray",
+    __module__ = "numpy",
+    evaluate = interp2app(W_LazyArray.descr_evaluate),
+    shape = GetSetProperty(W_LazyArray.descr_get_shape),
+    ndim = GetSetProperty(W_LazyArray.descr_get_ndim),
+    size = GetSetProperty(W_LazyArray.descr_get_size),
+    dtype = GetSetProperty(W_LazyArray.descr_get_dtype),
+    __array__ = interp2app(W_LazyArray.descr_array),
+    __repr__ = interp2app(W_LazyArray.descr_repr),
+    __str__ = interp2app(W_LazyArray.descr_str),
+    __len__ = interp2app(W_LazyArray.descr_len),
+    __getitem__ = interp2app(W_LazyArray.descr_getitem),
+    __iter__ = interp2app(W_LazyArray.descr_iter),
+    __nonzero__ = interp2app(W_LazyArray.descr_nonzero),
+    __getattr__ = interp2app(W_LazyArray.descr_getattr),
+
+    __pos__ = interp2app(W_LazyArray.descr_pos),
+    __neg__ = interp2app(W_LazyArray.descr_neg),
+    __abs__ = interp2app(W_LazyArray.descr_abs),
+    __invert__ = interp2app(W_LazyArray.descr_invert),
+
+    __add__ = interp2app(W_LazyArray.descr_add),
+    __sub__ = interp2app(W_LazyArray.descr_sub),
+    __mul__ = interp2app(W_LazyArray.descr_mul),
+    __div__ = interp2app(W_LazyArray.descr_div),
+    __truediv__ = interp2app(W_LazyArray.descr_truediv),
+    __floordiv__ = interp2app(W_LazyArray.descr_floordiv),
+    __mod__ = interp2app(W_LazyArray.descr_mod),
+    __pow__ = interp2app(W_LazyArray.descr_pow),
+    __and__ = interp2app(W_LazyArray.descr_and),
+    __or__ = interp2app(W_LazyArray.descr_or),
+    __xor__ = interp2app(W_LazyArray.descr_xor),
+
+    __radd__ = interp2app(W_LazyArray.descr_radd),
+    __rsub__ = interp2app(W_LazyArray.descr_rsub),
+    __rmul__ = interp2app(W_LazyArray.descr_rmul),
+    __rdiv__ = interp2app(W_LazyArray.descr_rdiv),
+    __rtruediv__ = interp2app(W_LazyArray.descr_rtruediv),
+    __rfloordiv__ = interp2app(W_LazyArray.descr_rfloordiv),
+    __rmod__ = interp2app(W_LazyArray.descr_rmod),
+    __rpow__ = interp2app(W_LazyArray.descr_rpow),
+    __rand__ = interp2app(W_LazyArray.descr_rand),
+    __ror__ = interp2app(W_LazyArray.descr_ror),
+    __rxor__ = interp2app(W_LazyArray.descr_rxor),
+
+    __eq__ = interp2app(W_LazyArray.descr_eq),
+    __ne__ = interp2app(W_LazyArray.descr_ne),
+    __lt__ = interp2app(W_LazyArray.descr_lt),
+    __le__ = interp2app(W_LazyArray.descr_le),
+    __gt__ = interp2app(W_LazyArray.descr_gt),
+    __ge__ = interp2app(W_LazyArray.descr_ge),
+)
+W_LazyArray.typedef.acceptable_as_base_class = False
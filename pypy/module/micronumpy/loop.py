@@ -7,14 +7,18 @@ from pypy.interpreter.error import oefmt
 from rpython.rlib import jit
 from rpython.rlib.rstring import StringBuilder
 from rpython.rtyper.lltypesystem import lltype, rffi
-from pypy.module.micronumpy import support, constants as NPY
+from pypy.module.micronumpy import support, parallel, constants as NPY
 from pypy.module.micronumpy.base import W_NDimArray, convert_to_array
 from pypy.module.micronumpy.iterators import PureShapeIter, AxisIter, \
     AllButAxisIter, ArrayIter
 from pypy.interpreter.argument import Arguments
 
 
-def call2(space, shape, func, calc_dtype, w_lhs, w_rhs, out):
+def call2(space, shape, func, calc_dtype, w_lhs, w_rhs, out,
+          parallel_op=parallel.OP_NONE):
+    if parallel.call2(space, parallel_op, shape, calc_dtype, w_lhs, w_rhs,
+                      out):
+        return out
     if w_lhs.get_size() == 1:
         w_left = w_lhs.get_scalar_value().convert_to(space, calc_dtype)
         left_iter = left_state = None
@@ -133,7 +137,10 @@ call1_driver = jit.JitDriver(
     greens=['shapelen', 'share_iterator', 'func', 'calc_dtype', 'res_dtype'],
     reds='auto', vectorize=True)
 
-def call1(space, shape, func, calc_dtype, w_obj, w_ret):
+def call1(space, shape, func, calc_dtype, w_obj, w_ret,
+          parallel_op=parallel.OP_NONE):
+    if parallel.call1(space, parallel_op, shape, calc_dtype, w_obj, w_ret):
+        return w_ret
     obj_iter, obj_state = w_obj.create_iter(shape)
     obj_iter.track_index = False
     out_iter, out_state = w_ret.create_iter(shape)
@@ -329,7 +336,12 @@ reduce_flat_driver = jit.JitDriver(
     greens = ['shapelen', 'func', 'done_func', 'calc_dtype'], reds = 'auto',
     vectorize = True)
 
-def reduce_flat(space, func, w_arr, calc_dtype, done_func, identity):
+def reduce_flat(space, func, w_arr, calc_dtype, done_func, identity,
+                parallel_op=parallel.OP_NONE):
+    if done_func is None:
+        w_res = parallel.reduce_flat(space, parallel_op, w_arr, calc_dtype)
+        if w_res is not None:
+            return w_res
     obj_iter, obj_state = w_arr.create_iter()
     if identity is None:
         cur_value = obj_iter.getitem(obj_state).convert_to(space, calc_dtype)
@@ -588,6 +600,8 @@ def multidim_dot(space, left, right, result, dtype, right_critical_dim):
           except where it==(right.ndims-2)
      right should skip 0, 1
     '''
+    if blocked_dot(space, left, right, result, dtype, right_critical_dim):
+        return result
     left_shape = left.get_shape()
     right_shape = right.get_shape()
     left_impl = left.implementation
@@ -624,6 +638,164 @@ def multidim_dot(space, left, right, result, dtype, right_critical_dim):
         lefts = lefti.next(lefts)
     return result
 
+# blocked_dot() walks the right matrix in tiles of DOT_BLOCK_K rows and
+# DOT_BLOCK_N columns, small enough to stay in the cache while all the
+# rows of the left matrix go over them
+DOT_BLOCK_K = 128
+DOT_BLOCK_N = 128
+# below that many multiplications, or with results narrower than that,
+# the simple loop of multidim_dot() is better
+DOT_BLOCKED_MIN_WORK = 1 << 15
+DOT_BLOCKED_MIN_COLUMNS = 16
+
+def _dot_dtype_ok(dtype, calc_dtype):
+    return dtype.num == calc_dtype.num and dtype.is_native()
+
+def _dot_matrix(impl, ndims):
+    ''' returns (rows, row stride, column stride) to walk 'impl' as a
+    matrix, merging all the dimensions but the last one, or (-1, 0, 0)
+    '''
+    shape = impl.get_shape()
+    strides = impl.get_strides()
+    if ndims == 1:
+        return 1, 0, strides[0]
+    if ndims == 2:
+        return shape[0], strides[0], strides[1]
+    if not impl.get_flags() & NPY.ARRAY_C_CONTIGUOUS:
+        return -1, 0, 0
+    elsize = impl.dtype.elsize
+    end = ndims - 1
+    assert end >= 0
+    return support.product(shape[:end]), shape[end] * elsize, elsize
+
+def blocked_dot(space, left, right, result, dtype, right_critical_dim):
+    ''' computes dot(left, right) with a cache-blocked matrix product and
+    returns True, or returns False if multidim_dot() has to do it.
+    Handles native integer, float32 and float64 arrays of the result
+    dtype, with 'left' any number of dimensions and 'right' two, or more
+    if contiguous: then dot() is a matrix product for each of the
+    matrices in 'right', i.e. for each 'b' in right.shape[:-2]
+        result[..., b, :] = dot(left, right[b])
+    The inner loop goes along a row of the result, which is why products
+    with a vector are left to multidim_dot().
+    '''
+    if not (dtype.is_int() and not dtype.is_bool() or
+            dtype.is_float() and (dtype.elsize == 4 or dtype.elsize == 8)):
+        return False
+    if not (_dot_dtype_ok(left.get_dtype(), dtype) and
+            _dot_dtype_ok(right.get_dtype(), dtype) and
+            _dot_dtype_ok(result.get_dtype(), dtype)):
+        return False
+    left_impl = left.implementation
+    right_impl = right.implementation
+    out_impl = result.implementation
+    if (not out_impl.get_flags() & NPY.ARRAY_C_CONTIGUOUS or
+            out_impl.storage == left_impl.storage or
+            out_impl.storage == right_impl.storage):
+        return False
+    left_ndims = len(left_impl.get_shape())
+    right_shape = right_impl.get_shape()
+    right_ndims = len(right_shape)
+    if left_ndims == 0 or right_ndims < 2:
+        return False
+    m, ls0, ls1 = _dot_matrix(left_impl, left_ndims)
+    if m < 0:
+        return False
+    k = left_impl.get_shape()[-1]
+    n = right_shape[-1]
+    if n < DOT_BLOCKED_MIN_COLUMNS or m * k * n < DOT_BLOCKED_MIN_WORK:
+        return False
+    elsize = dtype.elsize
+    if right_ndims == 2:
+        rs0 = right_impl.get_strides()[0]
+        rs1 = right_impl.get_strides()[1]
+        nbatch = 1
+        batch_stride = 0
+    elif right_impl.get_flags() & NPY.ARRAY_C_CONTIGUOUS:
+        rs0 = n * elsize
+        rs1 = elsize
+        end = right_ndims - 2
+        assert end >= 0
+        nbatch = support.product(right_shape[:end])
+        batch_stride = k * n * elsize
+    else:
+        return False
+    # the result has the shape left.shape[:-1] + right.shape[:-2] + (n,)
+    os0 = nbatch * n * elsize
+    os1 = elsize
+    for b in range(nbatch):
+        lstart = left_impl.start
+        rstart = right_impl.start + b * batch_stride
+        ostart = out_impl.start + b * n * elsize
+        if not parallel.dot(space, dtype, m, k, n,
+                            left_impl, lstart, ls0, ls1,
+                            right_impl, rstart, rs0, rs1,
+                            out_impl, ostart, os0, os1):
+            _dot_blocks(dtype, m, k, n, left_impl, lstart, ls0, ls1,
+                        right_impl, rstart, rs0, rs1,
+                        out_impl, ostart, os0, os1)
+    return True
+
+def _dot_blocks(dtype, m, k, n, left_impl, lstart, ls0, ls1,
+                right_impl, rstart, rs0, rs1, out_impl, ostart, os0, os1):
+    j0 = 0
+    while j0 < n:
+        j1 = min(j0 + DOT_BLOCK_N, n)
+        p0 = 0
+        while p0 < k:
+            p1 = min(p0 + DOT_BLOCK_K, k)
+            i = 0
+            while i < m:
+                p = p0
+                while p < p1:
+                    lval = left_impl.getitem(lstart + i * ls0 + p * ls1)
+                    dot_row(dtype, lval, j1 - j0,
+                            right_impl, rstart + p * rs0 + j0 * rs1, rs1,
+                            out_impl, ostart + i * os0 + j0 * os1, os1)
+                    p += 1
+                i += 1
+            p0 = p1
+        j0 = j1
+
+dot_row_driver = jit.JitDriver(name = 'numpy_dot_row',
+                               greens = ['dtype'],
+                               reds = 'auto',
+                               vectorize=True)
+
+def dot_row(dtype, lval, count, right_impl, ri, rs, out_impl, oi, os):
+    # out[j] += lval * right[j] for 'count' items
+    j = 0
+    while j < count:
+        dot_row_driver.jit_merge_point(dtype=dtype)
+        rval = right_impl.getitem(ri)
+        oval = out_impl.getitem(oi)
+        out_impl.setitem(oi, dtype.itemtype.add(oval,
+                                                dtype.itemtype.mul(lval, rval)))
+        ri += jit.promote(rs)
+        oi += jit.promote(os)
+        j += 1
+
+lazy_eval_driver = jit.JitDriver(name = 'numpy_lazy_eval',
+                                 greens = ['sig'],
+                                 reds = 'auto')
+
+def lazy_eval(space, sig, frame, w_res):
+    ''' computes all the items of a lazyarray with the Signature 'sig' and
+    the arrays in 'frame' into the contiguous array 'w_res'.  The JIT
+    compiles one loop for each signature, see lazy.py
+    '''
+    impl = w_res.implementation
+    size = w_res.get_size()
+    offset = impl.start
+    elsize = impl.dtype.elsize
+    i = 0
+    while i < size:
+        lazy_eval_driver.jit_merge_point(sig=sig)
+        impl.setitem(offset, sig.eval(space, frame, i))
+        offset += elsize
+        i += 1
+    return w_res
+
 count_all_true_driver = jit.JitDriver(name = 'numpy_count',
                                       greens = ['shapelen', 'dtype'],
                                       reds = 'auto',
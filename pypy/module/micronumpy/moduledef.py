@@ -19,6 +19,7 @@ class MultiArrayModule(MixedModule):
         'empty_like': 'ctors.empty_like',
         'fromstring': 'ctors.fromstring',
         'frombuffer': 'ctors.frombuffer',
+        'fromfile': 'ctors.fromfile',
 
         'concatenate': 'arrayops.concatenate',
         'count_nonzero': 'arrayops.count_nonzero',
@@ -33,6 +34,8 @@ class MultiArrayModule(MixedModule):
         'typeinfo': 'descriptor.get_dtype_cache(space).w_typeinfo',
         'nditer': 'nditer.W_NDIter',
         'broadcast': 'broadcast.W_Broadcast',
+        'lazyarray': 'lazy.W_LazyArray',
+        'lazy': 'lazy.lazy',
 
         'set_docstring': 'support.descr_set_docstring',
         'VisibleDeprecationWarning': 'support.W_VisibleDeprecationWarning',
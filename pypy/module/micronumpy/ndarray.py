@@ -19,7 +19,7 @@ from pypy.module.micronumpy.base import W_NDimArray, convert_to_array, \
 from pypy.module.micronumpy.concrete import BaseConcreteArray, V_OBJECTSTORE
 from pypy.module.micronumpy.converters import (
     multi_axis_converter, order_converter, shape_converter,
-    searchside_converter, out_converter)
+    searchside_converter, sortkind_converter, out_converter)
 from pypy.module.micronumpy.flagsobj import W_FlagsObject
 from pypy.module.micronumpy.strides import (
     get_shape_from_iterable, shape_agreement, shape_agreement_multiple,
@@ -704,7 +704,8 @@ class __extend__(W_NDimArray):
         return space.newfloat(self.__array_priority__)
 
     def descr_argsort(self, space, w_axis=None, w_kind=None, w_order=None):
-        # happily ignore the kind
+        # all the kinds give a stable sort
+        sortkind_converter(space, w_kind)
         # create a contiguous copy of the array
         # we must do that, because we need a working set. otherwise
         # we would modify the array in-place. Use this to our advantage
@@ -933,13 +934,12 @@ class __extend__(W_NDimArray):
         raise oefmt(space.w_NotImplementedError,
                     "setflags not implemented yet")
 
-    @unwrap_spec(kind='text')
-    def descr_sort(self, space, w_axis=None, kind='quicksort', w_order=None):
-        # happily ignore the kind
+    def descr_sort(self, space, w_axis=None, w_kind=None, w_order=None):
+        kind = sortkind_converter(space, w_kind)
         # modify the array in-place
         if self.is_scalar():
             return
-        return self.implementation.sort(space, w_axis, w_order)
+        return self.implementation.sort(space, w_axis, w_order, kind)
 
     def descr_partition(self, space, __args__):
         return get_appbridge_cache(space).call_method(
@@ -1422,6 +1422,24 @@ class __extend__(W_NDimArray):
         pass
 
 
+def _check_buffer_strides(space, shape, strides, dtype, offset, buflen):
+    # all the items must be inside the buffer, also with negative strides
+    if support.product(shape) == 0:
+        return
+    lo = offset
+    hi = offset + dtype.elsize
+    for i in range(len(shape)):
+        step = (shape[i] - 1) * strides[i]
+        if step < 0:
+            lo += step
+        else:
+            hi += step
+    if lo < 0 or hi > buflen:
+        raise oefmt(space.w_ValueError,
+            'strides is incompatible with shape of requested '
+            'array and size of buffer')
+
+
 @unwrap_spec(offset=int)
 def descr_new_array(space, w_subtype, w_shape, w_dtype=None, w_buffer=None,
                     offset=0, w_strides=None, w_order=None):
@@ -1447,6 +1465,13 @@ def descr_new_array(space, w_subtype, w_shape, w_dtype=None, w_buffer=None,
             raw_ptr = buf.get_raw_address()
         except ValueError:
             raise oefmt(space.w_TypeError, "Only raw buffers are supported")
+        if offset < 0 or offset > buf.getlength():
+            raise oefmt(space.w_ValueError,
+                        "offset must be non-negative and no greater than "
+                        "buffer length (%d)", buf.getlength())
+        if strides is not None and len(strides) == len(shape):
+            _check_buffer_strides(space, shape, strides, dtype, offset,
+                                  buf.getlength())
         if not shape:
             raise oefmt(space.w_TypeError,
                         "numpy scalars from buffers not supported yet")
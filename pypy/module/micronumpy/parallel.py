@@ -0,0 +1,284 @@
+""" Runs some simple ufuncs, reductions, matrix products and sorts over
+large arrays on several threads, with the GIL released.  This is only done
+for arrays of float64 or int64 in native byte order, that can be walked
+with a single stride, and only if the environment variable
+PYPY_NUMPY_THREADS is set to more than 1.  The work itself is done in C,
+see src/parallel.c.
+"""
+import os
+import py
+from rpython.rlib import jit
+from rpython.rlib.objectmodel import keepalive_until_here
+from rpython.rtyper.lltypesystem import lltype, rffi
+from rpython.translator import cdir
+from rpython.translator.tool.cbuild import ExternalCompilationInfo
+from pypy.module.micronumpy import support, constants as NPY
+from pypy.module.micronumpy.base import W_NDimArray
+
+
+# src/parallel.c uses pthreads
+HAVE_THREADS = os.name == 'posix'
+
+srcdir = py.path.local(__file__).dirpath().join('src')
+eci = ExternalCompilationInfo(
+    includes=[srcdir.join('parallel.h')],
+    include_dirs=[str(srcdir), cdir],
+    separate_module_files=[srcdir.join('parallel.c')],
+    libraries=['pthread'])
+
+# must match src/parallel.h
+OP_NONE = 0
+OP_ADD = 1
+OP_SUB = 2
+OP_MUL = 3
+OP_DIV = 4
+OP_MAX = 5
+OP_MIN = 6
+OP_NEG = 7
+OP_ABS = 8
+OP_DOT = 9
+OP_SORT = 10
+OP_MERGE = 11
+
+KIND_FLOAT64 = 0
+KIND_INT64 = 1
+
+# ufunc name -> operation
+OPS = {
+    'add': OP_ADD,
+    'subtract': OP_SUB,
+    'multiply': OP_MUL,
+    'divide': OP_DIV,           # only for floats
+    'true_divide': OP_DIV,
+    'maximum': OP_MAX,
+    'minimum': OP_MIN,
+    'negative': OP_NEG,
+    'absolute': OP_ABS,
+}
+
+def get_op(name):
+    return OPS.get(name, OP_NONE)
+
+c_parallel_call = rffi.llexternal(
+    'pypy_numpy_parallel_call',
+    [rffi.INT, rffi.INT, rffi.SIGNED, rffi.INT,
+     rffi.CCHARP, rffi.SIGNED, rffi.CCHARP, rffi.SIGNED,
+     rffi.CCHARP, rffi.SIGNED],
+    lltype.Void, compilation_info=eci, releasegil=True)
+c_parallel_reduce = rffi.llexternal(
+    'pypy_numpy_parallel_reduce',
+    [rffi.INT, rffi.INT, rffi.SIGNED, rffi.INT,
+     rffi.CCHARP, rffi.SIGNED, rffi.CCHARP],
+    lltype.Void, compilation_info=eci, releasegil=True)
+c_parallel_dot = rffi.llexternal(
+    'pypy_numpy_parallel_dot',
+    [rffi.INT, rffi.SIGNED, rffi.SIGNED, rffi.SIGNED, rffi.INT,
+     rffi.CCHARP, rffi.SIGNED, rffi.SIGNED,
+     rffi.CCHARP, rffi.SIGNED, rffi.SIGNED,
+     rffi.CCHARP, rffi.SIGNED, rffi.SIGNED],
+    lltype.Void, compilation_info=eci, releasegil=True)
+c_parallel_sort = rffi.llexternal(
+    'pypy_numpy_parallel_sort',
+    [rffi.SIGNED, rffi.INT, rffi.CCHARP, rffi.CCHARP],
+    lltype.Void, compilation_info=eci, releasegil=True)
+
+
+class Config(object):
+    """The number of threads is read from the environment the first time
+    it is needed; tests can set it directly."""
+    nthreads = -1
+    threshold = 1 << 16     # minimal number of items to use threads
+    sort_threshold = 1 << 18    # same, for sorting
+
+    def get_nthreads(self):
+        if self.nthreads < 0:
+            nthreads = 1
+            value = os.environ.get('PYPY_NUMPY_THREADS')
+            if value is not None:
+                try:
+                    nthreads = int(value)
+                except ValueError:
+                    pass
+            self.nthreads = max(nthreads, 1)
+        return self.nthreads
+
+config = Config()
+
+def _get_kind(dtype, op):
+    if not dtype.is_native() or dtype.elsize != 8:
+        return -1
+    if dtype.is_float():
+        return KIND_FLOAT64
+    if dtype.is_signed() and op != OP_DIV:
+        return KIND_INT64
+    return -1
+
+def _flat_stride(w_arr, shape, dtype):
+    """Returns the stride in bytes to walk 'w_arr' in the order of the
+    items of an array of the given shape, or 0 if there is none."""
+    impl = w_arr.implementation
+    if impl.dtype is not dtype or impl.get_shape() != shape:
+        return 0
+    if len(shape) == 1:
+        return impl.get_strides()[0]
+    if impl.get_flags() & NPY.ARRAY_C_CONTIGUOUS:
+        return dtype.elsize
+    return 0
+
+def _address(w_arr):
+    impl = w_arr.implementation
+    return support.get_storage_as_int(impl.storage, impl.start)
+
+def _overlaps(w_out, stride_out, w_arr, stride, size, elsize):
+    # 'out' may be exactly the same memory as an input, but must not
+    # overlap partially with it
+    start_out = _address(w_out)
+    start = _address(w_arr)
+    if start_out == start and stride_out == stride:
+        return False
+    lo_out = start_out + min(0, stride_out * (size - 1))
+    hi_out = start_out + max(0, stride_out * (size - 1)) + elsize
+    lo = start + min(0, stride * (size - 1))
+    hi = start + max(0, stride * (size - 1)) + elsize
+    return lo < hi_out and lo_out < hi
+
+def _operand(space, w_arr, shape, calc_dtype, w_out, stride_out, size):
+    """Returns (w_arr, stride) with which the C code can read the operand,
+    or (None, 0)."""
+    if w_arr.get_size() == 1:
+        # a scalar: put it in a one-item array, read with a stride of 0
+        w_value = w_arr.get_scalar_value().convert_to(space, calc_dtype)
+        w_arr = W_NDimArray.from_shape(space, [1], calc_dtype)
+        w_arr.implementation.setitem(0, w_value)
+        return w_arr, 0
+    stride = _flat_stride(w_arr, shape, calc_dtype)
+    if stride == 0 or _overlaps(w_out, stride_out, w_arr, stride, size,
+                                calc_dtype.elsize):
+        return None, 0
+    return w_arr, stride
+
+def _useful(op, size):
+    return (HAVE_THREADS and op != OP_NONE and size >= config.threshold and
+            config.get_nthreads() > 1)
+
+@jit.dont_look_inside
+def call2(space, op, shape, calc_dtype, w_lhs, w_rhs, w_out):
+    """Computes 'w_out = op(w_lhs, w_rhs)' and returns True, or returns
+    False if it cannot be done here."""
+    size = w_out.get_size()
+    if not _useful(op, size) or op == OP_NEG or op == OP_ABS:
+        return False
+    kind = _get_kind(calc_dtype, op)
+    if kind < 0:
+        return False
+    stride_out = _flat_stride(w_out, shape, calc_dtype)
+    if stride_out == 0:
+        return False
+    w_lhs, stride_lhs = _operand(space, w_lhs, shape, calc_dtype,
+                                 w_out, stride_out, size)
+    if w_lhs is None:
+        return False
+    w_rhs, stride_rhs = _operand(space, w_rhs, shape, calc_dtype,
+                                 w_out, stride_out, size)
+    if w_rhs is None:
+        return False
+    c_parallel_call(rffi.cast(rffi.INT, op), rffi.cast(rffi.INT, kind),
+                    size, rffi.cast(rffi.INT, config.get_nthreads()),
+                    rffi.cast(rffi.CCHARP, _address(w_lhs)), stride_lhs,
+                    rffi.cast(rffi.CCHARP, _address(w_rhs)), stride_rhs,
+                    rffi.cast(rffi.CCHARP, _address(w_out)), stride_out)
+    keepalive_until_here(w_lhs)
+    keepalive_until_here(w_rhs)
+    keepalive_until_here(w_out)
+    return True
+
+@jit.dont_look_inside
+def call1(space, op, shape, calc_dtype, w_obj, w_out):
+    """Computes 'w_out = op(w_obj)' and returns True, or returns False
+    if it cannot be done here."""
+    size = w_out.get_size()
+    if not _useful(op, size) or not (op == OP_NEG or op == OP_ABS):
+        return False
+    kind = _get_kind(calc_dtype, op)
+    if kind < 0:
+        return False
+    stride_out = _flat_stride(w_out, shape, calc_dtype)
+    if stride_out == 0:
+        return False
+    w_obj, stride = _operand(space, w_obj, shape, calc_dtype,
+                             w_out, stride_out, size)
+    if w_obj is None:
+        return False
+    c_parallel_call(rffi.cast(rffi.INT, op), rffi.cast(rffi.INT, kind),
+                    size, rffi.cast(rffi.INT, config.get_nthreads()),
+                    rffi.cast(rffi.CCHARP, _address(w_obj)), stride,
+                    lltype.nullptr(rffi.CCHARP.TO), 0,
+                    rffi.cast(rffi.CCHARP, _address(w_out)), stride_out)
+    keepalive_until_here(w_obj)
+    keepalive_until_here(w_out)
+    return True
+
+@jit.dont_look_inside
+def reduce_flat(space, op, w_arr, calc_dtype):
+    """Returns the reduction of all the items of 'w_arr' with 'op' as
+    a box of 'calc_dtype', or None if it cannot be done here.  Sums and
+    products of floats are always left to the sequential loop, so that
+    they give the same result whatever the number of threads."""
+    size = w_arr.get_size()
+    if not _useful(op, size) or not (op == OP_ADD or op == OP_MUL or
+                                     op == OP_MAX or op == OP_MIN):
+        return None
+    kind = _get_kind(calc_dtype, op)
+    if kind < 0:
+        return None
+    if kind == KIND_FLOAT64 and (op == OP_ADD or op == OP_MUL):
+        # the rounding would depend on the number of threads
+        return None
+    shape = w_arr.get_shape()
+    stride = _flat_stride(w_arr, shape, calc_dtype)
+    if stride == 0:
+        return None
+    w_res = W_NDimArray.from_shape(space, [1], calc_dtype)
+    c_parallel_reduce(rffi.cast(rffi.INT, op), rffi.cast(rffi.INT, kind),
+                      size, rffi.cast(rffi.INT, config.get_nthreads()),
+                      rffi.cast(rffi.CCHARP, _address(w_arr)), stride,
+                      rffi.cast(rffi.CCHARP, _address(w_res)))
+    keepalive_until_here(w_arr)
+    return w_res.implementation.getitem(0)
+
+@jit.dont_look_inside
+def dot(space, dtype, m, k, n, left, lstart, ls0, ls1, right, rstart, rs0, rs1,
+        out, ostart, os0, os1):
+    """Adds the product of the (m, k) matrix 'left' and the (k, n) matrix
+    'right' to the (m, n) matrix 'out', all three given as an implementation,
+    the offset of the first item and the strides of the rows and columns.
+    Returns False if it cannot be done here."""
+    if not _useful(OP_DOT, m * k * n) or m < 2:
+        return False
+    kind = _get_kind(dtype, OP_DOT)
+    if kind < 0:
+        return False
+    lptr = support.get_storage_as_int(left.storage, lstart)
+    rptr = support.get_storage_as_int(right.storage, rstart)
+    optr = support.get_storage_as_int(out.storage, ostart)
+    c_parallel_dot(rffi.cast(rffi.INT, kind), m, k, n,
+                   rffi.cast(rffi.INT, config.get_nthreads()),
+                   rffi.cast(rffi.CCHARP, lptr), ls0, ls1,
+                   rffi.cast(rffi.CCHARP, rptr), rs0, rs1,
+                   rffi.cast(rffi.CCHARP, optr), os0, os1)
+    keepalive_until_here(left)
+    keepalive_until_here(right)
+    keepalive_until_here(out)
+    return True
+
+@jit.dont_look_inside
+def sort_keys(keys, tmp, n):
+    """Sorts the 'n' unsigned 64-bit keys in the raw storage 'keys', with
+    'tmp' as scratch space of the same size: every thread sorts a chunk,
+    and the chunks are then merged in pairs.  Returns False if it cannot
+    be done here."""
+    if not (HAVE_THREADS and n >= config.sort_threshold and
+            config.get_nthreads() > 1):
+        return False
+    c_parallel_sort(n, rffi.cast(rffi.INT, config.get_nthreads()), keys, tmp)
+    return True
@@ -1,12 +1,13 @@
 from pypy.interpreter.error import oefmt
 from rpython.rlib.listsort import make_timsort_class
 from rpython.rlib.objectmodel import specialize
-from rpython.rlib.rarithmetic import widen
+from rpython.rlib.rarithmetic import widen, intmask, r_ulonglong
 from rpython.rlib.rawstorage import raw_storage_getitem, raw_storage_setitem, \
         free_raw_storage, alloc_raw_storage
 from rpython.rlib.unroll import unrolling_iterable
 from rpython.rtyper.lltypesystem import rffi, lltype
-from pypy.module.micronumpy import descriptor, types, constants as NPY
+from pypy.module.micronumpy import descriptor, types, parallel, \
+        constants as NPY
 from pypy.module.micronumpy.base import W_NDimArray
 from pypy.module.micronumpy.iterators import AllButAxisIter
 
@@ -17,6 +18,273 @@ all_types = (types.all_float_types + types.all_complex_types +
 all_types = [i for i in all_types if not issubclass(i[0], types.Float16)]
 all_types = unrolling_iterable(all_types)
 
+# below this size, the comparison sorts are faster than a radix sort
+RADIX_SORT_MIN = 256
+# ranges that introsort leaves to the insertion sort
+INTROSORT_SMALL = 16
+
+_unsigned_types = {1: rffi.UCHAR, 2: rffi.USHORT, 4: rffi.UINT,
+                   8: rffi.ULONGLONG}
+
+
+def make_introsort_class(getitem, setitem, length, lt):
+    """A quicksort with a median-of-three pivot, that switches to a
+    heapsort when the recursion gets too deep and to an insertion sort
+    for small ranges.  Not stable.  Same interface as the classes made
+    by make_timsort_class()."""
+
+    class IntroSort(object):
+        def __init__(self, list):
+            self.list = list
+
+        def sort(self):
+            n = length(self.list)
+            depth = 0
+            while (1 << depth) < n:
+                depth += 1
+            self.introsort(0, n, 2 * depth)
+
+        def swap(self, i, j):
+            lst = self.list
+            item = getitem(lst, i)
+            setitem(lst, i, getitem(lst, j))
+            setitem(lst, j, item)
+
+        def introsort(self, lo, hi, depth):
+            while hi - lo > INTROSORT_SMALL:
+                if depth == 0:
+                    self.heapsort(lo, hi)
+                    return
+                depth -= 1
+                p = self.partition(lo, hi - 1)
+                # recurse on the smaller part, loop on the larger one
+                if p - lo < hi - p:
+                    self.introsort(lo, p, depth)
+                    lo = p + 1
+                else:
+                    self.introsort(p + 1, hi, depth)
+                    hi = p
+            self.insertion_sort(lo, hi)
+
+        def partition(self, lo, last):
+            # the first and last items end up on the right side of the
+            # pivot, and stop the inner loops
+            lst = self.list
+            mid = lo + ((last - lo) >> 1)
+            if lt(getitem(lst, mid), getitem(lst, lo)):
+                self.swap(mid, lo)
+            if lt(getitem(lst, last), getitem(lst, mid)):
+                self.swap(last, mid)
+            if lt(getitem(lst, mid), getitem(lst, lo)):
+                self.swap(mid, lo)
+            pivot = getitem(lst, mid)
+            i = lo
+            j = last - 1
+            self.swap(mid, j)
+            while True:
+                i += 1
+                while lt(getitem(lst, i), pivot):
+                    i += 1
+                j -= 1
+                while lt(pivot, getitem(lst, j)):
+                    j -= 1
+                if i >= j:
+                    break
+                self.swap(i, j)
+            self.swap(i, last - 1)
+            return i
+
+        def insertion_sort(self, lo, hi):
+            lst = self.list
+            for i in range(lo + 1, hi):
+                item = getitem(lst, i)
+                j = i
+                while j > lo and lt(item, getitem(lst, j - 1)):
+                    setitem(lst, j, getitem(lst, j - 1))
+                    j -= 1
+                setitem(lst, j, item)
+
+        def sift_down(self, lo, root, end):
+            lst = self.list
+            item = getitem(lst, lo + root)
+            while True:
+                child = 2 * root + 1
+                if lo + child >= end:
+                    break
+                if (lo + child + 1 < end and
+                        lt(getitem(lst, lo + child),
+                           getitem(lst, lo + child + 1))):
+                    child += 1
+                if not lt(item, getitem(lst, lo + child)):
+                    break
+                setitem(lst, lo + root, getitem(lst, lo + child))
+                root = child
+            setitem(lst, lo + root, item)
+
+        def heapsort(self, lo, hi):
+            for root in range((hi - lo) // 2 - 1, -1, -1):
+                self.sift_down(lo, root, hi)
+            for end in range(hi - 1, lo, -1):
+                self.swap(lo, end)
+                self.sift_down(lo, 0, end)
+
+    return IntroSort
+
+
+def make_radix_functions(itemtype, comp_type):
+    """LSD radix sort for integers and floats of up to 8 bytes.  The
+    items are turned into unsigned keys that compare like them, sorted
+    one byte at a time (skipping the bytes that are the same in all keys)
+    and turned back.  It is stable, so it also gives a stable argsort.
+    """
+    TP = itemtype.T
+    size = rffi.sizeof(TP)
+    UTP = _unsigned_types[size]
+    top = r_ulonglong(1) << (size * 8 - 1)
+    mask = (top - 1) | top
+    is_float = comp_type == 'float'
+    is_signed = is_float or itemtype.kind == NPY.SIGNEDLTR
+
+    def get_key(keys, i):
+        return rffi.cast(rffi.ULONGLONG, raw_storage_getitem(UTP, keys, i * size))
+
+    def set_key(keys, i, u):
+        raw_storage_setitem(keys, i * size, rffi.cast(UTP, u))
+
+    def to_key(u):
+        if is_float:
+            # negative floats sort in the reverse order of their bits
+            if u & top:
+                return ~u & mask
+            return u | top
+        elif is_signed:
+            return u ^ top
+        return u
+
+    def from_key(u):
+        if is_float:
+            if u & top:
+                return u ^ top
+            return ~u & mask
+        elif is_signed:
+            return u ^ top
+        return u
+
+    def radix_pass(keys, tmp, idx, idx_tmp, n):
+        """Sorts the first 'n' keys, and the indexes 'idx' along with
+        them unless 'idx' is null.  Returns True if the result ended up
+        in 'tmp' and 'idx_tmp'."""
+        counts = [0] * (size * 256)
+        for i in range(n):
+            u = get_key(keys, i)
+            for b in range(size):
+                counts[b * 256 + (intmask(u >> (b * 8)) & 0xff)] += 1
+        offsets = [0] * 256
+        first = get_key(keys, 0)
+        swapped = False
+        for b in range(size):
+            shift = b * 8
+            base = b * 256
+            if counts[base + (intmask(first >> shift) & 0xff)] == n:
+                continue
+            pos = 0
+            for c in range(256):
+                offsets[c] = pos
+                pos += counts[base + c]
+            for i in range(n):
+                u = get_key(keys, i)
+                c = intmask(u >> shift) & 0xff
+                j = offsets[c]
+                offsets[c] = j + 1
+                set_key(tmp, j, u)
+                if idx:
+                    raw_storage_setitem(idx_tmp, j * INT_SIZE,
+                        raw_storage_getitem(lltype.Signed, idx, i * INT_SIZE))
+            keys, tmp = tmp, keys
+            idx, idx_tmp = idx_tmp, idx
+            swapped = not swapped
+        return swapped
+
+    def radix_sort(storage, start, stride, n):
+        if n == 0:
+            return
+        keys = alloc_raw_storage(n * size, track_allocation=False)
+        tmp = alloc_raw_storage(n * size, track_allocation=False)
+        try:
+            # NaNs go at the end in their original order, the other
+            # items are sorted with their keys
+            k = 0
+            nans = n
+            for i in range(n):
+                offset = start + i * stride
+                if is_float:
+                    v = float(raw_storage_getitem(TP, storage, offset))
+                    if v != v:
+                        nans -= 1
+                        raw_storage_setitem(keys, nans * size,
+                                raw_storage_getitem(UTP, storage, offset))
+                        continue
+                u = rffi.cast(rffi.ULONGLONG,
+                              raw_storage_getitem(UTP, storage, offset))
+                set_key(keys, k, to_key(u))
+                k += 1
+            src = keys
+            if k > 0 and not (size == 8 and
+                              parallel.sort_keys(keys, tmp, k)):
+                if radix_pass(keys, tmp, lltype.nullptr(rffi.CCHARP.TO),
+                              lltype.nullptr(rffi.CCHARP.TO), k):
+                    src = tmp
+            for i in range(k):
+                raw_storage_setitem(storage, start + i * stride,
+                                    rffi.cast(UTP, from_key(get_key(src, i))))
+            for i in range(k, n):
+                raw_storage_setitem(storage, start + i * stride,
+                        raw_storage_getitem(UTP, keys, (n - 1 - i + k) * size))
+        finally:
+            free_raw_storage(keys, track_allocation=False)
+            free_raw_storage(tmp, track_allocation=False)
+
+    def radix_argsort(values, start, stride, indexes, index_start,
+                      index_stride, n):
+        if n == 0:
+            return
+        keys = alloc_raw_storage(n * size, track_allocation=False)
+        tmp = alloc_raw_storage(n * size, track_allocation=False)
+        idx = alloc_raw_storage(n * INT_SIZE, track_allocation=False)
+        idx_tmp = alloc_raw_storage(n * INT_SIZE, track_allocation=False)
+        try:
+            for i in range(n):
+                offset = start + i * stride
+                u = rffi.cast(rffi.ULONGLONG,
+                              raw_storage_getitem(UTP, values, offset))
+                if is_float:
+                    # all NaNs are equal and bigger than anything else,
+                    # and -0.0 is equal to 0.0
+                    v = float(raw_storage_getitem(TP, values, offset))
+                    if v != v:
+                        set_key(keys, i, mask)
+                    elif v == 0.0:
+                        set_key(keys, i, to_key(r_ulonglong(0)))
+                    else:
+                        set_key(keys, i, to_key(u))
+                else:
+                    set_key(keys, i, to_key(u))
+                raw_storage_setitem(idx, i * INT_SIZE, i)
+            result = idx
+            if radix_pass(keys, tmp, idx, idx_tmp, n):
+                result = idx_tmp
+            for i in range(n):
+                raw_storage_setitem(indexes, index_start + i * index_stride,
+                        raw_storage_getitem(lltype.Signed, result,
+                                            i * INT_SIZE))
+        finally:
+            free_raw_storage(keys, track_allocation=False)
+            free_raw_storage(tmp, track_allocation=False)
+            free_raw_storage(idx, track_allocation=False)
+            free_raw_storage(idx_tmp, track_allocation=False)
+
+    return radix_sort, radix_argsort
+
 
 def make_argsort_function(space, itemtype, comp_type, count=1):
     TP = itemtype.T
@@ -119,6 +387,23 @@ def make_argsort_function(space, itemtype, comp_type, count=1):
 
     ArgSort = make_timsort_class(arg_getitem, arg_setitem, arg_length,
                                  arg_getitem_slice, arg_lt)
+    use_radix = count < 2 and step <= 8
+    if use_radix:
+        radix_argsort = make_radix_functions(itemtype, comp_type)[1]
+    else:
+        radix_argsort = None
+
+    def argsort_lane(values, start, stride, indexes, index_start,
+                     index_stride, n):
+        # both sorts are stable, which is fine for any 'kind'
+        if use_radix and n >= RADIX_SORT_MIN:
+            radix_argsort(values, start, stride, indexes, index_start,
+                          index_stride, n)
+            return
+        for i in range(n):
+            raw_storage_setitem(indexes, i * index_stride + index_start, i)
+        r = Repr(index_stride, stride, n, values, indexes, index_start, start)
+        ArgSort(r).sort()
 
     def argsort(arr, space, w_axis):
         if w_axis is space.w_None:
@@ -136,11 +421,8 @@ def make_argsort_function(space, itemtype, comp_type, count=1):
         index_arr = W_NDimArray.from_shape(space, arr.get_shape(), dtype)
         with index_arr.implementation as storage, arr as arr_storage:
             if len(arr.get_shape()) == 1:
-                for i in range(arr.get_size()):
-                    raw_storage_setitem(storage, i * INT_SIZE, i)
-                r = Repr(INT_SIZE, arr.strides[0], arr.get_size(), arr_storage,
-                         storage, 0, arr.start)
-                ArgSort(r).sort()
+                argsort_lane(arr_storage, arr.start, arr.strides[0],
+                             storage, 0, INT_SIZE, arr.get_size())
             else:
                 shape = arr.get_shape()
                 if axis < 0:
@@ -156,12 +438,9 @@ def make_argsort_function(space, itemtype, comp_type, count=1):
                 index_stride_size = index_impl.strides[axis]
                 axis_size = arr.shape[axis]
                 while not arr_iter.done(arr_state):
-                    for i in range(axis_size):
-                        raw_storage_setitem(storage, i * index_stride_size +
-                                            index_state.offset, i)
-                    r = Repr(index_stride_size, stride_size, axis_size,
-                         arr_storage, storage, index_state.offset, arr_state.offset)
-                    ArgSort(r).sort()
+                    argsort_lane(arr_storage, arr_state.offset, stride_size,
+                                 storage, index_state.offset,
+                                 index_stride_size, axis_size)
                     arr_state = arr_iter.next(arr_state)
                     index_state = index_iter.next(index_state)
             return index_arr
@@ -270,8 +549,27 @@ def make_sort_function(space, itemtype, comp_type, count=1):
 
     ArgSort = make_timsort_class(arg_getitem, arg_setitem, arg_length,
                                  arg_getitem_slice, arg_lt)
+    IntroSort = make_introsort_class(arg_getitem, arg_setitem, arg_length,
+                                     arg_lt)
+    use_radix = count < 2 and step <= 8
+    if use_radix:
+        radix_sort = make_radix_functions(itemtype, comp_type)[0]
+    else:
+        radix_sort = None
+
+    def sort_lane(storage, start, stride, n, kind):
+        if use_radix and n >= RADIX_SORT_MIN:
+            radix_sort(storage, start, stride, n)
+            return
+        r = Repr(stride, n, storage, start)
+        if kind == NPY.MERGESORT:
+            ArgSort(r).sort()
+        elif kind == NPY.HEAPSORT:
+            IntroSort(r).heapsort(0, n)
+        else:
+            IntroSort(r).sort()
 
-    def sort(arr, space, w_axis):
+    def sort(arr, space, w_axis, kind):
         if w_axis is space.w_None:
             # note that it's fine to pass None here as we're not going
             # to pass the result around (None is the link to base in slices)
@@ -283,9 +581,8 @@ def make_sort_function(space, itemtype, comp_type, count=1):
             axis = space.int_w(w_axis)
         with arr as storage:
             if len(arr.get_shape()) == 1:
-                r = Repr(arr.strides[0], arr.get_size(), storage,
-                         arr.start)
-                ArgSort(r).sort()
+                sort_lane(storage, arr.start, arr.strides[0], arr.get_size(),
+                          kind)
             else:
                 shape = arr.get_shape()
                 if axis < 0:
@@ -297,14 +594,14 @@ def make_sort_function(space, itemtype, comp_type, count=1):
                 stride_size = arr.strides[axis]
                 axis_size = arr.shape[axis]
                 while not arr_iter.done(arr_state):
-                    r = Repr(stride_size, axis_size, storage, arr_state.offset)
-                    ArgSort(r).sort()
+                    sort_lane(storage, arr_state.offset, stride_size,
+                              axis_size, kind)
                     arr_state = arr_iter.next(arr_state)
 
     return sort
 
 
-def sort_array(arr, space, w_axis, w_order):
+def sort_array(arr, space, w_axis, w_order, kind=NPY.QUICKSORT):
     cache = space.fromcache(SortCache)  # that populates SortClasses
     itemtype = arr.dtype.itemtype
     if arr.dtype.byteorder == NPY.OPPBYTE:
@@ -312,7 +609,7 @@ def sort_array(arr, space, w_axis, w_order):
                     "sorting of non-native byteorder not supported yet")
     for tp in all_types:
         if isinstance(itemtype, tp[0]):
-            return cache._lookup(tp)(arr, space, w_axis)
+            return cache._lookup(tp)(arr, space, w_axis, kind)
     # XXX this should probably be changed
     raise oefmt(space.w_NotImplementedError,
                 "sorting of non-numeric types '%s' is not implemented",
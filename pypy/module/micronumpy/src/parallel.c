@@ -0,0 +1,437 @@
+/* Elementwise operations and reductions over large arrays, split in
+   chunks that run on a small pool of worker threads.  See parallel.py.
+   This code runs without the GIL: it only touches raw memory.
+ */
+
+#include <string.h>
+#include <math.h>
+#include <pthread.h>
+#include "src/precommondefs.h"
+#include "parallel.h"
+
+#define MAX_THREADS   64
+
+
+struct np_task {
+    int op, kind, reduce;
+    Signed start, stop;
+    char *a, *b, *out;
+    Signed sa, sb, so;
+    union { double d; long long l; } result;
+    /* only for PYPY_NP_DOT: the rows start..stop of out = a x b, with
+       'k' and 'n' the other dimensions and sa2, sb2, so2 the strides of
+       the columns */
+    Signed k, n, sa2, sb2, so2;
+    /* PYPY_NP_SORT sorts the keys 'a' start..stop with 'b' as scratch
+       space; PYPY_NP_MERGE merges the sorted runs start..k and k..stop
+       of 'a' into 'out' */
+};
+
+static double ld_d(const char *p) { double v; memcpy(&v, p, 8); return v; }
+static long long ld_l(const char *p) { long long v; memcpy(&v, p, 8); return v; }
+static void st_d(char *p, double v) { memcpy(p, &v, 8); }
+static void st_l(char *p, long long v) { memcpy(p, &v, 8); }
+
+/* integer arithmetic wraps around, like in the RPython code */
+#define WRAP(expr)   ((long long)(unsigned long long)(expr))
+#define U(x)         ((unsigned long long)(x))
+
+#define LOOP2(LD, ST, EXPR)                                     \
+    for (i = t->start; i < t->stop; i++) {                      \
+        x = LD(a);                                              \
+        y = LD(b);                                              \
+        ST(o, EXPR);                                            \
+        a += t->sa;  b += t->sb;  o += t->so;                   \
+    }                                                           \
+    break
+
+#define LOOP1(LD, ST, EXPR)                                     \
+    for (i = t->start; i < t->stop; i++) {                      \
+        x = LD(a);                                              \
+        ST(o, EXPR);                                            \
+        a += t->sa;  o += t->so;                                \
+    }                                                           \
+    break
+
+/* like loop.reduce_flat(): start from the identity if there is one,
+   else from the first item */
+#define REDUCE(LD, INIT, EXPR)                                  \
+    r = (INIT);                                                 \
+    for (i = t->start; i < t->stop; i++) {                      \
+        x = LD(a);                                              \
+        r = (EXPR);                                             \
+        a += t->sa;                                             \
+    }                                                           \
+    break
+
+static void run_float64(struct np_task *t)
+{
+    Signed i;
+    char *a = t->a + t->start * t->sa;
+    char *b = t->b + t->start * t->sb;
+    char *o = t->out + t->start * t->so;
+    double x, y, r;
+
+    if (t->reduce) {
+        /* no sum or product: splitting them in chunks would round
+           differently for every number of threads */
+        switch (t->op) {
+        case PYPY_NP_MAX: REDUCE(ld_d, ld_d(a), (r >= x || r != r) ? r : x);
+        case PYPY_NP_MIN: REDUCE(ld_d, ld_d(a), (r <= x || r != r) ? r : x);
+        default: r = 0.0;
+        }
+        t->result.d = r;
+        return;
+    }
+    switch (t->op) {
+    case PYPY_NP_ADD: LOOP2(ld_d, st_d, x + y);
+    case PYPY_NP_SUB: LOOP2(ld_d, st_d, x - y);
+    case PYPY_NP_MUL: LOOP2(ld_d, st_d, x * y);
+    case PYPY_NP_DIV: LOOP2(ld_d, st_d, x / y);
+    case PYPY_NP_MAX: LOOP2(ld_d, st_d, (x >= y || x != x) ? x : y);
+    case PYPY_NP_MIN: LOOP2(ld_d, st_d, (x <= y || x != x) ? x : y);
+    case PYPY_NP_NEG: LOOP1(ld_d, st_d, -x);
+    case PYPY_NP_ABS: LOOP1(ld_d, st_d, fabs(x));
+    }
+}
+
+static void run_int64(struct np_task *t)
+{
+    Signed i;
+    char *a = t->a + t->start * t->sa;
+    char *b = t->b + t->start * t->sb;
+    char *o = t->out + t->start * t->so;
+    long long x, y, r;
+
+    if (t->reduce) {
+        switch (t->op) {
+        case PYPY_NP_ADD: REDUCE(ld_l, 0, WRAP(U(r) + U(x)));
+        case PYPY_NP_MUL: REDUCE(ld_l, 1, WRAP(U(r) * U(x)));
+        case PYPY_NP_MAX: REDUCE(ld_l, ld_l(a), r >= x ? r : x);
+        case PYPY_NP_MIN: REDUCE(ld_l, ld_l(a), r <= x ? r : x);
+        default: r = 0;
+        }
+        t->result.l = r;
+        return;
+    }
+    switch (t->op) {
+    case PYPY_NP_ADD: LOOP2(ld_l, st_l, WRAP(U(x) + U(y)));
+    case PYPY_NP_SUB: LOOP2(ld_l, st_l, WRAP(U(x) - U(y)));
+    case PYPY_NP_MUL: LOOP2(ld_l, st_l, WRAP(U(x) * U(y)));
+    case PYPY_NP_MAX: LOOP2(ld_l, st_l, x >= y ? x : y);
+    case PYPY_NP_MIN: LOOP2(ld_l, st_l, x <= y ? x : y);
+    case PYPY_NP_NEG: LOOP1(ld_l, st_l, WRAP(0 - U(x)));
+    case PYPY_NP_ABS: LOOP1(ld_l, st_l, x < 0 ? WRAP(0 - U(x)) : x);
+    }
+}
+
+/* out[i, j] += a[i, p] * b[p, j], walking b in tiles of DOT_BLOCK_K rows
+   and DOT_BLOCK_N columns that stay in the cache for all the rows of a.
+   Same loops as loop.blocked_dot(). */
+#define DOT_BLOCK_K   128
+#define DOT_BLOCK_N   128
+
+#define DOT(T, LD, ST, MULADD)                                          \
+    for (j0 = 0; j0 < t->n; j0 += DOT_BLOCK_N) {                        \
+        j1 = j0 + DOT_BLOCK_N < t->n ? j0 + DOT_BLOCK_N : t->n;         \
+        for (p0 = 0; p0 < t->k; p0 += DOT_BLOCK_K) {                    \
+            p1 = p0 + DOT_BLOCK_K < t->k ? p0 + DOT_BLOCK_K : t->k;     \
+            for (i = t->start; i < t->stop; i++) {                      \
+                for (p = p0; p < p1; p++) {                             \
+                    T x = LD(t->a + i * t->sa + p * t->sa2);            \
+                    char *b = t->b + p * t->sb + j0 * t->sb2;           \
+                    char *o = t->out + i * t->so + j0 * t->so2;         \
+                    for (j = j0; j < j1; j++) {                         \
+                        ST(o, MULADD(LD(o), x, LD(b)));                 \
+                        b += t->sb2;  o += t->so2;                      \
+                    }                                                   \
+                }                                                       \
+            }                                                           \
+        }                                                               \
+    }
+
+#define MULADD_D(r, x, y)   ((r) + (x) * (y))
+#define MULADD_L(r, x, y)   WRAP(U(r) + U(x) * U(y))
+
+static void run_dot(struct np_task *t)
+{
+    Signed i, j, p, j0, j1, p0, p1;
+    if (t->kind == PYPY_NP_FLOAT64) {
+        DOT(double, ld_d, st_d, MULADD_D)
+    }
+    else {
+        DOT(long long, ld_l, st_l, MULADD_L)
+    }
+}
+
+/* LSD radix sort of unsigned 64-bit keys, like selection.py */
+static void radix_sort(unsigned long long *keys, unsigned long long *tmp,
+                       Signed n)
+{
+    static const int nbytes = 8;
+    Signed counts[8][256], offsets[256], i, pos;
+    unsigned long long *src = keys, *dst = tmp, *swap;
+    int b, c, shift;
+
+    if (n <= 0)
+        return;
+    memset(counts, 0, sizeof(counts));
+    for (i = 0; i < n; i++)
+        for (b = 0; b < nbytes; b++)
+            counts[b][(keys[i] >> (b * 8)) & 0xff]++;
+    for (b = 0; b < nbytes; b++) {
+        shift = b * 8;
+        if (counts[b][(keys[0] >> shift) & 0xff] == n)
+            continue;
+        for (c = 0, pos = 0; c < 256; c++) {
+            offsets[c] = pos;
+            pos += counts[b][c];
+        }
+        for (i = 0; i < n; i++)
+            dst[offsets[(src[i] >> shift) & 0xff]++] = src[i];
+        swap = src; src = dst; dst = swap;
+    }
+    if (src != keys)
+        memcpy(keys, src, n * sizeof(unsigned long long));
+}
+
+static void run_merge(struct np_task *t)
+{
+    unsigned long long *src = (unsigned long long *)t->a;
+    unsigned long long *dst = (unsigned long long *)t->out;
+    Signed i = t->start, j = t->k, o = t->start;
+
+    while (i < t->k && j < t->stop) {
+        /* take from the left run on ties, to keep the sort stable */
+        if (src[j] < src[i])
+            dst[o++] = src[j++];
+        else
+            dst[o++] = src[i++];
+    }
+    while (i < t->k)
+        dst[o++] = src[i++];
+    while (j < t->stop)
+        dst[o++] = src[j++];
+}
+
+static void run_task(struct np_task *t)
+{
+    if (t->op == PYPY_NP_SORT)
+        radix_sort((unsigned long long *)t->a + t->start,
+                   (unsigned long long *)t->b + t->start,
+                   t->stop - t->start);
+    else if (t->op == PYPY_NP_MERGE)
+        run_merge(t);
+    else if (t->op == PYPY_NP_DOT)
+        run_dot(t);
+    else if (t->kind == PYPY_NP_FLOAT64)
+        run_float64(t);
+    else
+        run_int64(t);
+}
+
+
+/* The pool.  The workers are started the first time they are needed
+   and then wait for more tasks forever.  The calling thread runs tasks
+   too, so everything still works if some workers could not be started,
+   or are gone after a fork(). */
+
+static pthread_mutex_t run_lock = PTHREAD_MUTEX_INITIALIZER;
+static pthread_mutex_t pool_lock = PTHREAD_MUTEX_INITIALIZER;
+static pthread_cond_t pool_work = PTHREAD_COND_INITIALIZER;
+static pthread_cond_t pool_done = PTHREAD_COND_INITIALIZER;
+static int pool_workers = 0;
+static struct np_task *pool_tasks;
+static int pool_ntasks = 0, pool_next = 0, pool_remaining = 0;
+
+/* must be called with pool_lock held; releases it while running */
+static int run_next_task(void)
+{
+    struct np_task *t;
+    if (pool_next >= pool_ntasks)
+        return 0;
+    t = &pool_tasks[pool_next++];
+    pthread_mutex_unlock(&pool_lock);
+    run_task(t);
+    pthread_mutex_lock(&pool_lock);
+    if (--pool_remaining == 0)
+        pthread_cond_broadcast(&pool_done);
+    return 1;
+}
+
+static void *pool_worker(void *arg)
+{
+    pthread_mutex_lock(&pool_lock);
+    while (1) {
+        if (!run_next_task())
+            pthread_cond_wait(&pool_work, &pool_lock);
+    }
+    return NULL;
+}
+
+static void start_workers(int count)
+{
+    pthread_t th;
+    pthread_attr_t attr;
+    pthread_attr_init(&attr);
+    pthread_attr_setdetachstate(&attr, PTHREAD_CREATE_DETACHED);
+    while (pool_workers < count) {
+        if (pthread_create(&th, &attr, pool_worker, NULL) != 0)
+            break;
+        pool_workers++;
+    }
+    pthread_attr_destroy(&attr);
+}
+
+static void run_tasks(struct np_task *tasks, int ntasks)
+{
+    pthread_mutex_lock(&run_lock);
+    pthread_mutex_lock(&pool_lock);
+    start_workers(ntasks - 1);
+    pool_tasks = tasks;
+    pool_ntasks = ntasks;
+    pool_next = 0;
+    pool_remaining = ntasks;
+    pthread_cond_broadcast(&pool_work);
+    while (run_next_task())
+        ;
+    while (pool_remaining > 0)
+        pthread_cond_wait(&pool_done, &pool_lock);
+    pool_ntasks = 0;
+    pool_next = 0;
+    pthread_mutex_unlock(&pool_lock);
+    pthread_mutex_unlock(&run_lock);
+}
+
+static int split(struct np_task *tasks, int op, int kind, int reduce,
+                 Signed n, int nthreads)
+{
+    Signed chunk, start;
+    int i;
+    if (nthreads > MAX_THREADS)
+        nthreads = MAX_THREADS;
+    if (nthreads < 1)
+        nthreads = 1;
+    chunk = (n + nthreads - 1) / nthreads;
+    for (i = 0, start = 0; start < n; i++, start += chunk) {
+        tasks[i].op = op;
+        tasks[i].kind = kind;
+        tasks[i].reduce = reduce;
+        tasks[i].start = start;
+        tasks[i].stop = start + chunk < n ? start + chunk : n;
+    }
+    return i;
+}
+
+void pypy_numpy_parallel_call(int op, int kind, Signed n, int nthreads,
+                              char *a, Signed stride_a,
+                              char *b, Signed stride_b,
+                              char *out, Signed stride_out)
+{
+    struct np_task tasks[MAX_THREADS];
+    int i, ntasks = split(tasks, op, kind, 0, n, nthreads);
+    for (i = 0; i < ntasks; i++) {
+        tasks[i].a = a;
+        tasks[i].sa = stride_a;
+        tasks[i].b = b;
+        tasks[i].sb = stride_b;
+        tasks[i].out = out;
+        tasks[i].so = stride_out;
+    }
+    run_tasks(tasks, ntasks);
+}
+
+void pypy_numpy_parallel_reduce(int op, int kind, Signed n, int nthreads,
+                                char *a, Signed stride_a, char *result)
+{
+    struct np_task tasks[MAX_THREADS];
+    struct np_task last;
+    int i, ntasks = split(tasks, op, kind, 1, n, nthreads);
+    for (i = 0; i < ntasks; i++) {
+        tasks[i].a = a;
+        tasks[i].sa = stride_a;
+        tasks[i].b = tasks[i].out = NULL;
+        tasks[i].sb = tasks[i].so = 0;
+    }
+    run_tasks(tasks, ntasks);
+
+    /* combine the partial results, in order */
+    last.op = op;
+    last.kind = kind;
+    last.reduce = 1;
+    last.start = 0;
+    last.stop = ntasks;
+    last.a = (char *)&tasks[0].result;
+    last.sa = sizeof(struct np_task);
+    last.b = last.out = NULL;
+    last.sb = last.so = 0;
+    run_task(&last);
+    if (kind == PYPY_NP_FLOAT64)
+        st_d(result, last.result.d);
+    else
+        st_l(result, last.result.l);
+}
+
+void pypy_numpy_parallel_dot(int kind, Signed m, Signed k, Signed n,
+                             int nthreads,
+                             char *a, Signed stride_a0, Signed stride_a1,
+                             char *b, Signed stride_b0, Signed stride_b1,
+                             char *out, Signed stride_out0,
+                             Signed stride_out1)
+{
+    struct np_task tasks[MAX_THREADS];
+    int i, ntasks = split(tasks, PYPY_NP_DOT, kind, 0, m, nthreads);
+    for (i = 0; i < ntasks; i++) {
+        tasks[i].a = a;
+        tasks[i].sa = stride_a0;
+        tasks[i].sa2 = stride_a1;
+        tasks[i].b = b;
+        tasks[i].sb = stride_b0;
+        tasks[i].sb2 = stride_b1;
+        tasks[i].out = out;
+        tasks[i].so = stride_out0;
+        tasks[i].so2 = stride_out1;
+        tasks[i].k = k;
+        tasks[i].n = n;
+    }
+    run_tasks(tasks, ntasks);
+}
+
+void pypy_numpy_parallel_sort(Signed n, int nthreads, char *keys, char *tmp)
+{
+    struct np_task tasks[MAX_THREADS];
+    Signed bounds[MAX_THREADS + 1];
+    char *src = keys, *dst = tmp, *swap;
+    int i, nruns, ntasks = split(tasks, PYPY_NP_SORT, 0, 0, n, nthreads);
+
+    for (i = 0; i < ntasks; i++) {
+        tasks[i].a = keys;
+        tasks[i].b = tmp;
+        bounds[i] = tasks[i].start;
+    }
+    run_tasks(tasks, ntasks);
+    nruns = ntasks;
+    bounds[nruns] = n;
+
+    /* merge the sorted runs two by two, until there is only one left */
+    while (nruns > 1) {
+        ntasks = 0;
+        for (i = 0; i < nruns; i += 2) {
+            struct np_task *t = &tasks[ntasks++];
+            t->op = PYPY_NP_MERGE;
+            t->a = src;
+            t->out = dst;
+            t->start = bounds[i];
+            t->k = bounds[i + 1];
+            t->stop = i + 2 <= nruns ? bounds[i + 2] : bounds[i + 1];
+        }
+        run_tasks(tasks, ntasks);
+        for (i = 0; i < ntasks; i++)
+            bounds[i] = tasks[i].start;
+        bounds[ntasks] = n;
+        nruns = ntasks;
+        swap = src; src = dst; dst = swap;
+    }
+    if (src != keys)
+        memcpy(keys, src, n * sizeof(unsigned long long));
+}
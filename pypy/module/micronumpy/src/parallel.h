@@ -0,0 +1,36 @@
+/* operations, see parallel.py */
+#define PYPY_NP_ADD   1
+#define PYPY_NP_SUB   2
+#define PYPY_NP_MUL   3
+#define PYPY_NP_DIV   4
+#define PYPY_NP_MAX   5
+#define PYPY_NP_MIN   6
+#define PYPY_NP_NEG   7
+#define PYPY_NP_ABS   8
+#define PYPY_NP_DOT   9
+#define PYPY_NP_SORT  10
+#define PYPY_NP_MERGE 11
+
+/* kinds of items */
+#define PYPY_NP_FLOAT64   0
+#define PYPY_NP_INT64     1
+
+RPY_EXTERN void pypy_numpy_parallel_call(int op, int kind, Signed n,
+                                         int nthreads,
+                                         char *a, Signed stride_a,
+                                         char *b, Signed stride_b,
+                                         char *out, Signed stride_out);
+RPY_EXTERN void pypy_numpy_parallel_reduce(int op, int kind, Signed n,
+                                           int nthreads,
+                                           char *a, Signed stride_a,
+                                           char *result);
+RPY_EXTERN void pypy_numpy_parallel_dot(int kind, Signed m, Signed k,
+                                        Signed n, int nthreads,
+                                        char *a, Signed stride_a0,
+                                        Signed stride_a1,
+                                        char *b, Signed stride_b0,
+                                        Signed stride_b1,
+                                        char *out, Signed stride_out0,
+                                        Signed stride_out1);
+RPY_EXTERN void pypy_numpy_parallel_sort(Signed n, int nthreads,
+                                         char *keys, char *tmp);
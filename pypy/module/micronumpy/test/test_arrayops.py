@@ -1,3 +1,4 @@
+from pypy.module.micronumpy import loop
 from pypy.module.micronumpy.test.test_base import BaseNumpyAppTest
 
 
@@ -215,3 +216,65 @@ class AppTestNumSupport(BaseNumpyAppTest):
         a.put(23, -1, mode=1)  # wrap
         assert (a == array([0, 1, -10, -1, -15])).all()
         raises(TypeError, "arange(5).put(22, -5, mode='zzzz')")  # unrecognized mode
+
+
+class AppTestBlockedDot(BaseNumpyAppTest):
+    def setup_class(cls):
+        BaseNumpyAppTest.setup_class.im_func(cls)
+        cls.saved = (loop.DOT_BLOCK_K, loop.DOT_BLOCK_N,
+                     loop.DOT_BLOCKED_MIN_WORK, loop.DOT_BLOCKED_MIN_COLUMNS)
+        # small blocks, to test the edges with small matrices
+        loop.DOT_BLOCK_K = 3
+        loop.DOT_BLOCK_N = 4
+        loop.DOT_BLOCKED_MIN_WORK = 0
+        loop.DOT_BLOCKED_MIN_COLUMNS = 1
+
+    def teardown_class(cls):
+        (loop.DOT_BLOCK_K, loop.DOT_BLOCK_N,
+         loop.DOT_BLOCKED_MIN_WORK, loop.DOT_BLOCKED_MIN_COLUMNS) = cls.saved
+
+    def test_dot_blocked(self):
+        from numpy import arange, dot
+        def slow_dot(a, b):
+            return [[sum([a[i][p] * b[p][j] for p in range(len(b))])
+                     for j in range(len(b[0]))] for i in range(len(a))]
+        for dtype in ['float64', 'float32', 'int64', 'int32', 'uint8']:
+            for m, k, n in [(7, 5, 9), (1, 8, 8), (4, 1, 5), (9, 11, 2)]:
+                a = (arange(m * k) % 7).astype(dtype).reshape(m, k)
+                b = (arange(k * n) % 5).astype(dtype).reshape(k, n)
+                c = dot(a, b)
+                assert c.dtype == dtype
+                assert (c == slow_dot(a.tolist(), b.tolist())).all()
+                assert (dot(a[::-1], b.T.copy().T) ==
+                        slow_dot(a[::-1].tolist(), b.tolist())).all()
+        a = arange(6 * 8.0).reshape(6, 8)
+        assert (dot(a[::2, 1::2], a[:4, ::-1].T.T) ==
+                slow_dot(a[::2, 1::2].tolist(), a[:4, ::-1].tolist())).all()
+        assert (dot(a[:, 0], a[:, :5].T.T) ==
+                slow_dot([a[:, 0].tolist()], a[:, :5].tolist())[0]).all()
+
+    def test_dot_blocked_batched(self):
+        from numpy import arange, dot
+        a = arange(2 * 3 * 4.0).reshape(2, 3, 4)
+        b = arange(5 * 4 * 6.0).reshape(5, 4, 6)
+        c = dot(a, b)
+        assert c.shape == (2, 3, 5, 6)
+        for i in range(2):
+            for j in range(5):
+                assert (c[i, :, j, :] == dot(a[i], b[j])).all()
+                assert (dot(a[i], b[j]) ==
+                        dot(a[i].tolist(), b[j].tolist())).all()
+        assert dot(a, b)[1, 2, 3, 4] == sum(a[1, 2, :] * b[3, :, 4])
+
+    def test_dot_blocked_fallback(self):
+        from numpy import arange, dot, zeros
+        a = arange(12).reshape(3, 4)
+        b = arange(12.0).reshape(4, 3)
+        c = dot(a, b)
+        assert c.dtype == float
+        assert (c == [[42, 48, 54], [114, 136, 158], [186, 224, 262]]).all()
+        out = zeros((3, 3), dtype=int)
+        c = dot(a, b.astype(int), out=out)
+        assert c is out
+        assert (out == [[42, 48, 54], [114, 136, 158], [186, 224, 262]]).all()
+        assert (dot(a, arange(4)) == [14, 38, 62]).all()
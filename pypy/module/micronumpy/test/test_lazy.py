@@ -0,0 +1,147 @@
+from pypy.interpreter.gateway import interp2app
+from pypy.module.micronumpy.test.test_base import BaseNumpyAppTest
+from pypy.module.micronumpy import lazy
+
+
+class AppTestLazy(BaseNumpyAppTest):
+    def setup_class(cls):
+        BaseNumpyAppTest.setup_class.im_func(cls)
+        def tree_info(space, w_lazy):
+            assert isinstance(w_lazy, lazy.W_LazyArray)
+            signatures = space.fromcache(lazy.LazyCache).signatures
+            if w_lazy.node is None:
+                depth = 0      # already computed
+            else:
+                depth = w_lazy.node.depth
+            return space.newtuple([space.newint(depth),
+                                   space.newint(len(signatures))])
+        cls.w_tree_info = cls.space.wrap(interp2app(tree_info))
+        cls.w_MAX_DEPTH = cls.space.wrap(lazy.MAX_DEPTH)
+        cls.w_MAX_SIGNATURES = cls.space.wrap(lazy.MAX_SIGNATURES)
+
+    def test_basic(self):
+        from numpy import lazy, lazyarray, arange, ndarray
+        a = arange(10.0)
+        b = arange(10.0) * 2
+        c = lazy(a) * b + 3
+        assert isinstance(c, lazyarray)
+        assert c.shape == (10,)
+        assert c.ndim == 1
+        assert c.size == 10
+        assert c.dtype == float
+        a[0] = 42.0     # only read when evaluated
+        r = c.evaluate()
+        assert isinstance(r, ndarray)
+        assert list(r) == [42.0 * 0 + 3] + [i * 2.0 * i + 3
+                                            for i in range(1, 10)]
+        assert c.evaluate() is r
+        assert lazy(c) is c
+        raises(ValueError, lazy, 5)
+
+    def test_operators(self):
+        from numpy import lazy, arange, array
+        a = arange(1, 13).reshape(3, 4)
+        b = arange(12, 0, -1).reshape(3, 4)
+        la = lazy(a)
+        lb = lazy(b)
+        for op in ['+', '-', '*', '/', '//', '%', '**', '&', '|', '^',
+                   '==', '!=', '<', '<=', '>', '>=']:
+            expected = eval('a %s b' % op)
+            for res in [eval('la %s b' % op), eval('a %s lb' % op),
+                        eval('la %s lb' % op)]:
+                assert res.dtype == expected.dtype
+                assert (res.evaluate() == expected).all()
+        assert (eval('-la').evaluate() == -a).all()
+        assert (abs(-la).evaluate() == a).all()
+        assert (~la).evaluate().tolist() == (~a).tolist()
+        assert (+la) is la
+        assert ((la * 2.5).evaluate() == a * 2.5).all()
+        assert ((2.5 - la).evaluate() == 2.5 - a).all()
+
+    def test_dtypes(self):
+        from numpy import lazy, array, arange, int8, float32, complex128
+        a = array([1, 2, 3], dtype=int8)
+        # python scalars don't change the dtype, as with arrays
+        assert (lazy(a) + 1).dtype == int8
+        assert (lazy(a) + 1.5).dtype == float
+        assert (lazy(a) * array([1, 2, 3], dtype=float32)).dtype == float32
+        c = lazy(a) / 2
+        assert c.evaluate().tolist() == (a / 2).tolist()
+        c = lazy(array([1 + 2j, 3j])) * 2
+        assert c.dtype == complex128
+        assert c.evaluate().tolist() == [2 + 4j, 6j]
+        raises(TypeError, "lazy(arange(3.0)) & 1")
+        raises(TypeError, lazy, array(['a', 'b']))
+
+    def test_ufuncs(self):
+        from numpy import lazy, lazyarray, arange, sqrt, maximum, add, sin
+        a = arange(10.0)
+        b = arange(10.0)[::-1]
+        c = sqrt(lazy(a) * a + b * b)
+        assert isinstance(c, lazyarray)
+        assert (c.evaluate() == sqrt(a * a + b * b)).all()
+        c = maximum(lazy(a), b)
+        assert isinstance(c, lazyarray)
+        assert (c.evaluate() == maximum(a, b)).all()
+        out = arange(10.0)
+        res = add(lazy(a), b, out=out)
+        assert res is out
+        assert (out == 9.0).all()
+        assert sin(lazy(a)).sum() == sin(a).sum()
+
+    def test_views(self):
+        from numpy import lazy, arange
+        a = arange(24.0).reshape(4, 6)
+        t = a.T
+        c = lazy(t) + t * 2
+        assert (c.evaluate() == t * 3).all()
+        c = lazy(a[::2, 1::3]) - a[1::2, ::3]
+        assert (c.evaluate() == a[::2, 1::3] - a[1::2, ::3]).all()
+        c = lazy(a[:, 1]) * a[::-1, 2]
+        assert (c.evaluate() == a[:, 1] * a[::-1, 2]).all()
+
+    def test_broadcast(self):
+        from numpy import lazy, lazyarray, arange
+        a = arange(12).reshape(3, 4)
+        row = arange(4)
+        c = lazy(a) + row
+        # computed right away, but the result is still lazy
+        assert isinstance(c, lazyarray)
+        assert ((c * 2).evaluate() == (a + row) * 2).all()
+        raises(ValueError, "lazy(a) + arange(5)")
+
+    def test_forcing(self):
+        from numpy import lazy, arange, array
+        a = arange(6)
+        c = lazy(a) * 2
+        assert len(c) == 6
+        assert c[2] == 4
+        assert list(c) == [0, 2, 4, 6, 8, 10]
+        assert c.sum() == 30
+        assert c.reshape(2, 3).shape == (2, 3)
+        assert c.T.shape == (6,)
+        assert (array(c) == a * 2).all()
+        assert array(c, dtype=float).dtype == float
+        assert repr(c) == 'lazy(%r)' % (a * 2,)
+        assert str(c) == str(a * 2)
+        assert not (lazy(array([0])) * 2)
+        raises(AttributeError, "c.foobar")
+        a += lazy(a) + 1
+        assert list(a) == [2 * i + 1 for i in range(6)]
+
+    def test_deep_tree(self):
+        from numpy import lazy, arange, zeros
+        chunk = arange(10.0)
+        acc = lazy(zeros(10))
+        for i in range(1000):
+            acc = acc + chunk
+            depth, num_signatures = self.tree_info(acc)
+            assert depth <= self.MAX_DEPTH
+            assert num_signatures <= self.MAX_SIGNATURES
+        assert (acc.evaluate() == chunk * 1000).all()
+        # many leaves
+        acc = lazy(zeros(10))
+        for i in range(200):
+            acc = (acc + chunk) * (lazy(chunk) - chunk + 1)
+            assert self.tree_info(acc)[0] <= self.MAX_DEPTH
+        assert (acc.evaluate() == chunk * 200).all()
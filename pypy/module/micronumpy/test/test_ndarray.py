@@ -2750,6 +2750,113 @@ class AppTestNumArrayFromBuffer(BaseNumpyAppTest):
         buf.close()
         f.close()
 
+    def test_ndarray_from_buffer_strides(self):
+        import numpy as np
+        import array
+        buf = array.array('c', ''.join([chr(i) for i in range(16)]))
+        a = np.ndarray((4,), buffer=buf, dtype='u1', offset=12, strides=(-4,))
+        assert list(a) == [12, 8, 4, 0]
+        a = np.ndarray((2, 3), buffer=buf, dtype='u1', offset=1,
+                       strides=(8, 2))
+        assert a.tolist() == [[1, 3, 5], [9, 11, 13]]
+        exc = raises(ValueError, np.ndarray, (4,), buffer=buf, dtype='u1',
+                     offset=2, strides=(-1,))
+        assert exc.value[0] == ('strides is incompatible with shape of '
+                                'requested array and size of buffer')
+        raises(ValueError, np.ndarray, (2,), buffer=buf, dtype='u1',
+               offset=8, strides=(8,))
+        exc = raises(ValueError, np.ndarray, (2,), buffer=buf, dtype='u1',
+                     offset=17)
+        assert exc.value[0] == ('offset must be non-negative and no greater '
+                                'than buffer length (16)')
+
+    def test_frombuffer_mmap(self):
+        import numpy as np
+        from mmap import mmap
+        f = open(self.tmpname + 'frombuffer', "w+")
+        f.write(np.arange(10, dtype='i4').tostring())
+        f.flush()
+        buf = mmap(f.fileno(), 40)
+        a = np.frombuffer(buf, 'i4', count=3, offset=8)
+        assert list(a) == [2, 3, 4]
+        assert a.base is buf
+        # no copy: the array and the mapping share their memory
+        a[0] = 42
+        assert np.frombuffer(buf, 'i4')[2] == 42
+        del a
+        buf.close()
+        f.close()
+
+    def test_fromfile(self):
+        import numpy as np
+        name = self.tmpname + 'fromfile'
+        f = open(name, 'wb')
+        f.write('xyz' + np.arange(10, dtype='i2').tostring() + '!')
+        f.close()
+        a = np.fromfile(name, 'i2', offset=3)
+        assert list(a) == range(10)
+        assert a.dtype == np.dtype('i2')
+        f = open(name, 'rb')
+        f.read(1)
+        a = np.fromfile(f, 'i2', count=4, offset=2)
+        assert list(a) == [0, 1, 2, 3]
+        assert f.tell() == 11
+        assert list(np.fromfile(f, 'i2', count=2)) == [4, 5]
+        # a short read gives fewer items
+        assert list(np.fromfile(f, 'i2', count=100)) == [6, 7, 8, 9]
+        f.close()
+        f = open(name, 'w')
+        f.write('1, 2,3 ,4')
+        f.close()
+        assert list(np.fromfile(name, int, sep=',')) == [1, 2, 3, 4]
+        raises(TypeError, np.fromfile, name, int, sep=',', offset=1)
+        raises(ValueError, np.fromfile, name, 'S0')
+        raises(ValueError, np.fromfile, name, int, mmap_mode='w')
+
+    def test_fromfile_mmap(self):
+        import numpy as np
+        import mmap, sys
+        name = self.tmpname + 'fromfile_mmap'
+        data = np.arange(5000, dtype=float)
+        f = open(name, 'wb')
+        f.write('x' * 5 + data.tostring())
+        f.close()
+
+        a = np.fromfile(name, float, offset=5, mmap_mode='r')
+        assert isinstance(a.base, mmap.mmap)
+        assert (a == data).all()
+        raises(ValueError, "a[0] = 1.0")
+
+        # copy on write: the file does not change
+        f = open(name, 'rb')
+        f.seek(5 + 8 * 4000)
+        a = np.fromfile(f, float, count=10, mmap_mode='c')
+        assert list(a) == range(4000, 4010)
+        assert f.tell() == 5 + 8 * 4010
+        a[0] = -1.0
+        assert a[0] == -1.0
+        f.close()
+        assert np.fromfile(name, float, count=1, offset=5 + 8 * 4000)[0] == 4000
+
+        # shared: the writes end up in the file
+        a = np.fromfile(name, float, offset=5, mmap_mode='r+')
+        b = np.fromfile(name, float, offset=5, mmap_mode='r')
+        a[1] = 42.0
+        assert b[1] == 42.0
+        del a
+        assert np.fromfile(name, float, count=2, offset=5)[1] == 42.0
+
+        # nothing left to map
+        assert len(np.fromfile(name, float, offset=5 + 8 * 5000,
+                               mmap_mode='r')) == 0
+
+        # the GC must not see pointers read from a file
+        raises(ValueError, np.fromfile, name, object, mmap_mode='r')
+        raises(ValueError, np.fromfile, name, [('a', int), ('b', object)],
+               mmap_mode='r')
+        raises(ValueError, np.fromfile, name, ('O', (2,)), mmap_mode='r')
+        raises(ValueError, np.fromfile, name, float, count=sys.maxint)
+
 
 class AppTestMultiDim(BaseNumpyAppTest):
     def test_init(self):
@@ -0,0 +1,167 @@
+from pypy.conftest import option
+from pypy.interpreter.gateway import interp2app
+from pypy.module.micronumpy import loop, parallel
+from pypy.module.micronumpy.test.test_base import BaseNumpyAppTest
+
+
+class AppTestParallel(BaseNumpyAppTest):
+    def setup_class(cls):
+        BaseNumpyAppTest.setup_class.im_func(cls)
+        cls.saved = (parallel.config.nthreads, parallel.config.threshold,
+                     parallel.config.sort_threshold,
+                     loop.DOT_BLOCKED_MIN_WORK)
+        parallel.config.nthreads = 4
+        parallel.config.threshold = 10
+        parallel.config.sort_threshold = 300
+        loop.DOT_BLOCKED_MIN_WORK = 0
+        cls.w_runappdirect = cls.space.wrap(option.runappdirect)
+        def set_nthreads(space, w_n):
+            parallel.config.nthreads = space.int_w(w_n)
+        cls.w_set_nthreads = cls.space.wrap(interp2app(set_nthreads))
+
+    def teardown_class(cls):
+        (parallel.config.nthreads, parallel.config.threshold,
+         parallel.config.sort_threshold,
+         loop.DOT_BLOCKED_MIN_WORK) = cls.saved
+
+    def test_binary(self):
+        from numpy import array, add, subtract, multiply, maximum, minimum
+        for dtype in ['float64', 'int64']:
+            a = array(range(-20, 25), dtype=dtype)
+            b = array(range(45, 0, -1), dtype=dtype)
+            l, r = list(a), list(b)
+            assert list(a + b) == [x + y for x, y in zip(l, r)]
+            assert list(subtract(a, b)) == [x - y for x, y in zip(l, r)]
+            assert list(multiply(a, b)) == [x * y for x, y in zip(l, r)]
+            assert list(maximum(a, b)) == [max(x, y) for x, y in zip(l, r)]
+            assert list(minimum(a, b)) == [min(x, y) for x, y in zip(l, r)]
+            assert list(a * 3) == [x * 3 for x in l]
+            assert list(2 - a) == [2 - x for x in l]
+        a = array([float(i) for i in range(1, 50)])
+        assert list(a / 4) == [i / 4.0 for i in range(1, 50)]
+        b = array(range(1, 50))
+        assert list(b / 4) == [i // 4 for i in range(1, 50)]
+
+    def test_int_wraparound(self):
+        import sys
+        from numpy import array
+        if self.runappdirect and sys.maxint < 2 ** 63:
+            skip("64-bit only")
+        a = array([sys.maxint] * 30)
+        assert list(a + a) == [-2] * 30
+        assert list(-(a + 1)) == [-sys.maxint - 1] * 30
+
+    def test_nan(self):
+        from numpy import array, maximum, minimum, isnan
+        nan = float('nan')
+        a = array([1.0, nan, 3.0] * 10)
+        b = array([nan, 2.0, 1.0] * 10)
+        assert isnan(maximum(a, b)[:2]).all()
+        assert isnan(minimum(a, b)[:2]).all()
+        assert isnan(a.max())
+        assert isnan(a.min())
+
+    def test_unary(self):
+        from numpy import array, negative, absolute
+        for dtype in ['float64', 'int64']:
+            a = array(range(-20, 25), dtype=dtype)
+            assert list(negative(a)) == [-x for x in range(-20, 25)]
+            assert list(abs(a)) == [abs(x) for x in range(-20, 25)]
+            assert list(absolute(a[::-3])) == [abs(x)
+                                               for x in range(-20, 25)[::-3]]
+
+    def test_reduce(self):
+        from numpy import array
+        for dtype in ['float64', 'int64']:
+            a = array(range(-20, 25), dtype=dtype)
+            assert a.sum() == sum(range(-20, 25))
+            assert a[::2].sum() == sum(range(-20, 25)[::2])
+            assert a.max() == 24
+            assert a.min() == -20
+            assert a[1:20].prod() == reduce(lambda x, y: x * y,
+                                            range(-19, 0))
+            b = a.reshape(5, 9)
+            assert b.sum() == sum(range(-20, 25))
+            assert (b.sum(axis=0) == [sum(range(-20 + i, 25, 9))
+                                      for i in range(9)]).all()
+
+    def test_reduce_float_threads(self):
+        from numpy import array
+        if self.runappdirect:
+            skip("sets the number of threads")
+        # 0.1 is not exact, so the sum depends on the order of the additions
+        a = array([0.1 * i for i in range(1, 1000)] +
+                  [1e16, 1.0, -1e16] * 30)
+        b = array([1.0 + 1e-9 * i for i in range(1000)])
+        results = []
+        try:
+            for n in [1, 2, 3, 4, 7]:
+                self.set_nthreads(n)
+                results.append((a.sum(), a[::3].sum(), b.prod(),
+                                a.max(), a.min()))
+        finally:
+            self.set_nthreads(4)
+        for res in results[1:]:
+            assert res == results[0]
+        assert results[0][0] == reduce(lambda x, y: x + y, list(a))
+
+    def test_views(self):
+        from numpy import array, arange
+        a = arange(100.0)
+        assert list(a[::2] + a[1::2]) == [4.0 * i + 1 for i in range(50)]
+        assert list(a[::-1] - a) == [99.0 - 2 * i for i in range(100)]
+        b = arange(100.0).reshape(10, 10)
+        c = b.T + b
+        assert (c == array([[11.0 * (i + j) for j in range(10)]
+                            for i in range(10)])).all()
+
+    def test_out_overlap(self):
+        from numpy import arange, add, negative
+        a = arange(50.0)
+        add(a, a, out=a)
+        assert list(a) == [2.0 * i for i in range(50)]
+        a = arange(50)
+        # partial overlap: must be done in order, item after item
+        add(a[:-1], 1, out=a[1:])
+        assert list(a) == range(50)
+        a = arange(50)
+        negative(a[1:], out=a[:-1])
+        assert list(a) == [-i for i in range(1, 50)] + [49]
+
+    def test_other_dtypes(self):
+        from numpy import array
+        a = array(range(50), dtype='int32')
+        assert list(a + a) == [2 * i for i in range(50)]
+        assert a.sum() == sum(range(50))
+        a = array(range(50), dtype='>f8')
+        assert list(a + a) == [2.0 * i for i in range(50)]
+        assert a.max() == 49.0
+
+    def test_dot(self):
+        from numpy import arange, dot
+        for dtype in ['float64', 'int64']:
+            a = (arange(9 * 5) % 7).astype(dtype).reshape(9, 5)
+            b = (arange(5 * 20) % 3).astype(dtype).reshape(5, 20)
+            c = dot(a, b)
+            assert c.shape == (9, 20)
+            for i in range(9):
+                for j in range(20):
+                    assert c[i, j] == sum(a[i, :] * b[:, j])
+            assert (dot(a[::-2], b) == c[::-2]).all()
+            d = dot(a.reshape(3, 3, 5), b.reshape(1, 5, 20))
+            assert (d.reshape(9, 20) == c).all()
+
+    def test_sort(self):
+        from numpy import array
+        from math import isnan
+        for dtype in ['float64', 'int64', 'uint64']:
+            values = [(i * 7919) % 1001 for i in range(2000)]
+            if dtype != 'uint64':
+                values = [x - 500 for x in values]
+            if dtype == 'float64':
+                values += [float('nan'), 0.5, -0.0, float('inf')]
+            a = array(values, dtype=dtype)
+            exp = sorted([x for x in a if not isnan(x)])
+            a.sort()
+            assert list(a[:len(exp)]) == exp
+            assert all([isnan(x) for x in a[len(exp):]])
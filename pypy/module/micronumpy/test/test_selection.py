@@ -177,6 +177,66 @@ class AppTestSorting(BaseNumpyAppTest):
         d.sort()
         assert (d == c).all(), "test sort with default axis"
 
+    def test_sort_kind(self):
+        from numpy import array, arange
+        a = arange(20)[::-1]
+        for kind in ['quicksort', 'mergesort', 'heapsort', 'stable', None]:
+            c = a.copy()
+            c.sort(kind=kind)
+            assert (c == arange(20)).all()
+            assert (a.argsort(kind=kind) == arange(20)[::-1]).all()
+        exc = raises(ValueError, a.sort, kind='bogus')
+        assert exc.value[0] == "'bogus' is an invalid value for keyword 'kind'"
+        raises(ValueError, a.argsort, kind='')
+        # duplicates and all-equal ranges in the quicksort and heapsort
+        a = array([5, 1, 4] * 30 + [2] * 30)
+        for kind in ['q', 'h']:
+            c = a.copy()
+            c.sort(kind=kind)
+            assert list(c) == sorted(a)
+
+    def test_sort_radix(self):
+        # large enough arrays of integers and floats use a radix sort
+        from numpy import array
+        from _random import Random
+        from math import isnan
+        rnd = Random(42)
+        for dtype in ['int8', 'uint8', 'int16', 'uint16', 'int32', 'uint32',
+                      'int64', 'uint64', 'float32', 'float64']:
+            if dtype.startswith('u'):
+                values = [int(rnd.random() * 200) for i in range(1000)]
+            else:
+                values = [int(rnd.random() * 200) - 100 for i in range(1000)]
+            if dtype.startswith('float'):
+                values += [0.5, -0.25, 1e30, -1e30, float('inf'),
+                           -float('inf'), float('nan'), -float('nan')]
+            a = array(values, dtype=dtype)
+            exp = sorted([x for x in a if not isnan(x)])
+            c = a.copy()
+            c.sort()
+            assert list(c[:len(exp)]) == exp, dtype
+            assert all([isnan(x) for x in c[len(exp):]])
+            # a stable argsort, with all the NaNs at the end
+            res = a.argsort(kind='stable')
+            assert list(a[res][:len(exp)]) == exp
+            assert list(res[len(exp):]) == [i for i in range(len(a))
+                                            if isnan(a[i])]
+            for i in range(len(exp) - 1):
+                if a[res[i]] == a[res[i + 1]]:
+                    assert res[i] < res[i + 1]
+        # -0.0 and 0.0 are equal for the argsort
+        a = array([0.0, -0.0] * 200)
+        assert (a.argsort() == range(400)).all()
+        # along an axis, and with strides
+        a = array([(i * 7919) % 1000 for i in range(3000)]).reshape(3, 1000)
+        c = a.copy()
+        c.sort()
+        assert (c == [sorted(a[i]) for i in range(3)]).all()
+        c = a.T.copy()
+        c.sort(axis=0)
+        assert (c.T == [sorted(a[i]) for i in range(3)]).all()
+        assert (a.argsort(axis=1)[1] == a[1].argsort()).all()
+
     def test_sort_corner_cases_string_records(self):
         from numpy import array, dtype
         import sys
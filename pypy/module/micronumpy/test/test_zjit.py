@@ -822,6 +822,18 @@ class TestNumpyJit(LLJitMixin):
         assert result == 6
         self.check_vectorized(1,1) # vec. setslice
 
+    def define_sort():
+        return """
+        a = |30|
+        b = unegative(a)
+        sort(b)
+        b -> 0
+        """
+
+    def test_sort(self):
+        result = self.run("sort")
+        assert result == -29
+
     def define_where():
         return """
         a = [1, 0, 1, 0]
@@ -835,6 +847,31 @@ class TestNumpyJit(LLJitMixin):
         result = self.run("where")
         assert result == -40
 
+    def define_lazy():
+        return """
+        a = |30|
+        b = |30| -> ::-1
+        r = lazy_mul_add(a, b, a)
+        r -> 3
+        """
+
+    def test_lazy(self):
+        result = self.run("lazy")
+        assert result == 3 * 26 + 3
+        self.check_trace_count(1)
+        self.check_simple_loop({
+            'float_add': 1,
+            'float_mul': 1,
+            'guard_false': 1,
+            'guard_not_invalidated': 1,
+            'int_add': 2,
+            'int_ge': 1,
+            'int_mul': 3,
+            'jump': 1,
+            'raw_load': 3,
+            'raw_store': 1,
+        })
+
     def define_searchsorted():
         return """
         a = [1, 4, 5, 6, 9]
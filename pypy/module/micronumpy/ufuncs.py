@@ -11,7 +11,7 @@ from rpython.rlib.rawstorage import (
 from rpython.rtyper.lltypesystem import rffi, lltype
 from rpython.rlib.objectmodel import keepalive_until_here, specialize
 
-from pypy.module.micronumpy import loop, constants as NPY
+from pypy.module.micronumpy import loop, parallel, lazy, constants as NPY
 from pypy.module.micronumpy.descriptor import (
     get_dtype_cache, decode_w_dtype, num2dtype)
 from pypy.module.micronumpy.base import convert_to_array, W_NDimArray
@@ -88,7 +88,7 @@ class W_Ufunc(W_Root):
     _immutable_fields_ = [
         "name", "promote_to_largest", "promote_to_float", "promote_bools", "nin",
         "identity", "int_only", "allow_bool", "allow_complex",
-        "complex_to_float", "nargs", "nout", "signature"
+        "complex_to_float", "nargs", "nout", "signature", "parallel_op"
     ]
     w_doc = None
 
@@ -103,6 +103,7 @@ class W_Ufunc(W_Root):
         self.allow_bool = allow_bool
         self.allow_complex = allow_complex
         self.complex_to_float = complex_to_float
+        self.parallel_op = parallel.get_op(name)
 
     def descr_get_name(self, space):
         return space.newtext(self.name)
@@ -296,7 +297,8 @@ class W_Ufunc(W_Root):
                                 "too many dimensions", self.name)
                 dtype = out.get_dtype()
             res = loop.reduce_flat(
-                space, self.func, obj, dtype, self.done_func, self.identity)
+                space, self.func, obj, dtype, self.done_func, self.identity,
+                self.parallel_op)
             if out:
                 out.set_scalar_value(res)
                 return out
@@ -455,6 +457,8 @@ class W_Ufunc1(W_Ufunc):
         out = None
         if len(args_w) > 1:
             out = out_converter(space, args_w[1])
+        if out is None and isinstance(w_obj, lazy.W_LazyArray):
+            return lazy.call1(space, self, w_obj, casting)
         w_obj = numpify(space, w_obj)
         dtype = w_obj.get_dtype(space)
         calc_dtype, dt_out, func = self.find_specialization(space, dtype, out, casting)
@@ -471,7 +475,8 @@ class W_Ufunc1(W_Ufunc):
                 space, shape, dt_out, w_instance=w_obj)
         else:
             w_res = out
-        w_res = loop.call1(space, shape, func, calc_dtype, w_obj, w_res)
+        w_res = loop.call1(space, shape, func, calc_dtype, w_obj, w_res,
+                           self.parallel_op)
         if out is None:
             if w_res.is_scalar():
                 return w_res.get_scalar_value()
@@ -558,6 +563,9 @@ class W_Ufunc2(W_Ufunc):
         else:
             [w_lhs, w_rhs] = args_w
             out = None
+        if out is None and (isinstance(w_lhs, lazy.W_LazyArray) or
+                            isinstance(w_rhs, lazy.W_LazyArray)):
+            return lazy.call2(space, self, w_lhs, w_rhs, casting)
         if not isinstance(w_rhs, W_NDimArray):
             # numpy implementation detail, useful for things like numpy.Polynomial
             # FAIL with NotImplemented if the other object has
@@ -637,7 +645,7 @@ class W_Ufunc2(W_Ufunc):
         else:
             w_res = out
         w_res = loop.call2(space, new_shape, self.func, calc_dtype,
-                           w_lhs, w_rhs, w_res)
+                           w_lhs, w_rhs, w_res, self.parallel_op)
         if out is None:
             if w_res.is_scalar():
                 return w_res.get_scalar_value()
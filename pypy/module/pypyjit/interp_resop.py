@@ -390,12 +390,95 @@ def get_stats_snapshot(space):
     space.setitem_str(w_counter_times, 'BACKEND', space.newfloat(b_time))
     return W_JitInfoSnapshot(space, w_times, w_counters, w_counter_times)
 
-def get_stats_asmmemmgr(space):
+class W_GuardFailureInfo(W_Root):
+    def __init__(self, loop_no, guard_id, index, location, failures, bridge):
+        self.loop_no = loop_no
+        self.guard_id = guard_id
+        self.index = index
+        self.location = location
+        self.failures = failures
+        self.bridge = bridge
+
+    def descr_repr(self, space):
+        return space.newtext("<GuardFailureInfo loop %d guard 0x%x: %d "
+                             "failures at '%s'>" % (self.loop_no,
+                             r_uint(self.guard_id), self.failures,
+                             self.location))
+
+W_GuardFailureInfo.typedef = TypeDef(
+    "GuardFailureInfo",
+    __doc__ = "Failure count of a guard, see get_hot_guards()",
+    __repr__ = interp2app(W_GuardFailureInfo.descr_repr),
+    loop_no = interp_attrproperty("loop_no", cls=W_GuardFailureInfo,
+                                  wrapfn="newint",
+                                  doc="number of the loop (-1 if unknown)"),
+    guard_id = interp_attrproperty("guard_id", cls=W_GuardFailureInfo,
+                                   wrapfn="newint",
+                                   doc="identifier of the guard, as in the "
+                                       "jit-log-opt sections of PYPYLOG"),
+    index = interp_attrproperty("index", cls=W_GuardFailureInfo,
+                                wrapfn="newint",
+                                doc="position of the guard in its trace "
+                                    "(-1 if unknown)"),
+    location = interp_attrproperty("location", cls=W_GuardFailureInfo,
+                                   wrapfn="newtext",
+                                   doc="repr of the closest debug merge "
+                                       "point before the guard"),
+    failures = interp_attrproperty("failures", cls=W_GuardFailureInfo,
+                                   wrapfn="newint"),
+    bridge = interp_attrproperty("bridge", cls=W_GuardFailureInfo,
+                                 wrapfn="newbool",
+                                 doc="whether a bridge was attached to the "
+                                     "guard, after which its failures are "
+                                     "not counted any more"),
+)
+W_GuardFailureInfo.typedef.acceptable_as_base_class = False
+
+def enable_guard_stats(space):
+    """Start counting the failures of the guards of the loops and bridges
+    compiled from now on, for get_hot_guards()."""
+    jit_hooks.stats_set_guard_stats(None, True)
+
+def disable_guard_stats(space):
+    """Stop counting guard failures and forget the counts collected so
+    far."""
+    jit_hooks.stats_set_guard_stats(None, False)
+    jit_hooks.stats_reset_guard_stats(None)
+
+@unwrap_spec(n=int)
+def get_hot_guards(space, n=10):
+    """Returns a list of GuardFailureInfo for the 'n' guards that failed
+    the most often since enable_guard_stats(), most failures first."""
+    ll_guards = jit_hooks.stats_get_hot_guards(None, n)
+    guards_w = []
+    if ll_guards:
+        for i in range(len(ll_guards)):
+            g = ll_guards[i]
+            guards_w.append(W_GuardFailureInfo(g.loop_no, g.guard_id, g.index,
+                                               hlstr(g.location), g.failures,
+                                               g.bridge))
+    return space.newlist(guards_w)
+
+@unwrap_spec(detailed=bool)
+def get_stats_asmmemmgr(space, detailed=False):
     """Returns the raw memory currently used by the JIT backend,
-    as a pair (total_memory_allocated, memory_in_use)."""
+    as a pair (total_memory_allocated, memory_in_use).
+
+    With detailed=True, returns a dict that also contains the peak
+    memory in use and the number of loops that were freed because of
+    the 'jit_code_cache_max' limit."""
     m1 = jit_hooks.stats_asmmemmgr_allocated(None)
     m2 = jit_hooks.stats_asmmemmgr_used(None)
-    return space.newtuple2(space.newint(m1), space.newint(m2))
+    if not detailed:
+        return space.newtuple2(space.newint(m1), space.newint(m2))
+    m3 = jit_hooks.stats_asmmemmgr_peak(None)
+    evicted = jit_hooks.stats_memmgr_evicted_loops(None)
+    w_stats = space.newdict()
+    space.setitem_str(w_stats, 'total_memory_allocated', space.newint(m1))
+    space.setitem_str(w_stats, 'memory_in_use', space.newint(m2))
+    space.setitem_str(w_stats, 'peak_memory_in_use', space.newint(m3))
+    space.setitem_str(w_stats, 'evicted_loops', space.newint(evicted))
+    return w_stats
 
 def enable_debug(space):
     """ Set the jit debugging - completely necessary for some stats to work,
@@ -19,6 +19,10 @@ class Module(MixedModule):
         'set_trace_too_long_hook': 'interp_resop.set_trace_too_long_hook',
         'get_stats_snapshot': 'interp_resop.get_stats_snapshot',
         'get_stats_asmmemmgr': 'interp_resop.get_stats_asmmemmgr',
+        'enable_guard_stats': 'interp_resop.enable_guard_stats',
+        'disable_guard_stats': 'interp_resop.disable_guard_stats',
+        'get_hot_guards': 'interp_resop.get_hot_guards',
+        'GuardFailureInfo': 'interp_resop.W_GuardFailureInfo',
         # those things are disabled because they have bugs, but if
         # they're found to be useful, fix test_ztranslation_jit_stats
         # in the backend first. get_stats_snapshot still produces
@@ -1,6 +1,6 @@
 
 import py
-from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.gateway import interp2app, unwrap_spec
 from pypy.interpreter.pycode import PyCode
 from rpython.jit.metainterp.history import JitCellToken, ConstInt, ConstPtr,\
      BasicFailDescr
@@ -278,3 +278,111 @@ class AppTestJitHook(object):
         assert isinstance(stats.w_counters, dict)
         assert sorted(stats.w_counters.keys()) == self.sorted_keys
 
+
+
+class AppTestGuardStats(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        from rpython.jit.metainterp.guardstats import GuardStats
+        from rpython.rlib import jit_hooks
+        w_f = cls.space.appexec([], """():
+        def function():
+            pass
+        return function
+        """)
+        ll_code = cast_instance_to_base_ptr(w_f.code)
+        code_gcref = lltype.cast_opaque_ptr(llmemory.GCREF, ll_code)
+        oplist = parse("""
+        [i1, p2]
+        debug_merge_point(0, 0, 0, 0, 0, ConstPtr(ptr0))
+        guard_nonnull(p2) []
+        guard_true(i1) []
+        """, namespace={'ptr0': code_gcref}).operations
+        oplist[1].setdescr(BasicFailDescr())
+        oplist[2].setdescr(BasicFailDescr())
+        guardstats = GuardStats()
+
+        class FakeWarmRunnerDesc(object):
+            class metainterp_sd(object):
+                jitdrivers_sd = [MockJitDriverSD]
+        FakeWarmRunnerDesc.metainterp_sd.guardstats = guardstats
+
+        # untranslated, the jit_hooks helpers get None instead of the
+        # warmrunnerdesc: give them one with our GuardStats
+        def make_hook(func):
+            return lambda _, *args: func(FakeWarmRunnerDesc, *args)
+        cls.saved_hooks = {}
+        for name in ['stats_set_guard_stats', 'stats_reset_guard_stats',
+                     'stats_get_hot_guards']:
+            func = getattr(jit_hooks, name)
+            cls.saved_hooks[name] = func
+            setattr(jit_hooks, name, make_hook(func))
+
+        def interp_on_compile():
+            if guardstats.enabled:
+                guardstats.record_operations(FakeWarmRunnerDesc.metainterp_sd,
+                                             7, oplist)
+
+        @unwrap_spec(index=int)
+        def interp_guard_failed(index):
+            descr = oplist[index].getdescr()
+            if guardstats.enabled:
+                guardstats.guard_failed(descr)
+
+        space = cls.space
+        cls.w_on_compile = space.wrap(interp2app(interp_on_compile))
+        cls.w_guard_failed = space.wrap(interp2app(interp_guard_failed))
+        cls.keepalive = oplist
+
+    def teardown_class(cls):
+        from rpython.rlib import jit_hooks
+        for name, func in cls.saved_hooks.items():
+            setattr(jit_hooks, name, func)
+
+    def test_get_hot_guards(self):
+        import pypyjit
+        assert pypyjit.get_hot_guards() == []
+        pypyjit.enable_guard_stats()
+        try:
+            self.on_compile()
+            self.guard_failed(2)
+            for i in range(3):
+                self.guard_failed(1)
+            guards = pypyjit.get_hot_guards()
+            assert len(guards) == 2
+            g = guards[0]
+            assert isinstance(g, pypyjit.GuardFailureInfo)
+            assert g.failures == 3
+            assert g.loop_no == 7
+            assert g.index == 1
+            assert g.location == 'function'
+            assert not g.bridge
+            assert guards[1].failures == 1
+            assert guards[1].index == 2
+            assert guards[0].guard_id != guards[1].guard_id
+            assert repr(g) == ("<GuardFailureInfo loop 7 guard 0x%x: 3 "
+                               "failures at 'function'>" % (g.guard_id,))
+            assert len(pypyjit.get_hot_guards(1)) == 1
+            assert pypyjit.get_hot_guards(0) == []
+        finally:
+            pypyjit.disable_guard_stats()
+        assert pypyjit.get_hot_guards() == []
+        self.guard_failed(1)
+        assert pypyjit.get_hot_guards() == []
+
+    def test_guard_not_recorded(self):
+        import pypyjit
+        pypyjit.enable_guard_stats()
+        try:
+            # the loop was compiled while the statistics were disabled
+            self.guard_failed(1)
+            g, = pypyjit.get_hot_guards()
+            assert g.failures == 1
+            assert g.loop_no == -1
+            assert g.index == -1
+            assert g.location == ''
+        finally:
+            pypyjit.disable_guard_stats()
@@ -46,6 +46,7 @@ class GILReleaseAction(PeriodicAsyncAction):
     """An action called every sys.checkinterval bytecodes.  It releases
     the GIL to give some other thread a chance to run.
     """
+    releases_gil = True
 
     def perform(self, executioncontext, frame):
         rgil.yield_thread()
@@ -0,0 +1,49 @@
+# '%' formatting and str.format() with format strings that are not
+# constants, like in logging, compared with constant ones:
+#     pypy-c bench_format.py             (with the JIT)
+#     pypy-c --jit off bench_format.py   (interpreted)
+import time
+
+MOD_FORMATS = ['%s:%d [%s] %s', '%(name)s=%(value)r', '%-10s|%5.2f|%x',
+               '<%s %s>', 'user %s logged in from %s (%d)']
+MOD_ARGS = [('main', 42, 'INFO', 'started'), {'name': 'x', 'value': 1.5},
+            ('abc', 3.14159, 255), ('a', 'b'), ('bob', '10.0.0.1', 7)]
+TEMPLATES = ['{}:{} [{}] {}', '{name}={value!r}', '{:<10}|{:5.2f}|{:x}',
+             '<{} {}>', 'user {} logged in from {} ({})']
+
+def bench(name, f, loops=200000):
+    f(1000)
+    t0 = time.time()
+    f(loops)
+    t1 = time.time()
+    print '%-24s %8.1f ns' % (name, (t1 - t0) * 1e9 / loops)
+
+def mod_dynamic(loops):
+    n = len(MOD_FORMATS)
+    for i in xrange(loops):
+        MOD_FORMATS[i % n] % MOD_ARGS[i % n]
+
+def mod_constant(loops):
+    for i in xrange(loops):
+        '%s:%d [%s] %s' % ('main', 42, 'INFO', 'started')
+
+def format_dynamic(loops):
+    n = len(TEMPLATES)
+    for i in xrange(loops):
+        args = MOD_ARGS[i % n]
+        if isinstance(args, dict):
+            TEMPLATES[i % n].format(**args)
+        else:
+            TEMPLATES[i % n].format(*args)
+
+def format_constant(loops):
+    for i in xrange(loops):
+        '{}:{} [{}] {}'.format('main', 42, 'INFO', 'started')
+
+def main():
+    bench('% dynamic', mod_dynamic)
+    bench('% constant', mod_constant)
+    bench('format() dynamic', format_dynamic)
+    bench('format() constant', format_constant)
+
+main()
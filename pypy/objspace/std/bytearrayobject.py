@@ -19,7 +19,7 @@ from pypy.interpreter.buffer import SimpleView
 from pypy.objspace.std.sliceobject import W_SliceObject, unwrap_start_stop
 from pypy.objspace.std.stringmethods import StringMethods, _get_buffer
 from pypy.objspace.std.stringmethods import _descr_getslice_slowpath
-from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.bytesobject import W_AbstractBytesObject
 from pypy.objspace.std.util import get_positive_index
 
 
@@ -110,7 +110,7 @@ class W_BytearrayObject(W_Root):
     @staticmethod
     def _op_val(space, w_other, strict=None):
         # bytearray does not enforce the strict restriction (on strip at least)
-        if isinstance(w_other, W_BytesObject):
+        if isinstance(w_other, W_AbstractBytesObject):
             return w_other.str_w(space)
         return space.buffer_w(w_other, space.BUF_SIMPLE).as_str()
 
@@ -336,7 +336,7 @@ class W_BytearrayObject(W_Root):
             other = w_other.getdata()
             other_len = len(other)
             cmp = _memcmp(value, other, min(len(value), len(other)))
-        elif isinstance(w_other, W_BytesObject):
+        elif isinstance(w_other, W_AbstractBytesObject):
             other = w_other.str_w(space)
             other_len = len(other)
             cmp = _memcmp(value, other, min(len(value), len(other)))
@@ -446,7 +446,7 @@ class W_BytearrayObject(W_Root):
     def descr_extend(self, space, w_other):
         if isinstance(w_other, W_BytearrayObject):
             self._data += w_other.getdata()
-        elif isinstance(w_other, W_BytesObject):    # performance only
+        elif isinstance(w_other, W_AbstractBytesObject):    # performance only
             self._data += w_other.str_w(space)
         else:
             self._data += makebytearraydata_w(space, w_other)
@@ -13,7 +13,7 @@ like: (on the left, without the new bytecodes; on the right, with them)
 from pypy.interpreter import function
 from rpython.rlib import jit
 from pypy.objspace.std.mapdict import LOOKUP_METHOD_mapdict, \
-    LOOKUP_METHOD_mapdict_fill_cache_method
+    LOOKUP_METHOD_mapdict_fill_cache_method, LOAD_ATTR_nomap_caching
 
 
 # This module exports two extra methods for StdObjSpaceFrame implementing
@@ -38,6 +38,14 @@ def LOOKUP_METHOD(f, nameindex, *ignored):
         # mapdict has an extra-fast version of this function
         if LOOKUP_METHOD_mapdict(f, nameindex, w_obj):
             return
+        # and modules and classes have their own cache, for the common
+        # case module.function(args..)
+        if w_obj._get_mapdict_map() is None:
+            w_value = LOAD_ATTR_nomap_caching(f.getcode(), w_obj, nameindex)
+            if w_value is not None:
+                f.pushvalue(w_value)
+                f.pushvalue_none()
+                return
 
     w_name = f.getname_w(nameindex)
     w_value = None
@@ -56,7 +56,7 @@ class W_DictMultiObject(W_Root):
     @staticmethod
     def allocate_and_init_instance(space, w_type=None, module=False,
                                    instance=False, strdict=False,
-                                   kwargs=False):
+                                   kwargs=False, sharedkeys=False):
         if module:
             from pypy.objspace.std.celldict import ModuleDictStrategy
             assert w_type is None
@@ -78,6 +78,10 @@ class W_DictMultiObject(W_Root):
             assert w_type is None
             from pypy.objspace.std.kwargsdict import EmptyKwargsDictStrategy
             strategy = space.fromcache(EmptyKwargsDictStrategy)
+        elif sharedkeys and space.config.objspace.std.withsharedkeysdict:
+            assert w_type is None
+            from pypy.objspace.std.shareddict import EmptySharedDictStrategy
+            strategy = space.fromcache(EmptySharedDictStrategy)
         else:
             strategy = space.fromcache(EmptyDictStrategy)
         if w_type is None:
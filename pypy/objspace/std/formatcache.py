@@ -0,0 +1,42 @@
+"""Cache of the format strings parsed by formatting.py ('%' formatting) and
+newformat.py (the format() method), for format strings that are not
+constants in the JIT: those are parsed once into a list of literal chunks
+and conversion specs instead of on every call.
+"""
+
+from rpython.rlib.objectmodel import specialize
+
+# the cache is emptied when it reaches that size
+MAX_ENTRIES = 500
+
+
+class FormatCache(object):
+    def __init__(self, space):
+        self.mod_formats = {}       # '%' format -> CompiledModFormat
+        self.templates = {}         # format() template -> CompiledTemplate
+
+
+@specialize.arg(2)
+def _lookup(cache, fmt, compile):
+    try:
+        return cache[fmt]
+    except KeyError:
+        pass
+    compiled = compile(fmt)
+    if compiled is not None:
+        # format strings with errors are not cached: they are rare, and
+        # the error is reported by the formatter as if there were no cache
+        if len(cache) >= MAX_ENTRIES:
+            cache.clear()
+        cache[fmt] = compiled
+    return compiled
+
+def get_compiled_mod_format(space, fmt):
+    from pypy.objspace.std.formatting import compile_mod_format
+    return _lookup(space.fromcache(FormatCache).mod_formats, fmt,
+                   compile_mod_format)
+
+def get_compiled_template(space, template):
+    from pypy.objspace.std.newformat import compile_template
+    return _lookup(space.fromcache(FormatCache).templates, template,
+                   compile_template)
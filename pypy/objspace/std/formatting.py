@@ -11,6 +11,7 @@ from rpython.rlib.unroll import unrolling_iterable
 from rpython.tool.sourcetools import func_with_new_name
 
 from pypy.interpreter.error import OperationError, oefmt
+from pypy.objspace.std.formatcache import get_compiled_mod_format
 
 
 class BaseStringFormatter(object):
@@ -285,6 +286,12 @@ def make_formatter_subclass(do_unicode):
 
         @jit.look_inside_iff(lambda self: jit.isconstant(self.fmt))
         def format(self):
+            if not jit.isconstant(self.fmt):
+                # the format string is not known to the JIT: use the
+                # cached parsed version of it instead of parsing it again
+                compiled = get_compiled_mod_format(self.space, self.fmt)
+                if compiled is not None:
+                    return self.format_compiled(compiled)
             lgt = len(self.fmt) + 4 * len(self.values_w) + 10
             result = StringBuilder(lgt)
             self.result = result
@@ -334,6 +341,53 @@ def make_formatter_subclass(do_unicode):
             self.checkconsumed()
             return result.build()
 
+        def format_compiled(self, compiled):
+            # same as format(), for a format string parsed by
+            # compile_mod_format(); the values are consumed in the same order
+            space = self.space
+            fmt = self.fmt
+            lgt = len(fmt) + 4 * len(self.values_w) + 10
+            result = StringBuilder(lgt)
+            self.result = result
+            for spec in compiled.specs:
+                result.append_slice(fmt, spec.literal_start, spec.literal_end)
+                if spec.key is not None:
+                    w_value = self.getmappingvalue(spec.key)
+                else:
+                    w_value = None
+                self.f_ljust = spec.f_ljust
+                self.f_sign  = spec.f_sign
+                self.f_blank = spec.f_blank
+                self.f_alt   = spec.f_alt
+                self.f_zero  = spec.f_zero
+                width = spec.width
+                if width == SPEC_STAR:
+                    width = space.int_w(self.nextinputvalue())
+                    if width < 0:
+                        self.f_ljust = True
+                        width = -width
+                self.width = width
+                prec = spec.prec
+                if prec == SPEC_STAR:
+                    prec = space.c_int_w(self.nextinputvalue())
+                    if prec < 0:
+                        prec = 0
+                self.prec = prec
+                c = spec.char
+                if c == '%':
+                    result.append('%')
+                    continue
+                if w_value is None:
+                    w_value = self.nextinputvalue()
+                for c1 in FORMATTER_CHARS:
+                    if c == c1:
+                        do_fmt = getattr(self, 'fmt_' + c1)
+                        do_fmt(w_value)
+                        break
+            result.append_slice(fmt, compiled.tail_start, len(fmt))
+            self.checkconsumed()
+            return result.build()
+
         def unknown_fmtchar(self):
             space = self.space
             if do_unicode:
@@ -510,6 +564,129 @@ FORMATTER_CHARS = unrolling_iterable(
     [_name[-1] for _name in dir(StringFormatter)
                if len(_name) == 5 and _name.startswith('fmt_')])
 
+
+SPEC_STAR = -2      # width or precision given as '*'
+
+class ModFormatSpec(object):
+    """ One '%' conversion of a format string, with the literal text
+    before it given as a slice of the format string. """
+    _immutable_ = True
+
+    def __init__(self, literal_start, literal_end, key, f_ljust, f_sign,
+                 f_blank, f_alt, f_zero, width, prec, char):
+        self.literal_start = literal_start
+        self.literal_end = literal_end
+        self.key = key          # for '%(key)s', or None
+        self.f_ljust = f_ljust
+        self.f_sign = f_sign
+        self.f_blank = f_blank
+        self.f_alt = f_alt
+        self.f_zero = f_zero
+        self.width = width      # or SPEC_STAR
+        self.prec = prec        # -1 if not given, or SPEC_STAR
+        self.char = char
+
+class CompiledModFormat(object):
+    _immutable_ = True
+
+    def __init__(self, specs, tail_start):
+        self.specs = specs[:]
+        self.tail_start = tail_start
+
+def _peel_num(fmt, i, maxval):
+    # returns (number, index after it), or (-1, i) if it is too big
+    result = 0
+    while i < len(fmt):
+        digit = ord(fmt[i]) - ord('0')
+        if not (0 <= digit <= 9):
+            break
+        if result > (maxval - digit) / 10:
+            return -1, i
+        result = result * 10 + digit
+        i += 1
+    return result, i
+
+def compile_mod_format(fmt):
+    """ Parses a '%' format string (utf8-encoded if unicode).  Returns None
+    if it is invalid: in that case formatting it must report the error
+    after having done the conversions that come before it. """
+    specs = []
+    i = 0
+    length = len(fmt)
+    while True:
+        i0 = i
+        while i < length and fmt[i] != '%':
+            i += 1
+        if i == length:
+            return CompiledModFormat(specs, i0)
+        literal_end = i
+        i += 1
+        key = None
+        if i < length and fmt[i] == '(':
+            i += 1
+            k0 = i
+            pcount = 1
+            while i < length:
+                c = fmt[i]
+                if c == ')':
+                    pcount -= 1
+                    if pcount == 0:
+                        break
+                elif c == '(':
+                    pcount += 1
+                i += 1
+            if i == length:
+                return None
+            key = fmt[k0:i]
+            i += 1
+        f_ljust = f_sign = f_blank = f_alt = f_zero = False
+        while i < length:
+            c = fmt[i]
+            if c == '-':
+                f_ljust = True
+            elif c == '+':
+                f_sign = True
+            elif c == ' ':
+                f_blank = True
+            elif c == '#':
+                f_alt = True
+            elif c == '0':
+                f_zero = True
+            else:
+                break
+            i += 1
+        if i < length and fmt[i] == '*':
+            width = SPEC_STAR
+            i += 1
+        else:
+            width, i = _peel_num(fmt, i, sys.maxint)
+            if width < 0:
+                return None
+        prec = -1
+        if i < length and fmt[i] == '.':
+            i += 1
+            if i < length and fmt[i] == '*':
+                prec = SPEC_STAR
+                i += 1
+            else:
+                prec, i = _peel_num(fmt, i, INT_MAX)
+                if prec < 0:
+                    return None
+        if i < length and (fmt[i] == 'h' or fmt[i] == 'l' or fmt[i] == 'L'):
+            i += 1
+        if i == length:
+            return None
+        char = fmt[i]
+        i += 1
+        if char != '%':
+            for c1 in FORMATTER_CHARS:
+                if char == c1:
+                    break
+            else:
+                return None
+        specs.append(ModFormatSpec(i0, literal_end, key, f_ljust, f_sign,
+                                   f_blank, f_alt, f_zero, width, prec, char))
+
 def format(space, w_fmt, values_w, w_valuedict, do_unicode):
     "Entry point"
     if not do_unicode:
@@ -177,6 +177,14 @@ class KwargsDictStrategy(DictStrategy):
 
     def copy(self, w_dict):
         dstorage = self.unerase(w_dict.dstorage)
+        if self.space.config.objspace.std.withsharedkeysdict:
+            # e.g. dict(**kwargs): give the copy keys shared with other
+            # dicts built from the same keywords
+            from pypy.objspace.std.shareddict import from_keys_and_values
+            w_copy = from_keys_and_values(self.space, dstorage[0],
+                                          dstorage[1])
+            if w_copy is not None:
+                return w_copy
         return W_DictObject(self.space, self,
                 self.erase((dstorage[0][:], dstorage[1][:])))
 
@@ -10,9 +10,9 @@ from pypy.interpreter.typedef import _share_methods
 from pypy.objspace.std.dictmultiobject import (
     W_DictMultiObject, DictStrategy, ObjectDictStrategy, BaseKeyIterator,
     BaseValueIterator, BaseItemIterator, _never_equal_to_string,
-    W_DictObject, BytesDictStrategy, UnicodeDictStrategy
+    W_DictObject, BytesDictStrategy, UnicodeDictStrategy, W_ModuleDictObject
 )
-from pypy.objspace.std.typeobject import MutableCell
+from pypy.objspace.std.typeobject import MutableCell, W_TypeObject
 
 
 
@@ -1280,6 +1280,7 @@ INVALID_CACHE_ENTRY.valid_for_store = False
 def init_mapdict_cache(pycode):
     num_entries = len(pycode.co_names_w)
     pycode._mapdict_caches = [INVALID_CACHE_ENTRY] * num_entries
+    pycode._nomap_caches = [None] * num_entries
 
 @jit.dont_look_inside
 def _fill_cache(pycode, nameindex, map, version_tag, attr, w_method=None, valid_for_store=False, attr_to_add=None):
@@ -1360,10 +1361,108 @@ def LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map):
                     _fill_cache(pycode, nameindex, map, version_tag, attr,
                                 valid_for_store=w_type.setattr_if_not_from_object() is None)
                     return attr._direct_read(w_obj)
+    else:
+        w_value = LOAD_ATTR_nomap_caching(pycode, w_obj, nameindex)
+        if w_value is not None:
+            return w_value
     if space.config.objspace.std.withmethodcachecounter:
         INVALID_CACHE_ENTRY.failure_counter += 1
     return space.getattr(w_obj, w_name)
 
+# ____________________________________________________________
+# Caching for objects without a map: 'module.name' and 'Class.name'
+
+class NoMapCacheEntry(object):
+    """ Caches the result of a LOAD_ATTR on one specific module or class.
+    For a module, the value is read from the GlobalCache of the module dict
+    (see celldict.py), which always follows the current value.  For a class,
+    the value is valid as long as the version_tag of the class is. """
+    def __init__(self, w_obj, globalcache_wref, version_tag, w_value):
+        self.w_obj_wref = weakref.ref(w_obj)
+        self.globalcache_wref = globalcache_wref
+        self.version_tag = version_tag
+        self.w_value = w_value
+
+@objectmodel.always_inline
+def LOAD_ATTR_nomap_caching(pycode, w_obj, nameindex):
+    """ Returns the attribute, or None if the cache cannot give it. Not used
+    if we_are_jitted(): the JIT constant-folds these lookups anyway. """
+    entry = pycode._nomap_caches[nameindex]
+    if entry is not None and entry.w_obj_wref() is w_obj:
+        if entry.globalcache_wref is not None:
+            cache = entry.globalcache_wref()
+            if cache is not None:
+                w_value = cache.getvalue(pycode.space)
+                if w_value is not None:
+                    return w_value
+        elif isinstance(w_obj, W_TypeObject):
+            if w_obj.version_tag() is entry.version_tag:
+                return entry.w_value     # None if not cacheable
+    return LOAD_ATTR_nomap_slowpath(pycode, w_obj, nameindex)
+
+@objectmodel.dont_inline
+def LOAD_ATTR_nomap_slowpath(pycode, w_obj, nameindex):
+    from pypy.interpreter.module import Module
+    space = pycode.space
+    name = space.text_w(pycode.co_names_w[nameindex])
+    if isinstance(w_obj, Module):
+        w_type = space.type(w_obj)
+        if not space.is_w(w_type, space.gettypeobject(Module.typedef)):
+            return None   # a subclass of module
+        if w_type._lookup_where_all_typeobjects(name)[1] is not None:
+            return None   # '__dict__', '__doc__', etc.
+        # the module type has no __getattribute__ and no descriptor with
+        # that name: the attribute is the dict entry
+        w_dict = w_obj.w_dict
+        if not isinstance(w_dict, W_ModuleDictObject):
+            return None
+        cache = w_dict.get_global_cache(name)
+        if cache is None:
+            return None
+        w_value = cache.getvalue(space)
+        if w_value is not None:
+            _fill_nomap_cache(pycode, nameindex, w_obj, cache.ref, None, None)
+        return w_value
+    elif isinstance(w_obj, W_TypeObject):
+        if not space.is_w(space.type(w_obj), space.w_type):
+            return None
+        version_tag = w_obj.version_tag()
+        if version_tag is None:
+            return None
+        # walk the mros directly (a version_tag means that they contain
+        # only types): this runs once per version of the class, and keeps
+        # the method cache (and its counters) out of the picture
+        w_typetype = space.w_type
+        assert isinstance(w_typetype, W_TypeObject)
+        if w_typetype._lookup_where_all_typeobjects(name)[1] is not None:
+            return None   # '__name__', '__dict__', etc.
+        _, w_value = w_obj._lookup_where_all_typeobjects(name)
+        if w_value is not None and not _is_plain_class_attr(space, w_value):
+            w_value = None
+        # if w_value is None, remember that until the class is changed
+        _fill_nomap_cache(pycode, nameindex, w_obj, None, version_tag, w_value)
+        return w_value
+    return None
+
+def _is_plain_class_attr(space, w_value):
+    # only cache values that are returned unchanged: no __get__, and a type
+    # that cannot grow one later.  MutableCells can change without changing
+    # the version_tag.
+    if isinstance(w_value, MutableCell):
+        return False
+    return (not space.type(w_value).is_heaptype() and
+            space.lookup(w_value, "__get__") is None)
+
+@jit.dont_look_inside
+def _fill_nomap_cache(pycode, nameindex, w_obj, globalcache_wref,
+                      version_tag, w_value):
+    if not pycode.space._side_effects_ok():
+        return
+    pycode._nomap_caches[nameindex] = NoMapCacheEntry(
+        w_obj, globalcache_wref, version_tag, w_value)
+
+# ____________________________________________________________
+
 def LOOKUP_METHOD_mapdict(f, nameindex, w_obj):
     pycode = f.getcode()
     entry = pycode._mapdict_caches[nameindex]
@@ -10,6 +10,7 @@ from rpython.rlib.objectmodel import specialize
 from rpython.rlib.rfloat import formatd
 from rpython.rlib.rarithmetic import r_uint, intmask
 from pypy.interpreter.signature import Signature
+from pypy.objspace.std.formatcache import get_compiled_template
 
 @specialize.argtype(1)
 @jit.look_inside_iff(lambda space, s, start, end:
@@ -76,8 +77,28 @@ def make_template_formatting_class(for_unicode):
                 self.args, self.kwargs = args.unpack()
             self.auto_numbering = 0
             self.auto_numbering_state = ANS_INIT
+            if not jit.isconstant(self.template):
+                # the template is not known to the JIT: use the cached
+                # parsed version of it instead of parsing it again
+                compiled = get_compiled_template(self.space, self.template)
+                if compiled is not None:
+                    return self._build_compiled(compiled)
             return self._build_string(0, len(self.template), 2)
 
+        def _build_compiled(self, compiled):
+            # same as _build_string(0, len(self.template), 2), for a
+            # template parsed by compile_template()
+            s = self.template
+            out = rstring.StringBuilder()
+            for chunk in compiled.chunks:
+                out.append_slice(s, chunk.literal_start, chunk.literal_end)
+                if chunk.field_end >= 0:
+                    out.append(self._render_parsed_field(
+                        chunk.name, chunk.conversion, chunk.spec_start,
+                        chunk.field_end, chunk.recursive, 1))
+            out.append_slice(s, compiled.tail_start, len(s))
+            return out.build()
+
         def _build_string(self, start, end, level):
             space = self.space
             out = rstring.StringBuilder()
@@ -322,7 +343,6 @@ def make_template_formatting_class(for_unicode):
 
         def _render_field(self, start, end, recursive, level):
             name, conversion, spec_start = self._parse_field(start, end)
-            spec = self.template[spec_start:end]
             #
             if self.parser_list_w is not None:
                 # used from formatter_parser()
@@ -337,17 +357,24 @@ def make_template_formatting_class(for_unicode):
                     w_entry = space.newtuple([
                         self.wrap(self.template[self.last_end:startm1]),
                         self.wrap(name),
-                        self.wrap(spec),
+                        self.wrap(self.template[spec_start:end]),
                         w_conversion])
                     self.parser_list_w.append(w_entry)
                     self.last_end = end + 1
                 return ""
             #
+            return self._render_parsed_field(name, conversion, spec_start,
+                                             end, recursive, level)
+
+        def _render_parsed_field(self, name, conversion, spec_start, end,
+                                 recursive, level):
             w_obj = self._get_argument(name)
             if conversion is not None:
                 w_obj = self._convert(w_obj, conversion)
             if recursive:
                 spec = self._build_string(spec_start, end, level)
+            else:
+                spec = self.template[spec_start:end]
             w_rendered = self.space.format(w_obj, self.wrap(spec))
             if self.is_unicode:
                 w_rendered = self.space.unicode_from_object(w_rendered)
@@ -375,6 +402,97 @@ str_template_formatter = make_template_formatting_class(for_unicode=False)
 unicode_template_formatter = make_template_formatting_class(for_unicode=True)
 
 
+class TemplateChunk(object):
+    """ Literal text given as a slice of the template, followed by a
+    replacement field if field_end >= 0. """
+    _immutable_ = True
+
+    def __init__(self, literal_start, literal_end, name=None,
+                 conversion=None, spec_start=-1, field_end=-1,
+                 recursive=False):
+        self.literal_start = literal_start
+        self.literal_end = literal_end
+        self.name = name
+        self.conversion = conversion
+        self.spec_start = spec_start
+        self.field_end = field_end
+        self.recursive = recursive
+
+class CompiledTemplate(object):
+    _immutable_ = True
+
+    def __init__(self, chunks, tail_start):
+        self.chunks = chunks[:]
+        self.tail_start = tail_start
+
+def compile_template(s):
+    """ Parses a format() template (utf8-encoded if unicode) like
+    _do_build_string() and _parse_field() do.  Returns None if it is
+    invalid: in that case formatting it must report the error after having
+    rendered the fields that come before it. """
+    chunks = []
+    end = len(s)
+    last_literal = i = 0
+    while i < end:
+        c = s[i]
+        i += 1
+        if c != "{" and c != "}":
+            continue
+        if i == end or (c == "}" and s[i] != "}"):
+            return None
+        if s[i] == c:
+            # escaped "{" or "}"
+            i += 1
+            chunks.append(TemplateChunk(last_literal, i - 1))
+            last_literal = i
+            continue
+        literal_end = i - 1
+        nested = 1
+        field_start = i
+        recursive = False
+        while i < end:
+            c = s[i]
+            if c == "{":
+                recursive = True
+                nested += 1
+            elif c == "}":
+                nested -= 1
+                if not nested:
+                    break
+            i += 1
+        if nested:
+            return None
+        field_end = i
+        # find ":" or "!", see _parse_field()
+        j = field_start
+        name_end = field_end
+        conversion = None
+        spec_start = field_end
+        while j < field_end:
+            c = s[j]
+            if c == ":" or c == "!":
+                name_end = j
+                j += 1
+                if c == "!":
+                    if j == field_end:
+                        return None
+                    conversion = s[j]
+                    j += 1
+                    if j < field_end:
+                        if s[j] != ":":
+                            return None
+                        j += 1
+                spec_start = j
+                break
+            j += 1
+        chunks.append(TemplateChunk(last_literal, literal_end,
+                                    s[field_start:name_end], conversion,
+                                    spec_start, field_end, recursive))
+        i += 1
+        last_literal = i
+    return CompiledTemplate(chunks, last_literal)
+
+
 def format_method(space, w_string, args, is_unicode):
     if is_unicode:
         template = unicode_template_formatter(space,
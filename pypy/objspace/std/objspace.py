@@ -331,10 +331,10 @@ class StdObjSpace(ObjSpace):
         return W_ListObject.newlist_float(self, list_f)
 
     def newdict(self, module=False, instance=False, kwargs=False,
-                strdict=False):
+                strdict=False, sharedkeys=False):
         return W_DictMultiObject.allocate_and_init_instance(
                 self, module=module, instance=instance,
-                strdict=strdict, kwargs=kwargs)
+                strdict=strdict, kwargs=kwargs, sharedkeys=sharedkeys)
 
     def newset(self, iterable_w=None):
         if iterable_w is None:
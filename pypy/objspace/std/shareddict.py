@@ -0,0 +1,275 @@
+"""dict implementation for dicts built from literals and keyword arguments.
+
+Somewhat similar to MapDictStrategy and JsonDictStrategy: the str keys
+are stored in a KeysMap which is shared by all the dicts that got the
+same keys in the same order, and every dict only stores a list of values.
+Used if objspace.std.withsharedkeysdict is enabled.
+"""
+
+from rpython.rlib import jit, rerased
+
+from pypy.objspace.std.dictmultiobject import (
+    BytesDictStrategy, DictStrategy, EmptyDictStrategy, ObjectDictStrategy,
+    _never_equal_to_string, create_iterator_classes, W_DictObject)
+from pypy.objspace.std.kwargsdict import ZipItemsWithHash
+
+
+# limits on the size of the tree of KeysMaps: a dict devolves to a
+# BytesDictStrategy when it would need a map beyond them
+MAX_KEYS = 16           # keys in a single map
+MAX_TRANSITIONS = 8     # different keys added to a single map, apart
+                        # from the root: all the dicts of the program
+                        # start there, so it is only bound by MAX_MAPS
+MAX_MAPS = 10000        # maps in total
+
+
+class KeysMapCache(object):
+    def __init__(self, space):
+        self.space = space
+        self.num_maps = 0
+        self.root = KeysMap(space, self, None, None)
+
+
+class KeysMap(object):
+    """ The keys of a dict, in insertion order.  Adding a key gives the
+    next map, which is cached, so dicts built the same way end up with
+    the same map. """
+
+    _immutable_fields_ = ['cache', 'back', 'key', 'length', 'strategy']
+
+    def __init__(self, space, cache, back, key):
+        self.cache = cache
+        self.back = back
+        self.key = key
+        if back is None:
+            self.length = 0
+        else:
+            self.length = back.length + 1
+        self.transitions = None     # dict {key: next map}, created lazily
+        self.keys = None            # list of keys, created lazily
+        self.strategy = SharedDictStrategy(space, self)
+        cache.num_maps += 1
+
+    @jit.elidable
+    def index(self, key):
+        keysmap = self
+        while keysmap.back is not None:
+            if keysmap.key == key:
+                return keysmap.length - 1
+            keysmap = keysmap.back
+        return -1
+
+    @jit.elidable
+    def add_key(self, key):
+        """ Returns the map with 'key' added at the end, or None if that
+        would exceed the limits. """
+        transitions = self.transitions
+        if transitions is None:
+            transitions = self.transitions = {}
+        keysmap = transitions.get(key, None)
+        if keysmap is None:
+            if (self.length >= MAX_KEYS or
+                    (len(transitions) >= MAX_TRANSITIONS and
+                     self.back is not None) or
+                    self.cache.num_maps >= MAX_MAPS):
+                return None
+            keysmap = KeysMap(self.cache.space, self.cache, self, key)
+            transitions[key] = keysmap
+        return keysmap
+
+    @jit.elidable
+    def get_keys(self):
+        """ The keys in order.  The result must not be modified. """
+        keys = self.keys
+        if keys is None:
+            keys = [None] * self.length
+            keysmap = self
+            while keysmap.back is not None:
+                keys[keysmap.length - 1] = keysmap.key
+                keysmap = keysmap.back
+            self.keys = keys
+        return keys
+
+    def __repr__(self):
+        return "<KeysMap %r>" % (self.get_keys(),)
+
+
+def from_keys_and_values(space, keys, values_w):
+    """ Returns a new dict with the given str keys, which must all be
+    different, or None if they cannot share a map. """
+    keysmap = space.fromcache(KeysMapCache).root
+    for key in keys:
+        keysmap = keysmap.add_key(key)
+        if keysmap is None:
+            return None
+    strategy = keysmap.strategy
+    return W_DictObject(space, strategy, strategy.erase(values_w[:]))
+
+
+class EmptySharedDictStrategy(EmptyDictStrategy):
+    def switch_to_bytes_strategy(self, w_dict):
+        strategy = self.space.fromcache(KeysMapCache).root.strategy
+        storage = strategy.get_empty_storage()
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = storage
+
+    def copy(self, w_dict):
+        return W_DictObject(self.space, self, self.get_empty_storage())
+
+
+class SharedDictStrategy(DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("shareddict")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    _immutable_fields_ = ['keysmap']
+
+    def __init__(self, space, keysmap):
+        DictStrategy.__init__(self, space)
+        self.keysmap = keysmap
+
+    def wrap(self, key):
+        return self.space.newbytes(key)
+
+    def unwrap(self, wrapped):
+        return self.space.bytes_w(wrapped)
+
+    def wrapkey(space, key):
+        return space.newbytes(key)
+
+    def get_empty_storage(self):
+        assert self.keysmap.length == 0
+        return self.erase([])
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return space.is_w(space.type(w_obj), space.w_bytes)
+
+    def _never_equal_to(self, w_lookup_type):
+        return _never_equal_to_string(self.space, w_lookup_type)
+
+    def length(self, w_dict):
+        return self.keysmap.length
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        if self.is_correct_type(w_key):
+            return self.getitem_str(w_dict, self.unwrap(w_key))
+        elif self._never_equal_to(space.type(w_key)):
+            return None
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_key)
+
+    def getitem_str(self, w_dict, key):
+        if jit.isconstant(key):
+            jit.promote(self)
+        index = self.keysmap.index(key)
+        if index == -1:
+            return None
+        return self.unerase(w_dict.dstorage)[index]
+
+    def setitem(self, w_dict, w_key, w_value):
+        if self.is_correct_type(w_key):
+            self.setitem_str(w_dict, self.unwrap(w_key), w_value)
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.setitem(w_key, w_value)
+
+    def setitem_str(self, w_dict, key, w_value):
+        if jit.isconstant(key):
+            jit.promote(self)
+        values_w = self.unerase(w_dict.dstorage)
+        index = self.keysmap.index(key)
+        if index != -1:
+            values_w[index] = w_value
+            return
+        keysmap = self.keysmap.add_key(key)
+        if keysmap is None:
+            self.switch_to_bytes_strategy(w_dict)
+            w_dict.setitem_str(key, w_value)
+            return
+        values_w.append(w_value)
+        w_dict.set_strategy(keysmap.strategy)
+
+    def setdefault(self, w_dict, w_key, w_default):
+        if self.is_correct_type(w_key):
+            key = self.unwrap(w_key)
+            w_result = self.getitem_str(w_dict, key)
+            if w_result is not None:
+                return w_result
+            self.setitem_str(w_dict, key, w_default)
+            return w_default
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.setdefault(w_key, w_default)
+
+    def delitem(self, w_dict, w_key):
+        self.switch_to_bytes_strategy(w_dict)
+        return w_dict.delitem(w_key)
+
+    def popitem(self, w_dict):
+        keysmap = self.keysmap
+        if keysmap.back is None:
+            raise KeyError
+        w_value = self.unerase(w_dict.dstorage).pop()
+        w_dict.set_strategy(keysmap.back.strategy)
+        return self.wrap(keysmap.key), w_value
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_bytes(self.keysmap.get_keys()[:])
+
+    def values(self, w_dict):
+        return self.unerase(w_dict.dstorage)[:]
+
+    def items(self, w_dict):
+        space = self.space
+        keys = self.keysmap.get_keys()
+        values_w = self.unerase(w_dict.dstorage)
+        return [space.newtuple2(self.wrap(keys[i]), values_w[i])
+                for i in range(len(keys))]
+
+    def listview_bytes(self, w_dict):
+        return self.keysmap.get_keys()[:]
+
+    def view_as_kwargs(self, w_dict):
+        values_w = self.unerase(w_dict.dstorage)
+        return self.keysmap.get_keys()[:], values_w[:]
+
+    def switch_to_object_strategy(self, w_dict):
+        strategy = self.space.fromcache(ObjectDictStrategy)
+        keys = self.keysmap.get_keys()
+        values_w = self.unerase(w_dict.dstorage)
+        d_new = strategy.unerase(strategy.get_empty_storage())
+        for i in range(len(keys)):
+            d_new[self.wrap(keys[i])] = values_w[i]
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = strategy.erase(d_new)
+
+    def switch_to_bytes_strategy(self, w_dict):
+        strategy = self.space.fromcache(BytesDictStrategy)
+        keys = self.keysmap.get_keys()
+        values_w = self.unerase(w_dict.dstorage)
+        storage = strategy.get_empty_storage()
+        d_new = strategy.unerase(storage)
+        for i in range(len(keys)):
+            d_new[keys[i]] = values_w[i]
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = storage
+
+    def getiterkeys(self, w_dict):
+        return iter(self.keysmap.get_keys())
+
+    def getitervalues(self, w_dict):
+        return iter(self.unerase(w_dict.dstorage))
+
+    def getiteritems_with_hash(self, w_dict):
+        return ZipItemsWithHash(self.keysmap.get_keys(),
+                                self.unerase(w_dict.dstorage))
+
+    def copy(self, w_dict):
+        values_w = self.unerase(w_dict.dstorage)
+        return W_DictObject(self.space, self, self.erase(values_w[:]))
+
+
+create_iterator_classes(SharedDictStrategy)
@@ -0,0 +1,126 @@
+"""A 'str' built by repeated concatenation.  Enabled with the option
+objspace.std.withstrbuf: adding to a string that is long enough gives a
+W_StringBufferObject, and adding to that appends to the same
+StringBuilder instead of copying the whole string every time.  Any other
+operation flattens it first into a regular W_BytesObject.
+"""
+
+import inspect
+
+import py
+
+from rpython.rlib.buffer import StringBuffer
+from rpython.rlib.rstring import StringBuilder
+
+from pypy.interpreter.buffer import SimpleView
+from pypy.interpreter.error import oefmt
+from pypy.objspace.std.bytesobject import W_AbstractBytesObject, W_BytesObject
+
+# the result of 'str + str' needs to be at least that long to become a
+# W_StringBufferObject: shorter strings are cheaper to copy
+STRBUF_MIN_LENGTH = 64
+
+
+class W_StringBufferObject(W_AbstractBytesObject):
+    w_str = None
+
+    def __init__(self, builder, length):
+        # 'builder' may be shared with other W_StringBufferObjects that
+        # contain a prefix of the same string: only the first 'length'
+        # characters belong to this object
+        self.builder = builder
+        self.length = length
+
+    def __repr__(self):
+        """representation for debugging purposes"""
+        if self.w_str is None:
+            return "%s(%r[:%d])" % (self.__class__.__name__, self.builder,
+                                    self.length)
+        return "%s(%r)" % (self.__class__.__name__, self.w_str._value)
+
+    def force(self):
+        if self.w_str is None:
+            s = self.builder.build()
+            if self.length < len(s):
+                s = s[:self.length]
+            self.w_str = W_BytesObject(s)
+            self.builder = None
+            return s
+        else:
+            return self.w_str._value
+
+    def unwrap(self, space):
+        return self.force()
+
+    def str_w(self, space):
+        return self.force()
+
+    def utf8_w(self, space):
+        return self.force()
+
+    charbuf_w = str_w
+
+    def buffer_w(self, space, flags):
+        space.check_buf_flags(flags, True)
+        return SimpleView(StringBuffer(self.force()))
+
+    def readbuf_w(self, space):
+        return StringBuffer(self.force())
+
+    def writebuf_w(self, space):
+        raise oefmt(space.w_TypeError,
+                    "Cannot use string as modifiable buffer")
+
+    def listview_bytes(self):
+        self.force()
+        return self.w_str.listview_bytes()
+
+    def ord(self, space):
+        self.force()
+        return self.w_str.ord(space)
+
+    def descr_len(self, space):
+        return space.newint(self.length)
+
+    def descr_add(self, space, w_other):
+        if not isinstance(w_other, W_AbstractBytesObject):
+            self.force()
+            return self.w_str.descr_add(space, w_other)
+        other = space.bytes_w(w_other)
+        if self.w_str is None and self.builder.getlength() == self.length:
+            # nobody appended to the builder after us: reuse it
+            builder = self.builder
+        else:
+            builder = StringBuilder(self.length + len(other))
+            builder.append(self.force())
+        builder.append(other)
+        return W_StringBufferObject(builder, self.length + len(other))
+
+
+def _make_delegate(func):
+    # a method with the same signature as 'func' that flattens the
+    # string and calls 'func' on the W_BytesObject.  There is no
+    # unwrap_spec to copy: the typedef uses interpindirect2app() with the
+    # one of W_AbstractBytesObject.
+    args = inspect.getargs(func.func_code)
+    assert not args.varargs and not args.keywords
+    argspec = ', '.join([arg for arg in args.args[1:]])
+    func_code = py.code.Source("""
+    def f(self, %(args)s):
+        self.force()
+        return self.w_str.%(func_name)s(%(args)s)
+    """ % {'args': argspec, 'func_name': func.func_name})
+    d = {}
+    exec func_code.compile() in d
+    f = d['f']
+    f.func_defaults = func.func_defaults
+    f.__module__ = func.__module__
+    f.func_name = func.func_name
+    return f
+
+for _name, _func in W_AbstractBytesObject.__dict__.items():
+    if (_name.startswith('descr_') and
+            _name not in W_StringBufferObject.__dict__):
+        setattr(W_StringBufferObject, _name, _make_delegate(_func))
+
+W_StringBufferObject.typedef = W_BytesObject.typedef
@@ -44,8 +44,8 @@ class StringMethods(object):
             other = self._op_val(space, w_sub)
             return space.newbool(value.find(other, start, end) >= 0)
 
-        from pypy.objspace.std.bytesobject import W_BytesObject
-        if isinstance(w_sub, W_BytesObject):
+        from pypy.objspace.std.bytesobject import W_AbstractBytesObject
+        if isinstance(w_sub, W_AbstractBytesObject):
             other = self._op_val(space, w_sub)
             res = find(value, other, start, end)
         else:
@@ -154,11 +154,11 @@ class StringMethods(object):
                                             end))
 
         from pypy.objspace.std.bytearrayobject import W_BytearrayObject
-        from pypy.objspace.std.bytesobject import W_BytesObject
+        from pypy.objspace.std.bytesobject import W_AbstractBytesObject
         if isinstance(w_sub, W_BytearrayObject):
             res = count(value, w_sub.getdata(), start, end)
-        elif isinstance(w_sub, W_BytesObject):
-            res = count(value, w_sub._value, start, end)
+        elif isinstance(w_sub, W_AbstractBytesObject):
+            res = count(value, w_sub.str_w(space), start, end)
         else:
             buffer = _get_buffer(space, w_sub)
             res = count(value, buffer, start, end)
@@ -248,11 +248,11 @@ class StringMethods(object):
             return space.newint(res)
 
         from pypy.objspace.std.bytearrayobject import W_BytearrayObject
-        from pypy.objspace.std.bytesobject import W_BytesObject
+        from pypy.objspace.std.bytesobject import W_AbstractBytesObject
         if isinstance(w_sub, W_BytearrayObject):
             res = find(value, w_sub.getdata(), start, end)
-        elif isinstance(w_sub, W_BytesObject):
-            res = find(value, w_sub._value, start, end)
+        elif isinstance(w_sub, W_AbstractBytesObject):
+            res = find(value, w_sub.str_w(space), start, end)
         else:
             buffer = _get_buffer(space, w_sub)
             res = find(value, buffer, start, end)
@@ -268,11 +268,11 @@ class StringMethods(object):
             return space.newint(res)
 
         from pypy.objspace.std.bytearrayobject import W_BytearrayObject
-        from pypy.objspace.std.bytesobject import W_BytesObject
+        from pypy.objspace.std.bytesobject import W_AbstractBytesObject
         if isinstance(w_sub, W_BytearrayObject):
             res = rfind(value, w_sub.getdata(), start, end)
-        elif isinstance(w_sub, W_BytesObject):
-            res = rfind(value, w_sub._value, start, end)
+        elif isinstance(w_sub, W_AbstractBytesObject):
+            res = rfind(value, w_sub.str_w(space), start, end)
         else:
             buffer = _get_buffer(space, w_sub)
             res = rfind(value, buffer, start, end)
@@ -284,13 +284,13 @@ class StringMethods(object):
         value, start, end, ofs = self._convert_idx_params(space, w_start, w_end)
 
         from pypy.objspace.std.bytearrayobject import W_BytearrayObject
-        from pypy.objspace.std.bytesobject import W_BytesObject
+        from pypy.objspace.std.bytesobject import W_AbstractBytesObject
         if self._use_rstr_ops(space, w_sub):
             res = value.find(self._op_val(space, w_sub), start, end)
         elif isinstance(w_sub, W_BytearrayObject):
             res = find(value, w_sub.getdata(), start, end)
-        elif isinstance(w_sub, W_BytesObject):
-            res = find(value, w_sub._value, start, end)
+        elif isinstance(w_sub, W_AbstractBytesObject):
+            res = find(value, w_sub.str_w(space), start, end)
         else:
             buffer = _get_buffer(space, w_sub)
             res = find(value, buffer, start, end)
@@ -306,13 +306,13 @@ class StringMethods(object):
         value, start, end, ofs = self._convert_idx_params(space, w_start, w_end)
 
         from pypy.objspace.std.bytearrayobject import W_BytearrayObject
-        from pypy.objspace.std.bytesobject import W_BytesObject
+        from pypy.objspace.std.bytesobject import W_AbstractBytesObject
         if self._use_rstr_ops(space, w_sub):
             res = value.rfind(self._op_val(space, w_sub), start, end)
         elif isinstance(w_sub, W_BytearrayObject):
             res = rfind(value, w_sub.getdata(), start, end)
-        elif isinstance(w_sub, W_BytesObject):
-            res = rfind(value, w_sub._value, start, end)
+        elif isinstance(w_sub, W_AbstractBytesObject):
+            res = rfind(value, w_sub.str_w(space), start, end)
         else:
             buffer = _get_buffer(space, w_sub)
             res = rfind(value, buffer, start, end)
@@ -0,0 +1,105 @@
+from pypy.objspace.std import formatcache
+from pypy.objspace.std.formatcache import (
+    FormatCache, get_compiled_mod_format, get_compiled_template)
+from pypy.objspace.std.formatting import compile_mod_format, SPEC_STAR
+from pypy.objspace.std.newformat import compile_template
+
+
+class TestCompile:
+    def test_mod_format(self):
+        compiled = compile_mod_format("a%sbc%(x(y))-+ #05.3ld%%%*.*f!")
+        specs = compiled.specs
+        assert [spec.char for spec in specs] == ['s', 'd', '%', 'f']
+        assert [(spec.literal_start, spec.literal_end) for spec in specs] == [
+            (0, 1), (3, 5), (22, 22), (24, 24)]
+        assert compiled.tail_start == 29
+        assert specs[0].key is None
+        assert specs[0].width == 0
+        assert specs[0].prec == -1
+        d = specs[1]
+        assert d.key == "x(y)"
+        assert d.f_ljust and d.f_sign and d.f_blank and d.f_alt and d.f_zero
+        assert d.width == 5
+        assert d.prec == 3
+        assert specs[3].width == specs[3].prec == SPEC_STAR
+
+    def test_invalid_mod_format(self):
+        for fmt in ["%", "%(a", "%5", "%.", "%y", "%s %\xe9",
+                    "%.999999999999s", "%99999999999999999999999999s"]:
+            assert compile_mod_format(fmt) is None
+        assert compile_mod_format("abc").specs == []
+
+    def test_template(self):
+        compiled = compile_template("a{{b}}{0!r:>{1}}c{x.y[2]}{}")
+        chunks = compiled.chunks
+        assert [(chunk.literal_start, chunk.literal_end)
+                for chunk in chunks] == [(0, 2), (3, 5), (6, 6), (16, 17),
+                                         (25, 25)]
+        assert [chunk.field_end for chunk in chunks] == [-1, -1, 15, 24, 26]
+        assert [chunk.name for chunk in chunks[2:]] == ["0", "x.y[2]", ""]
+        assert chunks[2].conversion == "r"
+        assert chunks[2].spec_start == 11
+        assert chunks[2].recursive
+        assert not chunks[3].recursive
+        assert compiled.tail_start == 27
+
+    def test_invalid_template(self):
+        for template in ["{", "}", "a}b", "{0", "{0!}", "{0!rs}"]:
+            assert compile_template(template) is None
+
+
+class TestFormatCache:
+    def test_cached(self):
+        space = self.space
+        compiled = get_compiled_mod_format(space, "%d-%s")
+        assert get_compiled_mod_format(space, "%d-%s") is compiled
+        assert get_compiled_mod_format(space, "%y") is None
+        cache = space.fromcache(FormatCache)
+        assert "%y" not in cache.mod_formats
+        compiled = get_compiled_template(space, "{0}")
+        assert get_compiled_template(space, "{0}") is compiled
+
+    def test_bounded(self, monkeypatch):
+        space = self.space
+        monkeypatch.setattr(formatcache, 'MAX_ENTRIES', 10)
+        cache = space.fromcache(FormatCache)
+        for i in range(25):
+            get_compiled_template(space, "{%d}" % i)
+            assert len(cache.templates) <= 10
+
+
+class AppTestFormatCache:
+    def test_dynamic_formats(self):
+        fmts = ['%d:%s', '%(a)s/%(b)r', '%-*d|', '%.*f', '%c%%']
+        args = [(1, 'x'), {'a': 1, 'b': 'y'}, (4, 2), (2, 3.14159), 65]
+        for i in range(3):
+            results = [fmt % arg for fmt, arg in zip(fmts, args)]
+            assert results == ['1:x', "1/'y'", '2   |', '3.14', 'A%']
+            results = [unicode(fmt) % arg for fmt, arg in zip(fmts, args)]
+            assert results == [u'1:x', u"1/'y'", u'2   |', u'3.14', u'A%']
+        assert '%s' % u'\xe9' == u'\xe9'
+
+    def test_dynamic_templates(self):
+        templates = ['{0}-{1!r}', '{a:>{w}}', '{{{}}}', '{0.real}']
+        for i in range(3):
+            assert [templates[0].format(1, 'x'),
+                    templates[1].format(a='b', w=3),
+                    templates[2].format(5),
+                    templates[3].format(2)] == ["1-'x'", '  b', '{5}', '2']
+            assert u'{0}{1}'.format(u'\xe9', 1) == u'\xe91'
+
+    def test_errors_after_conversions(self):
+        seen = []
+        class A(object):
+            def __str__(self):
+                seen.append(1)
+                return 'a'
+            def __format__(self, spec):
+                seen.append(2)
+                return 'a'
+        raises(ValueError, "'%s %y' % (A(), 1)")
+        assert seen == [1]
+        raises(ValueError, "'{0} {'.format(A())")
+        assert seen == [1, 2]
+        raises(TypeError, "'%s %s' % (A(),)")
+        assert seen == [1, 2, 1]
@@ -1895,6 +1895,158 @@ class AppTestGlobalCaching(AppTestWithMapDict):
         else:
             assert 0, "failed: got %r" % ([got[1] for got in seen],)
 
+class AppTestNoMapCaching(object):
+    def setup_class(cls):
+        from pypy.interpreter import gateway
+        #
+        def cached(space, w_func, name):
+            w_code = space.getattr(w_func, space.wrap('func_code'))
+            nameindex = map(space.str_w, w_code.co_names_w).index(name)
+            entry = w_code._nomap_caches[nameindex]
+            if entry is None:
+                return space.w_None
+            if entry.globalcache_wref is not None:
+                return space.wrap("module")
+            return space.newbool(entry.w_value is not None)
+        cached.unwrap_spec = [gateway.ObjSpace, gateway.W_Root, 'text']
+        cls.w_cached = cls.space.wrap(gateway.interp2app(cached))
+
+    def test_module_attribute(self):
+        import math, sys
+        mod = type(sys)('mod')
+        mod.x = 1
+        def f():
+            return mod.x
+        assert f() == 1
+        assert self.cached(f, "x") == "module"
+        assert f() == 1
+        mod.x = 2
+        assert f() == 2
+        del mod.x
+        raises(AttributeError, f)
+        mod.x = 3
+        assert f() == 3
+        def g():
+            return math.sqrt(4.0)
+        assert g() == 2.0
+        assert g() == 2.0
+        assert self.cached(g, "sqrt") == "module"
+
+    def test_module_dict_changes_strategy(self):
+        import sys
+        mod = type(sys)('mod')
+        mod.x = 1
+        def f():
+            return mod.x
+        assert f() == 1
+        mod.__dict__[5] = 6
+        assert f() == 1
+        mod.x = 2
+        assert f() == 2
+
+    def test_several_modules(self):
+        import sys
+        mods = [type(sys)('mod%d' % i) for i in range(3)]
+        for i, mod in enumerate(mods):
+            mod.x = i
+        def f(mod):
+            return mod.x
+        for i in range(6):
+            assert f(mods[i % 3]) == i % 3
+
+    def test_module_subclass_and_doc(self):
+        import sys
+        class Mod(type(sys)):
+            def __getattribute__(self, name):
+                return 42
+        mod = Mod('mod')
+        def f():
+            return mod.x
+        assert f() == 42
+        assert f() == 42
+        assert self.cached(f, "x") is None
+        def g():
+            return sys.__doc__
+        assert g() == sys.__doc__
+        assert self.cached(g, "__doc__") is None
+
+    def test_class_attribute(self):
+        class A(object):
+            x = 1
+        class B(A):
+            pass
+        def f():
+            return B.x
+        assert f() == 1
+        assert self.cached(f, "x") is True
+        assert f() == 1
+        A.x = 2
+        assert f() == 2
+        B.x = 3
+        assert f() == 3
+        del B.x
+        assert f() == 2
+        del A.x
+        raises(AttributeError, f)
+
+    def test_class_attribute_not_cached(self):
+        class Descr(object):
+            def __get__(self, obj, cls):
+                return 42
+        class Other(object):
+            pass
+        class A(object):
+            x = Descr()
+            y = Other()
+            def meth(self):
+                pass
+        def f():
+            return A.x, A.y, A.meth
+        assert f()[0] == 42
+        assert self.cached(f, "x") is False
+        assert self.cached(f, "y") is False
+        assert self.cached(f, "meth") is False
+        Other.__get__ = lambda self, obj, cls: 43
+        assert f()[:2] == (42, 43)
+        assert f()[2] is not A.__dict__['meth']
+        def g():
+            return A.__name__
+        assert g() == 'A'
+        assert self.cached(g, "__name__") is None
+
+    def test_metaclass(self):
+        class Meta(type):
+            x = 5
+            def __getattribute__(self, name):
+                return 42
+        class A(object):
+            __metaclass__ = Meta
+            x = 1
+        def f():
+            return A.x
+        assert f() == 42
+        assert f() == 42
+        assert self.cached(f, "x") is None
+
+    def test_call_method(self):
+        import sys
+        mod = type(sys)('mod')
+        mod.func = lambda x: x + 1
+        class A(object):
+            @staticmethod
+            def meth(x):
+                return x + 2
+        # 'exec' to make sure that the calls use CALL_METHOD
+        d = {'mod': mod, 'A': A}
+        exec """def f(x):
+            return mod.func(x) + A.meth(x)""" in d
+        f = d['f']
+        assert f(1) == 5
+        assert self.cached(f, "func") == "module"
+        assert f(1) == 5
+        mod.func = lambda x: x + 10
+        assert f(1) == 14
+
 class TestDictSubclassShortcutBug(object):
     spaceconfig = {"objspace.std.withmethodcachecounter": True}
 
@@ -192,7 +192,10 @@ class AppTestMethodCaching(test_typeobject.AppTestTypeObject):
             # non-method attributes from the class
             assert cache_counter[0] >= 450
             assert cache_counter[1] >= 1
-            assert sum(cache_counter) == 500
+            # the first two 'A.x' don't look at the method cache: they come
+            # from the LOAD_ATTR cache for classes, until 'x' becomes a
+            # MutableCell
+            assert sum(cache_counter) == 498
 
             __pypy__.reset_method_cache_counter()
             a = A()
@@ -0,0 +1,167 @@
+import py
+
+from pypy.objspace.std.dictmultiobject import (
+    BytesDictStrategy, ObjectDictStrategy)
+from pypy.objspace.std.test import test_dictmultiobject
+from pypy.objspace.std.shareddict import (
+    SharedDictStrategy, MAX_KEYS, MAX_TRANSITIONS)
+
+
+class TestSharedDict(object):
+    spaceconfig = {"objspace.std.withsharedkeysdict": True}
+
+    def newdict(self, *keys):
+        space = self.space
+        w_d = space.newdict(sharedkeys=True)
+        for i, key in enumerate(keys):
+            space.setitem(w_d, space.newbytes(key), space.newint(i))
+        return w_d
+
+    def test_same_keys_share_the_map(self):
+        w_d1 = self.newdict("a", "b", "c")
+        w_d2 = self.newdict("a", "b", "c")
+        strategy = w_d1.get_strategy()
+        assert isinstance(strategy, SharedDictStrategy)
+        assert strategy is w_d2.get_strategy()
+        assert strategy.keysmap.get_keys() == ["a", "b", "c"]
+        assert strategy.unerase(w_d1.dstorage) is not (
+            strategy.unerase(w_d2.dstorage))
+        w_d3 = self.newdict("a", "c", "b")
+        assert w_d3.get_strategy() is not strategy
+
+    def test_getitem_setitem(self):
+        space = self.space
+        w_d = self.newdict("a", "b")
+        assert space.int_w(w_d.getitem_str("b")) == 1
+        assert w_d.getitem_str("c") is None
+        w_d.setitem_str("a", space.newint(42))
+        assert space.int_w(w_d.getitem(space.newbytes("a"))) == 42
+        assert w_d.getitem(space.newint(1)) is None
+        assert w_d.length() == 2
+        assert isinstance(w_d.get_strategy(), SharedDictStrategy)
+
+    def test_devolve(self):
+        space = self.space
+        w_d = self.newdict("a", "b")
+        space.setitem(w_d, space.newint(1), space.w_None)
+        assert isinstance(w_d.get_strategy(), ObjectDictStrategy)
+        assert space.int_w(w_d.getitem_str("b")) == 1
+        w_d = self.newdict("a", "b")
+        w_d.delitem(space.newbytes("a"))
+        assert isinstance(w_d.get_strategy(), BytesDictStrategy)
+        assert w_d.length() == 1
+
+    def test_limits(self):
+        w_d = self.newdict(*["k%d" % i for i in range(MAX_KEYS + 1)])
+        assert isinstance(w_d.get_strategy(), BytesDictStrategy)
+        assert self.space.int_w(w_d.getitem_str("k3")) == 3
+        for i in range(MAX_TRANSITIONS):
+            w_d = self.newdict("x", "y%d" % i)
+            assert isinstance(w_d.get_strategy(), SharedDictStrategy)
+        w_d = self.newdict("x", "z")
+        assert isinstance(w_d.get_strategy(), BytesDictStrategy)
+        w_d = self.newdict("x", "y0")
+        assert isinstance(w_d.get_strategy(), SharedDictStrategy)
+
+    def test_many_first_keys(self):
+        # the root map has no limit on its transitions
+        for i in range(MAX_TRANSITIONS * 4):
+            w_d = self.newdict("first%d" % i, "b")
+            assert isinstance(w_d.get_strategy(), SharedDictStrategy)
+
+    def test_max_maps(self, monkeypatch):
+        from pypy.objspace.std import shareddict
+        cache = self.space.fromcache(shareddict.KeysMapCache)
+        monkeypatch.setattr(shareddict, 'MAX_MAPS', cache.num_maps + 2)
+        w_d = self.newdict("newkey1", "newkey2")
+        assert isinstance(w_d.get_strategy(), SharedDictStrategy)
+        w_d = self.newdict("newkey3")
+        assert isinstance(w_d.get_strategy(), BytesDictStrategy)
+
+    def test_only_with_sharedkeys(self):
+        w_d = self.space.newdict()
+        w_d.setitem_str("a", self.space.w_None)
+        assert isinstance(w_d.get_strategy(), BytesDictStrategy)
+
+
+class AppTestSharedDict(object):
+    spaceconfig = {"objspace.std.withsharedkeysdict": True}
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("__repr__ doesn't work on appdirect")
+
+    def w_get_strategy(self, obj):
+        import __pypy__
+        r = __pypy__.internal_repr(obj)
+        return r[r.find("(") + 1: r.find(")")]
+
+    def test_literal(self):
+        def f(i):
+            return {'id': i, 'name': str(i), 'ts': 1.5}
+        d = f(5)
+        assert "SharedDictStrategy" in self.get_strategy(d)
+        assert d == {'name': '5', 'id': 5, 'ts': 1.5}
+        assert d.keys() == ['id', 'name', 'ts']
+        assert d.values() == [5, '5', 1.5]
+        assert d.items() == [('id', 5), ('name', '5'), ('ts', 1.5)]
+        assert list(d.iteritems()) == d.items()
+        assert 'name' in d
+        assert 'x' not in d
+        assert 1 not in d
+        assert len(d) == 3
+        assert f(6)['id'] == 6
+        assert "SharedDictStrategy" not in self.get_strategy({})
+
+    def test_add_and_change(self):
+        d = {'a': 1}
+        d['b'] = 2
+        d['a'] = 3
+        assert "SharedDictStrategy" in self.get_strategy(d)
+        assert d == {'a': 3, 'b': 2}
+        assert d.setdefault('c', 4) == 4
+        assert d.setdefault('a', 5) == 3
+        assert d.pop('a') == 3
+        assert d == {'b': 2, 'c': 4}
+
+    def test_popitem_and_copy(self):
+        d = {'a': 1, 'b': 2}
+        e = d.copy()
+        assert "SharedDictStrategy" in self.get_strategy(e)
+        assert d.popitem() == ('b', 2)
+        assert d.popitem() == ('a', 1)
+        raises(KeyError, d.popitem)
+        assert e == {'a': 1, 'b': 2}
+        e['c'] = 3
+        assert d == {}
+
+    def test_other_keys(self):
+        d = {'a': 1, u'b': 2}
+        assert d == {'a': 1, 'b': 2}
+        d = {'a': 1}
+        assert d.get(u'a') == 1
+        d[5] = 6
+        assert d == {'a': 1, 5: 6}
+
+    def test_iterate_while_adding(self):
+        d = {'a': 1}
+        def f():
+            for key in d:
+                d['b'] = 2
+        raises(RuntimeError, f)
+
+    def test_dict_kwargs(self):
+        d = dict(a=1, b=2)
+        assert "SharedDictStrategy" in self.get_strategy(d)
+        assert d == {'a': 1, 'b': 2}
+        def f(**kw):
+            return dict(**kw)
+        e = f(b=2, a=1)
+        assert e == d
+        e['c'] = 3
+        assert 'c' not in d
+
+
+class AppTest_DictMultiObjectWithSharedKeys(
+        test_dictmultiobject.AppTest_DictMultiObject):
+    spaceconfig = {"objspace.std.withsharedkeysdict": True}
@@ -0,0 +1,156 @@
+from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.strbufobject import (
+    W_StringBufferObject, STRBUF_MIN_LENGTH)
+from pypy.objspace.std.test import test_bytesobject
+
+
+class TestW_StringBufferObject:
+    spaceconfig = {"objspace.std.withstrbuf": True}
+
+    def test_short_add_is_not_a_buffer(self):
+        space = self.space
+        w_s = space.add(space.newbytes('a'), space.newbytes('b'))
+        assert type(w_s) is W_BytesObject
+
+    def test_add_appends_to_builder(self):
+        space = self.space
+        w_s = space.add(space.newbytes('x' * STRBUF_MIN_LENGTH),
+                        space.newbytes('a'))
+        assert isinstance(w_s, W_StringBufferObject)
+        builder = w_s.builder
+        w_s = space.add(w_s, space.newbytes('b'))
+        assert isinstance(w_s, W_StringBufferObject)
+        assert w_s.builder is builder
+        assert w_s.w_str is None
+        assert space.len_w(w_s) == STRBUF_MIN_LENGTH + 2
+        assert w_s.w_str is None
+        assert space.bytes_w(w_s) == 'x' * STRBUF_MIN_LENGTH + 'ab'
+        assert type(w_s.w_str) is W_BytesObject
+        assert w_s.builder is None
+
+    def test_shared_builder(self):
+        space = self.space
+        w_a = space.add(space.newbytes('x' * STRBUF_MIN_LENGTH),
+                        space.newbytes('a'))
+        w_b = space.add(w_a, space.newbytes('b'))
+        w_c = space.add(w_a, space.newbytes('c'))
+        assert w_c.builder is not w_b.builder
+        assert space.bytes_w(w_c) == 'x' * STRBUF_MIN_LENGTH + 'ac'
+        assert space.bytes_w(w_a) == 'x' * STRBUF_MIN_LENGTH + 'a'
+        assert space.bytes_w(w_b) == 'x' * STRBUF_MIN_LENGTH + 'ab'
+
+    def test_type(self):
+        space = self.space
+        w_s = space.add(space.newbytes('x' * STRBUF_MIN_LENGTH),
+                        space.newbytes('a'))
+        assert isinstance(w_s, W_StringBufferObject)
+        assert space.is_w(space.type(w_s), space.w_bytes)
+        assert space.isinstance_w(w_s, space.w_bytes)
+
+    def test_fast_paths_accept_buffer(self):
+        space = self.space
+        w_s = space.add(space.newbytes('x' * STRBUF_MIN_LENGTH),
+                        space.newbytes('a'))
+        assert isinstance(w_s, W_StringBufferObject)
+        assert W_BytesObject._use_rstr_ops(space, w_s)
+
+class AppTestStringBufferObject:
+    spaceconfig = {"objspace.std.withstrbuf": True}
+
+    def setup_class(cls):
+        cls.w_base = cls.space.newbytes('x' * STRBUF_MIN_LENGTH)
+
+    def test_basic(self):
+        s = self.base + 'a'
+        s += 'b'
+        assert type(s) is str
+        assert len(s) == len(self.base) + 2
+        assert s == self.base + 'ab'
+        assert self.base + 'ab' == s
+        assert s.endswith('xab')
+        assert s[-3:] == 'xab'
+
+    def test_add_many(self):
+        s = self.base
+        for i in range(1000):
+            s += chr(65 + i % 26)
+        assert len(s) == len(self.base) + 1000
+        assert s[len(self.base):len(self.base) + 3] == 'ABC'
+        assert s.count('Z') == 38
+
+    def test_add_to_shared_prefix(self):
+        a = self.base + 'a'
+        b = a + 'b'
+        c = a + 'c'
+        d = b + 'd'
+        assert a == self.base + 'a'
+        assert b == self.base + 'ab'
+        assert c == self.base + 'ac'
+        assert d == self.base + 'abd'
+
+    def test_add_self(self):
+        s = self.base + 'a'
+        s += s
+        assert s == (self.base + 'a') * 2
+
+    def test_add_other_types(self):
+        s = self.base + 'a'
+        u = s + u'\xe9'
+        assert type(u) is unicode
+        assert u == unicode(self.base) + u'a\xe9'
+        assert s + bytearray('b') == bytearray(self.base + 'ab')
+        raises(TypeError, "s + 1")
+        assert 'a' + s == 'a' + self.base + 'a'
+
+    def test_hash_and_dict(self):
+        s = self.base + 'a'
+        s += 'b'
+        d = {self.base + 'ab': 42}
+        assert hash(s) == hash(self.base + 'ab')
+        assert d[s] == 42
+
+    def test_methods_and_protocols(self):
+        s = self.base + 'a'
+        s += 'b'
+        assert s.upper() == self.base.upper() + 'AB'
+        assert '%s!' % s == self.base + 'ab!'
+        assert (s + '%d') % 5 == self.base + 'ab5'
+        assert '{0}'.format(s) == self.base + 'ab'
+        assert (s + '{0}').format(1) == self.base + 'ab1'
+        assert buffer(s)[-2:] == 'ab'
+        assert str(s) == self.base + 'ab'
+        assert int('1' * len(self.base) + '2') % 10 == 2
+        assert list(s)[-1] == 'b'
+        assert 'b' in s
+
+    def test_marshal(self):
+        import marshal
+        s = self.base + 'a'
+        assert marshal.loads(marshal.dumps(s)) == self.base + 'a'
+
+
+    def test_as_argument(self):
+        s = self.base + 'ab'
+        t = 'y' + self.base + 'ab' + self.base + 'ab'
+        assert s in t
+        assert t.count(s) == 2
+        assert t.find(s) == 1
+        assert t.rfind(s) == len(s) + 1
+        assert t.index(s) == 1
+        assert t.rindex(s) == len(s) + 1
+        b = bytearray(t)
+        assert s in b
+        assert b.count(s) == 2
+        assert b.find(s) == 1
+        assert b.rfind(s) == len(s) + 1
+        assert b.index(s) == 1
+        assert b.rindex(s) == len(s) + 1
+        assert b.strip('y') == t.strip('y')
+        assert b[1:1 + len(s)] == s
+        assert not b == s
+        b.extend(s)
+        assert b.endswith(s)
+
+
+class AppTestBytesObjectWithStrBuf(test_bytesobject.AppTestBytesObject):
+    spaceconfig = {"objspace.std.withstrbuf": True}
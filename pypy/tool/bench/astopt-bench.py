@@ -0,0 +1,91 @@
+"""Time the code folded by the AST optimizer against the code that was
+compiled before, in interpreted mode:
+
+    pypy --jit off astopt-bench.py [loops]
+
+The 'before' version of each case gets its constants from default
+arguments or from a global, which the optimizer cannot fold: the bytecode
+is then the same as the unfolded one, with a LOAD_FAST or a LOAD_GLOBAL
+instead of each LOAD_CONST or LOAD_GLOBAL.
+"""
+
+import sys
+import time
+
+LOOPS = 200000
+
+DEBUG = True
+
+CASES = [
+    ('compare', """
+def after(n):
+    for i in xrange(n):
+        x = 3 < 5 <= 5.5
+""", """
+def before(n, a=3, b=5, c=5.5):
+    for i in xrange(n):
+        x = a < b <= c
+"""),
+    ('if-expression', """
+def after(n):
+    for i in xrange(n):
+        x = 'on' if 1 else 'off'
+""", """
+def before(n, t=1):
+    for i in xrange(n):
+        x = 'on' if t else 'off'
+"""),
+    ('str method', """
+def after(n):
+    for i in xrange(n):
+        x = 'spam, eggs'.replace(', ', '-').upper()
+""", """
+def before(n, s='spam, eggs', a=', ', b='-'):
+    for i in xrange(n):
+        x = s.replace(a, b).upper()
+"""),
+    ('for over a list', """
+def after(n):
+    for i in xrange(n):
+        for x in [1, 2, 3]:
+            pass
+""", """
+def before(n, a=1, b=2, c=3):
+    for i in xrange(n):
+        for x in [a, b, c]:
+            pass
+"""),
+    ('if __debug__', """
+def after(n):
+    for i in xrange(n):
+        if __debug__:
+            x = i
+""", """
+def before(n):
+    for i in xrange(n):
+        if DEBUG:
+            x = i
+"""),
+]
+
+def timeit(source, name, loops):
+    d = {'DEBUG': DEBUG}
+    exec compile(source, '<%s>' % (name,), 'exec') in d
+    func = d[name]
+    func(loops // 10)
+    t0 = time.time()
+    func(loops)
+    return time.time() - t0
+
+def main(argv):
+    loops = int(argv[0]) if argv else LOOPS
+    print '%-18s %10s %10s %8s' % ('', 'before', 'after', 'speedup')
+    for name, after, before in CASES:
+        t_before = timeit(before, 'before', loops)
+        t_after = timeit(after, 'after', loops)
+        print '%-18s %8.1fms %8.1fms %7.2fx' % (name, t_before * 1e3,
+                                                 t_after * 1e3,
+                                                 t_before / t_after)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
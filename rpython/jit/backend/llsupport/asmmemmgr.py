@@ -18,6 +18,7 @@ class AsmMemoryManager(object):
                        num_indices      = NUM_INDICES):
         self.total_memory_allocated = r_uint(0)
         self.total_mallocs = r_uint(0)
+        self.peak_mallocs = r_uint(0)
         self.large_alloc_size = large_alloc_size
         self.min_fragment = min_fragment
         self.num_indices = num_indices
@@ -27,7 +28,8 @@ class AsmMemoryManager(object):
 
     def get_stats(self):
         """Returns stats for rlib.jit.jit_hooks.stats_asmmemmgr_*()."""
-        return (self.total_memory_allocated, self.total_mallocs)
+        return (self.total_memory_allocated, self.total_mallocs,
+                self.peak_mallocs)
 
     def malloc(self, minsize, maxsize):
         """Allocate executable memory, between minsize and maxsize bytes,
@@ -41,7 +43,7 @@ class AsmMemoryManager(object):
             self._add_free_block(smaller_stop, stop)
             stop = smaller_stop
             result = (start, stop)
-        self.total_mallocs += r_uint(stop - start)
+        self._record_malloc(stop - start)
         return result   # pair (start, stop)
 
     def free(self, start, stop):
@@ -54,9 +56,14 @@ class AsmMemoryManager(object):
         """Allocate at least minsize bytes.  Returns (start, stop)."""
         result = self._allocate_block(minsize)
         (start, stop) = result
-        self.total_mallocs += r_uint(stop - start)
+        self._record_malloc(stop - start)
         return result
 
+    def _record_malloc(self, size):
+        self.total_mallocs += r_uint(size)
+        if self.total_mallocs > self.peak_mallocs:
+            self.peak_mallocs = self.total_mallocs
+
     def open_free(self, middle, stop):
         """Used for freeing the end of an open-allocated block of memory."""
         if stop - middle >= self.min_fragment:
@@ -24,6 +24,7 @@ from rpython.jit.backend.llsupport.descr import (
 from rpython.jit.backend.llsupport.memcpy import memset_fn
 from rpython.jit.backend.llsupport import asmmemmgr, codemap
 from rpython.rlib.unroll import unrolling_iterable
+from rpython.rlib.rarithmetic import intmask
 
 
 class AbstractLLCPU(AbstractCPU):
@@ -249,6 +250,9 @@ class AbstractLLCPU(AbstractCPU):
         deadframe = lltype.cast_opaque_ptr(jitframe.JITFRAMEPTR, deadframe)
         return deadframe.jf_savedata
 
+    def get_code_memory_in_use(self):
+        return intmask(self.asmmemmgr.total_mallocs)
+
     def free_loop_and_bridges(self, compiled_loop_token):
         AbstractCPU.free_loop_and_bridges(self, compiled_loop_token)
         # turn off all gcreftracers
@@ -84,6 +84,20 @@ def test_malloc_without_fragment():
     (start, stop) = memmgr.malloc(10, 10)
     assert (start, stop) == (20, 30)
 
+def test_peak_mallocs():
+    memmgr = AsmMemoryManager(min_fragment=8,
+                              num_indices=5)
+    memmgr._add_free_block(10, 18)
+    memmgr._add_free_block(20, 30)
+    (start1, stop1) = memmgr.malloc(8, 8)
+    (start2, stop2) = memmgr.malloc(10, 10)
+    assert memmgr.get_stats()[1:] == (18, 18)
+    memmgr.free(start1, stop1)
+    assert memmgr.get_stats()[1:] == (10, 18)
+    memmgr.free(start2, stop2)
+    (start, stop) = memmgr.malloc(4, 4)
+    assert memmgr.get_stats()[1:] == (8, 18)
+
 def test_malloc_with_fragment():
     for reqsize in range(1, 33):
         memmgr = AsmMemoryManager(min_fragment=8,
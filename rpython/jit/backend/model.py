@@ -54,6 +54,11 @@ class AbstractCPU(object):
         """
         return False
 
+    def get_code_memory_in_use(self):
+        """Returns the number of bytes of machine code and data currently
+        allocated for compiled loops and bridges, or 0 if unknown."""
+        return 0
+
     def compile_loop(self, inputargs, operations, looptoken, jd_id=0,
                      unique_id=0, log=True, name='', logger=None):
         """Assemble the given loop.
@@ -306,6 +311,15 @@ class CompiledLoopToken(object):
         debug_print("allocating Loop #", self.number)
         debug_stop("jit-mem-looptoken-alloc")
 
+    def get_code_size(self):
+        """Returns the number of bytes used by the machine code and data
+        of the loop and all the bridges attached to it."""
+        size = 0
+        if self.asmmemmgr_blocks is not None:
+            for rawstart, rawstop in self.asmmemmgr_blocks:
+                size += rawstop - rawstart
+        return size
+
     def compiling_a_bridge(self):
         self.cpu.tracker.total_compiled_bridges += 1
         self.bridges_count += 1
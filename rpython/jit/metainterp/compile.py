@@ -555,6 +555,9 @@ def send_loop_to_backend(greenkey, jitdriver_sd, metainterp_sd, loop, type,
     metainterp_sd.logger_ops.log_loop(loop.inputargs, loop.operations, n,
                                       type, ops_offset,
                                       name=loopname)
+    if metainterp_sd.guardstats.enabled:
+        metainterp_sd.guardstats.record_operations(metainterp_sd, n,
+                                                   loop.operations)
     #
     if metainterp_sd.warmrunnerdesc is not None:    # for tests
         metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(original_jitcell_token)
@@ -603,6 +606,11 @@ def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
         ops_offset = None
     metainterp_sd.logger_ops.log_bridge(inputargs, operations, None, faildescr,
                                         ops_offset, memo=memo)
+    if metainterp_sd.guardstats.enabled:
+        metainterp_sd.guardstats.bridge_attached(faildescr)
+        metainterp_sd.guardstats.record_operations(metainterp_sd,
+                                                   original_loop_token.number,
+                                                   operations)
     #
     #if metainterp_sd.warmrunnerdesc is not None:    # for tests
     #    metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(
@@ -690,6 +698,8 @@ class AbstractResumeGuardDescr(ResumeDescr):
         raise NotImplementedError("abstract base class")
 
     def handle_fail(self, deadframe, metainterp_sd, jitdriver_sd):
+        if metainterp_sd.guardstats.enabled:
+            metainterp_sd.guardstats.guard_failed(self)
         if (self.must_compile(deadframe, metainterp_sd, jitdriver_sd)
                 and not rstack.stack_almost_full()):
             self.start_compiling()
@@ -0,0 +1,115 @@
+import weakref
+from rpython.rlib.objectmodel import compute_unique_id
+from rpython.rlib.rweakref import RWeakKeyDictionary
+from rpython.rlib.listsort import make_timsort_class
+from rpython.rlib.jit_hooks import HOT_GUARDS_CONTAINER
+from rpython.rtyper.annlowlevel import llstr
+from rpython.rtyper.lltypesystem import lltype
+from rpython.jit.metainterp.history import AbstractFailDescr
+from rpython.jit.metainterp.resoperation import rop
+
+#
+# Optional statistics about guard failures, for
+# rlib.jit_hooks.stats_get_hot_guards().
+#
+# When enabled, the guards of each loop and bridge are recorded when
+# they are compiled, together with the location of the closest
+# debug_merge_point before them.  Then every failure of a guard that
+# goes through handle_fail(), i.e. every failure before a bridge is
+# attached to it, increments its counter.  Nothing is recorded while
+# disabled, apart from checking a flag on each guard failure.
+#
+# The list of records only holds weak references to the guards.  The
+# records of the guards of freed loops are removed from it whenever it
+# has doubled in size since the last time, so that it stays proportional
+# to the number of guards alive.
+#
+
+MIN_PRUNE_LIMIT = 1000
+
+class GuardInfo(object):
+    def __init__(self, descr, loop_no, index, location):
+        self.descr_wref = weakref.ref(descr)
+        self.guard_id = compute_unique_id(descr)
+        self.loop_no = loop_no
+        self.index = index           # position of the guard in its trace
+        self.location = location
+        self.failures = 0
+        self.bridge = False
+
+def _more_failures(info1, info2):
+    return info1.failures > info2.failures
+
+GuardInfoSort = make_timsort_class(lt=_more_failures)
+
+
+class GuardStats(object):
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def set_enabled(self, flag):
+        self.enabled = flag
+
+    def reset(self):
+        self.infos = []
+        self.by_descr = RWeakKeyDictionary(AbstractFailDescr, GuardInfo)
+        self.prune_limit = MIN_PRUNE_LIMIT
+
+    def _add(self, descr, info):
+        if len(self.infos) >= self.prune_limit:
+            self._prune()
+            self.prune_limit = max(MIN_PRUNE_LIMIT, len(self.infos) * 2)
+        self.infos.append(info)
+        self.by_descr.set(descr, info)
+
+    def _prune(self):
+        # forget the guards of loops that have been freed
+        self.infos = [info for info in self.infos
+                          if info.descr_wref() is not None]
+
+    def record_operations(self, metainterp_sd, loop_no, operations):
+        location = ''
+        for i in range(len(operations)):
+            op = operations[i]
+            opnum = op.getopnum()
+            if opnum == rop.DEBUG_MERGE_POINT:
+                jd_sd = metainterp_sd.jitdrivers_sd[op.getarg(0).getint()]
+                location = jd_sd.warmstate.get_location_str(
+                    op.getarglist()[3:])
+            elif rop.is_guard(opnum):
+                descr = op.getdescr()
+                if descr is not None:
+                    self._add(descr, GuardInfo(descr, loop_no, i, location))
+
+    def guard_failed(self, descr):
+        info = self.by_descr.get(descr)
+        if info is None:
+            # compiled while the statistics were disabled
+            info = GuardInfo(descr, -1, -1, '')
+            self._add(descr, info)
+        info.failures += 1
+
+    def bridge_attached(self, descr):
+        info = self.by_descr.get(descr)
+        if info is not None:
+            info.bridge = True
+
+    def get_hot_guards(self, n):
+        """Returns the 'n' guards that failed the most, as a
+        HOT_GUARDS_CONTAINER."""
+        self._prune()
+        infos = [info for info in self.infos if info.failures > 0]
+        GuardInfoSort(infos).sort()
+        n = max(0, min(n, len(infos)))
+        result = lltype.malloc(HOT_GUARDS_CONTAINER, n)
+        for i in range(n):
+            info = infos[i]
+            result[i].guard_id = info.guard_id
+            result[i].loop_no = info.loop_no
+            result[i].index = info.index
+            result[i].location = llstr(info.location)
+            result[i].failures = info.failures
+            result[i].bridge = info.bridge
+        return result
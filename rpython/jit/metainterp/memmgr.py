@@ -2,6 +2,7 @@ import math
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.listsort import make_timsort_class
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,6 +20,22 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# Independently, if 'code_cache_max' is set, the total size of the
+# machine code is bounded: when it grows above the limit, the loops that
+# were least recently entered (i.e. with the smallest 'generation') are
+# removed from 'alive_loops' until the code of the remaining ones fits
+# in 3/4 of the limit.  The evicted code is only released by the next
+# GC, so after that we don't look at the size again before
+# CODE_CACHE_RECHECK more loops or bridges have been compiled.
+#
+
+CODE_CACHE_RECHECK = 20
+
+def _older_than(looptoken1, looptoken2):
+    return looptoken1.generation < looptoken2.generation
+
+LoopTokenSort = make_timsort_class(lt=_older_than)
+
 
 class MemoryManager(object):
 
@@ -38,6 +55,9 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        self.code_cache_max = 0
+        self.next_code_cache_check = r_int64(0)
+        self.evicted_loops = 0
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,6 +69,9 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_code_cache_max(self, max_size):
+        self.code_cache_max = max(max_size, 0)
+
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
@@ -60,6 +83,46 @@ class MemoryManager(object):
             looptoken.generation = self.current_generation
             self.alive_loops[looptoken] = None
 
+    def check_code_cache_size(self, cpu):
+        if (self.code_cache_max > 0 and
+                self.current_generation >= self.next_code_cache_check and
+                cpu.get_code_memory_in_use() > self.code_cache_max):
+            self._shrink_code_cache_now()
+            self.next_code_cache_check = (self.current_generation +
+                                          CODE_CACHE_RECHECK)
+
+    def _shrink_code_cache_now(self):
+        debug_start("jit-mem-codecache")
+        looptokens = self.alive_loops.keys()
+        total = 0
+        for looptoken in looptokens:
+            total += _get_code_size(looptoken)
+        # if the code of the alive loops already fits, the rest is
+        # waiting for the GC to free it
+        target = self.code_cache_max // 4 * 3
+        debug_print("Code cache limit:  ", self.code_cache_max)
+        debug_print("Code of alive loops:", total)
+        freed = 0
+        if total > target:
+            LoopTokenSort(looptokens).sort()
+            for looptoken in looptokens:
+                if total <= target:
+                    break
+                if looptoken.generation == self.current_generation:
+                    continue     # entered just now
+                del self.alive_loops[looptoken]
+                total -= _get_code_size(looptoken)
+                freed += 1
+        self.evicted_loops += freed
+        debug_print("Loop tokens freed: ", freed)
+        debug_print("Loop tokens left:  ", len(self.alive_loops))
+        if not we_are_translated() and freed > 0:
+            looptoken = None
+            looptokens = None
+            from rpython.rlib import rgc
+            rgc.collect(); rgc.collect(); rgc.collect()
+        debug_stop("jit-mem-codecache")
+
     def _kill_old_loops_now(self):
         debug_start("jit-mem-collect")
         oldtotal = len(self.alive_loops)
@@ -87,3 +150,8 @@ class MemoryManager(object):
         debug_print("Loop tokens cleared:", len(self.alive_loops))
         self.alive_loops.clear()
         debug_stop("jit-mem-releaseall")
+
+def _get_code_size(looptoken):
+    if looptoken.compiled_loop_token is None:
+        return 0
+    return looptoken.compiled_loop_token.get_code_size()
@@ -15,6 +15,7 @@ from rpython.jit.metainterp.history import (Const, ConstInt, ConstPtr,
     CONST_NULL, TargetToken, MissingValue, SwitchToBlackhole)
 from rpython.jit.metainterp.jitprof import EmptyProfiler
 from rpython.jit.metainterp.logger import Logger
+from rpython.jit.metainterp.guardstats import GuardStats
 from rpython.jit.metainterp.optimizeopt.util import args_dict
 from rpython.jit.metainterp.resoperation import rop, OpHelpers, GuardResOp
 from rpython.jit.metainterp.support import adr2int, ptr2int
@@ -2193,6 +2194,7 @@ class MetaInterpStaticData(object):
         self.jitlog = jl.JitLogger(self.cpu)
         self.logger_noopt = Logger(self)
         self.logger_ops = Logger(self, guard_number=True)
+        self.guardstats = GuardStats()
         # legacy loggers
         self.jitlog.logger_noopt = self.logger_noopt
         self.jitlog.logger_ops = self.logger_ops
@@ -2339,7 +2341,9 @@ class MetaInterpStaticData(object):
     def try_to_free_some_loops(self):
         # Increase here the generation recorded by the memory manager.
         if self.warmrunnerdesc is not None:       # for tests
-            self.warmrunnerdesc.memory_manager.next_generation()
+            memmgr = self.warmrunnerdesc.memory_manager
+            memmgr.next_generation()
+            memmgr.check_code_cache_size(self.cpu)
 
     # ---------------- logging ------------------------
 
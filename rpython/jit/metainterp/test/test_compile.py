@@ -6,6 +6,7 @@ from rpython.jit.metainterp.compile import compile_tmp_callback
 from rpython.jit.metainterp import jitexc
 from rpython.rlib.rjitlog import rjitlog as jl
 from rpython.jit.metainterp import jitprof, compile
+from rpython.jit.metainterp.guardstats import GuardStats
 from rpython.jit.metainterp.optimizeopt.test.test_util import LLtypeMixin
 from rpython.jit.tool.oparser import parse, convert_loop_to_trace
 from rpython.jit.metainterp.optimizeopt import ALL_OPTS_DICT
@@ -64,6 +65,7 @@ class FakeMetaInterpStaticData(object):
 
     stats = Stats(None)
     profiler = jitprof.EmptyProfiler()
+    guardstats = GuardStats()
     warmrunnerdesc = None
     def log(self, msg, event_kind=None):
         pass
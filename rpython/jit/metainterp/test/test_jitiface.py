@@ -349,6 +349,43 @@ class JitHookInterfaceTests(object):
                                no_stats_history=True)
         assert res == 42
 
+    def test_hot_guards(self):
+        driver = JitDriver(greens = [], reds = ['i', 's'],
+                           get_printable_location=lambda: 'the loop')
+        def loop(i):
+            s = 0
+            while i > 0:
+                driver.jit_merge_point(i=i, s=s)
+                if i % 3 == 0:
+                    s += 1
+                i -= 1
+            return s
+        def main():
+            jit_hooks.stats_set_guard_stats(None, True)
+            loop(30)
+            l = jit_hooks.stats_get_hot_guards(None, 10)
+            if len(l) == 0:
+                return -1
+            for i in range(1, len(l)):
+                if l[i].failures > l[i - 1].failures:
+                    return -2
+            if hlstr(l[0].location) != 'the loop':
+                return -3
+            if l[0].loop_no < 0 or l[0].index < 0:
+                return -4
+            if not l[0].bridge:
+                return -5
+            if len(jit_hooks.stats_get_hot_guards(None, 0)) != 0:
+                return -6
+            jit_hooks.stats_reset_guard_stats(None)
+            if len(jit_hooks.stats_get_hot_guards(None, 10)) != 0:
+                return -7
+            jit_hooks.stats_set_guard_stats(None, False)
+            return l[0].failures
+
+        res = self.meta_interp(main, [])
+        assert res > 0
+
 
 class LLJitHookInterfaceTests(JitHookInterfaceTests):
     # use this for any backend, instead of the super class
@@ -394,3 +431,19 @@ class LLJitHookInterfaceTests(JitHookInterfaceTests):
 
 class TestJitHookInterface(JitHookInterfaceTests, LLJitMixin):
     pass
+
+
+def test_guardstats_forgets_freed_guards():
+    from rpython.jit.metainterp.guardstats import GuardStats
+    from rpython.jit.metainterp.history import BasicFailDescr
+    stats = GuardStats()
+    stats.prune_limit = 4
+    descrs = [BasicFailDescr() for i in range(4)]
+    for i in range(4):
+        stats.guard_failed(descrs[i])
+    assert len(stats.infos) == 4
+    del descrs[1:]
+    descrs.append(BasicFailDescr())
+    stats.guard_failed(descrs[-1])
+    assert len(stats.infos) == 2
+    assert stats.prune_limit == 1000
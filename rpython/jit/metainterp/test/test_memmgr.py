@@ -11,7 +11,7 @@ if len(sys.argv) >= 4 and sys.argv[1] == '--sub':
     rpython.conftest.option.__dict__.update(eval(sys.argv[3]))
 
 import py
-from rpython.jit.metainterp.memmgr import MemoryManager
+from rpython.jit.metainterp.memmgr import MemoryManager, CODE_CACHE_RECHECK
 from rpython.jit.metainterp.test.support import LLJitMixin
 from rpython.rlib.jit import JitDriver, dont_look_inside
 from rpython.jit.metainterp.warmspot import get_stats
@@ -21,6 +21,20 @@ from rpython.rlib import rgc
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    compiled_loop_token = None
+
+class FakeCompiledLoopToken:
+    def __init__(self, size):
+        self.size = size
+    def get_code_size(self):
+        return self.size
+
+class FakeCPU:
+    def __init__(self, tokens):
+        self.tokens = tokens
+    def get_code_memory_in_use(self):
+        # like the real one, counts the code of loops not freed yet
+        return sum([t.compiled_loop_token.size for t in self.tokens])
 
 
 class _TestMemoryManager:
@@ -78,6 +92,84 @@ class _TestMemoryManager:
             else:
                 assert tokens[i] in memmgr.alive_loops
 
+    def make_sized_tokens(self, sizes):
+        tokens = []
+        for size in sizes:
+            token = FakeLoopToken()
+            token.compiled_loop_token = FakeCompiledLoopToken(size)
+            tokens.append(token)
+        return tokens
+
+    def test_code_cache_disabled(self):
+        memmgr = MemoryManager()
+        tokens = self.make_sized_tokens([100] * 10)
+        cpu = FakeCPU(tokens)
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+            memmgr.check_code_cache_size(cpu)
+        assert memmgr.alive_loops == dict.fromkeys(tokens)
+        assert memmgr.evicted_loops == 0
+
+    def test_code_cache_evicts_least_recently_entered(self):
+        memmgr = MemoryManager()
+        memmgr.set_code_cache_max(400)
+        tokens = self.make_sized_tokens([100] * 4)
+        cpu = FakeCPU(tokens)
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        memmgr.check_code_cache_size(cpu)
+        assert len(memmgr.alive_loops) == 4       # not above the limit
+        # enter tokens[0] again, then compile a new loop
+        memmgr.keep_loop_alive(tokens[0])
+        memmgr.next_generation()
+        tokens += self.make_sized_tokens([100])
+        memmgr.keep_loop_alive(tokens[4])
+        memmgr.check_code_cache_size(cpu)
+        # 500 > 400: we keep 300 bytes of the most recently entered ones
+        assert memmgr.alive_loops == dict.fromkeys(
+            [tokens[0], tokens[3], tokens[4]])
+        assert memmgr.evicted_loops == 2
+
+    def test_code_cache_waits_for_gc(self):
+        memmgr = MemoryManager()
+        memmgr.set_code_cache_max(400)
+        tokens = self.make_sized_tokens([200, 200, 200])
+        cpu = FakeCPU(tokens)
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        memmgr.check_code_cache_size(cpu)
+        assert memmgr.alive_loops == {tokens[2]: None}
+        # the GC did not free the code yet: don't evict more
+        memmgr.current_generation += CODE_CACHE_RECHECK
+        memmgr.check_code_cache_size(cpu)
+        assert memmgr.alive_loops == {tokens[2]: None}
+        assert memmgr.evicted_loops == 2
+
+    def test_code_cache_recheck_delay(self):
+        memmgr = MemoryManager()
+        memmgr.set_code_cache_max(400)
+        tokens = self.make_sized_tokens([200, 200, 200])
+        cpu = FakeCPU(tokens)
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        memmgr.check_code_cache_size(cpu)
+        assert memmgr.alive_loops == {tokens[2]: None}
+        # the GC frees the code, then more loops are compiled: the size
+        # is only checked again after CODE_CACHE_RECHECK of them
+        del tokens[:2]
+        tokens += self.make_sized_tokens([200, 200])
+        for i in range(CODE_CACHE_RECHECK):
+            memmgr.keep_loop_alive(tokens[1 + i % 2])
+            memmgr.next_generation()
+            memmgr.check_code_cache_size(cpu)
+            if i < CODE_CACHE_RECHECK - 1:
+                assert memmgr.evicted_loops == 2
+        assert memmgr.evicted_loops == 4
+
 
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
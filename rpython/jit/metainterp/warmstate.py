@@ -296,6 +296,12 @@ class WarmEnterState(object):
             self.warmrunnerdesc.memory_manager is not None):   # all for tests
             self.warmrunnerdesc.memory_manager.set_max_age(value)
 
+    def set_param_jit_code_cache_max(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.set_code_cache_max(value)
+
     def set_param_retrace_limit(self, value):
         if self.warmrunnerdesc:
             if self.warmrunnerdesc.memory_manager:
@@ -21,6 +21,9 @@ class GcHooks(object):
     def is_gc_collect_enabled(self):
         return False
 
+    def is_alloc_sample_enabled(self):
+        return False
+
     def on_gc_minor(self, duration, total_memory_used, pinned_objects):
         """
         Called after a minor collection
@@ -45,6 +48,14 @@ class GcHooks(object):
         Called after a major collection is fully done
         """
 
+    def on_alloc_sample(self, typeindex, size):
+        """
+        Called for the sampled allocations, see rgc.set_alloc_sampling().
+        ``typeindex`` is the index of the type of the allocated object in
+        rgc.get_typeids_list(), or -1 if unknown.  ``size`` is the number
+        of bytes allocated that this sample stands for.
+        """
+
     # the fire_* methods are meant to be called from the GC and should NOT be
     # overridden
 
@@ -68,3 +79,8 @@ class GcHooks(object):
                                arenas_count_before, arenas_count_after,
                                arenas_bytes, rawmalloc_bytes_before,
                                rawmalloc_bytes_after, pinned_objects)
+
+    @rgc.no_collect
+    def fire_alloc_sample(self, typeindex, size):
+        if self.is_alloc_sample_enabled():
+            self.on_alloc_sample(typeindex, size)
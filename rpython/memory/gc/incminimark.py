@@ -67,7 +67,7 @@ from rpython.rtyper.lltypesystem import lltype, llmemory, llarena, llgroup
 from rpython.rtyper.lltypesystem.lloperation import llop
 from rpython.rtyper.lltypesystem.llmemory import raw_malloc_usage
 from rpython.memory.gc.base import GCBase, MovingGCBase
-from rpython.memory.gc import env
+from rpython.memory.gc import env, inspector
 from rpython.memory.support import mangle_hash
 from rpython.rlib.rarithmetic import ovfcheck, LONG_BIT, intmask, r_uint
 from rpython.rlib.rarithmetic import LONG_BIT_SHIFT
@@ -324,6 +324,12 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.nursery_free = llmemory.NULL
         self.nursery_top  = llmemory.NULL
         self.debug_tiny_nursery = -1
+        #
+        # Allocation sampling, see set_alloc_sampling().  When active,
+        # 'nursery_top' is usually lowered, and 'alloc_sample_top' is
+        # the real end of the free part of the nursery.
+        self.alloc_sample_interval = 0
+        self.alloc_sample_top = llmemory.NULL
         self.debug_rotating_nurseries = lltype.nullptr(NURSARRAY)
         self.extra_threshold = 0
         #
@@ -387,6 +393,10 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.total_gc_time = 0.0
 
         self.gc_state = STATE_SCANNING
+        #
+        # Heap snapshot, see heap_snapshot_start().
+        self.heap_snapshot = None
+        self.heap_snapshot_collecting = False
 
         # if the GC is disabled, it runs only minor collections; major
         # collections need to be manually triggered by explicitly calling
@@ -677,7 +687,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             ll_assert(result != llmemory.NULL, "uninitialized nursery")
             self.nursery_free = new_free = self._bump_pointer(result, totalsize)
             if new_free > self.nursery_top:
-                result = self.collect_and_reserve(totalsize)
+                result = self.collect_and_reserve(totalsize, typeid)
             #
             # Build the object.
             llarena.arena_reserve(result, totalsize)
@@ -737,7 +747,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             new_free = self._bump_pointer(result, totalsize)
             self.nursery_free = new_free
             if new_free > self.nursery_top:
-                result = self.collect_and_reserve(totalsize)
+                result = self.collect_and_reserve(totalsize, typeid)
             #
             # Build the object.
             llarena.arena_reserve(result, totalsize)
@@ -862,13 +872,21 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.rrc_invoke_callback()
 
 
-    def collect_and_reserve(self, totalsize):
+    def collect_and_reserve(self, totalsize, typeid):
         """To call when nursery_free overflows nursery_top.
-        First check if pinned objects are in front of nursery_top. If so,
+        If nursery_top was only lowered for allocation sampling, report
+        the sample and reserve totalsize bytes below the real top.
+        Then check if pinned objects are in front of nursery_top. If so,
         jump over the pinned object and try again to reserve totalsize.
         Otherwise do a minor collection, and possibly some steps of a
         major collection, and finally reserve totalsize bytes.
         """
+        if self.alloc_sample_top:
+            self._restore_nursery_top()
+            self._report_alloc_sample(typeid)
+            if self.nursery_free <= self.nursery_top:
+                self._lower_nursery_top()
+                return self.nursery_free - totalsize
 
         minor_collection_count = 0
         while True:
@@ -931,6 +949,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
                               "Calling minor_collection() twice is not "
                               "enough. Too many pinned objects?")
                     self._minor_collection()
+                # the minor collection lowers nursery_top again
+                self._restore_nursery_top()
             #
             # Tried to do something about nursery_free overflowing
             # nursery_top before this point. Try to reserve totalsize now.
@@ -947,9 +967,46 @@ class IncrementalMiniMarkGC(MovingGCBase):
             if self.nursery_top - self.nursery_free > self.debug_tiny_nursery:
                 self.nursery_free = self.nursery_top - self.debug_tiny_nursery
         #
+        self._lower_nursery_top()
         return result
     collect_and_reserve._dont_inline_ = True
 
+    def set_alloc_sampling(self, interval):
+        """Report one allocation every 'interval' bytes allocated in the
+        nursery to hooks.on_alloc_sample(), or stop if 'interval' is 0.
+        This works by lowering 'nursery_top', so that the allocation that
+        crosses it goes to collect_and_reserve(), like the allocations
+        done by the JIT.  The cost between samples is thus zero.
+        """
+        self._restore_nursery_top()
+        if interval > 0:
+            # keep 'nursery_top' aligned
+            interval = (interval + (WORD - 1)) & ~(WORD - 1)
+        else:
+            interval = 0
+        self.alloc_sample_interval = interval
+        self._lower_nursery_top()
+
+    def _lower_nursery_top(self):
+        interval = self.alloc_sample_interval
+        if interval > 0 and self.nursery_top - self.nursery_free > interval:
+            self.alloc_sample_top = self.nursery_top
+            self.nursery_top = self.nursery_free + interval
+
+    def _restore_nursery_top(self):
+        if self.alloc_sample_top:
+            self.nursery_top = self.alloc_sample_top
+            self.alloc_sample_top = llmemory.NULL
+
+    def _report_alloc_sample(self, typeid):
+        # 'typeid' is 0 for the allocations done by the JIT, which only
+        # writes the type of the object after allocating it
+        if self.combine(typeid, 0):
+            typeindex = self.get_member_index(typeid)
+        else:
+            typeindex = -1
+        self.hooks.fire_alloc_sample(typeindex, self.alloc_sample_interval)
+
 
     # XXX kill alloc_young and make it always True
     def external_malloc(self, typeid, length, alloc_young):
@@ -1107,6 +1164,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.next_major_collection_threshold < 0:
             # cannot trigger a full collection now, but we can ensure
             # that one will occur very soon
+            self._restore_nursery_top()
             self.nursery_free = self.nursery_top
 
     def can_optimize_clean_setarrayitems(self):
@@ -1945,6 +2003,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         #
         self.nursery_free = self.nursery
         self.nursery_top = self.nursery_barriers.popleft()
+        self.alloc_sample_top = llmemory.NULL
+        self._lower_nursery_top()
         #
         # clear GCFLAG_PINNED_OBJECT_PARENT_KNOWN from all parents in the list.
         self.old_objects_pointing_to_pinned.foreach(
@@ -2530,6 +2590,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 #
                 self.stat_ac_arenas_count = self.ac.arenas_count
                 self.stat_rawmalloced_total_size = self.rawmalloced_total_size
+                if self.heap_snapshot is not None:
+                    self._heap_snapshot_start_sweeping()
                 self.gc_state = STATE_SWEEPING
             #END MARKING
         elif self.gc_state == STATE_SWEEPING:
@@ -2559,6 +2621,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
             #
             if done:
                 self.num_major_collects += 1
+                if self.heap_snapshot_collecting:
+                    self.heap_snapshot.state = inspector.SNAPSHOT_READY
+                    self.heap_snapshot_collecting = False
                 #
                 # We also need to reset the GCFLAG_VISITED on prebuilt GC objects.
                 self.prebuilt_root_objects.foreach(self._reset_gcflag_visited, None)
@@ -2652,12 +2717,53 @@ class IncrementalMiniMarkGC(MovingGCBase):
         obj = hdr + size_gc_header
         if self.header(obj).tid & GCFLAG_VISITED:
             self.header(obj).tid &= ~GCFLAG_VISITED
+            if self.heap_snapshot_collecting:
+                self.heap_snapshot.record(obj)
             return False     # survives
         return True      # dies
 
     def _reset_gcflag_visited(self, obj, ignored):
         self.header(obj).tid &= ~GCFLAG_VISITED
 
+    # ----------
+    # Heap snapshots
+
+    def heap_snapshot_start(self, edge_interval):
+        """Request a snapshot of the heap, see inspector.HeapSnapshot.
+        It is made of the objects found alive by the next complete major
+        collection, counted while they are swept, so it is built a few
+        steps at a time and never needs a walk over the whole heap.  If
+        'edge_interval' is positive, the references of one object out of
+        every 'edge_interval' are also recorded.  A previous snapshot is
+        discarded.
+        """
+        if self.heap_snapshot is not None:
+            self.heap_snapshot.delete()
+        self.heap_snapshot = inspector.HeapSnapshot(self, edge_interval)
+        self.heap_snapshot_collecting = False
+        return True
+
+    def heap_snapshot_state(self):
+        """0 if there is no snapshot, or one of SNAPSHOT_REQUESTED,
+        SNAPSHOT_COLLECTING and SNAPSHOT_READY."""
+        if self.heap_snapshot is None:
+            return 0
+        return self.heap_snapshot.state
+
+    def heap_snapshot_write(self, fd):
+        """Write the snapshot to 'fd' if it is ready.  Returns 0, -1 if
+        there is no ready snapshot, or the errno if writing failed."""
+        if self.heap_snapshot_state() != inspector.SNAPSHOT_READY:
+            return -1
+        return self.heap_snapshot.write(fd)
+
+    def _heap_snapshot_start_sweeping(self):
+        # a snapshot requested in the middle of a sweeping phase waits
+        # for the next one, so that it sees all the surviving objects
+        if self.heap_snapshot.state == inspector.SNAPSHOT_REQUESTED:
+            self.heap_snapshot.state = inspector.SNAPSHOT_COLLECTING
+            self.heap_snapshot_collecting = True
+
     def free_rawmalloced_object_if_unvisited(self, obj, check_flag):
         if self.header(obj).tid & check_flag:
             self.header(obj).tid &= ~check_flag   # survives
@@ -2696,6 +2802,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
     def free_unvisited_rawmalloc_objects_step(self, nobjects):
         while self.raw_malloc_might_sweep.non_empty() and nobjects > 0:
             obj = self.raw_malloc_might_sweep.pop()
+            if (self.heap_snapshot_collecting and
+                    self.header(obj).tid & GCFLAG_VISITED):
+                self.heap_snapshot.record(obj)
             self.free_rawmalloced_object_if_unvisited(obj, GCFLAG_VISITED)
             nobjects -= 1
 
@@ -3251,8 +3360,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
 
     def rrc_minor_collection_trace(self):
         length_estimate = self.rrc_p_dict_nurs.length()
-        self.rrc_p_dict_nurs.delete()
-        self.rrc_p_dict_nurs = self.AddressDict(length_estimate)
+        if length_estimate > 0:     # else, nothing to forget
+            self.rrc_p_dict_nurs.delete()
+            self.rrc_p_dict_nurs = self.AddressDict(length_estimate)
         self.rrc_p_list_young.foreach(self._rrc_minor_trace,
                                       self.singleaddr)
 
@@ -3352,6 +3462,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
 
     def rrc_major_collection_trace(self):
         self.rrc_p_list_old.foreach(self._rrc_major_trace, None)
+        self.visit_all_objects()
 
     def _rrc_major_trace(self, pyobject, ignore):
         from rpython.rlib.rawrefcount import REFCNT_FROM_PYPY
@@ -3362,14 +3473,12 @@ class IncrementalMiniMarkGC(MovingGCBase):
             pass     # the corresponding object may die
         else:
             # force the corresponding object to be alive
+            # (only if it was not already visited; the objects are all
+            # traced together by rrc_major_collection_trace() afterwards)
             intobj = self._pyobj(pyobject).ob_pypy_link
             obj = llmemory.cast_int_to_adr(intobj)
-            self.objects_to_trace.append(obj)
-            # XXX ouch, isn't it enough to call visit_all_objects from
-            # rrc_major_collection_trace? and shouldn't we check what color the
-            # object has first? we only need to trace non-black objects after
-            # all
-            self.visit_all_objects()
+            if self.header(obj).tid & GCFLAG_VISITED == 0:
+                self.objects_to_trace.append(obj)
 
     def rrc_major_collection_free(self):
         ll_assert(self.rrc_p_dict_nurs.length() == 0, "p_dict_nurs not empty 2")
@@ -1,6 +1,7 @@
 """
 Utility RPython functions to inspect objects in the GC.
 """
+import errno
 from rpython.rtyper.lltypesystem import lltype, llmemory, rffi, llgroup
 from rpython.rtyper.lltypesystem.lloperation import llop
 from rpython.rlib.objectmodel import free_non_gc_object
@@ -278,6 +279,143 @@ def count_memory_pressure(gc):
     counter.delete()
     return res
 
+# ---------- heap snapshots, built by incminimark while sweeping ----------
+
+# waiting for the next sweeping phase to start
+SNAPSHOT_REQUESTED = rgc.HEAP_SNAPSHOT_REQUESTED
+# counting the objects that survive the sweeping
+SNAPSHOT_COLLECTING = rgc.HEAP_SNAPSHOT_COLLECTING
+SNAPSHOT_READY = rgc.HEAP_SNAPSHOT_READY
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MAX_EDGES = 65536
+
+class HeapSnapshot(object):
+    """Per-type counts and sizes of the objects that survive one major
+    collection, plus optionally the types at both ends of the references
+    of every 'edge_interval'-th of these objects.  write() outputs it as
+    a list of machine words:
+
+        [version] [edge_interval]
+        [typeindex] [count] [bytes]      for every type seen
+        [-1] [-1] [-1]
+        [typeindex1] [typeindex2]        for every sampled reference
+        [-1] [-1]
+    """
+    _alloc_flavor_ = 'raw'
+
+    def __init__(self, gc, edge_interval):
+        self.gc = gc
+        self.state = SNAPSHOT_REQUESTED
+        self.edge_interval = edge_interval
+        self.objects_seen = 0
+        self.counts = lltype.nullptr(rffi.SIGNEDP.TO)
+        self.counts_length = 0      # number of typeindexes in 'counts'
+        self.edges = lltype.nullptr(rffi.SIGNEDP.TO)
+        self.edges_count = 0
+
+    def delete(self):
+        if self.counts:
+            lltype.free(self.counts, flavor='raw', track_allocation=False)
+        if self.edges:
+            lltype.free(self.edges, flavor='raw', track_allocation=False)
+        free_non_gc_object(self)
+
+    def _grow_counts(self, index):
+        newlength = max(index + 1, max(self.counts_length * 2, 256))
+        newcounts = lltype.malloc(rffi.SIGNEDP.TO, newlength * 2,
+                                  flavor='raw', zero=True,
+                                  track_allocation=False)
+        if self.counts:
+            i = 0
+            while i < self.counts_length * 2:
+                newcounts[i] = self.counts[i]
+                i += 1
+            lltype.free(self.counts, flavor='raw', track_allocation=False)
+        self.counts = newcounts
+        self.counts_length = newlength
+
+    def record(self, obj):
+        gc = self.gc
+        typeid = gc.get_type_id(obj)
+        index = gc.get_member_index(typeid)
+        if index >= self.counts_length:
+            self._grow_counts(index)
+        totalsize = gc.gcheaderbuilder.size_gc_header + gc.get_size(obj)
+        self.counts[index * 2] += 1
+        self.counts[index * 2 + 1] += llmemory.raw_malloc_usage(totalsize)
+        #
+        if self.edge_interval > 0:
+            self.objects_seen += 1
+            if (self.objects_seen >= self.edge_interval and
+                    self.edges_count < SNAPSHOT_MAX_EDGES and
+                    gc.has_gcptr(typeid)):
+                self.objects_seen = 0
+                if not self.edges:
+                    self.edges = lltype.malloc(rffi.SIGNEDP.TO,
+                                               SNAPSHOT_MAX_EDGES * 2,
+                                               flavor='raw',
+                                               track_allocation=False)
+                gc.trace(obj, gc.make_callback('_record_edge'), self, index)
+
+    def _record_edge(self, pointer, index):
+        i = self.edges_count
+        if i < SNAPSHOT_MAX_EDGES:
+            gc = self.gc
+            typeid = gc.get_type_id(pointer.address[0])
+            self.edges[i * 2] = index
+            self.edges[i * 2 + 1] = gc.get_member_index(typeid)
+            self.edges_count = i + 1
+
+    def _count_words(self):
+        result = 2 + 3 + self.edges_count * 2 + 2
+        i = 0
+        while i < self.counts_length:
+            if self.counts[i * 2] > 0:
+                result += 3
+            i += 1
+        return result
+
+    @jit.dont_look_inside
+    def write(self, fd):
+        """Returns 0, or the errno if writing to 'fd' failed."""
+        length = self._count_words()
+        buf = lltype.malloc(rffi.SIGNEDP.TO, length, flavor='raw')
+        buf[0] = SNAPSHOT_VERSION
+        buf[1] = self.edge_interval
+        j = 2
+        i = 0
+        while i < self.counts_length:
+            if self.counts[i * 2] > 0:
+                buf[j] = i
+                buf[j + 1] = self.counts[i * 2]
+                buf[j + 2] = self.counts[i * 2 + 1]
+                j += 3
+            i += 1
+        buf[j] = -1
+        buf[j + 1] = -1
+        buf[j + 2] = -1
+        j += 3
+        i = 0
+        while i < self.edges_count * 2:
+            buf[j] = self.edges[i]
+            j += 1
+            i += 1
+        buf[j] = -1
+        buf[j + 1] = -1
+        #
+        bytes = length * rffi.sizeof(rffi.SIGNED)
+        count = raw_os_write(rffi.cast(rffi.INT, fd),
+                             rffi.cast(llmemory.Address, buf),
+                             rffi.cast(rffi.SIZE_T, bytes))
+        lltype.free(buf, flavor='raw')
+        if rffi.cast(lltype.Signed, count) != bytes:
+            err = rffi.cast(lltype.Signed, rposix._get_errno())
+            if err <= 0:
+                err = errno.EIO
+            return err
+        return 0
+
 def get_typeids_z(gc):
     srcaddress = gc.root_walker.gcdata.typeids_z
     return llmemory.cast_adr_to_ptr(srcaddress, lltype.Ptr(rgc.ARRAY_OF_CHAR))
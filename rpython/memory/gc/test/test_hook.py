@@ -10,6 +10,7 @@ class MyGcHooks(GcHooks):
         self._gc_minor_enabled = False
         self._gc_collect_step_enabled = False
         self._gc_collect_enabled = False
+        self._alloc_sample_enabled = False
         self.reset()
 
     def is_gc_minor_enabled(self):
@@ -21,11 +22,15 @@ class MyGcHooks(GcHooks):
     def is_gc_collect_enabled(self):
         return self._gc_collect_enabled
 
+    def is_alloc_sample_enabled(self):
+        return self._alloc_sample_enabled
+
     def reset(self):
         self.minors = []
         self.steps = []
         self.collects = []
         self.durations = []
+        self.samples = []
 
     def on_gc_minor(self, duration, total_memory_used, pinned_objects):
         self.durations.append(duration)
@@ -53,6 +58,9 @@ class MyGcHooks(GcHooks):
             'pinned_objects': pinned_objects,
         })
 
+    def on_alloc_sample(self, typeindex, size):
+        self.samples.append((typeindex, size))
+
 
 class TestIncMiniMarkHooks(BaseDirectGCTest):
     from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
@@ -129,3 +137,41 @@ class TestIncMiniMarkHooks(BaseDirectGCTest):
         assert self.gc.hooks.minors == []
         assert self.gc.hooks.steps == []
         assert self.gc.hooks.collects == []
+        assert self.gc.hooks.samples == []
+
+    def test_on_alloc_sample(self):
+        self.gc.hooks._alloc_sample_enabled = True
+        # the nursery of the tests contains 8 objects S; one of every
+        # three allocations crosses the lowered 'nursery_top'
+        assert self.gc.nursery_size == self.size_of_S * 8
+        interval = self.size_of_S * 2
+        self.gc.set_alloc_sampling(interval)
+        for i in range(8):
+            self.stackroots.append(self.malloc(S))
+        typeindex = self.gc.get_member_index(self.get_type_id(S))
+        assert self.gc.hooks.samples == [(typeindex, interval)] * 2
+        #
+        # the samples continue after a minor collection
+        self.gc.hooks.reset()
+        self.gc._minor_collection()
+        for i in range(3):
+            self.stackroots.append(self.malloc(S))
+        assert self.gc.hooks.samples == [(typeindex, interval)]
+        #
+        self.gc.hooks.reset()
+        self.gc.set_alloc_sampling(0)
+        assert not self.gc.alloc_sample_top
+        for i in range(20):
+            self.malloc(S)
+        assert self.gc.hooks.samples == []
+
+    def test_alloc_sample_keeps_nursery_consistent(self):
+        self.gc.hooks._alloc_sample_enabled = True
+        self.gc.set_alloc_sampling(self.size_of_S * 3)
+        for i in range(100):
+            self.stackroots.append(self.malloc(S))
+            self.stackroots[-1].x = i
+            if len(self.stackroots) > 20:
+                del self.stackroots[:10]
+        assert [p.x for p in self.stackroots] == range(80, 100)
+        assert len(self.gc.hooks.samples) == 13    # one per minor collection
@@ -1,8 +1,8 @@
 import os
 from rpython.tool.udir import udir
-from rpython.memory.gc.test.test_direct import BaseDirectGCTest, S
-from rpython.memory.gc import inspector
-from rpython.rtyper.lltypesystem import llmemory
+from rpython.memory.gc.test.test_direct import BaseDirectGCTest, S, VAR
+from rpython.memory.gc import inspector, incminimark
+from rpython.rtyper.lltypesystem import lltype, llmemory, rffi
 
 
 class InspectorTest(BaseDirectGCTest):
@@ -46,3 +46,89 @@ class TestMiniMarkGCSimple(InspectorTest):
     from rpython.memory.gc.minimarktest import SimpleArenaCollection
     GC_PARAMS = {'ArenaCollectionClass': SimpleArenaCollection,
                  "card_page_indices": 4}
+
+
+class TestIncrementalMiniMarkGC(InspectorTest):
+    from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
+
+    def write_snapshot(self):
+        seen = []
+        def fake_raw_os_write(fd, adr, size):
+            buf = llmemory.cast_adr_to_ptr(adr, rffi.SIGNEDP)
+            size = rffi.cast(lltype.Signed, size)
+            for i in range(size // rffi.sizeof(rffi.SIGNED)):
+                seen.append(buf[i])
+            return rffi.cast(rffi.SIZE_T, size)
+        saved = inspector.raw_os_write
+        try:
+            inspector.raw_os_write = fake_raw_os_write
+            assert self.gc.heap_snapshot_write(-123456) == 0
+        finally:
+            inspector.raw_os_write = saved
+        return seen
+
+    def test_heap_snapshot(self):
+        assert self.gc.heap_snapshot_state() == 0
+        assert self.gc.heap_snapshot_write(-123456) == -1
+        p = self.malloc(S)
+        for i in range(5):
+            q = self.malloc(S)
+            self.write(q, 'next', p)
+            p = q
+        self.stackroots.append(p)
+        self.malloc(VAR, 10)       # garbage
+        self.gc.heap_snapshot_start(0)
+        assert self.gc.heap_snapshot_state() == inspector.SNAPSHOT_REQUESTED
+        self.gc.collect()
+        assert self.gc.heap_snapshot_state() == inspector.SNAPSHOT_READY
+        #
+        index_s = inspector.get_rpy_type_index(
+            self.gc, lltype.cast_opaque_ptr(llmemory.GCREF, self.stackroots[0]))
+        seen = self.write_snapshot()
+        assert seen[:2] == [inspector.SNAPSHOT_VERSION, 0]
+        assert seen[-5:] == [-1, -1, -1, -1, -1]
+        types = {}
+        for i in range(2, len(seen) - 5, 3):
+            types[seen[i]] = (seen[i + 1], seen[i + 2])
+        count, bytes = types[index_s]
+        assert count == 6
+        assert bytes > 0 and bytes % 6 == 0
+        assert len(types) == 1     # not the garbage VAR
+        # writing again gives the same result
+        assert self.write_snapshot() == seen
+
+    def test_heap_snapshot_edges(self):
+        p = self.malloc(S)
+        for i in range(3):
+            q = self.malloc(S)
+            self.write(q, 'next', p)
+            p = q
+        a = self.malloc(VAR, 2)
+        self.writearray(a, 0, p)
+        self.writearray(a, 1, p)
+        self.stackroots.append(a)
+        self.gc.heap_snapshot_start(1)
+        self.gc.collect()
+        index_s = inspector.get_rpy_type_index(
+            self.gc, lltype.cast_opaque_ptr(llmemory.GCREF,
+                                            self.stackroots[0][0]))
+        index_var = inspector.get_rpy_type_index(
+            self.gc, lltype.cast_opaque_ptr(llmemory.GCREF, self.stackroots[0]))
+        seen = self.write_snapshot()
+        assert seen[1] == 1
+        end = seen.index(-1)
+        edges = seen[end + 3:-2]
+        assert sorted(zip(edges[::2], edges[1::2])) == sorted(
+            [(index_var, index_s)] * 2 + [(index_s, index_s)] * 3)
+
+    def test_heap_snapshot_waits_for_sweeping(self):
+        self.stackroots.append(self.malloc(S))
+        self.gc.heap_snapshot_start(0)
+        self.gc.debug_gc_step_until(incminimark.STATE_SWEEPING)
+        assert self.gc.heap_snapshot_state() == inspector.SNAPSHOT_COLLECTING
+        # restarting in the middle of sweeping waits for the next one
+        self.gc.heap_snapshot_start(0)
+        self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
+        assert self.gc.heap_snapshot_state() == inspector.SNAPSHOT_REQUESTED
+        self.gc.collect()
+        assert self.gc.heap_snapshot_state() == inspector.SNAPSHOT_READY
@@ -576,6 +576,24 @@ class BaseFrameworkGCTransformer(GCTransformer):
                                               [s_gc, SomeAddress()],
                                               annmodel.s_None)
 
+        self.set_alloc_sampling_ptr = None
+        if hasattr(GCClass, 'set_alloc_sampling'):
+            self.set_alloc_sampling_ptr = getfn(
+                GCClass.set_alloc_sampling.im_func,
+                [s_gc, annmodel.SomeInteger()], annmodel.s_None)
+
+        self.heap_snapshot_start_ptr = None
+        if hasattr(GCClass, 'heap_snapshot_start'):
+            self.heap_snapshot_start_ptr = getfn(
+                GCClass.heap_snapshot_start.im_func,
+                [s_gc, annmodel.SomeInteger()], annmodel.s_Bool)
+            self.heap_snapshot_state_ptr = getfn(
+                GCClass.heap_snapshot_state.im_func,
+                [s_gc], annmodel.SomeInteger())
+            self.heap_snapshot_write_ptr = getfn(
+                GCClass.heap_snapshot_write.im_func,
+                [s_gc, annmodel.SomeInteger()], annmodel.SomeInteger())
+
         self.move_out_of_nursery_ptr = None
         if hasattr(GCClass, 'move_out_of_nursery'):
             self.move_out_of_nursery_ptr = getfn(GCClass.move_out_of_nursery,
@@ -1651,6 +1669,38 @@ class BaseFrameworkGCTransformer(GCTransformer):
             hop.genop("direct_call", [self.ignore_finalizer_ptr,
                                       self.c_const_gc, v_adr])
 
+    def gct_gc_set_alloc_sampling(self, hop):
+        if self.set_alloc_sampling_ptr is not None:
+            hop.genop("direct_call", [self.set_alloc_sampling_ptr,
+                                      self.c_const_gc, hop.spaceop.args[0]])
+
+    def gct_gc_heap_snapshot_start(self, hop):
+        if self.heap_snapshot_start_ptr is not None:
+            hop.genop("direct_call", [self.heap_snapshot_start_ptr,
+                                      self.c_const_gc, hop.spaceop.args[0]],
+                      resultvar=hop.spaceop.result)
+        else:
+            hop.genop("same_as", [rmodel.inputconst(lltype.Bool, False)],
+                      resultvar=hop.spaceop.result)
+
+    def gct_gc_heap_snapshot_state(self, hop):
+        if self.heap_snapshot_start_ptr is not None:
+            hop.genop("direct_call", [self.heap_snapshot_state_ptr,
+                                      self.c_const_gc],
+                      resultvar=hop.spaceop.result)
+        else:
+            hop.genop("same_as", [rmodel.inputconst(lltype.Signed, 0)],
+                      resultvar=hop.spaceop.result)
+
+    def gct_gc_heap_snapshot_write(self, hop):
+        if self.heap_snapshot_start_ptr is not None:
+            hop.genop("direct_call", [self.heap_snapshot_write_ptr,
+                                      self.c_const_gc, hop.spaceop.args[0]],
+                      resultvar=hop.spaceop.result)
+        else:
+            hop.genop("same_as", [rmodel.inputconst(lltype.Signed, -1)],
+                      resultvar=hop.spaceop.result)
+
     def gct_gc_move_out_of_nursery(self, hop):
         if self.move_out_of_nursery_ptr is not None:
             v_adr = hop.genop("cast_ptr_to_adr", [hop.spaceop.args[0]],
@@ -1402,6 +1402,8 @@ class GcHooksStats(object):
     minors = 0
     steps = 0
     collects = 0
+    samples = 0
+    sampled_bytes = 0
 
     def reset(self):
         # the NonConstant are needed so that the annotator annotates the
@@ -1411,6 +1413,8 @@ class GcHooksStats(object):
         self.minors = NonConstant(0)
         self.steps = NonConstant(0)
         self.collects = NonConstant(0)
+        self.samples = NonConstant(0)
+        self.sampled_bytes = NonConstant(0)
 
 
 class MyGcHooks(GcHooks):
@@ -1427,6 +1431,9 @@ class MyGcHooks(GcHooks):
     def is_gc_collect_enabled(self):
         return True
 
+    def is_alloc_sample_enabled(self):
+        return True
+
     def on_gc_minor(self, duration, total_memory_used, pinned_objects):
         self.stats.minors += 1
 
@@ -1439,6 +1446,10 @@ class MyGcHooks(GcHooks):
                       rawmalloc_bytes_after, pinned_objects):
         self.stats.collects += 1
 
+    def on_alloc_sample(self, typeindex, size):
+        self.stats.samples += 1
+        self.stats.sampled_bytes += size
+
 
 class TestIncrementalMiniMarkGC(TestMiniMarkGC):
     gcname = "incminimark"
@@ -1520,6 +1531,50 @@ class TestIncrementalMiniMarkGC(TestMiniMarkGC):
         assert steps == 4 * collects   # 4 steps for each major collection
         assert minors == steps         # one minor collection for each step
 
+    def define_gc_alloc_sampling(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        stats = cls.gchooks.stats
+        def f():
+            stats.reset()
+            rgc.set_alloc_sampling(4 * WORD)
+            lst = []
+            for i in range(200):
+                lst.append(lltype.malloc(S))
+            rgc.set_alloc_sampling(0)
+            samples = stats.samples
+            for i in range(200):
+                lst.append(lltype.malloc(S))
+            if stats.samples != samples:
+                return -1
+            return samples * 100 + stats.sampled_bytes // samples // WORD
+        return f
+
+    def test_gc_alloc_sampling(self):
+        run = self.runner("gc_alloc_sampling")
+        samples, size = divmod(run([]), 100)
+        assert size == 4
+        assert samples > 20
+
+    def define_gc_heap_snapshot(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            if rgc.heap_snapshot_state() != rgc.HEAP_SNAPSHOT_NONE:
+                return -1
+            if not rgc.heap_snapshot_start(10):
+                return -2
+            if rgc.heap_snapshot_state() != rgc.HEAP_SNAPSHOT_REQUESTED:
+                return -3
+            lst = [lltype.malloc(S) for i in range(100)]
+            llop.gc__collect(lltype.Void)
+            if rgc.heap_snapshot_state() != rgc.HEAP_SNAPSHOT_READY:
+                return -4
+            return len(lst)
+        return f
+
+    def test_gc_heap_snapshot(self):
+        run = self.runner("gc_heap_snapshot")
+        assert run([]) == 100
+
 # ________________________________________________________________
 # tagged pointers
 
@@ -3,7 +3,7 @@ from rpython.rtyper.llannotation import SomePtr, lltype_to_annotation
 from rpython.rtyper.annlowlevel import (
     cast_instance_to_gcref, cast_gcref_to_instance, llstr)
 from rpython.rtyper.extregistry import ExtRegistryEntry
-from rpython.rtyper.lltypesystem import llmemory, lltype
+from rpython.rtyper.lltypesystem import llmemory, lltype, rstr
 from rpython.flowspace.model import Constant
 
 
@@ -120,6 +120,26 @@ LOOP_RUN_CONTAINER = lltype.GcArray(lltype.Struct('elem',
 def stats_get_loop_run_times(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.get_all_loop_runs()
 
+HOT_GUARDS_CONTAINER = lltype.GcArray(lltype.Struct('guard',
+                                            ('guard_id', lltype.Signed),
+                                            ('loop_no', lltype.Signed),
+                                            ('index', lltype.Signed),
+                                            ('location', lltype.Ptr(rstr.STR)),
+                                            ('failures', lltype.Signed),
+                                            ('bridge', lltype.Bool)))
+
+@register_helper(annmodel.s_None)
+def stats_set_guard_stats(warmrunnerdesc, flag):
+    warmrunnerdesc.metainterp_sd.guardstats.set_enabled(flag)
+
+@register_helper(annmodel.s_None)
+def stats_reset_guard_stats(warmrunnerdesc):
+    warmrunnerdesc.metainterp_sd.guardstats.reset()
+
+@register_helper(lltype.Ptr(HOT_GUARDS_CONTAINER))
+def stats_get_hot_guards(warmrunnerdesc, n):
+    return warmrunnerdesc.metainterp_sd.guardstats.get_hot_guards(n)
+
 @register_helper(annmodel.SomeInteger(unsigned=True))
 def stats_asmmemmgr_allocated(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.asmmemmgr.get_stats()[0]
@@ -128,6 +148,14 @@ def stats_asmmemmgr_allocated(warmrunnerdesc):
 def stats_asmmemmgr_used(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.asmmemmgr.get_stats()[1]
 
+@register_helper(annmodel.SomeInteger(unsigned=True))
+def stats_asmmemmgr_peak(warmrunnerdesc):
+    return warmrunnerdesc.metainterp_sd.cpu.asmmemmgr.get_stats()[2]
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_evicted_loops(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.evicted_loops
+
 @register_helper(None)
 def stats_memmgr_release_all(warmrunnerdesc):
     warmrunnerdesc.memory_manager.release_all_loops()
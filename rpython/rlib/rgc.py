@@ -742,6 +742,44 @@ class MoveOutOfNurseryEntry(ExtRegistryEntry):
         hop.exception_cannot_occur()
         return hop.genop('gc_move_out_of_nursery', hop.args_v, resulttype=hop.r_result)
 
+@jit.dont_look_inside
+def set_alloc_sampling(interval):
+    """Ask the GC to report one allocation every 'interval' bytes
+    allocated, to the on_alloc_sample() method of the GC hooks; 0 stops.
+    Only supported by incminimark, ignored by the other GCs."""
+    from rpython.rtyper.lltypesystem.lloperation import llop
+    llop.gc_set_alloc_sampling(lltype.Void, interval)
+
+@jit.dont_look_inside
+def heap_snapshot_start(edge_interval=0):
+    """Ask the GC to build a snapshot of the heap during the next
+    complete major collection: the number and total size of the objects
+    of each type, and if 'edge_interval' > 0, the types at both ends
+    of the references of one object every 'edge_interval'.  Returns
+    False if the GC does not support it.  Only incminimark does."""
+    from rpython.rtyper.lltypesystem.lloperation import llop
+    return llop.gc_heap_snapshot_start(lltype.Bool, edge_interval)
+
+HEAP_SNAPSHOT_NONE = 0
+HEAP_SNAPSHOT_REQUESTED = 1
+HEAP_SNAPSHOT_COLLECTING = 2
+HEAP_SNAPSHOT_READY = 3
+
+@jit.dont_look_inside
+def heap_snapshot_state():
+    """One of the HEAP_SNAPSHOT_* constants."""
+    from rpython.rtyper.lltypesystem.lloperation import llop
+    return llop.gc_heap_snapshot_state(lltype.Signed)
+
+@jit.dont_look_inside
+def heap_snapshot_write(fd):
+    """Write the snapshot, once it is ready, to the file descriptor 'fd'
+    (see rpython.memory.gc.inspector.HeapSnapshot for the format).
+    Returns 0, -1 if no snapshot is ready, or the errno of a failed
+    write."""
+    from rpython.rtyper.lltypesystem.lloperation import llop
+    return llop.gc_heap_snapshot_write(lltype.Signed, fd)
+
 @jit.dont_look_inside
 def increase_root_stack_depth(new_depth):
     """Shadowstack: make sure the size of the shadowstack is at least
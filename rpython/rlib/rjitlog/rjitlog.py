@@ -14,7 +14,7 @@ from rpython.translator.tool.cbuild import ExternalCompilationInfo
 from rpython.jit.metainterp import resoperation as resoperations
 from rpython.jit.metainterp.resoperation import rop
 from rpython.jit.metainterp.history import ConstInt, ConstFloat, ConstPtr
-from rpython.rlib.rarithmetic import r_longlong
+from rpython.rlib.rarithmetic import r_longlong, intmask
 from rpython.rtyper.lltypesystem import lltype, llmemory, rffi
 from rpython.rlib.objectmodel import compute_unique_id, always_inline
 from rpython.rlib.objectmodel import we_are_translated, specialize
@@ -29,7 +29,7 @@ test_jitlog_name = 'JITLOG_FORTESTS'
 
 _libs = []
 if sys.platform.startswith('linux'):
-    _libs = ['dl']
+    _libs = ['dl', 'pthread']
 eci_kwds = dict(
     include_dirs = [SRC],
     includes = ['rjitlog.h'],
@@ -43,6 +43,12 @@ eci = ExternalCompilationInfo(**eci_kwds)
 # jit log functions
 jitlog_init = rffi.llexternal("jitlog_init", [rffi.INT],
                               rffi.CCHARP, compilation_info=eci)
+jitlog_init_buffered = rffi.llexternal("jitlog_init_buffered",
+                              [rffi.INT, rffi.LONG],
+                              rffi.CCHARP, compilation_info=eci)
+jitlog_dropped_records = rffi.llexternal("jitlog_dropped_records", [],
+                              rffi.LONG, compilation_info=eci,
+                              releasegil=False)
 jitlog_try_init_using_env = rffi.llexternal("jitlog_try_init_using_env",
                               [], lltype.Void, compilation_info=eci)
 jitlog_write_marked = rffi.llexternal("jitlog_write_marked",
@@ -67,10 +73,41 @@ def stats_flush_trace_counts(warmrunnerdesc):
         return # first param is None untranslated
     warmrunnerdesc.metainterp_sd.cpu.assembler.flush_trace_counters()
 
+# the kinds of events that are written to the jit log, see set_events()
+EVENT_LOOPS = 0x1       # loops, with their traces and assembler
+EVENT_BRIDGES = 0x2     # bridges, with their traces and assembler
+EVENT_ABORTS = 0x4      # aborted traces
+EVENT_COUNTERS = 0x8    # the counters of loops and bridges
+EVENT_ALL = EVENT_LOOPS | EVENT_BRIDGES | EVENT_ABORTS | EVENT_COUNTERS
+
+class JitlogEvents(object):
+    def __init__(self):
+        self.mask = EVENT_ALL
+
+jitlog_events = JitlogEvents()
+
+def set_events(mask):
+    """ Only write the events in 'mask' (a combination of the EVENT_*
+    flags) to the jit log.  The header and the records that patch
+    already-logged code (e.g. redirect_assembler) are always written.
+    """
+    jitlog_events.mask = mask & EVENT_ALL
+
 @jit.dont_look_inside
-def enable_jitlog(fileno):
-    # initialize the jit log
-    p_error = jitlog_init(fileno)
+def enable_jitlog(fileno, buffer_size=0, events=EVENT_ALL):
+    """ Start writing the jit log to 'fileno', which is then owned by
+    the jit log and closed by disable_jitlog().  This can be done at
+    any point while the program runs, the log then starts with a header.
+    If 'buffer_size' is positive, the records are copied into a ring
+    buffer of that many bytes and written out by a separate thread; if
+    the buffer is full, records are dropped instead of blocking the
+    program (see dropped_records()).
+    """
+    set_events(events)
+    if buffer_size > 0:
+        p_error = jitlog_init_buffered(fileno, buffer_size)
+    else:
+        p_error = jitlog_init(fileno)
     if p_error:
         raise JitlogError(rffi.charp2str(p_error))
     blob = assemble_header()
@@ -80,6 +117,11 @@ def disable_jitlog():
     stats_flush_trace_counts(None)
     jitlog_teardown()
 
+def dropped_records():
+    """ The number of records dropped because the ring buffer of a
+    buffered jit log was full. """
+    return intmask(jitlog_dropped_records())
+
 
 def commonprefix(a,b):
     "Given a list of pathnames, returns the longest common leading component"
@@ -309,6 +351,8 @@ def assemble_header():
 def _log_jit_counter(struct):
     if not jitlog_enabled():
         return
+    if not jitlog_events.mask & EVENT_COUNTERS:
+        return
     # addr is either a number (trace_id), or the address
     # of the descriptor. for entries it is a the trace_id,
     # for any label/bridge entry the addr is the address
@@ -339,6 +383,8 @@ class JitLogger(object):
         self.cpu = cpu
         self.memo = {}
         self.trace_id = 0
+        # is the current trace written to the log? (see set_events())
+        self.trace_logged = True
         self.metainterp_sd = None
         # legacy
         self.logger_ops = None
@@ -366,6 +412,15 @@ class JitLogger(object):
         if not jitlog_enabled():
             return
         self.metainterp_sd = metainterp_sd
+        mask = jitlog_events.mask
+        if faildescr:
+            self.trace_logged = bool(mask & EVENT_BRIDGES)
+        else:
+            self.trace_logged = bool(mask & EVENT_LOOPS)
+        if not self.trace_logged and not mask & EVENT_ABORTS:
+            return
+        # if only aborts are logged, the start of the trace is still
+        # written, but not the trace itself
         content = [encode_le_addr(self.trace_id)]
         if faildescr:
             content.append(encode_str('bridge'))
@@ -380,6 +435,8 @@ class JitLogger(object):
     def trace_aborted(self):
         if not jitlog_enabled():
             return
+        if not self.trace_logged and not jitlog_events.mask & EVENT_ABORTS:
+            return
         self._write_marked(MARK_ABORT_TRACE, encode_le_addr(self.trace_id))
 
     def _write_marked(self, mark, line):
@@ -391,7 +448,7 @@ class JitLogger(object):
         _log_jit_counter(struct)
 
     def log_trace(self, tag, metainterp_sd, mc, memo=None):
-        if not jitlog_enabled():
+        if not jitlog_enabled() or not self.trace_logged:
             return EMPTY_TRACE_LOG
         assert self.metainterp_sd is not None
         if memo is None:
@@ -399,7 +456,7 @@ class JitLogger(object):
         return LogTrace(tag, memo, self.metainterp_sd, mc, self)
 
     def log_patch_guard(self, descr_number, addr):
-        if not jitlog_enabled():
+        if not jitlog_enabled() or not self.trace_logged:
             return
         le_descr_number = encode_le_addr(descr_number)
         le_addr = encode_le_addr(addr)
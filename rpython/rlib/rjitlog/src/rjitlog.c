@@ -25,6 +25,9 @@
 #include <fcntl.h>
 #ifndef _WIN32
 #include <unistd.h>
+#include <poll.h>
+#include <pthread.h>
+#include <limits.h>
 #endif
 #include <errno.h>
 
@@ -37,6 +40,32 @@
 static int jitlog_fd = -1;
 static int jitlog_ready = 0;
 
+#ifndef _WIN32
+/* In buffered mode, jitlog_write_marked() only copies the record into a
+   fixed-size ring buffer, and a separate thread writes the buffer out to
+   the file descriptor (a file, a pipe or a socket).  The JIT never waits
+   for the reader: if a record does not fit into the free part of the
+   buffer, the whole record is dropped and counted in jitlog_dropped.
+   The thread never blocks for long either: it only writes when poll()
+   says that the descriptor is writable, and polls with a timeout.  When
+   the log is disabled, it is given RING_SHUTDOWN_POLLS more timeouts to
+   write out the rest of the buffer; after that, what is left is dropped,
+   so that jitlog_teardown() returns even if the reader is stuck. */
+#define RING_POLL_MS          100
+#define RING_SHUTDOWN_POLLS   10
+static char *ring_buf = NULL;
+static long ring_size = 0;
+static long ring_head = 0;      /* total number of bytes ever written */
+static long ring_tail = 0;      /* total number of bytes ever drained */
+static volatile int ring_stop = 0;
+static int ring_broken = 0;
+static int ring_regular_file = 0;
+static long jitlog_dropped = 0;
+static pthread_t ring_thread;
+static pthread_mutex_t ring_mutex = PTHREAD_MUTEX_INITIALIZER;
+static pthread_cond_t ring_cond = PTHREAD_COND_INITIALIZER;
+#endif
+
 RPY_EXTERN
 int jitlog_enabled()
 {
@@ -76,18 +105,173 @@ void jitlog_try_init_using_env(void) {
     jitlog_ready = 1;
 }
 
+#ifndef _WIN32
+static int ring_write_all(char *p, long length)
+{
+    int timeouts = 0;
+    while (length > 0) {
+        ssize_t n;
+        long chunk = length;
+        if (!ring_regular_file) {
+            /* wait until a write of up to PIPE_BUF bytes doesn't block */
+            struct pollfd pfd;
+            int res;
+            pfd.fd = jitlog_fd;
+            pfd.events = POLLOUT;
+            res = poll(&pfd, 1, RING_POLL_MS);
+            if (res < 0) {
+                if (errno == EINTR)
+                    continue;
+                return -1;
+            }
+            if (res == 0) {
+                if (ring_stop && ++timeouts >= RING_SHUTDOWN_POLLS)
+                    return -1;  /* shutting down, and the reader is stuck */
+                continue;
+            }
+            if (pfd.revents & (POLLERR | POLLHUP | POLLNVAL))
+                return -1;
+            if (chunk > PIPE_BUF)
+                chunk = PIPE_BUF;
+        }
+        n = write(jitlog_fd, p, chunk);
+        if (n < 0) {
+            if (errno == EINTR || errno == EAGAIN || errno == EWOULDBLOCK)
+                continue;
+            return -1;
+        }
+        p += n;
+        length -= n;
+    }
+    return 0;
+}
+
+static void *ring_drain(void *arg)
+{
+    pthread_mutex_lock(&ring_mutex);
+    while (1) {
+        long start, length;
+        int broken;
+        while (ring_head == ring_tail && !ring_stop)
+            pthread_cond_wait(&ring_cond, &ring_mutex);
+        if (ring_head == ring_tail)
+            break;      /* stopping, and everything is written out */
+        /* write out the contiguous part starting at the tail, without
+           holding the lock: the writers only ever touch the free part */
+        start = ring_tail % ring_size;
+        length = ring_head - ring_tail;
+        if (length > ring_size - start)
+            length = ring_size - start;
+        broken = ring_broken;
+        pthread_mutex_unlock(&ring_mutex);
+        if (!broken && ring_write_all(ring_buf + start, length) < 0)
+            broken = 1;         /* e.g. the reader went away; discard */
+        pthread_mutex_lock(&ring_mutex);
+        ring_broken = broken;
+        ring_tail += length;
+    }
+    pthread_mutex_unlock(&ring_mutex);
+    return NULL;
+}
+
+static void ring_shutdown(void)
+{
+    if (ring_buf == NULL)
+        return;
+    /* let the thread write out what is left in the buffer; this takes
+       at most about RING_SHUTDOWN_POLLS * RING_POLL_MS milliseconds
+       longer than the writes themselves if the reader doesn't read */
+    pthread_mutex_lock(&ring_mutex);
+    ring_stop = 1;
+    pthread_cond_signal(&ring_cond);
+    pthread_mutex_unlock(&ring_mutex);
+    pthread_join(ring_thread, NULL);
+    free(ring_buf);
+    ring_buf = NULL;
+}
+
+static void ring_write(char *text, long length)
+{
+    long start, first;
+    pthread_mutex_lock(&ring_mutex);
+    if (ring_broken || length > ring_size - (ring_head - ring_tail)) {
+        jitlog_dropped++;
+        pthread_mutex_unlock(&ring_mutex);
+        return;
+    }
+    start = ring_head % ring_size;
+    first = ring_size - start;
+    if (first > length)
+        first = length;
+    memcpy(ring_buf + start, text, first);
+    memcpy(ring_buf, text + first, length - first);
+    ring_head += length;
+    pthread_cond_signal(&ring_cond);
+    pthread_mutex_unlock(&ring_mutex);
+}
+#endif
+
 RPY_EXTERN
 char *jitlog_init(int fd)
 {
+#ifndef _WIN32
+    ring_shutdown();
+#endif
+    jitlog_fd = fd;
+    jitlog_ready = 1;
+    return NULL;
+}
+
+RPY_EXTERN
+char *jitlog_init_buffered(int fd, long size)
+{
+#ifdef _WIN32
+    return "buffered jitlog is not supported on Windows";
+#else
+    ring_shutdown();
+    if (size <= 0)
+        return "buffer size must be positive";
+    ring_buf = malloc(size);
+    if (ring_buf == NULL)
+        return "out of memory for the jitlog buffer";
+    ring_size = size;
+    ring_head = ring_tail = 0;
+    ring_stop = 0;
+    ring_broken = 0;
+    jitlog_dropped = 0;
     jitlog_fd = fd;
+    {
+        struct stat st;
+        ring_regular_file = fstat(fd, &st) == 0 && S_ISREG(st.st_mode);
+    }
+    if (pthread_create(&ring_thread, NULL, ring_drain, NULL) != 0) {
+        free(ring_buf);
+        ring_buf = NULL;
+        jitlog_fd = -1;
+        return "could not start the jitlog thread";
+    }
     jitlog_ready = 1;
     return NULL;
+#endif
+}
+
+RPY_EXTERN
+long jitlog_dropped_records(void)
+{
+#ifdef _WIN32
+    return 0;
+#else
+    return jitlog_dropped;
+#endif
 }
 
 RPY_EXTERN
 void jitlog_teardown()
 {
     jitlog_ready = 0;
+#ifndef _WIN32
+    ring_shutdown();
+#endif
     if (jitlog_fd == -1) {
         return;
     }
@@ -101,5 +285,11 @@ void jitlog_write_marked(char * text, int length)
 {
     if (!jitlog_ready) { return; }
 
+#ifndef _WIN32
+    if (ring_buf != NULL) {
+        ring_write(text, length);
+        return;
+    }
+#endif
     write(jitlog_fd, text, length);
 }
@@ -151,3 +151,79 @@ class TestLogger(object):
               jl.encode_le_addr(new_id_looptoken) + \
               jl.encode_le_addr(newlooptoken._ll_function_addr)
         assert binary.endswith(end)
+
+    def _get_fileno(self, file):
+        # the fd is owned and closed by the jit log
+        import os
+        return os.open(str(file), os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+
+    @pytest.mark.skipif("sys.platform == 'win32'")
+    def test_buffered(self, tmpdir):
+        file = tmpdir.join('binary_file')
+        jl.enable_jitlog(self._get_fileno(file), buffer_size=64 * 1024)
+        try:
+            for i in range(1000):
+                text = jl.MARK_ABORT_TRACE + jl.encode_le_addr(i)
+                jl.jitlog_write_marked(text, len(text))
+            assert jl.dropped_records() == 0
+        finally:
+            jl.jitlog_teardown()
+        binary = file.read()
+        assert binary.startswith(jl.MARK_JITLOG_HEADER)
+        expected = ''.join([jl.MARK_ABORT_TRACE + jl.encode_le_addr(i)
+                            for i in range(1000)])
+        assert binary.endswith(expected)
+
+    @pytest.mark.skipif("sys.platform == 'win32'")
+    def test_buffered_drops_whole_records(self, tmpdir):
+        file = tmpdir.join('binary_file')
+        assert not jl.jitlog_init_buffered(self._get_fileno(file), 64)
+        try:
+            text = 'x' * 100
+            jl.jitlog_write_marked(text, len(text))
+            assert jl.dropped_records() == 1
+            text = 'y' * 10
+            jl.jitlog_write_marked(text, len(text))
+        finally:
+            jl.jitlog_teardown()
+        assert file.read() == 'y' * 10
+
+    @pytest.mark.skipif("sys.platform == 'win32'")
+    def test_buffered_teardown_with_stuck_reader(self):
+        import os, time
+        rfd, wfd = os.pipe()
+        try:
+            assert not jl.jitlog_init_buffered(wfd, 1024 * 1024)
+            text = 'x' * 1000
+            for i in range(500):
+                jl.jitlog_write_marked(text, len(text))
+            # nobody reads the pipe: the rest of the buffer is dropped
+            t0 = time.time()
+            jl.jitlog_teardown()
+            assert time.time() - t0 < 10.0
+        finally:
+            os.close(rfd)
+
+    def test_events(self, tmpdir, metainterp_sd):
+        logger = jl.JitLogger()
+        file = tmpdir.join('binary_file')
+        jl.jitlog_init(self._get_fileno(file))
+        jl.set_events(jl.EVENT_BRIDGES)
+        try:
+            logger.start_new_trace(metainterp_sd, jd_name='jdname')
+            assert logger.log_trace(jl.MARK_TRACE, None, None) is \
+                       jl.EMPTY_TRACE_LOG
+            logger.trace_aborted()
+            jl.set_events(jl.EVENT_ABORTS)
+            logger.start_new_trace(metainterp_sd, jd_name='jdname')
+            assert logger.log_trace(jl.MARK_TRACE, None, None) is \
+                       jl.EMPTY_TRACE_LOG
+            logger.trace_aborted()
+        finally:
+            jl.set_events(jl.EVENT_ALL)
+            jl.jitlog_teardown()
+        # only the start and the abort of the second trace are written
+        assert file.read() == (jl.MARK_START_TRACE + jl.encode_le_addr(2) +
+                               jl.encode_str('loop') + jl.encode_le_addr(0) +
+                               jl.encode_str('jdname') +
+                               jl.MARK_ABORT_TRACE + jl.encode_le_addr(2))
@@ -2,6 +2,7 @@ import sys
 from rpython.rlib.debug import check_nonneg
 from rpython.rlib.unroll import unrolling_iterable
 from rpython.rlib.rsre import rsre_char, rsre_constants as consts
+from rpython.rlib.rsre import rsre_prefilter
 from rpython.tool.sourcetools import func_with_new_name
 from rpython.rlib.objectmodel import we_are_translated, not_rpython
 from rpython.rlib import jit
@@ -51,10 +52,15 @@ class EndOfString(Exception):
     pass
 
 class CompiledPattern(object):
-    _immutable_fields_ = ['pattern[*]', 'flags']
+    _immutable_fields_ = ['pattern[*]', 'flags', 'required_literal',
+                          'dfa?', 'dfa_checked?']
+    dfa = None              # see rsre_dfa.get_dfa()
+    dfa_checked = False
 
     def __init__(self, pattern, flags):
         self.pattern = pattern
+        # a literal substring that every match contains, or None
+        self.required_literal = rsre_prefilter.find_required_literal(pattern)
         if not consts.V37:      # 'flags' is ignored in >=3.7 mode
             self.flags = flags
         # check we don't get the old value of MAXREPEAT
@@ -186,6 +192,12 @@ class AbstractMatchContext(object):
             raise EndOfString
         return position
 
+    def find_literal(self, literal, start):
+        """Return the position of the first occurrence of the
+        RequiredLiteral 'literal' at or after 'start', or -1 if there is
+        none.  Returns -2 if this context cannot search quickly."""
+        return -2
+
     def get_mark(self, gid):
         return find_mark(self.match_marks, gid)
 
@@ -297,6 +309,13 @@ class StrMatchContext(FixedMatchContext):
     def get_single_byte(self, base_position, index):
         return self.str(base_position + index)
 
+    def find_literal(self, literal, start):
+        s = literal.as_bytes
+        if s is None or start > self.end:
+            return -1
+        assert start >= 0
+        return self._string.find(s, start, self.end)
+
     def _real_pos(self, index):
         return index     # overridden by tests
 
@@ -321,6 +340,12 @@ class UnicodeMatchContext(FixedMatchContext):
     def get_single_byte(self, base_position, index):
         return self.str(base_position + index)
 
+    def find_literal(self, literal, start):
+        if start > self.end:
+            return -1
+        assert start >= 0
+        return self._unicodestr.find(literal.get_unicode(), start, self.end)
+
 # ____________________________________________________________
 
 class Mark(object):
@@ -1293,14 +1318,25 @@ def search_context(ctx, pattern):
         return False
     base = 0
     charset = False
+    found = -1
+    literal = pattern.required_literal
+    if literal is not None:
+        found = ctx.find_literal(literal, ctx.go_forward_by_bytes(
+            ctx.match_start, literal.min_offset))
+        if found == -1:
+            return False      # the required literal does not occur at all
+        if found == -2:
+            literal = None    # not supported by this kind of context
     if pattern.pat(base) == consts.OPCODE_INFO:
         flags = pattern.pat(2)
         if flags & consts.SRE_INFO_PREFIX:
-            if pattern.pat(5) > 1:
+            if pattern.pat(5) > 1 and literal is None:
                 return fast_search(ctx, pattern)
         else:
             charset = (flags & consts.SRE_INFO_CHARSET)
         base += 1 + pattern.pat(1)
+    if literal is not None:
+        return required_literal_search(ctx, pattern, base, found, charset)
     if pattern.pat(base) == consts.OPCODE_LITERAL:
         return literal_search(ctx, pattern, base)
     if charset:
@@ -1365,6 +1401,75 @@ def charset_search(ctx, pattern, base):
         start = ctx.next(start)
     return False
 
+install_jitdriver_spec("RequiredLiteralSearch",
+                       greens=['base', 'charset', 'pattern'],
+                       reds=['start', 'found', 'ctx'],
+                       debugprint=(2, 0))
+@specializectx
+def required_literal_search(ctx, pattern, base, found, charset):
+    # every match contains 'pattern.required_literal', which we look for
+    # with a fast string search.  'found' is the position of its first
+    # occurrence that is at least 'min_offset' characters after the start.
+    # We only try to match at the positions from where the literal at
+    # 'found' is between 'min_offset' and 'max_offset' characters away.
+    start = _skip_to_literal(ctx, pattern, ctx.match_start, found)
+    while True:
+        ctx.jitdriver_RequiredLiteralSearch.jit_merge_point(ctx=ctx,
+                start=start, found=found, base=base, charset=charset,
+                pattern=pattern)
+        min_offset = pattern.required_literal.min_offset
+        if ctx.bytes_difference(found, start) < min_offset:
+            # too close to 'found' now, look for the next occurrence
+            found = ctx.find_literal(pattern.required_literal,
+                                     ctx.go_forward_by_bytes(start, min_offset))
+            if found == -1:
+                return False
+            start = _skip_to_literal(ctx, pattern, start, found)
+        if not charset or rsre_char.check_charset(ctx, pattern, 5,
+                                                  ctx.str(start)):
+            if sre_match(ctx, pattern, base, start, None) is not None:
+                ctx.match_start = start
+                return True
+        start = ctx.next(start)
+
+@specializectx
+def _skip_to_literal(ctx, pattern, start, found):
+    # a match that contains the literal at 'found' cannot start more than
+    # 'max_offset' characters before it
+    literal = pattern.required_literal
+    max_offset = literal.max_offset
+    if max_offset != rsre_prefilter.UNBOUNDED:
+        try:
+            start = ctx.prev_n(found, max_offset, start)
+        except EndOfString:
+            pass
+    repeat_ppos = literal.repeat_ppos
+    if repeat_ppos >= 0:
+        start = _rewind_over_repeat(ctx, pattern, repeat_ppos + 4,
+                                    start, found)
+    return start
+
+@specializectx
+@jit.dont_look_inside
+def _rewind_over_repeat(ctx, pattern, ppos, start, found):
+    # the pattern is of the form 'x*literal...' where 'x' is the single
+    # character item at 'ppos'.  Walk backward from 'found' as long as the
+    # characters match 'x': no match can start before that point, even
+    # using a later occurrence of the literal.
+    op = pattern.pat(ppos)
+    ptr = found
+    while ptr > start:
+        prevptr = ctx.prev(ptr)
+        for op1, checkerfn in unroll_char_checker:
+            if op1 == op:
+                if not checkerfn(ctx, pattern, prevptr, ppos):
+                    return ptr
+                break
+        else:
+            return start    # obscure case, see find_repetition_end()
+        ptr = prevptr
+    return start
+
 install_jitdriver_spec('FastSearch',
                        greens=['i', 'prefix_len', 'pattern'],
                        reds=['string_position', 'ctx'],
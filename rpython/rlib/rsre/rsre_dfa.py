@@ -0,0 +1,550 @@
+"""
+Searching without backtracking, for the patterns that don't need it.
+
+If a pattern doesn't use backreferences, lookaround, anchors or locale-
+dependent matching, it is equivalent to a plain NFA.  We build that NFA
+from the pattern code, and use it to find the leftmost position where a
+match starts, in a single left-to-right pass over the string.  A second
+pass from that position follows the alternatives in the order in which
+the backtracking engine would try them, and gives the end of the match.
+If the pattern has no groups, that's all: searching is linear-time for
+patterns like '(a|aa)*b' that are exponential with backtracking.  If it
+has groups, or a repetition of something that can match the empty
+string, the backtracking engine of rsre_core is still called once, at
+the start of the match, to compute the end and the groups; only this
+last step can backtrack.
+
+PatternSet combines many patterns into a single such NFA, with one MATCH
+node per pattern, to find in one pass which of them match a string.
+
+The NFA is simulated as a DFA that is built lazily, one transition at a
+time, and whose states are cached.  A DFA state is the list of NFA nodes
+that are alive, ordered by the position where their match attempt
+started.  The start positions themselves are not part of the state: they
+are carried along in a list, and each DFA transition says from which
+node of the previous state each node of the new state comes from.
+"""
+from rpython.rlib import jit
+from rpython.rlib.rsre import rsre_core, rsre_char, rsre_constants as consts
+from rpython.rlib.rsre.rsre_core import specializectx, MODE_ANY
+
+NFA_CHAR = 0      # arg1: ppos of a single-character opcode; arg2: next node
+NFA_SPLIT = 1     # arg1: first choice; arg2: second choice
+NFA_MATCH = 2
+
+MAX_NFA_SIZE = 1000     # patterns that need more NFA nodes are not handled
+MAX_CACHE_SIZE = 10000  # flush the cache of DFA states and transitions
+                        # when it contains more than this
+
+
+class NotSupported(Exception):
+    pass
+
+
+class NFABuilder(object):
+    """Turns the code of one or several patterns into an NFA."""
+
+    def __init__(self):
+        self.kinds = []
+        self.arg1 = []
+        self.arg2 = []
+        self.owners = []          # for each node, the index of its pattern
+        self.code = None
+        self.owner = 0
+        self.first_node = 0
+        self.backtracks = False   # does the pattern contain a REPEAT?
+        self.has_marks = False    # does the pattern contain a MARK?
+        self.empty_loops = False  # can an optional iteration match ''?
+
+    def new_node(self, kind, arg1, arg2):
+        if len(self.kinds) - self.first_node >= MAX_NFA_SIZE:
+            raise NotSupported
+        self.kinds.append(kind)
+        self.arg1.append(arg1)
+        self.arg2.append(arg2)
+        self.owners.append(self.owner)
+        return len(self.kinds) - 1
+
+    def join(self, starts):
+        # a chain of SPLITs, to start attempts at all the 'starts' at once
+        start = starts[-1]
+        i = len(starts) - 2
+        while i >= 0:
+            self.kinds.append(NFA_SPLIT)
+            self.arg1.append(starts[i])
+            self.arg2.append(start)
+            self.owners.append(-1)
+            start = len(self.kinds) - 1
+            i -= 1
+        return start
+
+    def truncate(self, size):
+        # forget the nodes added by a build() that raised NotSupported
+        assert size >= 0
+        del self.kinds[size:]
+        del self.arg1[size:]
+        del self.arg2[size:]
+        del self.owners[size:]
+
+    def get(self, ppos):
+        if not 0 <= ppos < len(self.code):
+            raise NotSupported
+        return self.code[ppos]
+
+    def skip(self, ppos):
+        # for opcodes of the form <OP> <skip> ...
+        skip = self.get(ppos + 1)
+        if skip <= 0:
+            raise NotSupported
+        return ppos + 1 + skip
+
+    def build(self, pattern, owner):
+        """Add the NFA for 'pattern', whose MATCH node is tagged with
+        'owner'.  Returns its first node."""
+        if not consts.V37 and pattern.flags & consts.SRE_FLAG_LOCALE:
+            raise NotSupported
+        self.code = pattern.pattern
+        self.owner = owner
+        self.first_node = len(self.kinds)
+        self.backtracks = False
+        self.has_marks = False
+        self.empty_loops = False
+        match = self.new_node(NFA_MATCH, owner, 0)
+        ppos = 0
+        if self.get(0) == consts.OPCODE_INFO:
+            ppos = self.skip(0)
+        start, endppos = self.build_sequence(ppos, match)
+        if self.get(endppos) != consts.OPCODE_SUCCESS:
+            raise NotSupported
+        return start
+
+    def build_sequence(self, ppos, nxt):
+        """Build the NFA for the sequence of opcodes at 'ppos', followed
+        by the node 'nxt'.  Returns the first node of the sequence and the
+        position of the opcode that ends the sequence."""
+        elements = []
+        while True:
+            op = self.get(ppos)
+            if (op == consts.OPCODE_SUCCESS or
+                op == consts.OPCODE_JUMP or
+                op == consts.OPCODE_MAX_UNTIL or
+                op == consts.OPCODE_MIN_UNTIL):
+                break
+            elements.append(ppos)
+            ppos = self.element_end(ppos, op)
+        i = len(elements) - 1
+        while i >= 0:
+            nxt = self.build_element(elements[i], nxt)
+            i -= 1
+        return nxt, ppos
+
+    def element_end(self, ppos, op):
+        if op == consts.OPCODE_ANY or op == consts.OPCODE_ANY_ALL:
+            return ppos + 1
+        if _is_charset_op(op):
+            return self.skip(ppos)
+        if _is_char_op(op) or op == consts.OPCODE_MARK:
+            return ppos + 2
+        if op == consts.OPCODE_BRANCH:
+            p = ppos + 1
+            while self.get(p):
+                p += self.get(p)
+            return p + 1
+        if (op == consts.OPCODE_REPEAT_ONE or
+            op == consts.OPCODE_MIN_REPEAT_ONE):
+            return self.skip(ppos)
+        if op == consts.OPCODE_REPEAT:
+            return self.skip(ppos) + 1
+        # AT, ASSERT, ASSERT_NOT, GROUPREF, GROUPREF_EXISTS, CATEGORY...
+        raise NotSupported
+
+    def build_element(self, ppos, nxt):
+        op = self.get(ppos)
+        if _is_char_op(op):
+            return self.new_node(NFA_CHAR, ppos, nxt)
+        if op == consts.OPCODE_MARK:
+            self.has_marks = True
+            return nxt
+        if op == consts.OPCODE_BRANCH:
+            # <BRANCH> <0=skip> code <JUMP> ... <NULL>
+            entries = []
+            p = ppos + 1
+            while self.get(p):
+                entry, _ = self.build_sequence(p + 1, nxt)
+                entries.append(entry)
+                p += self.get(p)
+            if not entries:
+                raise NotSupported
+            result = entries[-1]
+            i = len(entries) - 2
+            while i >= 0:
+                result = self.new_node(NFA_SPLIT, entries[i], result)
+                i -= 1
+            return result
+        if op == consts.OPCODE_REPEAT_ONE:
+            return self.build_repeat(ppos + 4, self.get(ppos + 2),
+                                     self.get(ppos + 3), True, nxt)
+        if op == consts.OPCODE_MIN_REPEAT_ONE:
+            return self.build_repeat(ppos + 4, self.get(ppos + 2),
+                                     self.get(ppos + 3), False, nxt)
+        if op == consts.OPCODE_REPEAT:
+            # <REPEAT> <skip> <1=min> <2=max> item <UNTIL> tail
+            self.backtracks = True
+            greedy = self.get(self.skip(ppos)) == consts.OPCODE_MAX_UNTIL
+            return self.build_repeat(ppos + 4, self.get(ppos + 2),
+                                     self.get(ppos + 3), greedy, nxt)
+        raise NotSupported
+
+    def build_repeat(self, itemppos, min, max, greedy, nxt):
+        if min < 0 or min > MAX_NFA_SIZE:
+            raise NotSupported
+        if max == rsre_char.MAXREPEAT:
+            loop = self.new_node(NFA_SPLIT, -1, -1)
+            body, _ = self.build_sequence(itemppos, loop)
+            self.check_empty_loop(body, loop)
+            self.set_split(loop, body, nxt, greedy)
+            entry = loop
+        else:
+            if max < min or max - min > MAX_NFA_SIZE:
+                raise NotSupported
+            entry = nxt
+            for i in range(max - min):
+                split = self.new_node(NFA_SPLIT, -1, -1)
+                body, _ = self.build_sequence(itemppos, entry)
+                self.check_empty_loop(body, entry)
+                self.set_split(split, body, nxt, greedy)
+                entry = split
+        for i in range(min):
+            entry, _ = self.build_sequence(itemppos, entry)
+        return entry
+
+    def check_empty_loop(self, body, nxt):
+        # The backtracking engine stops repeating after an iteration
+        # that matched the empty string, which an NFA cannot express.
+        # It doesn't change where matches start, but it can change where
+        # they end.
+        pending = [body]
+        seen = {}
+        while pending:
+            node = pending.pop()
+            if node == nxt:
+                self.empty_loops = True
+                return
+            if node in seen:
+                continue
+            seen[node] = None
+            if self.kinds[node] == NFA_SPLIT:
+                pending.append(self.arg1[node])
+                pending.append(self.arg2[node])
+
+    def set_split(self, split, body, nxt, greedy):
+        if greedy:
+            self.arg1[split] = body
+            self.arg2[split] = nxt
+        else:
+            self.arg1[split] = nxt
+            self.arg2[split] = body
+
+
+def _is_charset_op(op):
+    return op == consts.OPCODE_IN or op == consts.OPCODE_IN_IGNORE or (
+        consts.eq(op, consts.OPCODE37_IN_UNI_IGNORE))
+
+def _is_char_op(op):
+    # the single-character opcodes that only depend on the character.
+    # The *_LOC_IGNORE ones depend on the current locale, so we cannot
+    # cache the DFA transitions for them.
+    return (op == consts.OPCODE_ANY or
+            op == consts.OPCODE_ANY_ALL or
+            _is_charset_op(op) or
+            op == consts.OPCODE_LITERAL or
+            op == consts.OPCODE_NOT_LITERAL or
+            op == consts.OPCODE_LITERAL_IGNORE or
+            op == consts.OPCODE_NOT_LITERAL_IGNORE or
+            consts.eq(op, consts.OPCODE37_LITERAL_UNI_IGNORE) or
+            consts.eq(op, consts.OPCODE37_NOT_LITERAL_UNI_IGNORE))
+
+# ____________________________________________________________
+
+class DFAState(object):
+    def __init__(self, nodes, injecting):
+        self.nodes = nodes            # list of NFA nodes, CHAR or MATCH
+        self.injecting = injecting    # are we still starting new attempts?
+        self.match_index = -1         # index of the first MATCH node
+        self.matched = []             # owners of the MATCH nodes
+        self.transitions = {}         # {char_ord: DFATransition}
+
+
+class DFATransition(object):
+    def __init__(self, target, origins):
+        self.target = target
+        # for each node of 'target', the index of the node in the
+        # previous state that it comes from, or -1 for a new attempt
+        self.origins = origins
+
+
+class DFA(object):
+    def __init__(self, patterns, builder, start):
+        self.patterns = patterns      # indexed by the owners of the nodes
+        self.kinds = builder.kinds[:]
+        self.arg1 = builder.arg1[:]
+        self.arg2 = builder.arg2[:]
+        self.owners = builder.owners[:]
+        self.size = len(self.kinds)
+        self.start = start
+        self.has_marks = builder.has_marks
+        self.empty_loops = builder.empty_loops
+        self.flush()
+
+    def flush(self):
+        self.cache = {}
+        self.cache_size = 0
+        nodes = []
+        self.add_closure(self.start, nodes, [], -1, [False] * self.size)
+        self.initial_state = self.intern(nodes, True)
+        # the same nodes, for a single attempt: used by find_match_end()
+        self.single_state = self.intern(nodes, False)
+
+    def intern(self, nodes, injecting):
+        key = '%d:%s' % (injecting, ','.join([str(n) for n in nodes]))
+        try:
+            return self.cache[key]
+        except KeyError:
+            state = DFAState(nodes, injecting)
+            for i in range(len(nodes)):
+                if self.kinds[nodes[i]] == NFA_MATCH:
+                    if state.match_index < 0:
+                        state.match_index = i
+                    state.matched.append(self.owners[nodes[i]])
+            self.cache[key] = state
+            self.cache_size += 1
+            return state
+
+    def add_closure(self, node, nodes, origins, origin, seen):
+        # add to 'nodes' all the CHAR and MATCH nodes reachable from 'node'
+        # following SPLITs.  Nodes already seen are reached by an attempt
+        # that started earlier, which makes this one redundant.
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            if seen[node]:
+                continue
+            seen[node] = True
+            if self.kinds[node] == NFA_SPLIT:
+                pending.append(self.arg2[node])
+                pending.append(self.arg1[node])
+            else:
+                nodes.append(node)
+                origins.append(origin)
+
+    def prefix_state(self, state, length):
+        # the state with only the first 'length' nodes, which started no
+        # later than them, and no new attempts
+        assert length >= 0
+        return self.intern(state.nodes[:length], False)
+
+
+@specializectx
+def _compute_transition(ctx, dfa, state, ptr):
+    nodes = []
+    origins = []
+    seen = [False] * dfa.size
+    for i in range(len(state.nodes)):
+        node = state.nodes[i]
+        if dfa.kinds[node] == NFA_CHAR:
+            pattern = dfa.patterns[dfa.owners[node]]
+            ppos = dfa.arg1[node]
+            assert ppos >= 0
+            op = pattern.pat(ppos)
+            for op1, checkerfn in rsre_core.unroll_char_checker:
+                if op1 == op:
+                    if checkerfn(ctx, pattern, ptr, ppos):
+                        dfa.add_closure(dfa.arg2[node], nodes, origins, i,
+                                        seen)
+                    break
+            else:
+                raise rsre_core.Error("rsre_dfa: bad opcode %d" % op)
+    if state.injecting:
+        dfa.add_closure(dfa.start, nodes, origins, -1, seen)
+    target = dfa.intern(nodes, state.injecting)
+    dfa.cache_size += 1
+    return DFATransition(target, origins)
+
+@specializectx
+def _get_transition(ctx, dfa, state, ptr):
+    char_ord = ctx.str(ptr)
+    try:
+        return state.transitions[char_ord]
+    except KeyError:
+        if dfa.cache_size > MAX_CACHE_SIZE:
+            # throw away all states and transitions, and continue
+            # from a fresh copy of the current state
+            dfa.flush()
+            state = dfa.intern(state.nodes, state.injecting)
+        transition = _compute_transition(ctx, dfa, state, ptr)
+        state.transitions[char_ord] = transition
+        return transition
+
+@specializectx
+@jit.dont_look_inside
+def find_leftmost_start(ctx, dfa):
+    """Return the smallest position, starting from ctx.match_start, where
+    a match of the pattern starts, or -1 if there is no match at all."""
+    ptr = ctx.match_start
+    end = ctx.end
+    state = dfa.initial_state
+    starts = [ptr] * dfa.size
+    newstarts = [0] * dfa.size
+    best = -1
+    while True:
+        k = state.match_index
+        if k >= 0:
+            # a match started at starts[k].  Only the attempts that
+            # started strictly before can still give a better result.
+            best = starts[k]
+            while k > 0 and starts[k - 1] == best:
+                k -= 1
+            if k == 0:
+                return best
+            state = dfa.prefix_state(state, k)
+        if ptr >= end:
+            return best
+        transition = _get_transition(ctx, dfa, state, ptr)
+        ptr = ctx.next(ptr)
+        origins = transition.origins
+        for i in range(len(origins)):
+            origin = origins[i]
+            if origin >= 0:
+                newstarts[i] = starts[origin]
+            else:
+                newstarts[i] = ptr
+        starts, newstarts = newstarts, starts
+        state = transition.target
+        if not state.nodes:
+            return best
+
+@specializectx
+@jit.dont_look_inside
+def find_match_end(ctx, dfa, start):
+    """Return the position where the match starting at 'start' ends, or
+    -1 if there is no match starting there.  This is the match that the
+    backtracking engine would find: the nodes of a DFA state are ordered
+    by the priority of the alternatives that lead to them, so when a MATCH
+    node is reached, the nodes after it cannot give the result any more,
+    and the nodes before it can only give a match that ends later."""
+    ptr = start
+    end = ctx.end
+    state = dfa.single_state
+    result = -1
+    while True:
+        k = state.match_index
+        if k >= 0:
+            result = ptr
+            state = dfa.prefix_state(state, k)
+        if ptr >= end or not state.nodes:
+            return result
+        transition = _get_transition(ctx, dfa, state, ptr)
+        ptr = ctx.next(ptr)
+        state = transition.target
+
+# ____________________________________________________________
+
+def get_dfa(pattern):
+    """Return the DFA for 'pattern', or None if the pattern cannot or
+    should not be searched with a DFA."""
+    if not pattern.dfa_checked:
+        pattern.dfa = _make_dfa(pattern)
+        pattern.dfa_checked = True
+    return pattern.dfa
+
+def _make_dfa(pattern):
+    builder = NFABuilder()
+    try:
+        start = builder.build(pattern, 0)
+    except NotSupported:
+        return None
+    if not builder.backtracks:
+        # without a general REPEAT, i.e. a repetition of something else
+        # than a single character, the backtracking search cannot blow
+        # up, and it is better because the JIT can compile it
+        return None
+    return DFA([pattern], builder, start)
+
+def search_context(ctx, pattern, dfa):
+    """Like rsre_core.search_context(), using the given DFA."""
+    if ctx.match_mode != MODE_ANY:
+        return rsre_core.search_context(ctx, pattern)
+    ctx.original_pos = ctx.match_start
+    if ctx.end < ctx.match_start:
+        return False
+    literal = pattern.required_literal
+    if literal is not None:
+        found = ctx.find_literal(literal, ctx.go_forward_by_bytes(
+            ctx.match_start, literal.min_offset))
+        if found == -1:
+            return False
+    start = find_leftmost_start(ctx, dfa)
+    if start < ctx.ZERO:
+        return False
+    if not dfa.has_marks and not dfa.empty_loops:
+        end = find_match_end(ctx, dfa, start)
+        if end >= ctx.ZERO:
+            ctx.match_start = start
+            ctx.match_end = end
+            ctx.match_marks = None
+            return True
+    elif rsre_core.sre_match(ctx, pattern, 0, start, None) is not None:
+        ctx.match_start = start
+        return True
+    # should not occur, but be safe: use the backtracking search
+    return rsre_core.search_context(ctx, pattern)
+
+# ____________________________________________________________
+
+class PatternSet(object):
+    """Many patterns combined into a single DFA, to find in one pass over
+    a string which ones match somewhere in it.  The patterns that cannot
+    be turned into an NFA are listed in 'others': they must be searched
+    for one by one."""
+
+    def __init__(self, patterns):
+        self.patterns = patterns
+        self.others = []
+        self.num_dfa_patterns = 0
+        builder = NFABuilder()
+        starts = []
+        for i in range(len(patterns)):
+            size = len(builder.kinds)
+            try:
+                starts.append(builder.build(patterns[i], i))
+            except NotSupported:
+                builder.truncate(size)
+                self.others.append(i)
+        self.dfa = None
+        if starts:
+            self.num_dfa_patterns = len(starts)
+            self.dfa = DFA(patterns, builder, builder.join(starts))
+
+@specializectx
+@jit.dont_look_inside
+def find_matching_patterns(ctx, patternset, found):
+    """Set found[i] to True for each pattern i of the PatternSet's DFA
+    that matches somewhere between ctx.match_start and ctx.end.  The
+    patterns listed in 'patternset.others' are ignored."""
+    dfa = patternset.dfa
+    if dfa is None or ctx.end < ctx.match_start:
+        return
+    missing = patternset.num_dfa_patterns
+    ptr = ctx.match_start
+    end = ctx.end
+    state = dfa.initial_state
+    while True:
+        for i in state.matched:
+            if not found[i]:
+                found[i] = True
+                missing -= 1
+        if missing == 0 or ptr >= end:
+            return
+        transition = _get_transition(ctx, dfa, state, ptr)
+        ptr = ctx.next(ptr)
+        state = transition.target
@@ -0,0 +1,265 @@
+"""
+Compile-time analysis of a pattern, looking for a literal substring that
+every match must contain.  If there is one, searching can first look for
+that substring with a fast string search and only try to match at the
+positions where it could be the start of a match.
+"""
+from rpython.rlib import jit, rutf8
+from rpython.rlib.rsre import rsre_constants as consts
+from rpython.rlib.rsre.rsre_char import MAXREPEAT
+
+UNBOUNDED = -1          # for 'max_offset': no known upper bound
+MAX_WIDTH = 1 << 20     # larger widths are not tracked precisely
+
+
+class RequiredLiteral(object):
+    """A literal string that is part of any match, together with the
+    range of possible distances (in characters) between the start of the
+    match and the start of the literal."""
+    _immutable_fields_ = ['min_offset', 'max_offset',
+                          'repeat_ppos', 'as_bytes', 'as_utf8']
+    _as_unicode = None
+
+    def __init__(self, codes, min_offset, max_offset, repeat_ppos=-1):
+        self.codes = codes
+        assert min_offset >= 0
+        self.min_offset = min_offset
+        self.max_offset = max_offset
+        # if the literal is only preceded by a single REPEAT_ONE or
+        # MIN_REPEAT_ONE, this is the position of that opcode: then the
+        # characters between the start of a match and the literal must
+        # all match the repeated item.  Otherwise -1.
+        self.repeat_ppos = repeat_ppos
+        self.as_bytes = _encode_bytes(codes)
+        self.as_utf8 = _encode_utf8(codes)
+
+    def get_unicode(self):
+        # only needed by UnicodeMatchContext, which is not used by PyPy
+        if self._as_unicode is None:
+            self._as_unicode = u''.join([unichr(c) for c in self.codes])
+        return self._as_unicode
+
+    def __repr__(self):
+        return '<RequiredLiteral %r %d..%d>' % (self.as_utf8, self.min_offset,
+                                                self.max_offset)
+
+def _encode_bytes(codes):
+    # None if the literal can never appear in a byte string
+    for c in codes:
+        if c > 255:
+            return None
+    return ''.join([chr(c) for c in codes])
+
+def _encode_utf8(codes):
+    # None if the literal can never appear in a unicode string
+    result = []
+    for c in codes:
+        if c > 0x10ffff:
+            return None
+        result.append(rutf8.unichr_as_utf8(c, allow_surrogates=True))
+    return ''.join(result)
+
+# ____________________________________________________________
+
+class GiveUp(Exception):
+    pass
+
+def _add_max(a, b):
+    if a == UNBOUNDED or b == UNBOUNDED:
+        return UNBOUNDED
+    result = a + b
+    if result > MAX_WIDTH:
+        return UNBOUNDED
+    return result
+
+def _add_min(a, b):
+    return min(a + b, MAX_WIDTH)
+
+def _repeat_width(item_min, item_max, rmin, rmax):
+    if item_min > 0 and rmin > MAX_WIDTH // item_min:
+        minw = MAX_WIDTH
+    else:
+        minw = min(item_min * rmin, MAX_WIDTH)
+    if item_max == 0:
+        maxw = 0
+    elif (rmax == MAXREPEAT or item_max == UNBOUNDED or
+          rmax > MAX_WIDTH // item_max):
+        maxw = UNBOUNDED
+    else:
+        maxw = item_max * rmax
+    return minw, maxw
+
+def _is_single_char(op):
+    return (op == consts.OPCODE_ANY or
+            op == consts.OPCODE_ANY_ALL)
+
+def _is_single_char_with_arg(op):
+    return (op == consts.OPCODE_LITERAL or
+            op == consts.OPCODE_NOT_LITERAL or
+            op == consts.OPCODE_LITERAL_IGNORE or
+            op == consts.OPCODE_NOT_LITERAL_IGNORE or
+            op == consts.OPCODE_CATEGORY or
+            consts.eq(op, consts.OPCODE37_LITERAL_UNI_IGNORE) or
+            consts.eq(op, consts.OPCODE37_LITERAL_LOC_IGNORE) or
+            consts.eq(op, consts.OPCODE37_NOT_LITERAL_UNI_IGNORE) or
+            consts.eq(op, consts.OPCODE37_NOT_LITERAL_LOC_IGNORE))
+
+def _is_single_char_set(op):
+    return (op == consts.OPCODE_IN or
+            op == consts.OPCODE_IN_IGNORE or
+            consts.eq(op, consts.OPCODE37_IN_UNI_IGNORE) or
+            consts.eq(op, consts.OPCODE37_IN_LOC_IGNORE))
+
+def _is_groupref(op):
+    return (op == consts.OPCODE_GROUPREF or
+            op == consts.OPCODE_GROUPREF_IGNORE or
+            consts.eq(op, consts.OPCODE37_GROUPREF_UNI_IGNORE) or
+            consts.eq(op, consts.OPCODE37_GROUPREF_LOC_IGNORE))
+
+def _is_end_of_sequence(op):
+    return (op == consts.OPCODE_SUCCESS or
+            op == consts.OPCODE_JUMP or
+            op == consts.OPCODE_MAX_UNTIL or
+            op == consts.OPCODE_MIN_UNTIL)
+
+def _get(code, ppos):
+    if not 0 <= ppos < len(code):
+        raise GiveUp
+    return code[ppos]
+
+def _skip(code, ppos):
+    # for opcodes of the form <OP> <skip> ...
+    skip = _get(code, ppos + 1)
+    if skip <= 0:
+        raise GiveUp
+    return ppos + 1 + skip
+
+def walk_sequence(code, ppos, runs):
+    """Compute the minimum and maximum width of the sequence of opcodes
+    starting at 'ppos'.  If 'runs' is not None, also record in it the runs
+    of consecutive LITERAL opcodes, as tuples (codes, min_offset,
+    max_offset, repeat_ppos).  Raises GiveUp on anything we don't
+    understand; the runs recorded so far are still valid in that case."""
+    minw = 0
+    maxw = 0
+    current = None      # the run of LITERALs we are building, or None
+    cur_min = cur_max = 0
+    cur_repeat = -1
+    num_ops = 0         # number of non-MARK opcodes seen so far
+    first_repeat = -1   # position of the first opcode, if a REPEAT_ONE
+    while True:
+        op = _get(code, ppos)
+        if _is_end_of_sequence(op):
+            break
+        if op == consts.OPCODE_LITERAL:
+            if runs is not None:
+                if current is None:
+                    current = []
+                    cur_min = minw
+                    cur_max = maxw
+                    cur_repeat = first_repeat if num_ops == 1 else -1
+                current.append(_get(code, ppos + 1))
+            ppos += 2
+            num_ops += 1
+            minw = _add_min(minw, 1)
+            maxw = _add_max(maxw, 1)
+            continue
+        if op == consts.OPCODE_MARK:
+            # zero-width, doesn't interrupt a run of LITERALs
+            ppos += 2
+            continue
+        if current is not None:
+            runs.append((current, cur_min, cur_max, cur_repeat))
+            current = None
+        if num_ops == 0 and (op == consts.OPCODE_REPEAT_ONE or
+                             op == consts.OPCODE_MIN_REPEAT_ONE):
+            first_repeat = ppos
+        num_ops += 1
+        if _is_single_char(op):
+            ppos += 1
+            minw = _add_min(minw, 1)
+            maxw = _add_max(maxw, 1)
+        elif _is_single_char_with_arg(op):
+            ppos += 2
+            minw = _add_min(minw, 1)
+            maxw = _add_max(maxw, 1)
+        elif _is_single_char_set(op):
+            ppos = _skip(code, ppos)
+            minw = _add_min(minw, 1)
+            maxw = _add_max(maxw, 1)
+        elif op == consts.OPCODE_AT:
+            ppos += 2
+        elif (op == consts.OPCODE_ASSERT or op == consts.OPCODE_ASSERT_NOT or
+              op == consts.OPCODE_INFO):
+            ppos = _skip(code, ppos)
+        elif op == consts.OPCODE_BRANCH:
+            # <BRANCH> <0=skip> code <JUMP> ... <NULL>
+            bmin = -1
+            bmax = 0
+            p = ppos + 1
+            while _get(code, p):
+                amin, amax = walk_sequence(code, p + 1, None)
+                if bmin < 0 or amin < bmin:
+                    bmin = amin
+                if amax == UNBOUNDED or bmax == UNBOUNDED:
+                    bmax = UNBOUNDED
+                elif amax > bmax:
+                    bmax = amax
+                p += _get(code, p)
+            if bmin < 0:
+                bmin = 0
+            ppos = p + 1
+            minw = _add_min(minw, bmin)
+            maxw = _add_max(maxw, bmax)
+        elif (op == consts.OPCODE_REPEAT_ONE or
+              op == consts.OPCODE_MIN_REPEAT_ONE):
+            # <REPEAT_ONE> <skip> <1=min> <2=max> item <SUCCESS> tail
+            # 'item' is always exactly one character wide
+            rmin, rmax = _repeat_width(1, 1, _get(code, ppos + 2),
+                                       _get(code, ppos + 3))
+            ppos = _skip(code, ppos)
+            minw = _add_min(minw, rmin)
+            maxw = _add_max(maxw, rmax)
+        elif op == consts.OPCODE_REPEAT:
+            # <REPEAT> <skip> <1=min> <2=max> item <UNTIL> tail
+            untilppos = _skip(code, ppos)
+            imin, imax = walk_sequence(code, ppos + 4, None)
+            rmin, rmax = _repeat_width(imin, imax, _get(code, ppos + 2),
+                                       _get(code, ppos + 3))
+            ppos = untilppos + 1
+            minw = _add_min(minw, rmin)
+            maxw = _add_max(maxw, rmax)
+        elif _is_groupref(op):
+            ppos += 2
+            maxw = UNBOUNDED
+        else:
+            # FAILURE, GROUPREF_EXISTS, unknown opcodes...
+            raise GiveUp
+    if current is not None:
+        runs.append((current, cur_min, cur_max, cur_repeat))
+    return minw, maxw
+
+@jit.dont_look_inside
+def find_required_literal(code):
+    """Return a RequiredLiteral for the given pattern code, or None."""
+    ppos = 0
+    if _get_or_zero(code, 0) == consts.OPCODE_INFO:
+        ppos = _get_or_zero(code, 1) + 1
+    runs = []
+    try:
+        walk_sequence(code, ppos, runs)
+    except GiveUp:
+        pass
+    if not runs:
+        return None
+    best = runs[0]
+    for run in runs:
+        if len(run[0]) > len(best[0]):
+            best = run
+    codes, min_offset, max_offset, repeat_ppos = best
+    return RequiredLiteral(codes, min_offset, max_offset, repeat_ppos)
+
+def _get_or_zero(code, ppos):
+    if ppos < len(code):
+        return code[ppos]
+    return 0
@@ -23,6 +23,15 @@ class Utf8MatchContext(AbstractMatchContext):
     def get_single_byte(self, base_position, index):
         return self._utf8[base_position + index]
 
+    def find_literal(self, literal, start):
+        # the first byte of the literal is never a continuation byte, so
+        # any occurrence found starts at a character boundary
+        s = literal.as_utf8
+        if s is None or start > self.end:
+            return -1
+        assert start >= 0
+        return self._utf8.find(s, start, self.end)
+
     def next(self, position):
         return rutf8.next_codepoint_pos(self._utf8, position)
     next_indirect = next
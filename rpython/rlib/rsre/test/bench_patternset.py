@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Benchmark for rsre_dfa.PatternSet, comparing one pass over the string
+with the combined automaton against searching for each pattern in turn.
+
+Run it on top of CPython for a quick (slow) check:
+
+    python bench_patternset.py [num_patterns] [repeat]
+
+or translate it for real numbers:
+
+    rpython rpython/rlib/rsre/test/bench_patternset.py
+    ./bench_patternset-c [num_patterns] [repeat]
+"""
+from __future__ import print_function
+
+import time
+from rpython.rlib.rsre import rsre_core, rsre_dfa
+from rpython.rlib.rsre.rpy import get_code
+
+
+def make_route(i):
+    # a mix of the kinds of patterns seen in URL routing tables
+    kind = i % 4
+    if kind == 0:
+        return r'/api/v1/res%d/\d+' % i
+    elif kind == 1:
+        return r'/api/v1/res%d/(\w+)/edit' % i
+    elif kind == 2:
+        return r'/static/s%d/[\w/]+\.(?:css|js)' % i
+    else:
+        return r'/(?:users|groups)/u%d(?:/\w+)*' % i
+
+MAX_PATTERNS = 400
+ROUTES = [get_code(make_route(i)) for i in range(MAX_PATTERNS)]
+REQUESTS = ['GET /api/v1/res%d/12345 HTTP/1.1' % (MAX_PATTERNS - 4),
+            'GET /static/s2/css/site.css HTTP/1.1',
+            'POST /users/u7/settings/privacy HTTP/1.1',
+            'GET /favicon.ico HTTP/1.1']
+
+def search_one_by_one(codes, found, string):
+    for i in range(len(codes)):
+        found[i] = rsre_core.search(codes[i], string) is not None
+
+def search_with_patternset(patternset, found, string):
+    for i in range(len(found)):
+        found[i] = False
+    ctx = rsre_core.StrMatchContext(string, 0, len(string))
+    rsre_dfa.find_matching_patterns(ctx, patternset, found)
+
+def entry_point(argv):
+    num_patterns = 100
+    if len(argv) > 1:
+        num_patterns = min(int(argv[1]), MAX_PATTERNS)
+    repeat = 100
+    if len(argv) > 2:
+        repeat = int(argv[2])
+    codes = ROUTES[:num_patterns]
+    patternset = rsre_dfa.PatternSet(codes)
+    found = [False] * num_patterns
+    t0 = time.time()
+    for i in range(repeat):
+        for string in REQUESTS:
+            search_one_by_one(codes, found, string)
+    t1 = time.time()
+    for i in range(repeat):
+        for string in REQUESTS:
+            search_with_patternset(patternset, found, string)
+    t2 = time.time()
+    print('%d patterns, %d strings' % (num_patterns, repeat * len(REQUESTS)))
+    print('%-24s %8.4fs' % ('one by one', t1 - t0))
+    print('%-24s %8.4fs' % ('PatternSet', t2 - t1))
+    if t2 > t1:
+        print('%-24s %8.2fx' % ('', (t1 - t0) / (t2 - t1)))
+    return 0
+
+def target(*args):
+    return entry_point, None
+
+if __name__ == '__main__':
+    import sys
+    entry_point(sys.argv)
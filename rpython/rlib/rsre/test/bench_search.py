@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Benchmarks for rsre_core.search(), comparing the normal search loops
+with the search that first looks for a required literal substring.
+
+Run it on top of CPython for a quick (slow) check:
+
+    python bench_search.py [size_in_kb]
+
+or translate it for real numbers:
+
+    rpython rpython/rlib/rsre/test/bench_search.py
+    ./bench_search-c [size_in_kb]
+"""
+from __future__ import print_function
+
+import os, time
+from rpython.rlib.rsre import rsre_core
+from rpython.rlib.rsre.rpy import get_code
+
+
+# (name, regexp, line in the generated text that matches)
+BENCHMARKS = [
+    ('prefix literal',    r'Traceback \(most',   'Traceback (most recent)'),
+    ('inner literal',     r'\d+ ERROR (\w+)',    '1234 ERROR disk_full'),
+    ('bounded prefix',    r'\d{2,4}-ERR-\d+',    'ts 0042-ERR-17'),
+    ('literal suffix',    r'[a-z]+\.example\.com', 'host.example.com'),
+    ('no literal',        r'[A-Z]{3}\d{3}',      'ABC123'),
+]
+
+FILLER = ('2024-01-01 12:00:00 INFO request served in 12ms from cache\n'
+          '2024-01-01 12:00:01 DEBUG connection pool size 17 idle 3\n')
+
+def make_text(size, line):
+    # 'size' bytes of log-like text, with 'line' appearing once near the end
+    pieces = []
+    total = 0
+    while total < size:
+        pieces.append(FILLER)
+        total += len(FILLER)
+    pieces.append(line + '\n')
+    return ''.join(pieces)
+
+def without_literal(code):
+    result = rsre_core.CompiledPattern(code.pattern, code.flags)
+    result.required_literal = None
+    return result
+
+def count_matches(code, text):
+    count = 0
+    start = 0
+    while True:
+        ctx = rsre_core.search(code, text, start)
+        if ctx is None:
+            break
+        count += 1
+        start = ctx.match_end
+        if ctx.match_end == ctx.match_start:
+            start += 1
+    return count
+
+def run_one(name, code, text, repeat):
+    t0 = time.time()
+    for i in range(repeat):
+        count = count_matches(code, text)
+    t1 = time.time()
+    print('%-24s %8.4fs  (%d matches)' % (name, t1 - t0, count))
+    return t1 - t0
+
+COMPILED = [(name, get_code(regexp), line)
+            for (name, regexp, line) in BENCHMARKS]
+
+def entry_point(argv):
+    size = 64
+    if len(argv) > 1:
+        size = int(argv[1])
+    repeat = 1
+    if len(argv) > 2:
+        repeat = int(argv[2])
+    for name, code, line in COMPILED:
+        text = make_text(size * 1024, line)
+        plain = without_literal(code)
+        t_plain = run_one(name + ' [plain]', plain, text, repeat)
+        t_fast = run_one(name + ' [literal]', code, text, repeat)
+        if t_fast > 0.0:
+            print('%-24s %8.2fx' % ('', t_plain / t_fast))
+    return 0
+
+def target(*args):
+    return entry_point, None
+
+if __name__ == '__main__':
+    import sys
+    entry_point(sys.argv)
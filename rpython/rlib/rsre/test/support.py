@@ -17,8 +17,8 @@ class Position(object):
     def __cmp__(self, other):
         if isinstance(other, Position):
             return cmp(self._p, other._p)
-        if type(other) is int and other == -1:
-            return cmp(self._p, -1)
+        if type(other) is int and other in (-1, -2):
+            return cmp(self._p, other)
         raise TypeError("cannot compare %r with %r" % (self, other))
 
 
@@ -77,6 +77,16 @@ class MatchContextForTests(StrMatchContext):
     def debug_check_pos(self, position):
         assert isinstance(position, Position)
 
+    def find_literal(self, literal, start):
+        assert isinstance(start, Position)
+        end = self._real_pos(self.end)
+        if literal.as_bytes is None or start._p > end:
+            return -1
+        result = self._string.find(literal.as_bytes, start._p, end)
+        if result < 0:
+            return result
+        return Position(result)
+
     #def minimum_distance(self, position_low, position_high):
     #    """Return an estimate.  The real value may be higher."""
     #    assert isinstance(position_low, Position)
@@ -0,0 +1,237 @@
+import re
+from rpython.rlib.rsre.test.test_match import get_code
+from rpython.rlib.rsre import rsre_core, rsre_utf8, rsre_char, rsre_dfa
+
+def setup_module(mod):
+    from rpython.rlib.unicodedata import unicodedb
+    rsre_char.set_unicode_db(unicodedb)
+
+
+def get_dfa(regexp, flags=0):
+    return rsre_dfa.get_dfa(get_code(regexp, flags))
+
+def test_supported_patterns():
+    assert get_dfa(r'(a|aa)*b') is not None
+    assert get_dfa(r'(?:foo|bar)+baz') is not None
+    assert get_dfa(r'x(?:ab|cd){2,4}?y') is not None
+    assert get_dfa(r'(?i)(?:get|post)+ /\w+') is not None
+
+def test_unsupported_patterns():
+    assert get_dfa(r'(ab|c)+\1') is None        # backreference
+    assert get_dfa(r'(?:ab|c)+(?=c)') is None   # lookahead
+    assert get_dfa(r'(?<!x)(?:ab|c)+') is None  # lookbehind
+    assert get_dfa(r'^(?:ab|c)+$') is None      # anchors
+    assert get_dfa(r'(?L)(?:ab|c)+') is None    # locale
+    assert get_dfa(r'(ab)*(?(1)c|d)') is None   # conditional
+    assert get_dfa(r'(?:ab){2000}') is None     # too big
+
+def test_no_dfa_without_general_repeat():
+    assert get_dfa(r'abc') is None
+    assert get_dfa(r'\d+ ERROR (\w+)') is None
+    assert get_dfa(r'foo|bar') is None
+    assert get_dfa(r'[ab]*c') is None           # REPEAT_ONE of a charset
+
+def test_dfa_is_cached_on_the_pattern():
+    code = get_code(r'(a|b)+c')
+    dfa = rsre_dfa.get_dfa(code)
+    assert dfa is not None
+    assert rsre_dfa.get_dfa(code) is dfa
+
+
+class BaseTestDFASearch:
+
+    def search(self, regexp, string, start=0, flags=0):
+        code = get_code(regexp, flags)
+        dfa = rsre_dfa.get_dfa(code)
+        assert dfa is not None
+        ctx = self.make_ctx(string, start)
+        if rsre_dfa.search_context(ctx, code, dfa):
+            return ctx
+        return None
+
+    def check(self, regexp, string, start=0, flags=0):
+        expected = re.compile(regexp, flags).search(string, start)
+        ctx = self.search(regexp, string, start, flags)
+        if expected is None:
+            assert ctx is None
+        else:
+            assert ctx is not None
+            assert (ctx.match_start, ctx.match_end) == expected.span()
+            for i in range(1, expected.re.groups + 1):
+                assert ctx.span(i) == expected.span(i)
+
+    def test_simple(self):
+        self.check(r'(?:foo|bar)+baz', "foo bar foobarbaz barbaz")
+        self.check(r'(?:foo|bar)+baz', "foo bar foobarbax")
+        self.check(r'(a|aa)*b', "aaaaaaab")
+        self.check(r'x(a|b)+?y', "xaby xaay")
+
+    def test_exponential_pattern(self):
+        # these take forever with backtracking only (including with
+        # CPython's re, so we don't compare with it here)
+        assert self.search(r'(a|aa)*[bc]c', "a" * 100 + "b") is None
+        assert self.search(r'(?:a*)*[bc]c', "a" * 100 + "b") is None
+        assert self.search(r'(?:a|aa)*[bc][bc]', "a" * 100 + "b") is None
+        ctx = self.search(r'(?:a|aa)+[bc]c', "b" + "a" * 100 + "bc")
+        assert (ctx.match_start, ctx.match_end) == (1, 103)
+        self.check(r'(?:a|ab)*c', "a" * 100 + "c")
+
+    def test_exponential_pattern_that_matches(self):
+        # the first alternative backtracks forever before failing: the
+        # end of the match must be found without backtracking too
+        ctx = self.search(r'(?:(?:a|aa)*c|a(?:b|a)*?)', "x" + "a" * 100)
+        assert (ctx.match_start, ctx.match_end) == (1, 2)
+        ctx = self.search(r'(?:(?:a|aa)*c|(?:a|b)+)', "a" * 100 + "b")
+        assert (ctx.match_start, ctx.match_end) == (0, 101)
+
+    def test_match_end_priority(self):
+        # the end is the one of the backtracking engine, not the longest
+        self.check(r'(?:a|ab)+', "abab")
+        self.check(r'(?:ab|a)+', "abab")
+        self.check(r'(?:a|ab)+?b', "aabab")
+        self.check(r'(?:a|b)*?(?:bb|b)', "aabbb")
+        self.check(r'(?:x|)*y?', "xxy")
+        self.check(r'(?:a*)*b?', "aab")
+        self.check(r'(?:a|ab)(?:c|bcd)(?:d|dd)*', "abcddd")
+        self.check(r'(?:ab|c){2,3}?c?', "ababcc")
+
+    def test_leftmost_start_with_longer_match(self):
+        # the match starting first ends after the one starting later
+        self.check(r'(?:abcd|bc)+', "xabcd")
+        self.check(r'(?:abcd|bc)+', "xabce")
+        self.check(r'(?:a.*z|bc)+', "xabc__z")
+
+    def test_empty_match(self):
+        self.check(r'(?:ab|c)*', "xxab")
+        self.check(r'(?:ab|c)*', "")
+        self.check(r'(?:ab|c)*?', "ab")
+        self.check(r'(ab|c)*', "ab", start=2)
+
+    def test_start_position(self):
+        self.check(r'(?:ab|cd)+', "ab cd abcd", start=1)
+        self.check(r'(?:ab|cd)+', "ab cd abcd", start=7)
+        self.check(r'(?:ab|cd)+', "ab cd abcd", start=9)
+
+    def test_counted_repeats(self):
+        self.check(r'(?:ab|c){2,3}d', "abd abcd ccccd")
+        self.check(r'(?:ab|c){2,3}?d', "abcabcd")
+        self.check(r'x(?:a|bc){3}', "xabc xabca")
+
+    def test_ignorecase(self):
+        self.check(r'(?:get|post)+ /(\w+)', "GET /foo", flags=re.I)
+
+    def test_cache_flush(self):
+        old = rsre_dfa.MAX_CACHE_SIZE
+        rsre_dfa.MAX_CACHE_SIZE = 5
+        try:
+            assert self.search(r'(?:[a-m]|[h-z])+0',
+                               "abcdefghijklmnopqrstuvwxyz" * 4) is None
+            self.check(r'(?:[a-m]|[h-z])+0', "abcdefghijklmnopqrstuvwxyz0")
+            self.check(r'(?:[a-m]|[h-z])+0', "9" * 20 + "xyz0")
+        finally:
+            rsre_dfa.MAX_CACHE_SIZE = old
+
+class TestDFASearchStr(BaseTestDFASearch):
+    def make_ctx(self, string, start):
+        return rsre_core.StrMatchContext(string, start, len(string))
+
+class TestDFASearchUtf8(BaseTestDFASearch):
+    def make_ctx(self, string, start):
+        return rsre_utf8.make_utf8_ctx(string, start, len(string))
+
+    def test_non_ascii(self):
+        s = u"caf\xe9 th\xe9 \xe9t\xe9".encode('utf-8')
+        code = get_code(u'(?:th|\xe9t)+\xe9', re.UNICODE)
+        dfa = rsre_dfa.get_dfa(code)
+        ctx = rsre_utf8.make_utf8_ctx(s, 0, len(s))
+        assert rsre_dfa.search_context(ctx, code, dfa)
+        assert s[ctx.match_start:ctx.match_end].decode('utf-8') == u'th\xe9'
+
+
+def test_translates():
+    from rpython.rtyper.test.test_llinterp import interpret
+    code = get_code(r'(a|aa)*[bc]x')
+    def f(n):
+        s = "a" * n + "bx"
+        ctx = rsre_core.StrMatchContext(s, 0, len(s))
+        dfa = rsre_dfa.get_dfa(code)
+        if not rsre_dfa.search_context(ctx, code, dfa):
+            return -1
+        ctx2 = rsre_utf8.make_utf8_ctx(s, 1, len(s))
+        if not rsre_dfa.search_context(ctx2, code, dfa):
+            return -2
+        return ctx.match_end * 100 + ctx2.match_start
+    assert interpret(f, [5]) == 701
+
+def test_translates_patternset():
+    from rpython.rtyper.test.test_llinterp import interpret
+    patternset = rsre_dfa.PatternSet([get_code(r'(a|aa)*[bc]x'),
+                                      get_code(r'y'), get_code(r'a{3}')])
+    def f(n):
+        s = "a" * n + "bx"
+        ctx = rsre_core.StrMatchContext(s, 0, len(s))
+        found = [False] * 3
+        rsre_dfa.find_matching_patterns(ctx, patternset, found)
+        return found[0] * 100 + found[1] * 10 + found[2]
+    assert interpret(f, [5]) == 101
+    assert interpret(f, [2]) == 100
+
+
+class TestPatternSet:
+
+    def find(self, regexps, string, start=0):
+        codes = [get_code(regexp) for regexp in regexps]
+        patternset = rsre_dfa.PatternSet(codes)
+        found = [False] * len(codes)
+        ctx = rsre_core.StrMatchContext(string, start, len(string))
+        rsre_dfa.find_matching_patterns(ctx, patternset, found)
+        return patternset, found
+
+    def check(self, regexps, string, start=0):
+        patternset, found = self.find(regexps, string, start)
+        assert patternset.others == []
+        expected = [re.compile(regexp).search(string, start) is not None
+                    for regexp in regexps]
+        assert found == expected
+
+    def test_simple(self):
+        routes = [r'/users/\d+', r'/users/new', r'/posts/(\w+)/edit',
+                  r'/static/.*\.css', r'/(?:a|b)+/x']
+        self.check(routes, "GET /users/42 HTTP/1.1")
+        self.check(routes, "GET /users/new HTTP/1.1")
+        self.check(routes, "GET /posts/hello/edit")
+        self.check(routes, "/static/a/b.css /abba/x")
+        self.check(routes, "nothing here")
+        self.check(routes, "")
+
+    def test_start_position(self):
+        self.check([r'ab', r'b', r'c'], "abc", start=1)
+        self.check([r'ab', r'b', r'c'], "abc", start=3)
+
+    def test_empty_matches(self):
+        self.check([r'x*', r'a', r'(?:ab|c)*?'], "b")
+        self.check([r'x*', r'a'], "")
+
+    def test_many_patterns(self):
+        regexps = ['word%d' % i for i in range(300)]
+        self.check(regexps, "foo word12 word299 bar word1")
+
+    def test_unsupported_patterns_are_left_out(self):
+        patternset, found = self.find([r'^foo', r'bar', r'(a)\1', r'a'],
+                                      "foo bar aa")
+        assert patternset.others == [0, 2]
+        assert found == [False, True, False, True]
+
+    def test_all_unsupported(self):
+        patternset, found = self.find([r'^foo', r'(a)\1'], "foo")
+        assert patternset.dfa is None
+        assert found == [False, False]
+
+    def test_cache_flush(self):
+        old = rsre_dfa.MAX_CACHE_SIZE
+        rsre_dfa.MAX_CACHE_SIZE = 5
+        try:
+            self.check([r'[a-m]+z', r'[h-z]+0', r'q'],
+                       "abcdefghijklmnopqrstuvwxyz0")
+        finally:
+            rsre_dfa.MAX_CACHE_SIZE = old
@@ -0,0 +1,140 @@
+import re
+from rpython.rlib.rsre.test.test_match import get_code
+from rpython.rlib.rsre.test import support
+from rpython.rlib.rsre import rsre_core, rsre_utf8, rsre_char
+from rpython.rlib.rsre.rsre_prefilter import UNBOUNDED
+
+def setup_module(mod):
+    from rpython.rlib.unicodedata import unicodedb
+    rsre_char.set_unicode_db(unicodedb)
+
+
+def required(regexp, flags=0):
+    literal = get_code(regexp, flags).required_literal
+    if literal is None:
+        return None
+    return literal.as_utf8, literal.min_offset, literal.max_offset
+
+def test_required_literal():
+    assert required(r'foobar') == ('foobar', 0, 0)
+    assert required(r'\d+ ERROR (\w+)') == (' ERROR ', 1, UNBOUNDED)
+    assert required(r'\d{2,5}-ab') == ('-ab', 2, 5)
+    assert required(r'a(b)c') == ('abc', 0, 0)
+    assert required(r'x(?:ab|cde)yz') == ('yz', 3, 4)
+    assert required(r'(?:xy)*xyz') == ('xyz', 0, UNBOUNDED)
+    assert required(r'(?:ab){2,3}-cd') == ('-cd', 4, 6)
+    assert required(r'\bfoo\b') == ('foo', 0, 0)
+    assert required(r'(?=abc)abcd') == ('abcd', 0, 0)
+    assert required(u'\xe9t\xe9', re.UNICODE) == (u'\xe9t\xe9'.encode('utf-8'),
+                                                 0, 0)
+
+def test_no_required_literal():
+    assert required(r'[abc][def]') is None
+    assert required(r'a|b') is None
+    assert required(r'(?:abc)?d*') is None
+    assert required(r'(?i)foobar') is None
+    assert required(r'') is None
+
+def test_literal_before_unknown_opcode():
+    # GROUPREF_EXISTS stops the analysis, but 'abc' is still required
+    assert required(r'(x)?abc(?(1)d|e)') == ('abc', 0, 1)
+
+def test_groupref_makes_offsets_unbounded():
+    assert required(r'(a+)\1-end') == ('-end', 1, UNBOUNDED)
+
+def test_repeat_before_literal():
+    def repeat_op(regexp):
+        code = get_code(regexp)
+        ppos = code.required_literal.repeat_ppos
+        if ppos < 0:
+            return None
+        return code.pattern[ppos]
+    from rpython.rlib.rsre import rsre_constants as consts
+    assert repeat_op(r'\d+ ERROR') == consts.OPCODE_REPEAT_ONE
+    assert repeat_op(r'(\d*?)-x') == consts.OPCODE_MIN_REPEAT_ONE
+    assert repeat_op(r'a\d+ ERROR') is None
+    assert repeat_op(r'\d+ ERROR\d+ ERRORS') is None
+    assert repeat_op(r'ERROR') is None
+
+
+class BaseTestPrefilterSearch:
+
+    def check(self, regexp, string, start=0, flags=0):
+        code = get_code(regexp, flags)
+        assert code.required_literal is not None
+        expected = re.compile(regexp, flags).search(string, start)
+        res = self.search(code, string, start)
+        if expected is None:
+            assert res is None
+        else:
+            assert res is not None
+            assert res.span() == tuple(map(self.P, expected.span()))
+
+    def test_literal_after_repeat(self):
+        s = "2 INFO x\n12 WARN y\n345 ERROR boom\n6 ERROR bang\n"
+        self.check(r'\d+ ERROR (\w+)', s)
+        self.check(r'\d+ ERROR (\w+)', s, start=30)
+        self.check(r'\d+ ERROR (\w+)', s, start=40)
+        self.check(r'\d+ ERROR (\w+)', "no errors here at all")
+
+    def test_repeat_before_literal(self):
+        self.check(r'[a-z]+\.example\.com', "Www.example.com mail.example.com")
+        self.check(r'[a-z]+\.example\.com', "a.b.example.com")
+        self.check(r'\w*?!', "foo bar!")
+        self.check(r'\w*?!', "foo bar !")
+        self.check(r'(\d*)-x', "12-12-x")
+
+    def test_bounded_max_offset(self):
+        self.check(r'\d{2,5}-ab', "1-ab 123456-ab 12-a 1234-ab")
+        self.check(r'\d{2,5}-ab', "1-ab 123456-ac")
+
+    def test_literal_in_the_middle(self):
+        self.check(r'x(?:ab|cde)yz', "xabyy xcdeyz xabyz")
+        self.check(r'(?:xy)*xyz', "xyxyxyxyxy xyxyz")
+
+    def test_overlapping_occurrences(self):
+        self.check(r'a.aab', "aaaaaaab")
+        self.check(r'(?:aa)+aab', "aaaaaaaaaaab")
+
+    def test_literal_near_the_end(self):
+        self.check(r'.{3}end', "the end")
+        self.check(r'.{3}end', "nd end")
+
+
+class TestPrefilterSearchCustom(BaseTestPrefilterSearch):
+    search = staticmethod(support.search)
+    P = support.Position
+
+class TestPrefilterSearchStr(BaseTestPrefilterSearch):
+    search = staticmethod(rsre_core.search)
+    P = staticmethod(lambda n: n)
+
+class TestPrefilterSearchUtf8(BaseTestPrefilterSearch):
+    search = staticmethod(rsre_utf8.utf8search)
+    P = staticmethod(lambda n: n)   # NB. only for plain ascii
+
+    def test_non_ascii(self):
+        s = u"\xe9\xe9 d\xe9j\xe0 vu, d\xe9j\xe0 \xe9t\xe9".encode('utf-8')
+        code = get_code(u'.j\xe0 \xe9', re.UNICODE)
+        res = rsre_utf8.utf8search(code, s)
+        assert res is not None
+        matched = s[res.match_start:res.match_end].decode('utf-8')
+        assert matched == u'\xe9j\xe0 \xe9'
+        code = get_code(u'.{2}vu', re.UNICODE)
+        res = rsre_utf8.utf8search(code, s)
+        assert res is not None
+        assert s[res.match_start:res.match_end].decode('utf-8') == u'\xe0 vu'
+
+class TestPrefilterSearchBuf(BaseTestPrefilterSearch):
+    # BufMatchContext doesn't support find_literal(), so this checks
+    # that search() falls back to the other search loops
+    P = staticmethod(lambda n: n)
+
+    @staticmethod
+    def search(code, string, start=0):
+        from rpython.rlib.buffer import StringBuffer
+        ctx = rsre_core.BufMatchContext(StringBuffer(string), start,
+                                        len(string))
+        if rsre_core.search_context(ctx, code):
+            return ctx
+        return None
@@ -32,8 +32,10 @@ def get_unique_id(code):
         return code._vmprof_unique_id
     return 0
 
-def enable(fileno, interval, memory=0, native=0, real_time=0):
-    _get_vmprof().enable(fileno, interval, memory, native, real_time)
+def enable(fileno, interval, memory=0, native=0, real_time=0,
+           alloc_sampling=0, alloc_fileno=-1):
+    _get_vmprof().enable(fileno, interval, memory, native, real_time,
+                         alloc_sampling, alloc_fileno)
 
 def disable():
     _get_vmprof().disable()
@@ -58,6 +60,12 @@ def get_profile_path(space):
 def stop_sampling():
     return _get_vmprof().stop_sampling()
 
+def is_alloc_sampling_enabled():
+    return _get_vmprof().alloc_sampling > 0
+
+def sample_allocation(typeindex, size):
+    _get_vmprof().sample_allocation(typeindex, size)
+
 def start_sampling():
     return _get_vmprof().start_sampling()
 
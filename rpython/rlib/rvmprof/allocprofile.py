@@ -0,0 +1,67 @@
+"""
+The allocation samples recorded when vmprof is enabled with
+alloc_sampling > 0 go to their own file, so that the main profile stays
+readable by the existing vmprof tools.  That file starts with HEADER and
+the size of a word (one byte), followed by records in native byte order:
+
+    MARKER_ALLOCATION  (1 byte)
+    size               (word)  the number of bytes that the sample stands for
+    depth              (word)
+    stack              (depth words)  like in MARKER_STACKTRACE records
+    typeindex          (word)  index in gc.get_typeids_list(), or -1
+
+This module is plain Python: read_alloc_samples() is the reader.
+"""
+
+import struct
+
+HEADER = 'VMPROFALLOC\x01'
+
+# keep in sync with rvmprof.c
+MARKER_ALLOCATION = '\x09'
+
+
+class AllocSample(object):
+    def __init__(self, size, stack, typeindex):
+        self.size = size
+        self.stack = stack
+        self.typeindex = typeindex
+
+    def __repr__(self):
+        return '<AllocSample %d bytes, type %d, depth %d>' % (
+            self.size, self.typeindex, len(self.stack))
+
+
+def read_alloc_samples(f):
+    """Read the file object 'f' and return the list of AllocSamples in it.
+    Raises ValueError if it is not an allocation profile; a truncated last
+    record is ignored."""
+    data = f.read()
+    if not data.startswith(HEADER) or len(data) <= len(HEADER):
+        raise ValueError("not a vmprof allocation profile")
+    word = ord(data[len(HEADER)])
+    if word == 4:
+        fmt = '=i'
+    elif word == 8:
+        fmt = '=q'
+    else:
+        raise ValueError("bad word size %d" % (word,))
+    samples = []
+    pos = len(HEADER) + 1
+    while pos < len(data):
+        if data[pos] != MARKER_ALLOCATION:
+            raise ValueError("unknown marker %r at offset %d" % (data[pos],
+                                                                 pos))
+        pos += 1
+        if pos + 2 * word > len(data):
+            break
+        size, = struct.unpack(fmt, data[pos:pos + word])
+        depth, = struct.unpack(fmt, data[pos + word:pos + 2 * word])
+        pos += 2 * word
+        end = pos + (depth + 1) * word
+        if depth < 0 or end > len(data):
+            break
+        values = struct.unpack('=%d%s' % (depth + 1, fmt[1]), data[pos:end])
+        samples.append(AllocSample(size, list(values[:depth]), values[depth]))
+        pos = end
+    return samples
@@ -152,6 +152,12 @@ def setup():
     vmprof_start_sampling = rffi.llexternal("vmprof_start_sampling", [],
                                             lltype.Void, compilation_info=eci,
                                             _nowrapper=True)
+    vmprof_sample_allocation = rffi.llexternal("vmprof_sample_allocation",
+                                               [rffi.LONG, rffi.LONG,
+                                                rffi.LONG],
+                                               lltype.Void,
+                                               compilation_info=eci,
+                                               _nowrapper=True)
 
     return CInterface(locals())
 
@@ -2,6 +2,7 @@ from rpython.rlib.objectmodel import specialize
 
 class DummyVMProf(object):
     is_enabled = False
+    alloc_sampling = 0
 
     def __init__(self):
         self._unique_id = 0
@@ -14,7 +15,8 @@ class DummyVMProf(object):
     def register_code(self, code, full_name_func):
         pass
 
-    def enable(self, fileno, interval, memory=0, native=0, real_time=0):
+    def enable(self, fileno, interval, memory=0, native=0, real_time=0,
+               alloc_sampling=0, alloc_fileno=-1):
         pass
 
     def disable(self):
@@ -25,3 +27,6 @@ class DummyVMProf(object):
 
     def stop_sampling(self):
         return -1
+
+    def sample_allocation(self, typeindex, size):
+        pass
@@ -2,6 +2,8 @@ import sys, os
 from rpython.rlib.objectmodel import specialize, we_are_translated, not_rpython
 from rpython.rlib import jit, rposix, rgc
 from rpython.rlib.rvmprof import cintf
+from rpython.rlib.rvmprof.allocprofile import HEADER
+from rpython.rlib.rarithmetic import LONG_BIT
 from rpython.rlib.rvmprof.dummy import DummyVMProf
 from rpython.rtyper.annlowlevel import cast_instance_to_gcref
 from rpython.rtyper.annlowlevel import cast_base_ptr_to_instance
@@ -11,6 +13,8 @@ from rpython.rlib.rweaklist import RWeakListMixin
 
 MAX_FUNC_NAME = 1023
 
+ALLOC_HEADER = HEADER + chr(LONG_BIT // 8)
+
 PLAT_WINDOWS = sys.platform == 'win32'
 
 # ____________________________________________________________
@@ -55,6 +59,8 @@ class VMProf(object):
 
     def _cleanup_(self):
         self.is_enabled = False
+        self.alloc_sampling = 0
+        self.alloc_fileno = -1
 
     @jit.dont_look_inside
     @specialize.argtype(1)
@@ -129,15 +135,23 @@ class VMProf(object):
         self._gather_all_code_objs = gather_all_code_objs
 
     @jit.dont_look_inside
-    def enable(self, fileno, interval, memory=0, native=0, real_time=0):
+    def enable(self, fileno, interval, memory=0, native=0, real_time=0,
+               alloc_sampling=0, alloc_fileno=-1):
         """Enable vmprof.  Writes go to the given 'fileno'.
         The sampling interval is given by 'interval' as a number of
         seconds, as a float which must be smaller than 1.0.
+        If 'alloc_sampling' is positive, the stack is also recorded for
+        one allocation every 'alloc_sampling' bytes, together with the
+        type of the allocated object (this needs the GC hooks to call
+        sample_allocation(), see rpython.memory.gc.hook).  These samples
+        are written to 'alloc_fileno', in the format of allocprofile.py.
         Raises VMProfError if something goes wrong.
         """
         assert fileno >= 0
         if self.is_enabled:
             raise VMProfError("vmprof is already enabled")
+        if alloc_sampling > 0 and alloc_fileno < 0:
+            raise VMProfError("alloc_sampling needs an alloc_fileno")
 
         if PLAT_WINDOWS:
             native = 0 # force disabled on Windows
@@ -152,6 +166,15 @@ class VMProf(object):
         if res < 0:
             raise VMProfError(os.strerror(rposix.get_saved_errno()))
         self.is_enabled = True
+        if alloc_sampling > 0:
+            try:
+                os.write(alloc_fileno, ALLOC_HEADER)
+            except OSError as e:
+                self.disable()
+                raise VMProfError(os.strerror(e.errno))
+            self.alloc_fileno = alloc_fileno
+            self.alloc_sampling = alloc_sampling
+            rgc.set_alloc_sampling(alloc_sampling)
 
     @jit.dont_look_inside
     def disable(self):
@@ -161,6 +184,9 @@ class VMProf(object):
         if not self.is_enabled:
             raise VMProfError("vmprof is not enabled")
         self.is_enabled = False
+        if self.alloc_sampling > 0:
+            self.alloc_sampling = 0
+            rgc.set_alloc_sampling(0)
         res = self.cintf.vmprof_disable()
         if res < 0:
             raise VMProfError(os.strerror(rposix.get_saved_errno()))
@@ -187,6 +213,16 @@ class VMProf(object):
         """
         self.cintf.vmprof_start_sampling()
 
+    @rgc.no_collect
+    def sample_allocation(self, typeindex, size):
+        """
+        Record the current stack for an allocation of 'size' bytes of
+        the type 'typeindex'.  Called from the GC hooks.
+        """
+        if self.alloc_sampling > 0:
+            self.cintf.vmprof_sample_allocation(self.alloc_fileno,
+                                                typeindex, size)
+
 
 def vmprof_execute_code(name, get_code_fn, result_class=None,
                         _hack_update_stack_untranslated=False):
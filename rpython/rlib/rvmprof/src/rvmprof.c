@@ -46,3 +46,37 @@ void vmprof_start_sampling(void)
 {
     vmprof_ignore_signals(0);
 }
+
+/* keep in sync with allocprofile.py */
+#define MARKER_ALLOCATION '\x09'
+
+/* Write a MARKER_ALLOCATION record for the current thread to 'fd', the
+   allocation profile (see allocprofile.py), not to the main profile: the
+   existing vmprof readers don't know about this record.  It has the
+   layout of a MARKER_STACKTRACE record, but 'count' is the number of
+   bytes allocated that this sample stands for, and the last entry after
+   the stack is the index of the allocated type in gc.get_typeids_list()
+   (or -1) instead of the thread state.  Called synchronously from the
+   GC hooks, so it must not allocate. */
+void vmprof_sample_allocation(long fd, long typeindex, long size)
+{
+#ifdef VMPROF_UNIX
+    if (vmprof_enter_signal() == 0) {
+        char buf[SINGLE_BUF_SIZE];
+        struct prof_stacktrace_s *st = (struct prof_stacktrace_s *)buf;
+        int depth = get_stack_trace(get_vmprof_stack(), st->stack,
+                                    MAX_STACK_DEPTH-1, 0);
+        if (depth > 0) {
+            size_t start = offsetof(struct prof_stacktrace_s, marker);
+            st->marker = MARKER_ALLOCATION;
+            st->count = size;
+            st->depth = depth;
+            st->stack[depth++] = (void *)typeindex;
+            (void)write(fd, buf + start,
+                        depth * sizeof(void *) +
+                        sizeof(struct prof_stacktrace_s) - start);
+        }
+    }
+    vmprof_exit_signal();
+#endif
+}
@@ -1,4 +1,4 @@
-import py, os
+import py, os, struct
 import pytest
 import time
 from rpython.tool.udir import udir
@@ -207,3 +207,58 @@ class TestNative(RVMProfSamplingTest):
                     del not_found[i]
                     break
         assert not_found == []
+
+
+class TestAllocSampling(RVMProfSamplingTest):
+
+    @pytest.fixture
+    def init(self, tmpdir):
+        self.allocfilename = str(tmpdir.join('profile.alloc'))
+        super(TestAllocSampling, self).init(tmpdir)
+
+    # normally called by the GC hooks, see rpython.memory.gc.hook
+    @rvmprof.vmprof_execute_code("xcode1", lambda self, code, count: code)
+    def main(self, code, count):
+        for i in range(count):
+            rvmprof.sample_allocation(42, 123456)
+        return count
+
+    def entry_point(self, value, delta_t, memory=0):
+        code = self.MyCode('py:code:52:test_alloc')
+        rvmprof.register_code(code, self.MyCode.get_name)
+        fd = os.open(self.tmpfilename, os.O_WRONLY | os.O_CREAT, 0666)
+        allocfd = os.open(self.allocfilename, os.O_WRONLY | os.O_CREAT, 0666)
+        res = self.main(code, value)     # not enabled, ignored
+        rvmprof.enable(fd, self.SAMPLING_INTERVAL, alloc_sampling=4096,
+                       alloc_fileno=allocfd)
+        res += self.main(code, value)
+        rvmprof.disable()
+        os.close(fd)
+        os.close(allocfd)
+        return res
+
+    def test(self):
+        from rpython.rlib.rvmprof.allocprofile import read_alloc_samples
+        assert self.rpy_entry_point(3, 0.0, 0) == 6
+        # the main profile has no allocation record
+        assert '\x09' + struct.pack('l', 123456) not in self.tmpfile.read('rb')
+        with open(self.allocfilename, 'rb') as f:
+            samples = read_alloc_samples(f)
+        assert len(samples) == 3
+        for sample in samples:
+            assert sample.size == 123456
+            assert sample.typeindex == 42
+            assert len(sample.stack) >= 1
+
+
+def test_read_alloc_samples():
+    from rpython.rlib.rvmprof.allocprofile import read_alloc_samples, HEADER
+    from StringIO import StringIO
+    record = '\x09' + struct.pack('=qqqqq', 100, 2, 7, 8, -1)
+    f = StringIO(HEADER + '\x08' + record + record[:-3])
+    samples = read_alloc_samples(f)
+    assert len(samples) == 1
+    assert samples[0].size == 100
+    assert samples[0].stack == [7, 8]
+    assert samples[0].typeindex == -1
+    py.test.raises(ValueError, read_alloc_samples, StringIO('abc'))
@@ -534,6 +534,10 @@ LL_OPERATIONS = {
 
     'gc_move_out_of_nursery':           LLOp(),
     'gc_increase_root_stack_depth':     LLOp(canrun=True),
+    'gc_set_alloc_sampling': LLOp(canrun=True),
+    'gc_heap_snapshot_start': LLOp(canrun=True),
+    'gc_heap_snapshot_state': LLOp(canrun=True),
+    'gc_heap_snapshot_write': LLOp(canrun=True),
 
     'gc_push_roots'        : LLOp(),  # temporary: list of roots to save
     'gc_pop_roots'         : LLOp(),  # temporary: list of roots to restore
@@ -793,6 +793,18 @@ def op_gc_move_out_of_nursery(obj):
 def op_gc_increase_root_stack_depth(new_depth):
     pass
 
+def op_gc_set_alloc_sampling(interval):
+    pass
+
+def op_gc_heap_snapshot_start(edge_interval):
+    return False
+
+def op_gc_heap_snapshot_state():
+    return 0
+
+def op_gc_heap_snapshot_write(fd):
+    return -1
+
 def op_revdb_do_next_call():
     pass
 
@@ -172,6 +172,10 @@ RPY_EXTERN void *boehm_fq_next_dead(struct boehm_fq_s **);
 #define OP_GC_SET_EXTRA_THRESHOLD(x, r)  /* nothing */
 #define OP_GC_IGNORE_FINALIZER(x, r)     /* nothing */
 #define OP_GC_INCREASE_ROOT_STACK_DEPTH(x, r)   /* nothing */
+#define OP_GC_SET_ALLOC_SAMPLING(x, r)   /* nothing */
+#define OP_GC_HEAP_SNAPSHOT_START(x, r)  r = 0
+#define OP_GC_HEAP_SNAPSHOT_STATE(r)     r = 0
+#define OP_GC_HEAP_SNAPSHOT_WRITE(x, r)  r = -1
 
 /****************************/
 /* misc stuff               */